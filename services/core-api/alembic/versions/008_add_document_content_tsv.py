@@ -0,0 +1,57 @@
+"""Add stored full-text vector for documents
+
+Revision ID: 008
+Revises: 007
+Create Date: 2024-01-01 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+# Rows updated per backfill transaction, so the backfill never holds long row locks
+BACKFILL_BATCH_SIZE = 5000
+
+
+def upgrade():
+    # Nullable column without a default: adding it doesn't rewrite the table
+    op.add_column('documents', sa.Column('content_tsv', postgresql.TSVECTOR(), nullable=True))
+
+    # Keep it current for new and edited chunks (before the backfill, so no row is missed)
+    op.execute(
+        "CREATE TRIGGER documents_content_tsv_update BEFORE INSERT OR UPDATE OF content ON documents "
+        "FOR EACH ROW EXECUTE FUNCTION tsvector_update_trigger(content_tsv, 'pg_catalog.english', content)"
+    )
+
+    with op.get_context().autocommit_block():
+        if op.get_context().as_sql:
+            op.execute(
+                "UPDATE documents SET content_tsv = to_tsvector('pg_catalog.english', content) "
+                "WHERE content_tsv IS NULL"
+            )
+        else:
+            # Backfill existing chunks in batches, each committed on its own
+            connection = op.get_bind()
+            backfill = sa.text(
+                "UPDATE documents SET content_tsv = to_tsvector('pg_catalog.english', content) "
+                "WHERE id IN (SELECT id FROM documents WHERE content_tsv IS NULL LIMIT :limit)"
+            )
+            while connection.execute(backfill, {"limit": BACKFILL_BATCH_SIZE}).rowcount:
+                pass
+
+        op.execute(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_documents_content_tsv '
+            'ON documents USING gin (content_tsv)'
+        )
+
+
+def downgrade():
+    op.execute('DROP INDEX IF EXISTS idx_documents_content_tsv')
+    op.execute('DROP TRIGGER IF EXISTS documents_content_tsv_update ON documents')
+    op.drop_column('documents', 'content_tsv')
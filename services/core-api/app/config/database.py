@@ -28,6 +28,12 @@ class DatabaseConfig:
     READ_POOL_SIZE: int = int(os.getenv("DB_READ_POOL_SIZE", "5"))
     READ_MAX_OVERFLOW: int = int(os.getenv("DB_READ_MAX_OVERFLOW", "10"))
     
+    # Read routing: how often and how long replica lag is checked, and how stale (seconds) each workload may read
+    READ_REPLICA_LAG_CHECK_INTERVAL: float = float(os.getenv("DB_READ_REPLICA_LAG_CHECK_INTERVAL", "5"))
+    READ_REPLICA_LAG_CHECK_TIMEOUT: float = float(os.getenv("DB_READ_REPLICA_LAG_CHECK_TIMEOUT", "2"))
+    ANALYTICS_MAX_STALENESS: float = float(os.getenv("DB_ANALYTICS_MAX_STALENESS", "300"))
+    LIVE_MAX_STALENESS: float = float(os.getenv("DB_LIVE_MAX_STALENESS", "10"))
+    
     # Query settings
     QUERY_TIMEOUT: int = int(os.getenv("DB_QUERY_TIMEOUT", "30"))
     STATEMENT_TIMEOUT: int = int(os.getenv("DB_STATEMENT_TIMEOUT", "60"))
@@ -36,6 +42,19 @@ class DatabaseConfig:
     VECTOR_DIMENSIONS: int = int(os.getenv("VECTOR_DIMENSIONS", "768"))
     IVFFLAT_LISTS: int = int(os.getenv("IVFFLAT_LISTS", "100"))
     
+    # ANN index lifecycle: "auto" picks HNSW up to VECTOR_HNSW_MAX_ROWS rows, IVFFlat beyond
+    VECTOR_INDEX_METHOD: str = os.getenv("VECTOR_INDEX_METHOD", "auto")
+    VECTOR_HNSW_MAX_ROWS: int = int(os.getenv("VECTOR_HNSW_MAX_ROWS", "2000000"))
+    HNSW_M: int = int(os.getenv("HNSW_M", "16"))
+    HNSW_EF_CONSTRUCTION: int = int(os.getenv("HNSW_EF_CONSTRUCTION", "64"))
+    VECTOR_RECALL_TARGET: float = float(os.getenv("VECTOR_RECALL_TARGET", "0.95"))
+    VECTOR_LATENCY_BUDGET_MS: float = float(os.getenv("VECTOR_LATENCY_BUDGET_MS", "50"))
+    VECTOR_INDEX_DRIFT_RATIO: float = float(os.getenv("VECTOR_INDEX_DRIFT_RATIO", "0.5"))
+    VECTOR_CENTROID_DRIFT: float = float(os.getenv("VECTOR_CENTROID_DRIFT", "0.05"))
+    VECTOR_INDEX_CHECK_INTERVAL: int = int(os.getenv("VECTOR_INDEX_CHECK_INTERVAL", "3600"))
+    VECTOR_INDEX_BUILD_MEMORY: str = os.getenv("VECTOR_INDEX_BUILD_MEMORY", "512MB")
+    VECTOR_INDEX_MAINTENANCE: bool = os.getenv("VECTOR_INDEX_MAINTENANCE", "true").lower() == "true"
+    
     # Performance settings
     ENABLE_QUERY_CACHE: bool = os.getenv("ENABLE_QUERY_CACHE", "true").lower() == "true"
     SLOW_QUERY_THRESHOLD: float = float(os.getenv("SLOW_QUERY_THRESHOLD", "1.0"))
@@ -54,11 +73,25 @@ class DatabaseConfig:
         }
     
     @classmethod
-    def get_read_connection_args(cls) -> dict:
-        """Get read-only connection arguments"""
-        args = cls.get_connection_args()
-        args["options"] += " -c default_transaction_read_only=on"
-        args["application_name"] = "anzx-core-api-read"
+    def get_async_connection_args(cls) -> dict:
+        """Get connection arguments for the asyncpg driver"""
+        return {
+            "server_settings": {
+                "timezone": "utc",
+                "statement_timeout": f"{cls.STATEMENT_TIMEOUT}s",
+                "application_name": "anzx-core-api",
+            },
+            "timeout": cls.POOL_TIMEOUT,
+        }
+    
+    @classmethod
+    def get_async_read_connection_args(cls) -> dict:
+        """Get read-only connection arguments for the asyncpg driver"""
+        args = cls.get_async_connection_args()
+        args["server_settings"].update({
+            "default_transaction_read_only": "on",
+            "application_name": "anzx-core-api-read",
+        })
         return args
 
 
@@ -3,6 +3,7 @@ ANZX AI Platform - Core API
 Main FastAPI application entry point
 """
 
+import asyncio
 import logging
 import time
 from datetime import datetime
@@ -16,9 +17,12 @@ from sqlalchemy.orm import Session
 from sqlalchemy import text
 
 # Import database components
-from .utils.database import get_db, create_tables, engine
+from .utils.database import get_db, create_tables, engine, async_engine, get_pool_stats
+from .models.database import async_read_engine
 from .models.user import Organization, Assistant
 from .services.assistant_factory import assistant_factory
+from .services.vector_index_manager import vector_index_manager
+from .config.database import db_config
 
 # Simple logging setup
 logging.basicConfig(level=logging.INFO)
@@ -36,17 +40,30 @@ async def lifespan(app: FastAPI):
         await create_tables()
         logger.info("Database tables created successfully")
         
+        # Search tuning needs the current index even when maintenance is off or hasn't run yet
+        await asyncio.to_thread(vector_index_manager.refresh_state, engine)
+        
         # Initialize services
         logger.info("Services initialized successfully")
         
     except Exception as e:
         logger.error(f"Failed to initialize application: {e}")
         # Don't exit in development, just log the error
+    
+    # Keep the vector index suited to the data: checks drift and rebuilds in the background
+    index_task = None
+    if db_config.VECTOR_INDEX_MAINTENANCE:
+        index_task = asyncio.create_task(vector_index_manager.run_maintenance(engine))
         
     yield
     
     # Shutdown
     logger.info("Shutting down ANZX AI Platform Core API")
+    if index_task is not None:
+        index_task.cancel()
+    await async_engine.dispose()
+    if async_read_engine is not None:
+        await async_read_engine.dispose()
 
 
 # Create FastAPI application
@@ -133,6 +150,18 @@ async def detailed_health_check(db: Session = Depends(get_db)):
         }
         health_status["status"] = "unhealthy"
     
+    # Connection pools and read routing
+    try:
+        health_status["checks"]["database_pools"] = {
+            "status": "healthy",
+            **get_pool_stats()
+        }
+    except Exception as e:
+        health_status["checks"]["database_pools"] = {
+            "status": "unhealthy",
+            "message": f"Pool statistics unavailable: {str(e)}"
+        }
+    
     # Assistant factory check
     try:
         types = assistant_factory.get_available_types()
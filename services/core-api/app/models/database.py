@@ -2,12 +2,23 @@
 Database configuration and connection management
 """
 
+import asyncio
+import logging
 import os
-from sqlalchemy import create_engine, MetaData
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, MetaData, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import QueuePool
 
+from ..config.database import db_config
+
+logger = logging.getLogger(__name__)
+
 # Database URL from environment
 DATABASE_URL = os.getenv(
     "DATABASE_URL", 
@@ -28,6 +39,117 @@ engine = create_engine(
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def get_async_database_url(url: str = DATABASE_URL) -> str:
+    """Database URL for the asyncpg driver"""
+    scheme, _, rest = url.partition("://")
+    return f"postgresql+asyncpg://{rest}" if scheme.startswith("postgres") else url
+
+
+# Async engine for request handlers; the sync engine stays for Alembic, scripts and background jobs
+async_engine = create_async_engine(
+    get_async_database_url(),
+    pool_size=db_config.POOL_SIZE,
+    max_overflow=db_config.MAX_OVERFLOW,
+    pool_timeout=db_config.POOL_TIMEOUT,
+    pool_pre_ping=True,
+    pool_recycle=db_config.POOL_RECYCLE,
+    connect_args=db_config.get_async_connection_args(),
+    echo=os.getenv("SQL_ECHO", "false").lower() == "true"
+)
+
+# Async session factory; objects stay usable after commit, as there is no lazy loading to refresh them
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+# Read replica engine, for read-only request handlers that tolerate some staleness (none without READ_REPLICA_URL)
+async_read_engine = None
+AsyncReadSessionLocal = None
+if db_config.READ_REPLICA_URL:
+    async_read_engine = create_async_engine(
+        get_async_database_url(db_config.READ_REPLICA_URL),
+        pool_size=db_config.READ_POOL_SIZE,
+        max_overflow=db_config.READ_MAX_OVERFLOW,
+        pool_pre_ping=True,
+        pool_recycle=db_config.POOL_RECYCLE,
+        connect_args=db_config.get_async_read_connection_args()
+    )
+    AsyncReadSessionLocal = async_sessionmaker(
+        async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+
+# Seconds the replica is behind the primary; 0 when it has replayed everything it received
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class ReadReplicaRouter:
+    """
+    Chooses the replica or the primary for read-only sessions
+    
+    Callers state how stale their data may be. The replica serves them while its replication lag,
+    plus the time since that lag was measured, is within that; otherwise, or when the replica is
+    unreachable, they read from the primary. Routing never waits for the replica: a due lag check
+    runs as one background task, bounded by READ_REPLICA_LAG_CHECK_TIMEOUT.
+    """
+    
+    def __init__(self):
+        self.lag_seconds: Optional[float] = None
+        self._checked_at = float("-inf")
+        self._check_task: Optional[asyncio.Task] = None
+        self.routed = {"replica": 0, "primary": 0}
+    
+    @property
+    def enabled(self) -> bool:
+        return async_read_engine is not None
+    
+    def _check_due(self) -> bool:
+        return time.monotonic() - self._checked_at >= db_config.READ_REPLICA_LAG_CHECK_INTERVAL
+    
+    def _record_lag(self, lag: Optional[float]) -> None:
+        self.lag_seconds = float(lag) if lag is not None else None
+        self._checked_at = time.monotonic()
+    
+    def _route(self, max_staleness: float) -> bool:
+        # The replica may have fallen further behind since the lag was measured
+        use_replica = (
+            self.lag_seconds is not None
+            and self.lag_seconds + (time.monotonic() - self._checked_at) <= max_staleness
+        )
+        self.routed["replica" if use_replica else "primary"] += 1
+        return use_replica
+    
+    async def _query_lag(self) -> Optional[float]:
+        async with async_read_engine.connect() as conn:
+            return (await conn.execute(REPLICA_LAG_SQL)).scalar()
+    
+    async def check_lag(self) -> Optional[float]:
+        """Measure the replica's lag; None when it can't be measured in time"""
+        try:
+            self._record_lag(await asyncio.wait_for(
+                self._query_lag(), timeout=db_config.READ_REPLICA_LAG_CHECK_TIMEOUT
+            ))
+        except Exception as e:
+            logger.warning(f"Read replica lag check failed: {e!r}")
+            self._record_lag(None)
+        return self.lag_seconds
+    
+    def use_replica(self, max_staleness: float) -> bool:
+        """Whether a read tolerating max_staleness seconds should go to the replica, by the last measured lag"""
+        if not self.enabled:
+            return False
+        if self._check_due() and (self._check_task is None or self._check_task.done()):
+            self._check_task = asyncio.get_running_loop().create_task(self.check_lag())
+        return self._route(max_staleness)
+
+
+replica_router = ReadReplicaRouter()
+
 # Create declarative base
 Base = declarative_base()
 
@@ -44,6 +166,56 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """Get async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+@lru_cache(maxsize=None)
+def get_async_read_db(max_staleness: float = db_config.LIVE_MAX_STALENESS):
+    """
+    Dependency factory for read-only sessions that may be served by the read replica
+    
+    Args:
+        max_staleness: Seconds behind the primary the caller's data may be
+    
+    Returns:
+        The dependency; the same one for the same tolerance, so tests can override it
+    """
+    async def async_read_db():
+        use_replica = replica_router.use_replica(max_staleness)
+        async with (AsyncReadSessionLocal if use_replica else AsyncSessionLocal)() as db:
+            yield db
+    return async_read_db
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Connection pool usage per engine, and how reads were routed"""
+    engines = {"primary": engine, "primary_async": async_engine}
+    if async_read_engine is not None:
+        engines["replica_async"] = async_read_engine
+    
+    pools = {}
+    for name, pool_engine in engines.items():
+        pool = pool_engine.pool
+        pools[name] = {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow()
+        }
+    
+    return {
+        "pools": pools,
+        "read_replica": {
+            "enabled": replica_router.enabled,
+            "lag_seconds": replica_router.lag_seconds,
+            "routed_reads": dict(replica_router.routed)
+        }
+    }
+
+
 async def create_tables():
     """Create all database tables"""
     # Import all models to ensure they're registered
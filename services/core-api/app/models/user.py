@@ -6,10 +6,10 @@ from datetime import datetime
 from typing import Optional, List
 from sqlalchemy import (
     Column, Integer, String, DateTime, Boolean, Text, ForeignKey, JSON, 
-    Numeric, Index, UniqueConstraint, CheckConstraint, Float
+    Numeric, Index, UniqueConstraint, CheckConstraint, Float, DDL, event
 )
-from sqlalchemy.orm import relationship
-from sqlalchemy.dialects.postgresql import UUID, ARRAY
+from sqlalchemy.orm import relationship, deferred
+from sqlalchemy.dialects.postgresql import UUID, ARRAY, TSVECTOR
 from pgvector.sqlalchemy import Vector
 import uuid
 
@@ -226,6 +226,8 @@ class Document(Base):
     
     # Search optimization
     content_hash = Column(String(64), nullable=True)  # For deduplication
+    # Full-text vector of content, kept current by a trigger; deferred so it isn't loaded with results
+    content_tsv = deferred(Column(TSVECTOR, nullable=True))
     
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -238,12 +240,24 @@ class Document(Base):
         Index('idx_documents_knowledge_source', 'knowledge_source_id'),
         Index('idx_documents_chunk_index', 'knowledge_source_id', 'chunk_index'),
         Index('idx_documents_content_hash', 'content_hash'),
+        Index('idx_documents_content_tsv', 'content_tsv', postgresql_using='gin'),
         # Vector similarity index (will be created in migration)
         Index('idx_documents_embedding_cosine', 'embedding', postgresql_using='ivfflat', 
               postgresql_ops={'embedding': 'vector_cosine_ops'}),
     )
 
 
+# Tables created without migrations (create_all) need the content_tsv trigger too
+event.listen(
+    Document.__table__,
+    "after_create",
+    DDL(
+        "CREATE TRIGGER documents_content_tsv_update BEFORE INSERT OR UPDATE OF content ON documents "
+        "FOR EACH ROW EXECUTE FUNCTION tsvector_update_trigger(content_tsv, 'pg_catalog.english', content)"
+    ).execute_if(dialect="postgresql")
+)
+
+
 class Conversation(Base):
     """Conversation model with enhanced tracking"""
     __tablename__ = "conversations"
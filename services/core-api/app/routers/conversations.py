@@ -7,11 +7,14 @@ from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, Field
 
-from ..utils.database import get_db
+from ..utils.database import get_db, get_async_db, get_async_read_db
+from ..config.database import db_config
 from ..middleware.auth import get_current_user, get_organization_id
 from ..services.conversation_service import conversation_service
+from ..services.conversation_dashboard import conversation_dashboard_service
 from ..models.user import User
 
 logger = logging.getLogger(__name__)
@@ -93,7 +96,7 @@ async def get_conversations(
     limit: int = Query(50, ge=1, le=100, description="Maximum results"),
     offset: int = Query(0, ge=0, description="Results offset"),
     include_analytics: bool = Query(False, description="Include analytics data"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
     organization_id: str = Depends(get_organization_id)
 ):
@@ -128,7 +131,7 @@ async def get_conversation(
     conversation_id: str,
     include_messages: bool = Query(True, description="Include message history"),
     include_analytics: bool = Query(True, description="Include analytics data"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
     organization_id: str = Depends(get_organization_id)
 ):
@@ -331,7 +334,7 @@ async def get_conversation_analytics(
     end_date: Optional[datetime] = Query(None, description="End date for analytics"),
     channel: Optional[str] = Query(None, description="Filter by channel"),
     assistant_id: Optional[str] = Query(None, description="Filter by assistant"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db(db_config.ANALYTICS_MAX_STALENESS)),
     current_user: User = Depends(get_current_user),
     organization_id: str = Depends(get_organization_id)
 ):
@@ -363,14 +366,14 @@ async def get_satisfaction_analytics(
     start_date: Optional[datetime] = Query(None, description="Start date"),
     end_date: Optional[datetime] = Query(None, description="End date"),
     channel: Optional[str] = Query(None, description="Filter by channel"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db(db_config.ANALYTICS_MAX_STALENESS)),
     current_user: User = Depends(get_current_user),
     organization_id: str = Depends(get_organization_id)
 ):
     """Get detailed satisfaction analytics"""
     try:
         from ..models.user import Message, Conversation
-        from sqlalchemy import func
+        from sqlalchemy import func, select
         
         # Default date range (last 30 days)
         if not start_date:
@@ -379,7 +382,7 @@ async def get_satisfaction_analytics(
             end_date = datetime.utcnow()
         
         # Base query for messages with feedback
-        query = db.query(Message).join(Conversation).filter(
+        query = select(Message).join(Conversation).where(
             Conversation.organization_id == organization_id,
             Message.feedback_rating.isnot(None),
             Message.created_at >= start_date,
@@ -388,11 +391,9 @@ async def get_satisfaction_analytics(
         
         # Apply channel filter
         if channel:
-            query = query.filter(
-                Conversation.metadata.op('->>')('channel') == channel
-            )
+            query = query.where(Conversation.channel == channel)
         
-        messages_with_feedback = query.all()
+        messages_with_feedback = (await db.execute(query)).scalars().all()
         
         if not messages_with_feedback:
             return {
@@ -467,7 +468,7 @@ async def get_all_conversations_admin(
     limit: int = Query(50, ge=1, le=100, description="Maximum results"),
     offset: int = Query(0, ge=0, description="Results offset"),
     include_analytics: bool = Query(False, description="Include analytics data"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
     organization_id: str = Depends(get_organization_id)
 ):
@@ -504,6 +505,107 @@ async def get_all_conversations_admin(
         )
 
 
+# Dashboard endpoints (read from the replica; live views tolerate less staleness than reports)
+@router.get("/dashboard/overview", response_model=Dict[str, Any])
+async def get_dashboard_overview(
+    time_period: str = Query("7d", description="Time period (1d, 7d, 30d, 90d)"),
+    db: AsyncSession = Depends(get_async_read_db(db_config.ANALYTICS_MAX_STALENESS)),
+    current_user: User = Depends(get_current_user),
+    organization_id: str = Depends(get_organization_id)
+):
+    """Get conversation dashboard overview"""
+    try:
+        result = await conversation_dashboard_service.get_dashboard_overview(
+            db=db,
+            organization_id=organization_id,
+            time_period=time_period
+        )
+        
+        return result
+        
+    except Exception as e:
+        logger.error(f"Failed to get dashboard overview: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to retrieve dashboard overview"
+        )
+
+
+@router.get("/dashboard/active", response_model=List[Dict[str, Any]])
+async def get_active_conversations(
+    limit: int = Query(20, ge=1, le=100, description="Maximum results"),
+    db: AsyncSession = Depends(get_async_read_db(db_config.LIVE_MAX_STALENESS)),
+    current_user: User = Depends(get_current_user),
+    organization_id: str = Depends(get_organization_id)
+):
+    """Get active conversations requiring attention"""
+    try:
+        result = await conversation_dashboard_service.get_active_conversations(
+            db=db,
+            organization_id=organization_id,
+            limit=limit
+        )
+        
+        return result
+        
+    except Exception as e:
+        logger.error(f"Failed to get active conversations: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to retrieve active conversations"
+        )
+
+
+@router.get("/dashboard/escalations", response_model=List[Dict[str, Any]])
+async def get_escalation_queue(
+    db: AsyncSession = Depends(get_async_read_db(db_config.LIVE_MAX_STALENESS)),
+    current_user: User = Depends(get_current_user),
+    organization_id: str = Depends(get_organization_id)
+):
+    """Get conversations in the escalation queue"""
+    try:
+        result = await conversation_dashboard_service.get_escalation_queue(
+            db=db,
+            organization_id=organization_id
+        )
+        
+        return result
+        
+    except Exception as e:
+        logger.error(f"Failed to get escalation queue: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to retrieve escalation queue"
+        )
+
+
+@router.get("/dashboard/performance", response_model=Dict[str, Any])
+async def get_performance_metrics(
+    assistant_id: Optional[str] = Query(None, description="Filter by assistant"),
+    time_period: str = Query("7d", description="Time period (1d, 7d, 30d, 90d)"),
+    db: AsyncSession = Depends(get_async_read_db(db_config.ANALYTICS_MAX_STALENESS)),
+    current_user: User = Depends(get_current_user),
+    organization_id: str = Depends(get_organization_id)
+):
+    """Get assistant performance metrics"""
+    try:
+        result = await conversation_dashboard_service.get_performance_metrics(
+            db=db,
+            organization_id=organization_id,
+            assistant_id=assistant_id,
+            time_period=time_period
+        )
+        
+        return result
+        
+    except Exception as e:
+        logger.error(f"Failed to get performance metrics: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to retrieve performance metrics"
+        )
+
+
 def analyze_feedback_themes(comments: List[str]) -> List[Dict[str, Any]]:
     """Simple feedback theme analysis"""
     if not comments:
@@ -6,9 +6,11 @@ import logging
 from typing import Dict, Any, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, Field
 
-from ..utils.database import get_db
+from ..utils.database import get_db, get_async_db, get_async_read_db
+from ..config.database import db_config
 from ..middleware.auth import get_current_user, get_organization_id
 from ..services.knowledge_service import knowledge_service
 from ..models.user import User
@@ -133,7 +135,7 @@ async def upload_knowledge_source(
 async def get_knowledge_sources(
     status_filter: Optional[str] = None,
     type_filter: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
     organization_id: str = Depends(get_organization_id)
 ):
@@ -272,7 +274,7 @@ async def reprocess_knowledge_source(
 @router.post("/search", response_model=Dict[str, Any])
 async def search_knowledge_base(
     search_request: SearchRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db(db_config.LIVE_MAX_STALENESS)),
     current_user: User = Depends(get_current_user),
     organization_id: str = Depends(get_organization_id)
 ):
@@ -301,7 +303,7 @@ async def search_knowledge_base(
 
 @router.get("/analytics", response_model=Dict[str, Any])
 async def get_knowledge_analytics(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db(db_config.ANALYTICS_MAX_STALENESS)),
     current_user: User = Depends(get_current_user),
     organization_id: str = Depends(get_organization_id)
 ):
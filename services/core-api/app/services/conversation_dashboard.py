@@ -6,8 +6,8 @@ Provides dashboard data and insights for conversation management
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, and_, or_, desc, select
 
 from ..models.user import Conversation, Message, Assistant, User, Organization
 
@@ -21,7 +21,7 @@ class ConversationDashboardService:
     
     async def get_dashboard_overview(
         self,
-        db: Session,
+        db: AsyncSession,
         organization_id: str,
         time_period: str = "7d"
     ) -> Dict[str, Any]:
@@ -44,11 +44,13 @@ class ConversationDashboardService:
             start_date = end_date - timedelta(days=days)
             
             # Get conversations in period
-            conversations = db.query(Conversation).filter(
-                Conversation.organization_id == organization_id,
-                Conversation.created_at >= start_date,
-                Conversation.created_at <= end_date
-            ).all()
+            conversations = (await db.execute(
+                select(Conversation).where(
+                    Conversation.organization_id == organization_id,
+                    Conversation.created_at >= start_date,
+                    Conversation.created_at <= end_date
+                )
+            )).scalars().all()
             
             # Calculate metrics
             total_conversations = len(conversations)
@@ -120,7 +122,7 @@ class ConversationDashboardService:
     
     async def get_active_conversations(
         self,
-        db: Session,
+        db: AsyncSession,
         organization_id: str,
         limit: int = 20
     ) -> List[Dict[str, Any]]:
@@ -137,32 +139,34 @@ class ConversationDashboardService:
         """
         try:
             # Get active conversations ordered by priority
-            conversations = db.query(Conversation).filter(
-                Conversation.organization_id == organization_id,
-                Conversation.status.in_(["active", "escalated"])
-            ).order_by(
-                # Escalated conversations first
-                desc(Conversation.status == "escalated"),
-                # Then by last activity (oldest first)
-                Conversation.updated_at
-            ).limit(limit).all()
+            conversations = (await db.execute(
+                select(Conversation).where(
+                    Conversation.organization_id == organization_id,
+                    Conversation.status.in_(["active", "escalated"])
+                ).order_by(
+                    # Escalated conversations first
+                    desc(Conversation.status == "escalated"),
+                    # Then by last activity (oldest first)
+                    Conversation.updated_at
+                ).limit(limit)
+            )).scalars().all()
             
             result = []
             for conv in conversations:
                 # Get last message
-                last_message = db.query(Message).filter(
-                    Message.conversation_id == conv.id
-                ).order_by(desc(Message.created_at)).first()
+                last_message = (await db.execute(
+                    select(Message).where(
+                        Message.conversation_id == conv.id
+                    ).order_by(desc(Message.created_at)).limit(1)
+                )).scalars().first()
                 
                 # Get assistant info
-                assistant = db.query(Assistant).filter(
-                    Assistant.id == conv.assistant_id
-                ).first()
+                assistant = await db.get(Assistant, conv.assistant_id)
                 
                 # Get user info
                 user_info = None
                 if conv.user_id:
-                    user = db.query(User).filter(User.id == conv.user_id).first()
+                    user = await db.get(User, conv.user_id)
                     if user:
                         user_info = {
                             "id": str(user.id),
@@ -214,7 +218,7 @@ class ConversationDashboardService:
     
     async def get_escalation_queue(
         self,
-        db: Session,
+        db: AsyncSession,
         organization_id: str
     ) -> List[Dict[str, Any]]:
         """
@@ -228,10 +232,12 @@ class ConversationDashboardService:
             List of escalated conversations
         """
         try:
-            escalated_conversations = db.query(Conversation).filter(
-                Conversation.organization_id == organization_id,
-                Conversation.status == "escalated"
-            ).order_by(Conversation.updated_at).all()
+            escalated_conversations = (await db.execute(
+                select(Conversation).where(
+                    Conversation.organization_id == organization_id,
+                    Conversation.status == "escalated"
+                ).order_by(Conversation.updated_at)
+            )).scalars().all()
             
             result = []
             for conv in escalated_conversations:
@@ -257,7 +263,7 @@ class ConversationDashboardService:
                 # Get user info
                 user_info = None
                 if conv.user_id:
-                    user = db.query(User).filter(User.id == conv.user_id).first()
+                    user = await db.get(User, conv.user_id)
                     if user:
                         user_info = {
                             "email": user.email,
@@ -285,7 +291,7 @@ class ConversationDashboardService:
     
     async def get_performance_metrics(
         self,
-        db: Session,
+        db: AsyncSession,
         organization_id: str,
         assistant_id: Optional[str] = None,
         time_period: str = "7d"
@@ -310,16 +316,16 @@ class ConversationDashboardService:
             start_date = end_date - timedelta(days=days)
             
             # Base query
-            query = db.query(Conversation).filter(
+            query = select(Conversation).where(
                 Conversation.organization_id == organization_id,
                 Conversation.created_at >= start_date,
                 Conversation.created_at <= end_date
             )
             
             if assistant_id:
-                query = query.filter(Conversation.assistant_id == assistant_id)
+                query = query.where(Conversation.assistant_id == assistant_id)
             
-            conversations = query.all()
+            conversations = (await db.execute(query)).scalars().all()
             
             # Group by assistant
             assistant_metrics = {}
@@ -328,9 +334,7 @@ class ConversationDashboardService:
                 asst_id = str(conv.assistant_id)
                 if asst_id not in assistant_metrics:
                     # Get assistant info
-                    assistant = db.query(Assistant).filter(
-                        Assistant.id == conv.assistant_id
-                    ).first()
+                    assistant = await db.get(Assistant, conv.assistant_id)
                     
                     assistant_metrics[asst_id] = {
                         "assistant_id": asst_id,
@@ -357,10 +361,12 @@ class ConversationDashboardService:
                     metrics["escalated"] += 1
                 
                 # Get satisfaction scores
-                messages_with_feedback = db.query(Message).filter(
-                    Message.conversation_id == conv.id,
-                    Message.feedback_rating.isnot(None)
-                ).all()
+                messages_with_feedback = (await db.execute(
+                    select(Message).where(
+                        Message.conversation_id == conv.id,
+                        Message.feedback_rating.isnot(None)
+                    )
+                )).scalars().all()
                 
                 for msg in messages_with_feedback:
                     if msg.feedback_rating:
@@ -403,7 +409,7 @@ class ConversationDashboardService:
     
     async def _calculate_response_times(
         self,
-        db: Session,
+        db: AsyncSession,
         conversations: List[Conversation]
     ) -> Dict[str, Any]:
         """Calculate response time metrics"""
@@ -412,9 +418,11 @@ class ConversationDashboardService:
             
             for conv in conversations:
                 # Get messages ordered by time
-                messages = db.query(Message).filter(
-                    Message.conversation_id == conv.id
-                ).order_by(Message.created_at).all()
+                messages = (await db.execute(
+                    select(Message).where(
+                        Message.conversation_id == conv.id
+                    ).order_by(Message.created_at)
+                )).scalars().all()
                 
                 # Calculate response times between user and assistant messages
                 for i in range(len(messages) - 1):
@@ -447,7 +455,7 @@ class ConversationDashboardService:
     
     async def _get_satisfaction_metrics(
         self,
-        db: Session,
+        db: AsyncSession,
         conversations: List[Conversation]
     ) -> Dict[str, Any]:
         """Get satisfaction metrics"""
@@ -455,10 +463,12 @@ class ConversationDashboardService:
             all_ratings = []
             
             for conv in conversations:
-                messages_with_feedback = db.query(Message).filter(
-                    Message.conversation_id == conv.id,
-                    Message.feedback_rating.isnot(None)
-                ).all()
+                messages_with_feedback = (await db.execute(
+                    select(Message).where(
+                        Message.conversation_id == conv.id,
+                        Message.feedback_rating.isnot(None)
+                    )
+                )).scalars().all()
                 
                 for msg in messages_with_feedback:
                     if msg.feedback_rating:
@@ -492,7 +502,7 @@ class ConversationDashboardService:
     
     async def _get_conversation_trends(
         self,
-        db: Session,
+        db: AsyncSession,
         organization_id: str,
         start_date: datetime,
         end_date: datetime
@@ -502,11 +512,13 @@ class ConversationDashboardService:
             # Group conversations by day
             daily_stats = {}
             
-            conversations = db.query(Conversation).filter(
-                Conversation.organization_id == organization_id,
-                Conversation.created_at >= start_date,
-                Conversation.created_at <= end_date
-            ).all()
+            conversations = (await db.execute(
+                select(Conversation).where(
+                    Conversation.organization_id == organization_id,
+                    Conversation.created_at >= start_date,
+                    Conversation.created_at <= end_date
+                )
+            )).scalars().all()
             
             # Initialize all days with zero counts
             current_date = start_date.date()
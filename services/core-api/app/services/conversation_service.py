@@ -8,7 +8,8 @@ import uuid
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, func, desc, select
 from fastapi import HTTPException, status
 
 from ..models.user import (
@@ -124,7 +125,7 @@ class ConversationService:
     
     async def get_conversations(
         self,
-        db: Session,
+        db: AsyncSession,
         organization_id: str,
         user_id: Optional[str] = None,
         status: Optional[str] = None,
@@ -152,29 +153,27 @@ class ConversationService:
             List of conversations
         """
         try:
-            query = db.query(Conversation).filter(
+            query = select(Conversation).where(
                 Conversation.organization_id == organization_id
             )
             
             # Apply filters
             if user_id:
-                query = query.filter(Conversation.user_id == user_id)
+                query = query.where(Conversation.user_id == user_id)
             
             if status:
-                query = query.filter(Conversation.status == status)
+                query = query.where(Conversation.status == status)
             
             if channel:
-                query = query.filter(
-                    Conversation.metadata.op('->>')('channel') == channel
-                )
+                query = query.where(Conversation.channel == channel)
             
             if assistant_id:
-                query = query.filter(Conversation.assistant_id == assistant_id)
+                query = query.where(Conversation.assistant_id == assistant_id)
             
             # Get conversations with pagination
-            conversations = query.order_by(
-                desc(Conversation.updated_at)
-            ).offset(offset).limit(limit).all()
+            conversations = (await db.execute(
+                query.order_by(desc(Conversation.updated_at)).offset(offset).limit(limit)
+            )).scalars().all()
             
             result = []
             for conv in conversations:
@@ -193,7 +192,7 @@ class ConversationService:
     
     async def get_conversation(
         self,
-        db: Session,
+        db: AsyncSession,
         conversation_id: str,
         organization_id: str,
         include_messages: bool = True,
@@ -213,10 +212,12 @@ class ConversationService:
             Conversation details
         """
         try:
-            conversation = db.query(Conversation).filter(
-                Conversation.id == conversation_id,
-                Conversation.organization_id == organization_id
-            ).first()
+            conversation = (await db.execute(
+                select(Conversation).where(
+                    Conversation.id == conversation_id,
+                    Conversation.organization_id == organization_id
+                )
+            )).scalars().first()
             
             if not conversation:
                 raise HTTPException(
@@ -231,9 +232,11 @@ class ConversationService:
             
             # Include messages if requested
             if include_messages:
-                messages = db.query(Message).filter(
-                    Message.conversation_id == conversation_id
-                ).order_by(Message.created_at).all()
+                messages = (await db.execute(
+                    select(Message).where(
+                        Message.conversation_id == conversation_id
+                    ).order_by(Message.created_at)
+                )).scalars().all()
                 
                 conv_data["messages"] = [
                     await self._format_message(msg) for msg in messages
@@ -568,7 +571,7 @@ class ConversationService:
     
     async def get_conversation_analytics(
         self,
-        db: Session,
+        db: AsyncSession,
         organization_id: str,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
@@ -597,7 +600,7 @@ class ConversationService:
                 end_date = datetime.utcnow()
             
             # Base query
-            query = db.query(Conversation).filter(
+            query = select(Conversation).where(
                 Conversation.organization_id == organization_id,
                 Conversation.created_at >= start_date,
                 Conversation.created_at <= end_date
@@ -605,14 +608,12 @@ class ConversationService:
             
             # Apply filters
             if channel:
-                query = query.filter(
-                    Conversation.metadata.op('->>')('channel') == channel
-                )
+                query = query.where(Conversation.channel == channel)
             
             if assistant_id:
-                query = query.filter(Conversation.assistant_id == assistant_id)
+                query = query.where(Conversation.assistant_id == assistant_id)
             
-            conversations = query.all()
+            conversations = (await db.execute(query)).scalars().all()
             
             # Calculate analytics
             total_conversations = len(conversations)
@@ -646,10 +647,12 @@ class ConversationService:
             # Satisfaction metrics (from message feedback)
             satisfaction_scores = []
             for conv in conversations:
-                messages = db.query(Message).filter(
-                    Message.conversation_id == conv.id,
-                    Message.feedback_rating.isnot(None)
-                ).all()
+                messages = (await db.execute(
+                    select(Message).where(
+                        Message.conversation_id == conv.id,
+                        Message.feedback_rating.isnot(None)
+                    )
+                )).scalars().all()
                 
                 for msg in messages:
                     if msg.feedback_rating:
@@ -696,21 +699,19 @@ class ConversationService:
     
     async def _format_conversation(
         self,
-        db: Session,
+        db: AsyncSession,
         conversation: Conversation,
         include_analytics: bool = False
     ) -> Dict[str, Any]:
         """Format conversation for API response"""
         try:
-            # Get assistant info
-            assistant = db.query(Assistant).filter(
-                Assistant.id == conversation.assistant_id
-            ).first()
+            # Get assistant info (db.get reuses rows already loaded in this session)
+            assistant = await db.get(Assistant, conversation.assistant_id)
             
             # Get user info if available
             user_info = None
             if conversation.user_id:
-                user = db.query(User).filter(User.id == conversation.user_id).first()
+                user = await db.get(User, conversation.user_id)
                 if user:
                     user_info = {
                         "id": str(user.id),
@@ -726,14 +727,14 @@ class ConversationService:
                 "message_count": conversation.message_count,
                 "total_tokens": conversation.total_tokens,
                 "total_cost_aud": float(conversation.total_cost or 0),
-                "channel": conversation.metadata.get("channel") if conversation.metadata else None,
+                "channel": conversation.channel,
                 "assistant": {
                     "id": str(assistant.id) if assistant else None,
                     "name": assistant.name if assistant else "Unknown",
                     "type": assistant.type if assistant else "unknown"
                 },
                 "user": user_info,
-                "metadata": conversation.metadata or {},
+                "metadata": conversation.conv_metadata or {},
                 "created_at": conversation.created_at.isoformat(),
                 "updated_at": conversation.updated_at.isoformat() if conversation.updated_at else None
             }
@@ -741,9 +742,11 @@ class ConversationService:
             # Add analytics if requested
             if include_analytics:
                 # Get last message time
-                last_message = db.query(Message).filter(
-                    Message.conversation_id == conversation.id
-                ).order_by(desc(Message.created_at)).first()
+                last_message = (await db.execute(
+                    select(Message).where(
+                        Message.conversation_id == conversation.id
+                    ).order_by(desc(Message.created_at)).limit(1)
+                )).scalars().first()
                 
                 conv_data["analytics"] = {
                     "last_message_at": last_message.created_at.isoformat() if last_message else None,
@@ -774,7 +777,7 @@ class ConversationService:
             "feedback_comment": message.feedback_comment,
             "citations": message.citations or [],
             "tool_calls": message.tool_calls or [],
-            "metadata": message.metadata or {},
+            "metadata": message.msg_metadata or {},
             "created_at": message.created_at.isoformat()
         }
     
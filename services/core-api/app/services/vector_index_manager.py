@@ -0,0 +1,476 @@
+"""
+Vector Index Lifecycle Management
+Chooses, tunes and rebuilds the pgvector ANN index on document embeddings
+"""
+
+import asyncio
+import json
+import logging
+import math
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config.database import db_config
+
+logger = logging.getLogger(__name__)
+
+HNSW = "hnsw"
+IVFFLAT = "ivfflat"
+
+# Query-time setting that trades recall for latency, per index method
+SEARCH_SETTINGS = {HNSW: "hnsw.ef_search", IVFFLAT: "ivfflat.probes"}
+
+# Uncalibrated defaults: the smallest recall target each row reaches -> ef_search as a multiple
+# of k, or probes as a multiple of sqrt(lists) (pgvector's starting point for probes)
+_EF_SEARCH_FACTORS = ((0.90, 2), (0.95, 4), (0.98, 8), (0.99, 12), (1.0, 20))
+_PROBES_FACTORS = ((0.90, 0.5), (0.95, 1.0), (0.98, 2.0), (0.99, 3.0), (1.0, 5.0))
+
+# Advisory lock held while rebuilding, so one API instance rebuilds at a time
+_REBUILD_LOCK_KEY = 7_411_201
+
+
+def vector_literal(embedding: Sequence[float]) -> str:
+    """pgvector text form of an embedding, for CAST(:param AS vector)"""
+    return "[" + ",".join(f"{float(value):.7g}" for value in embedding) + "]"
+
+
+@dataclass
+class IndexPlan:
+    """An ANN index: its method, build parameters and the row count it was built for"""
+    method: str
+    params: Dict[str, int]
+    rows: Optional[int] = None
+    built_at: Optional[str] = None
+
+    def with_clause(self) -> str:
+        """Storage parameters for CREATE INDEX ... WITH (...)"""
+        return ", ".join(f"{name} = {int(value)}" for name, value in self.params.items())
+
+
+@dataclass
+class SearchSetting:
+    """Measured recall@k and latency of one ef_search/probes value"""
+    method: str
+    value: int
+    recall: float
+    p50_ms: float
+    p95_ms: float
+
+
+@dataclass
+class DriftCheck:
+    """Whether the index no longer suits the data, and why"""
+    rebuild: bool
+    reason: str = ""
+    rows: int = 0
+    details: Dict[str, Any] = field(default_factory=dict)
+
+
+class VectorIndexManager:
+    """
+    ANN index lifecycle for a pgvector column
+
+    Features:
+    - HNSW or IVFFlat chosen by row count, with lists sized to the table
+    - ef_search/probes set per query from a recall target and latency budget
+    - Calibration of recall@k and latency against exact search
+    - Background rebuilds (CREATE INDEX CONCURRENTLY and swap) when the data drifts
+    """
+
+    def __init__(
+        self,
+        table: str = "documents",
+        column: str = "embedding",
+        index_name: str = "idx_documents_embedding_cosine",
+        opclass: str = "vector_cosine_ops",
+        timestamp_column: str = "created_at"
+    ):
+        self.table = table
+        self.column = column
+        self.index_name = index_name
+        self.opclass = opclass
+        self.timestamp_column = timestamp_column
+        self.config = db_config
+
+        # Current index as last read from the database, and measured search settings per method
+        self.current: Optional[IndexPlan] = None
+        self._calibration: Dict[str, List[SearchSetting]] = {}
+        self._rebuild_lock = threading.Lock()
+
+    # Planning
+
+    def plan_for(self, rows: int) -> IndexPlan:
+        """
+        Index to build for a row count
+
+        HNSW gives the best recall per millisecond but builds slowly and needs the graph in memory,
+        so past VECTOR_HNSW_MAX_ROWS (or when configured) IVFFlat is used, with rows/1000 lists up
+        to a million rows and sqrt(rows) beyond.
+        """
+        method = self.config.VECTOR_INDEX_METHOD
+        if method not in (HNSW, IVFFLAT):
+            method = HNSW if rows <= self.config.VECTOR_HNSW_MAX_ROWS else IVFFLAT
+
+        if method == HNSW:
+            params = {"m": self.config.HNSW_M, "ef_construction": self.config.HNSW_EF_CONSTRUCTION}
+        else:
+            if rows <= 0:
+                lists = self.config.IVFFLAT_LISTS
+            elif rows <= 1_000_000:
+                lists = max(rows // 1000, 1)
+            else:
+                lists = int(math.sqrt(rows))
+            params = {"lists": lists}
+
+        return IndexPlan(method=method, params=params, rows=rows)
+
+    # Query tuning
+
+    def search_setting(
+        self,
+        k: int,
+        recall_target: Optional[float] = None,
+        latency_budget_ms: Optional[float] = None
+    ) -> Optional[Tuple[str, int]]:
+        """
+        ef_search/probes value for a query
+
+        Args:
+            k: Rows the query returns
+            recall_target: Wanted recall@k (defaults to VECTOR_RECALL_TARGET)
+            latency_budget_ms: Latency the setting should stay within (defaults to VECTOR_LATENCY_BUDGET_MS)
+
+        Returns:
+            (setting name, value), or None when no ANN index is known
+        """
+        plan = self.current
+        if plan is None or plan.method not in SEARCH_SETTINGS:
+            return None
+        recall_target = recall_target or self.config.VECTOR_RECALL_TARGET
+        latency_budget_ms = latency_budget_ms or self.config.VECTOR_LATENCY_BUDGET_MS
+
+        calibrated = self._calibration.get(plan.method)
+        if calibrated:
+            # Cheapest measured value reaching the target within budget, else the best recall within budget
+            affordable = [s for s in calibrated if s.p95_ms <= latency_budget_ms] or calibrated[:1]
+            reaching = [s for s in affordable if s.recall >= recall_target]
+            value = reaching[0].value if reaching else max(affordable, key=lambda s: s.recall).value
+        elif plan.method == HNSW:
+            value = k * _factor_for(_EF_SEARCH_FACTORS, recall_target)
+        else:
+            lists = plan.params.get("lists", self.config.IVFFLAT_LISTS)
+            value = math.ceil(math.sqrt(lists) * _factor_for(_PROBES_FACTORS, recall_target))
+
+        if plan.method == HNSW:
+            # An HNSW scan returns at most ef_search rows; 40 is pgvector's default
+            value = max(value, k, 40)
+        else:
+            value = min(max(value, 1), plan.params.get("lists", value))
+        return SEARCH_SETTINGS[plan.method], int(value)
+
+    async def apply_search_params(
+        self,
+        db: AsyncSession,
+        k: int,
+        recall_target: Optional[float] = None,
+        latency_budget_ms: Optional[float] = None
+    ) -> Optional[Tuple[str, int]]:
+        """Set ef_search/probes for the rest of the session's current transaction"""
+        setting = self.search_setting(k, recall_target, latency_budget_ms)
+        if setting is None:
+            return None
+        name, value = setting
+        try:
+            # In a savepoint, so a failure doesn't abort the caller's transaction
+            async with db.begin_nested():
+                await db.execute(text(f"SET LOCAL {name} = {value}"))
+        except Exception as e:
+            logger.warning(f"Failed to set {name}: {e}")
+            return None
+        return setting
+
+    # Index state
+
+    def load_state(self, bind) -> Optional[IndexPlan]:
+        """Read the current index definition and build metadata from the database"""
+        row = bind.execute(text("""
+            SELECT indexdef, obj_description(format('%I', indexname)::regclass, 'pg_class')
+            FROM pg_indexes
+            WHERE tablename = :table AND indexname = :index
+        """), {"table": self.table, "index": self.index_name}).first()
+        if row is None:
+            self.current = None
+            return None
+
+        indexdef, comment = row
+        try:
+            plan = IndexPlan(**json.loads(comment)) if comment else None
+        except (TypeError, ValueError):
+            plan = None
+        if plan is None:
+            # Created by a migration or create_all: take the method from the definition, build size unknown
+            method = HNSW if "USING hnsw" in indexdef else IVFFLAT
+            params = {}
+            if method == IVFFLAT:
+                lists = _storage_param(indexdef, "lists")
+                params["lists"] = lists or 100
+            plan = IndexPlan(method=method, params=params)
+
+        self.current = plan
+        return plan
+
+    def refresh_state(self, engine) -> Optional[IndexPlan]:
+        """Load the index state on its own connection, so search tuning works without maintenance"""
+        with engine.connect() as conn:
+            return self.load_state(conn)
+
+    def count_rows(self, bind) -> int:
+        """Approximate row count: planner statistics, else an exact count of embedded rows"""
+        estimate = bind.execute(text("""
+            SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)
+        """), {"table": self.table}).scalar()
+        if estimate is not None and estimate >= 0:
+            return int(estimate)
+        return int(bind.execute(text(
+            f"SELECT count(*) FROM {self.table} WHERE {self.column} IS NOT NULL"
+        )).scalar() or 0)
+
+    def check_drift(self, bind) -> DriftCheck:
+        """
+        Decide whether the index should be rebuilt
+
+        Rebuilds when it is missing, when the row count calls for the other method or
+        a different IVFFlat list count, when the table has grown or shrunk by VECTOR_INDEX_DRIFT_RATIO
+        since the build, or when the mean embedding of rows added since an IVFFlat build has moved
+        away from the rest (its centroids no longer fit the data).
+        """
+        rows = self.count_rows(bind)
+        current = self.load_state(bind)
+        target = self.plan_for(rows)
+
+        if current is None:
+            return DriftCheck(True, "missing index", rows)
+        if current.method != target.method:
+            return DriftCheck(True, f"{rows} rows call for {target.method}", rows)
+        if current.method == IVFFLAT:
+            lists, wanted = current.params.get("lists", 0), target.params["lists"]
+            if lists and not (wanted / 2 <= lists <= wanted * 2):
+                return DriftCheck(True, f"{lists} lists for {rows} rows, want {wanted}", rows)
+        if current.rows is not None:
+            change = abs(rows - current.rows) / max(current.rows, 1)
+            if change >= self.config.VECTOR_INDEX_DRIFT_RATIO and abs(rows - current.rows) >= 1000:
+                return DriftCheck(True, f"rows changed {current.rows} -> {rows}", rows)
+        if current.method == IVFFLAT and current.built_at:
+            shift = self.centroid_shift(bind, current.built_at)
+            if shift is not None and shift >= self.config.VECTOR_CENTROID_DRIFT:
+                return DriftCheck(True, f"embedding centroid moved {shift:.3f}", rows, {"centroid_shift": shift})
+
+        return DriftCheck(False, "", rows)
+
+    def centroid_shift(self, bind, built_at: str) -> Optional[float]:
+        """Cosine distance between the mean embedding of rows added since a build and of the rows before"""
+        return bind.execute(text(f"""
+            SELECT avg({self.column}) FILTER (WHERE {self.timestamp_column} > :built_at)
+                <=> avg({self.column}) FILTER (WHERE {self.timestamp_column} <= :built_at)
+            FROM {self.table}
+            WHERE {self.column} IS NOT NULL
+        """), {"built_at": built_at}).scalar()
+
+    # Rebuilds
+
+    def rebuild(self, engine, plan: Optional[IndexPlan] = None) -> Optional[IndexPlan]:
+        """
+        Build a new index next to the old one and swap it in, without blocking writes
+
+        Args:
+            engine: SQLAlchemy engine (CREATE INDEX CONCURRENTLY needs autocommit)
+            plan: Index to build (defaults to plan_for the current row count)
+
+        Returns:
+            The built index, or None if another rebuild holds the lock
+        """
+        if not self._rebuild_lock.acquire(blocking=False):
+            return None
+        try:
+            with engine.connect() as conn:
+                conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+                if not conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": _REBUILD_LOCK_KEY}).scalar():
+                    logger.info("Vector index rebuild already running elsewhere")
+                    return None
+                try:
+                    return self._build_and_swap(conn, plan)
+                finally:
+                    conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _REBUILD_LOCK_KEY})
+        finally:
+            self._rebuild_lock.release()
+
+    def _build_and_swap(self, conn, plan: Optional[IndexPlan]) -> IndexPlan:
+        """Build under a temporary name, swap names, then drop the old index"""
+        rows = self.count_rows(conn)
+        plan = plan or self.plan_for(rows)
+        plan.rows = rows
+        plan.built_at = datetime.utcnow().isoformat()
+        building, retired = f"{self.index_name}_new", f"{self.index_name}_old"
+
+        start_time = time.perf_counter()
+        # Leftovers of an interrupted rebuild are invalid indexes
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {building}"))
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {retired}"))
+        if self.config.VECTOR_INDEX_BUILD_MEMORY:
+            conn.execute(text(f"SET maintenance_work_mem = '{self.config.VECTOR_INDEX_BUILD_MEMORY}'"))
+        try:
+            conn.execute(text(
+                f"CREATE INDEX CONCURRENTLY {building} ON {self.table} "
+                f"USING {plan.method} ({self.column} {self.opclass}) WITH ({plan.with_clause()})"
+            ))
+        finally:
+            # Session-level under autocommit; don't leave it on the pooled connection
+            if self.config.VECTOR_INDEX_BUILD_MEMORY:
+                conn.execute(text("RESET maintenance_work_mem"))
+
+        # Queries don't name the index, so the old one keeps serving until it is dropped
+        conn.execute(text(f"ALTER INDEX IF EXISTS {self.index_name} RENAME TO {retired}"))
+        conn.execute(text(f"ALTER INDEX {building} RENAME TO {self.index_name}"))
+        conn.execute(text(f"COMMENT ON INDEX {self.index_name} IS :comment"), {"comment": json.dumps(asdict(plan))})
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {retired}"))
+        conn.execute(text(f"ANALYZE {self.table}"))
+
+        build_seconds = time.perf_counter() - start_time
+        logger.info(f"Rebuilt vector index {self.index_name} as {plan.method} ({plan.with_clause()}) "
+                    f"for {rows} rows in {build_seconds:.1f}s")
+
+        # Measurements of the old index no longer apply
+        self._calibration.pop(plan.method, None)
+        self.current = plan
+        return plan
+
+    def maintain(self, engine) -> DriftCheck:
+        """Check for drift and rebuild if needed"""
+        with engine.connect() as conn:
+            check = self.check_drift(conn)
+        if check.rebuild:
+            logger.info(f"Rebuilding vector index {self.index_name}: {check.reason}")
+            self.rebuild(engine)
+        return check
+
+    async def run_maintenance(self, engine, interval_seconds: Optional[int] = None) -> None:
+        """Periodically check for drift and rebuild in a worker thread; runs until cancelled"""
+        interval_seconds = interval_seconds or self.config.VECTOR_INDEX_CHECK_INTERVAL
+        while True:
+            try:
+                await asyncio.to_thread(self.maintain, engine)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Vector index maintenance failed: {e}")
+            await asyncio.sleep(interval_seconds)
+
+    # Calibration
+
+    def calibrate(
+        self,
+        engine,
+        queries: Sequence[Sequence[float]],
+        k: int = 10,
+        values: Optional[Sequence[int]] = None
+    ) -> List[SearchSetting]:
+        """
+        Measure recall@k and latency of ef_search/probes values against exact search
+
+        Args:
+            engine: SQLAlchemy engine
+            queries: Sample query embeddings
+            k: Results per query
+            values: ef_search/probes values to try (defaults to a doubling ladder)
+
+        Returns:
+            Measured settings, cheapest first; later search_setting() calls choose from them
+        """
+        with engine.connect() as conn:
+            plan = self.load_state(conn)
+        if plan is None:
+            return []
+
+        if values is None:
+            if plan.method == HNSW:
+                values = sorted({max(k, value) for value in (10, 20, 40, 80, 160, 320, 640)})
+            else:
+                lists = plan.params.get("lists", self.config.IVFFLAT_LISTS)
+                values = sorted({min(value, lists) for value in (1, 2, 4, 8, 16, 32, 64, 128)})
+
+        literals = [vector_literal(query) for query in queries]
+        exact = [self._top_k(engine, literal, k, None) for literal in literals]
+
+        settings = []
+        name = SEARCH_SETTINGS[plan.method]
+        for value in values:
+            recalls, latencies = [], []
+            for literal, truth in zip(literals, exact):
+                start_time = time.perf_counter()
+                found = self._top_k(engine, literal, k, (name, value))
+                latencies.append((time.perf_counter() - start_time) * 1000)
+                recalls.append(len(set(found) & set(truth)) / max(len(truth), 1))
+            latencies.sort()
+            settings.append(SearchSetting(
+                method=plan.method,
+                value=int(value),
+                recall=sum(recalls) / max(len(recalls), 1),
+                p50_ms=latencies[len(latencies) // 2] if latencies else 0.0,
+                p95_ms=latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)] if latencies else 0.0
+            ))
+
+        self._calibration[plan.method] = settings
+        return settings
+
+    def _top_k(self, engine, literal: str, k: int, setting: Optional[Tuple[str, int]]) -> List[Any]:
+        """IDs of the k nearest rows; exact (no index) when setting is None"""
+        with engine.begin() as conn:
+            if setting is None:
+                conn.execute(text("SET LOCAL enable_indexscan = off"))
+            else:
+                conn.execute(text(f"SET LOCAL {setting[0]} = {int(setting[1])}"))
+            rows = conn.execute(text(f"""
+                SELECT id FROM {self.table}
+                WHERE {self.column} IS NOT NULL
+                ORDER BY {self.column} <=> CAST(:query AS vector)
+                LIMIT :k
+            """), {"query": literal, "k": k})
+            return [row[0] for row in rows]
+
+    def get_status(self) -> Dict[str, Any]:
+        """Current index and calibration, for health and admin endpoints"""
+        return {
+            "index": asdict(self.current) if self.current else None,
+            "calibration": {
+                method: [asdict(setting) for setting in settings]
+                for method, settings in self._calibration.items()
+            }
+        }
+
+
+def _factor_for(factors: Sequence[Tuple[float, float]], recall_target: float) -> float:
+    """Factor of the first row whose recall reaches the target"""
+    for recall, factor in factors:
+        if recall_target <= recall:
+            return factor
+    return factors[-1][1]
+
+
+def _storage_param(indexdef: str, name: str) -> Optional[int]:
+    """Integer storage parameter from an index definition, e.g. lists='100'"""
+    marker = f"{name}='"
+    position = indexdef.find(marker)
+    if position < 0:
+        return None
+    digits = indexdef[position + len(marker):].split("'", 1)[0]
+    return int(digits) if digits.isdigit() else None
+
+
+# Global instance
+vector_index_manager = VectorIndexManager()
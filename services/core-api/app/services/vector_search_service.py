@@ -26,12 +26,66 @@ except ImportError as e:
         pass
 
 from sqlalchemy.orm import Session
-from sqlalchemy import text, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, text, func
 from ..models.user import Document, KnowledgeSource, Organization
 from ..config.vertex_ai import vertex_ai_config
+from .vector_index_manager import vector_index_manager, vector_literal
 
 logger = logging.getLogger(__name__)
 
+# Reciprocal rank fusion: a document scores weight / (RRF_K + rank) in each list it appears in
+RRF_K = 60
+# Candidates taken from each of the semantic and keyword rankings, per requested result
+HYBRID_CANDIDATE_FACTOR = 4
+
+HYBRID_SEARCH_SQL = text("""
+    WITH semantic AS (
+        SELECT d.id,
+               rank() OVER (ORDER BY d.embedding <=> CAST(:embedding AS vector)) AS rank,
+               1 - (d.embedding <=> CAST(:embedding AS vector)) AS similarity
+        FROM documents d
+        JOIN knowledge_sources ks ON ks.id = d.knowledge_source_id
+        WHERE ks.organization_id = :organization_id
+          AND d.embedding IS NOT NULL
+          AND (CAST(:source_id AS uuid) IS NULL OR ks.id = CAST(:source_id AS uuid))
+        ORDER BY d.embedding <=> CAST(:embedding AS vector)
+        LIMIT CAST(:candidates AS integer)
+    ),
+    keyword AS (
+        SELECT d.id,
+               rank() OVER (ORDER BY ts_rank(d.content_tsv, q.query) DESC) AS rank,
+               ts_rank(d.content_tsv, q.query) AS relevance
+        FROM documents d
+        JOIN knowledge_sources ks ON ks.id = d.knowledge_source_id
+        CROSS JOIN plainto_tsquery('english', :query) AS q(query)
+        WHERE ks.organization_id = :organization_id
+          AND d.content_tsv @@ q.query
+          AND (CAST(:source_id AS uuid) IS NULL OR ks.id = CAST(:source_id AS uuid))
+        ORDER BY ts_rank(d.content_tsv, q.query) DESC
+        LIMIT CAST(:candidates AS integer)
+    ),
+    fused AS (
+        SELECT COALESCE(s.id, k.id) AS id,
+               COALESCE(CAST(:semantic_weight AS float8) / (CAST(:rrf_k AS float8) + s.rank), 0)
+                 + COALESCE(CAST(:keyword_weight AS float8) / (CAST(:rrf_k AS float8) + k.rank), 0) AS score,
+               s.similarity,
+               k.relevance
+        FROM semantic s
+        FULL OUTER JOIN keyword k ON k.id = s.id
+        WHERE k.id IS NOT NULL OR s.similarity >= CAST(:similarity_threshold AS float8)
+        ORDER BY score DESC
+        LIMIT CAST(:limit AS integer)
+    )
+    SELECT d.id, d.knowledge_source_id, ks.name AS source_name, d.content, d.doc_metadata, d.chunk_index,
+           f.score, f.similarity, f.relevance,
+           (SELECT count(*) FROM semantic) AS semantic_candidates
+    FROM fused f
+    JOIN documents d ON d.id = f.id
+    JOIN knowledge_sources ks ON ks.id = d.knowledge_source_id
+    ORDER BY f.score DESC
+""")
+
 
 class VectorSearchService:
     """
@@ -188,7 +242,7 @@ class VectorSearchService:
     
     async def semantic_search(
         self,
-        db: Session,
+        db: AsyncSession,
         organization_id: str,
         query: str,
         max_results: int = None,
@@ -221,23 +275,31 @@ class VectorSearchService:
             query_embedding = query_embeddings[0]
             
             # Build SQL query for vector similarity search
-            base_query = db.query(
+            distance = func.cosine_distance(Document.embedding, query_embedding)
+            statement = select(
                 Document,
                 KnowledgeSource.name.label('source_name'),
-                func.cosine_distance(Document.embedding, query_embedding).label('distance')
-            ).join(KnowledgeSource).filter(
+                distance.label('distance')
+            ).join(KnowledgeSource).where(
                 KnowledgeSource.organization_id == organization_id,
                 Document.embedding.isnot(None)
             )
             
             # Apply source filter
             if source_filter:
-                base_query = base_query.filter(KnowledgeSource.id == source_filter)
+                statement = statement.where(KnowledgeSource.id == source_filter)
             
-            # Order by similarity and limit results
-            results = base_query.order_by(
-                func.cosine_distance(Document.embedding, query_embedding)
-            ).limit(max_results).all()
+            # Order by similarity and limit results, with ef_search/probes tuned to the recall target
+            statement = statement.order_by(distance).limit(max_results)
+            setting = await vector_index_manager.apply_search_params(db, max_results)
+            results = (await db.execute(statement)).all()
+            
+            # The ANN scan stops after ef_search/probes candidates, which may mostly belong to other
+            # organisations; a short result only needs an exact search if the organisation has more rows
+            if setting is not None and len(results) < max_results:
+                embedded = await self._embedded_rows(db, organization_id, source_filter, max_results)
+                if embedded > len(results):
+                    results = await self._exact_search(db, statement)
             
             # Format results
             search_results = []
@@ -247,12 +309,12 @@ class VectorSearchService:
                 if similarity >= similarity_threshold:
                     search_results.append({
                         "document_id": str(doc.id),
-                        "source_id": str(doc.source_id),
+                        "source_id": str(doc.knowledge_source_id),
                         "source_name": source_name,
                         "content": doc.content,
                         "similarity_score": float(similarity),
-                        "metadata": doc.metadata,
-                        "chunk_id": doc.chunk_id
+                        "metadata": doc.doc_metadata,
+                        "chunk_id": doc.chunk_index
                     })
             
             logger.info(f"Semantic search returned {len(search_results)} results for query: {query[:50]}...")
@@ -262,9 +324,35 @@ class VectorSearchService:
             logger.error(f"Semantic search failed: {e}")
             return []
     
+    async def _embedded_rows(
+        self,
+        db: AsyncSession,
+        organization_id: str,
+        source_filter: Optional[str],
+        limit: int
+    ) -> int:
+        """Count the organisation's embedded documents, stopping at limit"""
+        statement = select(Document.id).join(KnowledgeSource).where(
+            KnowledgeSource.organization_id == organization_id,
+            Document.embedding.isnot(None)
+        )
+        if source_filter:
+            statement = statement.where(KnowledgeSource.id == source_filter)
+        capped = statement.limit(limit).subquery()
+        return (await db.execute(select(func.count()).select_from(capped))).scalar_one()
+    
+    async def _exact_search(self, db: AsyncSession, statement, params: Optional[Dict[str, Any]] = None) -> List[Any]:
+        """Run a similarity query without the ANN index, filtering by organisation first"""
+        try:
+            async with db.begin_nested():
+                await db.execute(text("SET LOCAL enable_indexscan = off"))
+                return (await db.execute(statement, params)).all()
+        finally:
+            await db.execute(text("RESET enable_indexscan"))
+    
     async def keyword_search(
         self,
-        db: Session,
+        db: AsyncSession,
         organization_id: str,
         query: str,
         max_results: int = None,
@@ -286,42 +374,36 @@ class VectorSearchService:
         try:
             max_results = max_results or self.max_results
             
-            # Build full-text search query
-            base_query = db.query(
+            # Match against the stored, GIN-indexed tsvector instead of re-tokenising every chunk
+            ts_query = func.plainto_tsquery('english', query)
+            rank = func.ts_rank(Document.content_tsv, ts_query).label('rank')
+            statement = select(
                 Document,
                 KnowledgeSource.name.label('source_name'),
-                func.ts_rank(
-                    func.to_tsvector('english', Document.content),
-                    func.plainto_tsquery('english', query)
-                ).label('rank')
-            ).join(KnowledgeSource).filter(
+                rank
+            ).join(KnowledgeSource).where(
                 KnowledgeSource.organization_id == organization_id,
-                func.to_tsvector('english', Document.content).match(query)
+                Document.content_tsv.op('@@')(ts_query)
             )
             
             # Apply source filter
             if source_filter:
-                base_query = base_query.filter(KnowledgeSource.id == source_filter)
+                statement = statement.where(KnowledgeSource.id == source_filter)
             
             # Order by relevance and limit results
-            results = base_query.order_by(
-                func.ts_rank(
-                    func.to_tsvector('english', Document.content),
-                    func.plainto_tsquery('english', query)
-                ).desc()
-            ).limit(max_results).all()
+            results = (await db.execute(statement.order_by(rank.desc()).limit(max_results))).all()
             
             # Format results
             search_results = []
             for doc, source_name, rank in results:
                 search_results.append({
                     "document_id": str(doc.id),
-                    "source_id": str(doc.source_id),
+                    "source_id": str(doc.knowledge_source_id),
                     "source_name": source_name,
                     "content": doc.content,
                     "relevance_score": float(rank),
-                    "metadata": doc.metadata,
-                    "chunk_id": doc.chunk_id
+                    "metadata": doc.doc_metadata,
+                    "chunk_id": doc.chunk_index
                 })
             
             logger.info(f"Keyword search returned {len(search_results)} results for query: {query[:50]}...")
@@ -333,7 +415,7 @@ class VectorSearchService:
     
     async def hybrid_search(
         self,
-        db: Session,
+        db: AsyncSession,
         organization_id: str,
         query: str,
         max_results: int = None,
@@ -344,14 +426,17 @@ class VectorSearchService:
         """
         Perform hybrid search combining semantic and keyword search
         
+        Both candidate sets and their reciprocal rank fusion run in one SQL statement,
+        which returns only the top results with content.
+        
         Args:
             db: Database session
             organization_id: Organization ID
             query: Search query
             max_results: Maximum results to return
             source_filter: Filter by knowledge source ID
-            semantic_weight: Weight for semantic search results
-            keyword_weight: Weight for keyword search results
+            semantic_weight: Weight of a document's semantic rank in the fused score
+            keyword_weight: Weight of a document's keyword rank in the fused score
             
         Returns:
             List of reranked search results
@@ -359,90 +444,61 @@ class VectorSearchService:
         try:
             max_results = max_results or self.max_results
             
-            # Perform both searches in parallel
-            semantic_task = self.semantic_search(
-                db, organization_id, query, max_results * 2, source_filter
-            )
-            keyword_task = self.keyword_search(
-                db, organization_id, query, max_results * 2, source_filter
-            )
+            query_embeddings = await self.generate_embeddings([query], "RETRIEVAL_QUERY")
+            if not query_embeddings:
+                return []
             
-            semantic_results, keyword_results = await asyncio.gather(
-                semantic_task, keyword_task
-            )
+            candidates = max_results * HYBRID_CANDIDATE_FACTOR
+            params = {
+                "embedding": vector_literal(query_embeddings[0]),
+                "query": query,
+                "organization_id": organization_id,
+                "source_id": source_filter,
+                "candidates": candidates,
+                "limit": max_results,
+                "rrf_k": RRF_K,
+                "semantic_weight": semantic_weight,
+                "keyword_weight": keyword_weight,
+                "similarity_threshold": self.similarity_threshold
+            }
             
-            # Combine and rerank results
-            combined_results = self._combine_search_results(
-                semantic_results, keyword_results, semantic_weight, keyword_weight
-            )
+            setting = await vector_index_manager.apply_search_params(db, candidates)
+            rows = (await db.execute(HYBRID_SEARCH_SQL, params)).all()
+            
+            # As in semantic_search: a short semantic candidate list means the ANN scan may have run out
+            semantic_candidates = rows[0].semantic_candidates if rows else 0
+            if setting is not None and semantic_candidates < candidates:
+                embedded = await self._embedded_rows(db, organization_id, source_filter, candidates)
+                if embedded > semantic_candidates:
+                    rows = await self._exact_search(db, HYBRID_SEARCH_SQL, params)
+            
+            # Scale fused scores to 0-1 (1 = first in both rankings), the range reranking boosts assume
+            best_score = (semantic_weight + keyword_weight) / (RRF_K + 1) or 1.0
+            combined_results = []
+            for row in rows:
+                combined_results.append({
+                    "document_id": str(row.id),
+                    "source_id": str(row.knowledge_source_id),
+                    "source_name": row.source_name,
+                    "content": row.content,
+                    "metadata": row.doc_metadata,
+                    "chunk_id": row.chunk_index,
+                    "semantic_score": float(row.similarity or 0),
+                    "keyword_score": float(row.relevance or 0),
+                    "combined_score": float(row.score) / best_score
+                })
             
             # Apply reranking if enabled
             if self.rerank_results:
                 combined_results = await self._rerank_results(query, combined_results)
             
-            # Limit final results
-            final_results = combined_results[:max_results]
-            
-            logger.info(f"Hybrid search returned {len(final_results)} results for query: {query[:50]}...")
-            return final_results
+            logger.info(f"Hybrid search returned {len(combined_results)} results for query: {query[:50]}...")
+            return combined_results
             
         except Exception as e:
             logger.error(f"Hybrid search failed: {e}")
             return []
     
-    def _combine_search_results(
-        self,
-        semantic_results: List[Dict[str, Any]],
-        keyword_results: List[Dict[str, Any]],
-        semantic_weight: float,
-        keyword_weight: float
-    ) -> List[Dict[str, Any]]:
-        """Combine and score results from semantic and keyword search"""
-        try:
-            # Create document ID to result mapping
-            all_results = {}
-            
-            # Add semantic results
-            for result in semantic_results:
-                doc_id = result["document_id"]
-                result["semantic_score"] = result.get("similarity_score", 0)
-                result["keyword_score"] = 0
-                all_results[doc_id] = result
-            
-            # Add/update with keyword results
-            for result in keyword_results:
-                doc_id = result["document_id"]
-                if doc_id in all_results:
-                    all_results[doc_id]["keyword_score"] = result.get("relevance_score", 0)
-                else:
-                    result["semantic_score"] = 0
-                    result["keyword_score"] = result.get("relevance_score", 0)
-                    all_results[doc_id] = result
-            
-            # Calculate combined scores
-            for result in all_results.values():
-                # Normalize scores to 0-1 range
-                semantic_norm = min(result["semantic_score"], 1.0)
-                keyword_norm = min(result["keyword_score"] / 10.0, 1.0)  # Assuming max rank ~10
-                
-                result["combined_score"] = (
-                    semantic_weight * semantic_norm + 
-                    keyword_weight * keyword_norm
-                )
-            
-            # Sort by combined score
-            sorted_results = sorted(
-                all_results.values(),
-                key=lambda x: x["combined_score"],
-                reverse=True
-            )
-            
-            return sorted_results
-            
-        except Exception as e:
-            logger.error(f"Result combination failed: {e}")
-            return semantic_results + keyword_results
-    
     async def _rerank_results(
         self,
         query: str,
@@ -536,30 +592,36 @@ class VectorSearchService:
     
     async def get_search_analytics(
         self,
-        db: Session,
+        db: AsyncSession,
         organization_id: str
     ) -> Dict[str, Any]:
         """Get search and embedding analytics"""
         try:
             # Count documents with embeddings
-            embedded_docs = db.query(Document).join(KnowledgeSource).filter(
-                KnowledgeSource.organization_id == organization_id,
-                Document.embedding.isnot(None)
-            ).count()
+            embedded_docs = (await db.execute(
+                select(func.count(Document.id)).join(KnowledgeSource).where(
+                    KnowledgeSource.organization_id == organization_id,
+                    Document.embedding.isnot(None)
+                )
+            )).scalar_one()
             
             # Count total documents
-            total_docs = db.query(Document).join(KnowledgeSource).filter(
-                KnowledgeSource.organization_id == organization_id
-            ).count()
+            total_docs = (await db.execute(
+                select(func.count(Document.id)).join(KnowledgeSource).where(
+                    KnowledgeSource.organization_id == organization_id
+                )
+            )).scalar_one()
             
             # Get embedding coverage by source
-            source_stats = db.query(
-                KnowledgeSource.name,
-                func.count(Document.id).label('total_docs'),
-                func.count(Document.embedding).label('embedded_docs')
-            ).join(Document).filter(
-                KnowledgeSource.organization_id == organization_id
-            ).group_by(KnowledgeSource.name).all()
+            source_stats = (await db.execute(
+                select(
+                    KnowledgeSource.name,
+                    func.count(Document.id).label('total_docs'),
+                    func.count(Document.embedding).label('embedded_docs')
+                ).join(Document).where(
+                    KnowledgeSource.organization_id == organization_id
+                ).group_by(KnowledgeSource.name)
+            )).all()
             
             source_breakdown = []
             for name, total, embedded in source_stats:
@@ -9,13 +9,20 @@ from pgvector.sqlalchemy import Vector
 import logging
 
 # Import database components
-from ..models.database import engine, SessionLocal, Base, get_db, create_tables
+from ..models.database import (
+    engine, SessionLocal, Base, get_db, create_tables, async_engine, AsyncSessionLocal, get_async_db,
+    get_async_read_db, get_pool_stats
+)
 from ..models.user import Document, KnowledgeSource
 
 logger = logging.getLogger(__name__)
 
 # Export database components
-__all__ = ['engine', 'SessionLocal', 'Base', 'get_db', 'create_tables']
+__all__ = [
+    'engine', 'SessionLocal', 'Base', 'get_db', 'create_tables',
+    'async_engine', 'AsyncSessionLocal', 'get_async_db',
+    'get_async_read_db', 'get_pool_stats'
+]
 
 
 class VectorSearchUtils:
@@ -112,13 +119,14 @@ class VectorSearchUtils:
             
             vector_subquery = vector_query.subquery()
             
-            # Text search subquery using pg_trgm
+            # Text search subquery on the GIN-indexed content_tsv; normalisation 32 scales rank to 0-1
+            ts_query = func.plainto_tsquery('english', query_text)
             text_query = db.query(
                 Document.id,
-                func.similarity(Document.content, query_text).label('text_score')
+                func.ts_rank(Document.content_tsv, ts_query, 32).label('text_score')
             ).join(KnowledgeSource).filter(
                 KnowledgeSource.organization_id == organization_id,
-                func.similarity(Document.content, query_text) > 0.1
+                Document.content_tsv.op('@@')(ts_query)
             )
             
             if knowledge_source_ids:
@@ -196,17 +204,37 @@ class DatabaseUtils:
             return {}
     
     @staticmethod
-    def optimize_vector_index(db: Session, table_name: str = "documents") -> bool:
-        """Optimize vector index performance"""
+    def optimize_vector_index(db: Session, table_name: str = "documents", force: bool = False) -> bool:
+        """
+        Rebuild the vector index if the data has drifted from what it was built for
+        
+        Args:
+            db: Database session
+            table_name: Table holding the embeddings
+            force: Rebuild even without drift
+            
+        Returns:
+            True if the index is up to date
+        """
+        from ..services.vector_index_manager import VectorIndexManager, vector_index_manager
+        
+        manager = vector_index_manager
+        if table_name != manager.table:
+            manager = VectorIndexManager(table=table_name, index_name=f"idx_{table_name}_embedding_cosine")
+        
         try:
-            # Analyze table for better query planning
+            # Analyze table for better query planning and row estimates
             db.execute(text(f"ANALYZE {table_name}"))
+            db.commit()
             
-            # Update index statistics
-            db.execute(text(f"REINDEX INDEX idx_{table_name}_embedding_cosine"))
-            
+            check = manager.check_drift(db)
+            # CREATE INDEX CONCURRENTLY waits for open transactions, including this session's
             db.commit()
-            logger.info(f"Optimized vector index for {table_name}")
+            if force or check.rebuild:
+                logger.info(f"Rebuilding vector index for {table_name}: {check.reason or 'forced'}")
+                return manager.rebuild(db.get_bind()) is not None
+            
+            logger.info(f"Vector index for {table_name} is up to date")
             return True
             
         except Exception as e:
@@ -7,13 +7,17 @@ import pytest
 import asyncio
 from typing import AsyncGenerator, Generator
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from fastapi.testclient import TestClient
 from testcontainers.postgres import PostgresContainer
 from testcontainers.redis import RedisContainer
 
 from app.main import app
-from app.utils.database import get_db, Base
+from app.utils.database import get_db, get_async_db, get_async_read_db, Base
+from app.models.database import get_async_database_url
+from app.config.database import db_config
 from app.config.settings import get_settings
 
 
@@ -68,6 +72,13 @@ def test_session_factory(test_engine):
     return sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
 
 
+@pytest.fixture(scope="session")
+def test_async_session_factory(test_database_url, test_engine):
+    """Create async test session factory (no pooling, as each test client runs its own event loop)"""
+    engine = create_async_engine(get_async_database_url(test_database_url), poolclass=NullPool)
+    return async_sessionmaker(engine, expire_on_commit=False)
+
+
 @pytest.fixture
 def test_db_session(test_session_factory):
     """Create test database session"""
@@ -80,7 +91,7 @@ def test_db_session(test_session_factory):
 
 
 @pytest.fixture
-def test_client(test_db_session, test_redis_url):
+def test_client(test_db_session, test_async_session_factory, test_redis_url):
     """Create test client with dependency overrides"""
     
     def override_get_db():
@@ -89,6 +100,10 @@ def test_client(test_db_session, test_redis_url):
         finally:
             pass
     
+    async def override_get_async_db():
+        async with test_async_session_factory() as session:
+            yield session
+    
     def override_get_settings():
         settings = get_settings()
         settings.redis_url = test_redis_url
@@ -96,6 +111,9 @@ def test_client(test_db_session, test_redis_url):
         return settings
     
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    for max_staleness in (db_config.ANALYTICS_MAX_STALENESS, db_config.LIVE_MAX_STALENESS):
+        app.dependency_overrides[get_async_read_db(max_staleness)] = override_get_async_db
     app.dependency_overrides[get_settings] = override_get_settings
     
     with TestClient(app) as client:
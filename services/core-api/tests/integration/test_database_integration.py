@@ -5,13 +5,19 @@ Integration tests for database operations
 import pytest
 from testcontainers.postgres import PostgresContainer
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 import asyncio
+from unittest.mock import AsyncMock, patch
 
 from app.utils.database import Base
-from app.models.user import User, Organization, Assistant, Conversation, Message, KnowledgeSource
+from app.models.database import get_async_database_url
+from app.models.user import User, Organization, Assistant, Conversation, Message, KnowledgeSource, Document
 from app.services.conversation_service import conversation_service
 from app.services.assistant_factory import assistant_factory
+from app.services.vector_search_service import vector_search_service, HYBRID_SEARCH_SQL, RRF_K
+from app.services.vector_index_manager import vector_literal
 
 
 @pytest.fixture(scope="module")
@@ -30,6 +36,15 @@ def integration_db_engine(postgres_container):
     return engine
 
 
+@pytest.fixture(scope="module")
+def integration_async_session_factory(postgres_container, integration_db_engine):
+    """Create async session factory for the read paths that use AsyncSession"""
+    engine = create_async_engine(
+        get_async_database_url(postgres_container.get_connection_url()), poolclass=NullPool
+    )
+    return async_sessionmaker(engine, expire_on_commit=False)
+
+
 @pytest.fixture
 def integration_db_session(integration_db_engine):
     """Create database session for integration tests"""
@@ -197,6 +212,109 @@ class TestDatabaseIntegration:
         assert len(document_sources) == 1
         assert document_sources[0].type == "document"
     
+    @pytest.mark.asyncio
+    async def test_keyword_search_uses_content_tsv(self, integration_db_session, integration_async_session_factory):
+        """Test that the trigger fills content_tsv and keyword search matches through it"""
+        org = Organization(name="Search Test Org", domain="search.test")
+        integration_db_session.add(org)
+        integration_db_session.flush()
+        
+        source = KnowledgeSource(name="Handbook", type="document", organization_id=org.id)
+        integration_db_session.add(source)
+        integration_db_session.flush()
+        
+        contents = ["Refunds are processed within five business days", "Our office is closed on public holidays"]
+        for i, content in enumerate(contents):
+            integration_db_session.add(Document(knowledge_source_id=source.id, content=content, chunk_index=i))
+        integration_db_session.commit()
+        
+        # Populated by the trigger, not by the application
+        filled = integration_db_session.query(Document)\
+            .filter(Document.knowledge_source_id == source.id, Document.content_tsv.isnot(None))\
+            .count()
+        assert filled == 2
+        
+        async with integration_async_session_factory() as session:
+            results = await vector_search_service.keyword_search(session, str(org.id), "refund processing")
+        assert [result["chunk_id"] for result in results] == [0]
+        assert results[0]["relevance_score"] > 0
+    
+    @pytest.mark.asyncio
+    async def test_hybrid_search_fuses_rankings(self, integration_db_session, integration_async_session_factory):
+        """Test that hybrid search ranks a chunk found by both searches above ones found by one"""
+        org = Organization(name="Hybrid Test Org", domain="hybrid.test")
+        integration_db_session.add(org)
+        integration_db_session.flush()
+        
+        source = KnowledgeSource(name="Support", type="document", organization_id=org.id)
+        integration_db_session.add(source)
+        integration_db_session.flush()
+        
+        def embedding(axis):
+            vector = [0.0] * 768
+            vector[axis] = 1.0
+            return vector
+        
+        chunks = [
+            ("How to reset your password from the login page", embedding(0)),  # both
+            ("Password rules for administrators", embedding(5)),               # keyword only
+            ("Recovering access to a locked account", embedding(0)),           # semantic only
+        ]
+        for i, (content, vector) in enumerate(chunks):
+            integration_db_session.add(Document(
+                knowledge_source_id=source.id, content=content, chunk_index=i, embedding=vector
+            ))
+        integration_db_session.commit()
+        
+        with patch.object(vector_search_service, "generate_embeddings", AsyncMock(return_value=[embedding(0)])), \
+                patch.object(vector_search_service, "rerank_results", False, create=True), \
+                patch.object(vector_search_service, "similarity_threshold", 0.5, create=True):
+            async with integration_async_session_factory() as session:
+                results = await vector_search_service.hybrid_search(session, str(org.id), "password", max_results=2)
+        
+        assert len(results) == 2
+        assert results[0]["chunk_id"] == 0
+        assert results[0]["combined_score"] > results[1]["combined_score"]
+        assert results[0]["semantic_score"] == pytest.approx(1.0)
+        assert results[0]["keyword_score"] > 0
+    
+    @pytest.mark.asyncio
+    async def test_hybrid_search_sql_binds_under_asyncpg(self, integration_db_session, integration_async_session_factory):
+        """Test that the fused-score statement accepts float weights through asyncpg's inferred parameter types"""
+        org = Organization(name="Hybrid SQL Org", domain="hybrid-sql.test")
+        integration_db_session.add(org)
+        integration_db_session.flush()
+        
+        source = KnowledgeSource(name="FAQ", type="document", organization_id=org.id)
+        integration_db_session.add(source)
+        integration_db_session.flush()
+        
+        vector = [0.0] * 768
+        vector[0] = 1.0
+        integration_db_session.add(Document(
+            knowledge_source_id=source.id, content="Invoices are emailed monthly", chunk_index=0, embedding=vector
+        ))
+        integration_db_session.commit()
+        
+        params = {
+            "embedding": vector_literal(vector),
+            "query": "invoices",
+            "organization_id": str(org.id),
+            "source_id": None,
+            "candidates": 8,
+            "limit": 2,
+            "rrf_k": RRF_K,
+            "semantic_weight": 0.7,
+            "keyword_weight": 0.3,
+            "similarity_threshold": 0.5
+        }
+        async with integration_async_session_factory() as session:
+            rows = (await session.execute(HYBRID_SEARCH_SQL, params)).all()
+        
+        assert len(rows) == 1
+        assert rows[0].score == pytest.approx(1.0 / (RRF_K + 1))
+        assert rows[0].semantic_candidates == 1
+    
     def test_concurrent_operations(self, integration_db_session):
         """Test concurrent database operations"""
         import threading
@@ -0,0 +1,106 @@
+"""
+Vector Index Benchmark
+Recall@k and latency of HNSW and IVFFlat against exact search, on a local Postgres+pgvector container
+"""
+
+import random
+
+import pytest
+from sqlalchemy import create_engine, text
+from testcontainers.postgres import PostgresContainer
+
+from app.services.vector_index_manager import VectorIndexManager, IndexPlan, HNSW, IVFFLAT, vector_literal
+
+DIMENSIONS = 64
+ROWS = 20_000
+QUERIES = 50
+K = 10
+
+
+def _clustered_vectors(rng: random.Random, count: int, clusters: int = 50):
+    """Unit vectors around random centres, closer to real embeddings than uniform noise"""
+    centres = [[rng.gauss(0, 1) for _ in range(DIMENSIONS)] for _ in range(clusters)]
+    vectors = []
+    for _ in range(count):
+        centre = rng.choice(centres)
+        vector = [value + rng.gauss(0, 0.3) for value in centre]
+        norm = sum(value * value for value in vector) ** 0.5
+        vectors.append([value / norm for value in vector])
+    return vectors
+
+
+@pytest.fixture(scope="module")
+def vector_engine():
+    """Postgres with pgvector and a populated benchmark table"""
+    with PostgresContainer("pgvector/pgvector:pg16", driver="psycopg2") as postgres:
+        engine = create_engine(postgres.get_connection_url())
+        rng = random.Random(42)
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+            conn.execute(text(f"""
+                CREATE TABLE bench_documents (
+                    id SERIAL PRIMARY KEY,
+                    embedding vector({DIMENSIONS}),
+                    created_at TIMESTAMP DEFAULT now()
+                )
+            """))
+            vectors = _clustered_vectors(rng, ROWS)
+            for start in range(0, ROWS, 1000):
+                conn.execute(
+                    text("INSERT INTO bench_documents (embedding) VALUES (CAST(:embedding AS vector))"),
+                    [{"embedding": vector_literal(vector)} for vector in vectors[start:start + 1000]]
+                )
+            conn.execute(text("ANALYZE bench_documents"))
+        yield engine
+        engine.dispose()
+
+
+def _manager() -> VectorIndexManager:
+    return VectorIndexManager(table="bench_documents", index_name="idx_bench_documents_embedding")
+
+
+def _report(method: str, settings) -> None:
+    print(f"\n{method} recall@{K} over {QUERIES} queries, {ROWS} rows x {DIMENSIONS} dims")
+    for setting in settings:
+        print(f"  {setting.value:>5}  recall={setting.recall:.3f}  p50={setting.p50_ms:.2f}ms  p95={setting.p95_ms:.2f}ms")
+
+
+@pytest.mark.integration
+@pytest.mark.performance
+@pytest.mark.slow
+class TestVectorIndexBenchmark:
+    """Build each index method, calibrate it and check the recall/latency trade-off"""
+
+    def test_hnsw(self, vector_engine):
+        """Test HNSW recall rises with ef_search and the tuned setting meets the target"""
+        manager = _manager()
+        plan = manager.rebuild(vector_engine, IndexPlan(method=HNSW, params={"m": 16, "ef_construction": 64}))
+        assert plan.method == HNSW and plan.rows == ROWS
+
+        queries = _clustered_vectors(random.Random(7), QUERIES)
+        settings = manager.calibrate(vector_engine, queries, k=K, values=[10, 20, 40, 80, 160])
+        _report(HNSW, settings)
+
+        assert settings[-1].recall >= settings[0].recall
+        assert settings[-1].recall >= 0.95
+        name, value = manager.search_setting(K, recall_target=0.9, latency_budget_ms=1000)
+        assert name == "hnsw.ef_search"
+        assert next(s for s in settings if s.value == value).recall >= 0.9
+
+    def test_ivfflat(self, vector_engine):
+        """Test IVFFlat recall rises with probes and a table this small is flagged for HNSW"""
+        manager = _manager()
+        plan = manager.rebuild(vector_engine, IndexPlan(method=IVFFLAT, params={"lists": 20}))
+        assert plan.method == IVFFLAT
+
+        queries = _clustered_vectors(random.Random(7), QUERIES)
+        settings = manager.calibrate(vector_engine, queries, k=K, values=[1, 2, 5, 10, 20])
+        _report(IVFFLAT, settings)
+
+        assert settings[-1].recall == pytest.approx(1.0, abs=0.01)
+        assert settings[0].recall < settings[-1].recall
+
+        with vector_engine.connect() as conn:
+            assert manager.load_state(conn).params == {"lists": 20}
+            check = manager.check_drift(conn)
+        assert check.rebuild and check.reason == f"{ROWS} rows call for hnsw"
@@ -11,7 +11,7 @@ from pathlib import Path
 # Add the app directory to Python path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from app.utils.database import get_db
+from app.utils.database import get_db, AsyncSessionLocal
 from app.models.user import Organization, User
 from app.services.knowledge_service import knowledge_service
 from app.services.document_processor import document_processor
@@ -79,40 +79,44 @@ async def test_basic_functionality():
         print("🔍 Testing search functionality...")
         
         # Semantic search
-        semantic_results = await vector_search_service.semantic_search(
-            db=db,
-            organization_id=str(org.id),
-            query="AI platform features",
-            max_results=3
-        )
+        async with AsyncSessionLocal() as async_db:
+            semantic_results = await vector_search_service.semantic_search(
+                db=async_db,
+                organization_id=str(org.id),
+                query="AI platform features",
+                max_results=3
+            )
         print(f"✅ Semantic search: {len(semantic_results)} results")
         
         # Keyword search
-        keyword_results = await vector_search_service.keyword_search(
-            db=db,
-            organization_id=str(org.id),
-            query="support contact",
-            max_results=3
-        )
+        async with AsyncSessionLocal() as async_db:
+            keyword_results = await vector_search_service.keyword_search(
+                db=async_db,
+                organization_id=str(org.id),
+                query="support contact",
+                max_results=3
+            )
         print(f"✅ Keyword search: {len(keyword_results)} results")
         
         # Hybrid search
-        hybrid_results = await vector_search_service.hybrid_search(
-            db=db,
-            organization_id=str(org.id),
-            query="business automation platform",
-            max_results=5
-        )
+        async with AsyncSessionLocal() as async_db:
+            hybrid_results = await vector_search_service.hybrid_search(
+                db=async_db,
+                organization_id=str(org.id),
+                query="business automation platform",
+                max_results=5
+            )
         print(f"✅ Hybrid search: {len(hybrid_results)} results")
         
         # Test knowledge service search
-        knowledge_search = await knowledge_service.search_knowledge_base(
-            db=db,
-            organization_id=str(org.id),
-            query="What is ANZx.ai?",
-            search_type="hybrid",
-            max_results=3
-        )
+        async with AsyncSessionLocal() as async_db:
+            knowledge_search = await knowledge_service.search_knowledge_base(
+                db=async_db,
+                organization_id=str(org.id),
+                query="What is ANZx.ai?",
+                search_type="hybrid",
+                max_results=3
+            )
         print(f"✅ Knowledge service search: {len(knowledge_search['results'])} results")
         print(f"   Search time: {knowledge_search['search_time_ms']}ms")
         
@@ -126,10 +130,11 @@ async def test_basic_functionality():
         
         # Test analytics
         print("\n📊 Testing analytics...")
-        analytics = await knowledge_service.get_knowledge_analytics(
-            db=db,
-            organization_id=str(org.id)
-        )
+        async with AsyncSessionLocal() as async_db:
+            analytics = await knowledge_service.get_knowledge_analytics(
+                db=async_db,
+                organization_id=str(org.id)
+            )
         
         print(f"✅ Analytics generated:")
         print(f"   Total sources: {analytics['processing']['total_sources']}")
@@ -231,13 +236,14 @@ async def test_performance():
         # Test search performance
         search_start = time.time()
         
-        search_results = await knowledge_service.search_knowledge_base(
-            db=db,
-            organization_id=str(org.id),
-            query="business automation processes",
-            search_type="hybrid",
-            max_results=10
-        )
+        async with AsyncSessionLocal() as async_db:
+            search_results = await knowledge_service.search_knowledge_base(
+                db=async_db,
+                organization_id=str(org.id),
+                query="business automation processes",
+                search_type="hybrid",
+                max_results=10
+            )
         
         search_time = time.time() - search_start
         print(f"✅ Search completed in {search_time:.3f} seconds")
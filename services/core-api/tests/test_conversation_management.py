@@ -4,7 +4,7 @@ Conversation Management Tests
 
 import pytest
 import asyncio
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 
@@ -112,10 +112,11 @@ class TestConversationService:
         assert "Organization not found" in str(exc_info.value)
     
     @pytest.mark.asyncio
-    async def test_get_conversations_with_filters(self, conversation_service, mock_db, sample_conversation, sample_assistant):
+    async def test_get_conversations_with_filters(self, conversation_service, sample_conversation):
         """Test getting conversations with filters"""
-        mock_db.query.return_value.filter.return_value.filter.return_value.order_by.return_value.offset.return_value.limit.return_value.all.return_value = [sample_conversation]
-        mock_db.query.return_value.filter.return_value.first.return_value = sample_assistant
+        mock_db = AsyncMock()
+        mock_db.execute.return_value = Mock()
+        mock_db.execute.return_value.scalars.return_value.all.return_value = [sample_conversation]
         
         with patch.object(conversation_service, '_format_conversation') as mock_format:
             mock_format.return_value = {
@@ -223,7 +224,7 @@ class TestConversationService:
         mock_db.commit.assert_called_once()
     
     @pytest.mark.asyncio
-    async def test_get_conversation_analytics(self, conversation_service, mock_db):
+    async def test_get_conversation_analytics(self, conversation_service):
         """Test conversation analytics"""
         # Mock conversations
         conv1 = Mock(spec=Conversation)
@@ -238,10 +239,14 @@ class TestConversationService:
         conv2.total_cost = 0.08
         conv2.metadata = {"channel": "email"}
         
-        mock_db.query.return_value.filter.return_value.all.return_value = [conv1, conv2]
+        def rows(*items):
+            result = Mock()
+            result.scalars.return_value.all.return_value = list(items)
+            return result
         
-        # Mock messages for satisfaction
-        mock_db.query.return_value.filter.return_value.all.return_value = []
+        # Conversations, then each conversation's rated messages
+        mock_db = AsyncMock()
+        mock_db.execute.side_effect = [rows(conv1, conv2), rows(), rows()]
         
         result = await conversation_service.get_conversation_analytics(
             db=mock_db,
@@ -9,10 +9,13 @@ import tempfile
 import os
 from typing import Dict, Any
 from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
 
 from app.main import app
 from app.utils.database import get_db
+from app.models.database import get_async_database_url
 from app.models.user import Organization, User, KnowledgeSource, Document
 from app.services.knowledge_service import knowledge_service
 from app.services.document_processor import document_processor
@@ -21,6 +24,11 @@ from app.services.vector_search_service import vector_search_service
 # Test client
 client = TestClient(app)
 
+# Search runs on AsyncSession; unpooled, as every async test has its own event loop
+AsyncTestSession = async_sessionmaker(
+    create_async_engine(get_async_database_url(), poolclass=NullPool), expire_on_commit=False
+)
+
 # Test data
 SAMPLE_TEXT_CONTENT = """
 ANZx.ai Platform Documentation
@@ -152,33 +160,36 @@ class TestKnowledgeManagementE2E:
         assert all(doc.embedding is not None for doc in documents)
         
         # Step 3: Test semantic search
-        search_results = await vector_search_service.semantic_search(
-            db=db_session,
-            organization_id=str(test_organization.id),
-            query="AI assistant platform features",
-            max_results=5
-        )
+        async with AsyncTestSession() as async_db:
+            search_results = await vector_search_service.semantic_search(
+                db=async_db,
+                organization_id=str(test_organization.id),
+                query="AI assistant platform features",
+                max_results=5
+            )
         
         assert len(search_results) > 0
         assert any("AI assistant" in result["content"] for result in search_results)
         
         # Step 4: Test keyword search
-        keyword_results = await vector_search_service.keyword_search(
-            db=db_session,
-            organization_id=str(test_organization.id),
-            query="subscription plan",
-            max_results=5
-        )
+        async with AsyncTestSession() as async_db:
+            keyword_results = await vector_search_service.keyword_search(
+                db=async_db,
+                organization_id=str(test_organization.id),
+                query="subscription plan",
+                max_results=5
+            )
         
         assert len(keyword_results) > 0
         
         # Step 5: Test hybrid search
-        hybrid_results = await vector_search_service.hybrid_search(
-            db=db_session,
-            organization_id=str(test_organization.id),
-            query="getting started with ANZx",
-            max_results=5
-        )
+        async with AsyncTestSession() as async_db:
+            hybrid_results = await vector_search_service.hybrid_search(
+                db=async_db,
+                organization_id=str(test_organization.id),
+                query="getting started with ANZx",
+                max_results=5
+            )
         
         assert len(hybrid_results) > 0
         assert all("combined_score" in result for result in hybrid_results)
@@ -228,25 +239,27 @@ class TestKnowledgeManagementE2E:
         assert faq_result["status"] == "completed"
         
         # Test search across all sources
-        all_results = await vector_search_service.hybrid_search(
-            db=db_session,
-            organization_id=str(test_organization.id),
-            query="password reset",
-            max_results=10
-        )
+        async with AsyncTestSession() as async_db:
+            all_results = await vector_search_service.hybrid_search(
+                db=async_db,
+                organization_id=str(test_organization.id),
+                query="password reset",
+                max_results=10
+            )
         
         # Should find results from FAQ source
         assert len(all_results) > 0
         assert any("password" in result["content"].lower() for result in all_results)
         
         # Test filtered search (only FAQ source)
-        faq_results = await vector_search_service.hybrid_search(
-            db=db_session,
-            organization_id=str(test_organization.id),
-            query="subscription plans",
-            max_results=10,
-            source_filter=faq_result["source_id"]
-        )
+        async with AsyncTestSession() as async_db:
+            faq_results = await vector_search_service.hybrid_search(
+                db=async_db,
+                organization_id=str(test_organization.id),
+                query="subscription plans",
+                max_results=10,
+                source_filter=faq_result["source_id"]
+            )
         
         # Should only find results from FAQ source
         assert len(faq_results) > 0
@@ -384,10 +397,11 @@ class TestKnowledgeManagementE2E:
         assert update_result["name"] == "Updated Lifecycle Test"
         
         # Get analytics
-        analytics = await knowledge_service.get_knowledge_analytics(
-            db=db_session,
-            organization_id=str(test_organization.id)
-        )
+        async with AsyncTestSession() as async_db:
+            analytics = await knowledge_service.get_knowledge_analytics(
+                db=async_db,
+                organization_id=str(test_organization.id)
+            )
         
         assert "processing" in analytics
         assert "search" in analytics
@@ -441,13 +455,14 @@ class TestKnowledgeManagementE2E:
         import time
         
         start_time = time.time()
-        search_results = await knowledge_service.search_knowledge_base(
-            db=db_session,
-            organization_id=str(test_organization.id),
-            query="AI assistant platform",
-            search_type="hybrid",
-            max_results=10
-        )
+        async with AsyncTestSession() as async_db:
+            search_results = await knowledge_service.search_knowledge_base(
+                db=async_db,
+                organization_id=str(test_organization.id),
+                query="AI assistant platform",
+                search_type="hybrid",
+                max_results=10
+            )
         end_time = time.time()
         
         search_time_ms = (end_time - start_time) * 1000
@@ -491,11 +506,12 @@ class TestKnowledgeManagementE2E:
             )
         
         # Test search with invalid organization
-        search_results = await vector_search_service.semantic_search(
-            db=db_session,
-            organization_id="invalid_org_id",
-            query="test query"
-        )
+        async with AsyncTestSession() as async_db:
+            search_results = await vector_search_service.semantic_search(
+                db=async_db,
+                organization_id="invalid_org_id",
+                query="test query"
+            )
         assert len(search_results) == 0
         
         # Test get non-existent knowledge source
@@ -579,13 +595,14 @@ async def test_complete_rag_pipeline():
         assert result["status"] == "completed"
         
         # Test knowledge retrieval (simulating agent query)
-        search_result = await knowledge_service.search_knowledge_base(
-            db=db,
-            organization_id=str(org.id),
-            query="What is ANZx.ai?",
-            search_type="hybrid",
-            max_results=3
-        )
+        async with AsyncTestSession() as async_db:
+            search_result = await knowledge_service.search_knowledge_base(
+                db=async_db,
+                organization_id=str(org.id),
+                query="What is ANZx.ai?",
+                search_type="hybrid",
+                max_results=3
+            )
         
         assert len(search_result["results"]) > 0
         
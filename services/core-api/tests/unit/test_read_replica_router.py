@@ -0,0 +1,100 @@
+"""
+Unit tests for routing read-only sessions to the read replica
+"""
+
+import asyncio
+import pytest
+from unittest.mock import Mock, AsyncMock, patch
+
+from app.models.database import ReadReplicaRouter
+
+
+@pytest.fixture
+def replica_engine():
+    """Pretend a read replica is configured"""
+    with patch("app.models.database.async_read_engine", Mock()):
+        yield
+
+
+@pytest.mark.unit
+class TestReadReplicaRouter:
+    """Test routing read-only sessions between the replica and the primary"""
+    
+    @pytest.mark.asyncio
+    async def test_disabled_without_replica(self):
+        """Test that reads stay on the primary when no replica is configured"""
+        router = ReadReplicaRouter()
+        with patch("app.models.database.async_read_engine", None):
+            assert router.use_replica(300) is False
+        assert router._check_task is None
+    
+    @pytest.mark.asyncio
+    async def test_routes_by_staleness(self, replica_engine):
+        """Test that the measured lag decides per tolerance, checked once per interval"""
+        router = ReadReplicaRouter()
+        router._query_lag = AsyncMock(return_value=30.0)
+        
+        # Nothing measured yet: the primary serves while the check runs in the background
+        assert router.use_replica(300) is False
+        await router._check_task
+        
+        assert router.use_replica(300) is True
+        assert router.use_replica(10) is False
+        assert router.lag_seconds == 30.0
+        router._query_lag.assert_awaited_once()
+        assert router.routed == {"replica": 1, "primary": 2}
+    
+    @pytest.mark.asyncio
+    async def test_single_flight_check(self, replica_engine):
+        """Test that concurrent requests share one lag check and don't wait for it"""
+        router = ReadReplicaRouter()
+        release = asyncio.Event()
+        
+        async def query_lag():
+            await release.wait()
+            return 0.0
+        
+        router._query_lag = Mock(side_effect=query_lag)
+        
+        assert [router.use_replica(300) for _ in range(5)] == [False] * 5
+        release.set()
+        await router._check_task
+        
+        assert router._query_lag.call_count == 1
+        assert router.use_replica(300) is True
+    
+    @pytest.mark.asyncio
+    async def test_slow_replica_times_out(self, replica_engine):
+        """Test that an unresponsive replica is given up on and reads go to the primary"""
+        router = ReadReplicaRouter()
+        
+        async def query_lag():
+            await asyncio.sleep(60)
+        
+        router._query_lag = query_lag
+        
+        with patch("app.models.database.db_config.READ_REPLICA_LAG_CHECK_TIMEOUT", 0.01):
+            assert await router.check_lag() is None
+        
+        assert router.use_replica(300) is False
+    
+    @pytest.mark.asyncio
+    async def test_falls_back_when_unreachable(self, replica_engine):
+        """Test that a failed lag check sends reads to the primary"""
+        router = ReadReplicaRouter()
+        router._query_lag = AsyncMock(side_effect=Exception("connection refused"))
+        
+        assert await router.check_lag() is None
+        assert router.use_replica(300) is False
+    
+    @pytest.mark.asyncio
+    async def test_measurement_age_counts_as_lag(self, replica_engine):
+        """Test that an old measurement no longer meets a tight tolerance"""
+        router = ReadReplicaRouter()
+        router._query_lag = AsyncMock(return_value=0.0)
+        await router.check_lag()
+        
+        router._checked_at -= 20
+        with patch.object(router, "_check_due", return_value=False):
+            assert router.use_replica(300) is True
+            assert router.use_replica(10) is False
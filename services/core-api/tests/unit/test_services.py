@@ -3,7 +3,7 @@ Unit tests for service layer
 """
 
 import pytest
-from unittest.mock import Mock, AsyncMock, patch
+from unittest.mock import Mock, MagicMock, AsyncMock, patch
 from datetime import datetime
 
 from app.services.assistant_factory import assistant_factory, SupportAssistant
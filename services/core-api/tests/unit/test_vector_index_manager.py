@@ -0,0 +1,118 @@
+"""
+Unit tests for vector index planning and query tuning
+"""
+
+import pytest
+from unittest.mock import Mock, MagicMock, AsyncMock
+
+from app.services.vector_index_manager import (
+    VectorIndexManager, IndexPlan, SearchSetting, HNSW, IVFFLAT, _storage_param
+)
+
+
+@pytest.mark.unit
+class TestVectorIndexManager:
+    """Test vector index planning and query tuning"""
+    
+    def test_plan_by_row_count(self):
+        """Test HNSW for small tables and IVFFlat sized to large ones"""
+        manager = VectorIndexManager()
+        manager.config = Mock(
+            VECTOR_INDEX_METHOD="auto", VECTOR_HNSW_MAX_ROWS=2_000_000,
+            HNSW_M=16, HNSW_EF_CONSTRUCTION=64, IVFFLAT_LISTS=100
+        )
+        
+        small = manager.plan_for(50_000)
+        assert small.method == HNSW
+        assert small.with_clause() == "m = 16, ef_construction = 64"
+        
+        large = manager.plan_for(4_000_000)
+        assert large.method == IVFFLAT
+        assert large.params == {"lists": 2000}
+        
+        manager.config.VECTOR_INDEX_METHOD = IVFFLAT
+        assert manager.plan_for(500_000).params == {"lists": 500}
+    
+    def test_search_setting_heuristics(self):
+        """Test ef_search/probes defaults before calibration"""
+        manager = VectorIndexManager()
+        assert manager.search_setting(10) is None
+        
+        manager.current = IndexPlan(method=HNSW, params={"m": 16, "ef_construction": 64})
+        assert manager.search_setting(10, recall_target=0.95) == ("hnsw.ef_search", 40)
+        assert manager.search_setting(50, recall_target=0.99) == ("hnsw.ef_search", 600)
+        
+        manager.current = IndexPlan(method=IVFFLAT, params={"lists": 100})
+        assert manager.search_setting(10, recall_target=0.95) == ("ivfflat.probes", 10)
+        assert manager.search_setting(10, recall_target=1.0) == ("ivfflat.probes", 50)
+    
+    def test_search_setting_calibrated(self):
+        """Test choosing the cheapest measured value that meets recall within budget"""
+        manager = VectorIndexManager()
+        manager.current = IndexPlan(method=IVFFLAT, params={"lists": 100})
+        manager._calibration[IVFFLAT] = [
+            SearchSetting(IVFFLAT, 4, 0.82, 2.0, 3.0),
+            SearchSetting(IVFFLAT, 8, 0.93, 3.0, 5.0),
+            SearchSetting(IVFFLAT, 16, 0.97, 6.0, 9.0),
+            SearchSetting(IVFFLAT, 32, 0.99, 12.0, 20.0)
+        ]
+        
+        assert manager.search_setting(10, 0.95, 50) == ("ivfflat.probes", 16)
+        assert manager.search_setting(10, 0.99, 10) == ("ivfflat.probes", 16)
+        assert manager.search_setting(10, 0.99, 50) == ("ivfflat.probes", 32)
+    
+    @pytest.mark.asyncio
+    async def test_apply_search_params(self):
+        """Test that the setting is applied with SET LOCAL and failures are tolerated"""
+        manager = VectorIndexManager()
+        manager.current = IndexPlan(method=HNSW, params={})
+        db = MagicMock()
+        db.execute = AsyncMock()
+        db.begin_nested.return_value.__aexit__.return_value = False
+        
+        assert await manager.apply_search_params(db, 10, recall_target=0.95) == ("hnsw.ef_search", 40)
+        assert "SET LOCAL hnsw.ef_search = 40" in str(db.execute.call_args[0][0])
+        
+        db.execute.side_effect = Exception("unrecognized configuration parameter")
+        assert await manager.apply_search_params(db, 10) is None
+    
+    def test_refresh_state(self):
+        """Test loading the existing index so searches are tuned without a maintenance pass"""
+        manager = VectorIndexManager()
+        conn = MagicMock()
+        conn.execute.return_value.first.return_value = (
+            "CREATE INDEX idx_documents_embedding_cosine ON public.documents "
+            "USING hnsw (embedding vector_cosine_ops)", None
+        )
+        engine = MagicMock()
+        engine.connect.return_value.__enter__.return_value = conn
+        
+        assert manager.refresh_state(engine).method == HNSW
+        assert manager.search_setting(10, recall_target=0.95) == ("hnsw.ef_search", 40)
+    
+    def test_build_memory_reset(self):
+        """Test that the build's maintenance_work_mem doesn't outlive it on the pooled connection"""
+        manager = VectorIndexManager()
+        manager.config = Mock(VECTOR_INDEX_BUILD_MEMORY="512MB")
+        manager.count_rows = Mock(return_value=1000)
+        
+        def execute(statement, *args):
+            if "CREATE INDEX" in str(statement):
+                raise Exception("out of memory")
+            return MagicMock()
+        
+        conn = MagicMock()
+        conn.execute.side_effect = execute
+        
+        with pytest.raises(Exception, match="out of memory"):
+            manager._build_and_swap(conn, IndexPlan(method=HNSW, params={"m": 16, "ef_construction": 64}))
+        
+        statements = [str(call[0][0]) for call in conn.execute.call_args_list]
+        assert statements[-1] == "RESET maintenance_work_mem"
+    
+    def test_storage_param(self):
+        """Test reading lists from an index definition"""
+        indexdef = ("CREATE INDEX idx_documents_embedding_cosine ON public.documents "
+                    "USING ivfflat (embedding vector_cosine_ops) WITH (lists='250')")
+        assert _storage_param(indexdef, "lists") == 250
+        assert _storage_param(indexdef, "m") is None
@@ -0,0 +1,57 @@
+"""
+Unit tests for vector search service
+"""
+
+import importlib
+import pytest
+from unittest.mock import Mock, MagicMock, AsyncMock, patch
+
+from app.config.vertex_ai import VertexAIConfig
+
+
+@pytest.fixture
+def search_service_class():
+    """Import the service with the embedding and search settings it reads at import time"""
+    embedding_config = {"model": "text-embedding-004", "dimensions": 768, "batch_size": 5}
+    search_config = {"max_results": 10, "similarity_threshold": 0.7, "rerank_results": True}
+    with patch.object(VertexAIConfig, "EMBEDDING_CONFIG", embedding_config, create=True), \
+            patch.object(VertexAIConfig, "SEARCH_CONFIG", search_config, create=True):
+        module = importlib.import_module("app.services.vector_search_service")
+        yield module.VectorSearchService
+
+
+@pytest.mark.unit
+class TestVectorSearchService:
+    """Test the exact-search fallback after a short ANN scan"""
+    
+    @pytest.mark.asyncio
+    async def test_hybrid_search_exact_retry(self, search_service_class):
+        """Test that a short candidate list is only searched again when the organisation has more rows"""
+        service = search_service_class()
+        service.rerank_results = False
+        service.generate_embeddings = AsyncMock(return_value=[[0.1] * 768])
+        row = Mock(
+            id="doc", knowledge_source_id="source", source_name="Handbook", content="text",
+            doc_metadata={}, chunk_index=0, score=0.01, similarity=0.9, relevance=0.1,
+            semantic_candidates=3
+        )
+        service._exact_search = AsyncMock(return_value=[row])
+        embedded = Mock()
+        
+        def execute(statement, params=None):
+            return embedded if params is None else Mock(all=Mock(return_value=[row]))
+        
+        db = MagicMock()
+        db.execute = AsyncMock(side_effect=execute)
+        
+        with patch("app.services.vector_search_service.vector_index_manager") as manager:
+            manager.apply_search_params = AsyncMock(return_value=("hnsw.ef_search", 40))
+            
+            # Every embedded row was a candidate: the ANN scan didn't miss any
+            embedded.scalar_one.return_value = 3
+            assert len(await service.hybrid_search(db, "org", "query", max_results=5)) == 1
+            service._exact_search.assert_not_called()
+            
+            embedded.scalar_one.return_value = 20
+            await service.hybrid_search(db, "org", "query", max_results=5)
+            service._exact_search.assert_called_once()
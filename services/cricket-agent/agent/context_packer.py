@@ -0,0 +1,126 @@
+"""
+Context packing for Cricket Agent prompts
+Deduplicates retrieved snippets and fits them, best first, into a per-intent token budget
+"""
+
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Sequence, Set
+
+logger = logging.getLogger(__name__)
+
+# Characters per token for the rough estimate used throughout the agent
+CHARS_PER_TOKEN = 4
+
+# Two snippets sharing at least this fraction of their lines are treated as the same snippet
+LINE_OVERLAP_THRESHOLD = 0.8
+
+# Don't bother truncating a snippet into less room than this
+MIN_PARTIAL_TOKENS = 32
+
+SNIPPET_SEPARATOR = "\n\n"
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token)"""
+    if not text:
+        return 0
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+@dataclass
+class PackedContext:
+    """Context text ready for a prompt, plus what went into it"""
+    text: str
+    tokens: int
+    doc_ids: List[str] = field(default_factory=list)
+    duplicates: int = 0
+    truncated: int = 0
+    dropped: int = 0
+
+
+def _normalize_line(line: str) -> str:
+    return _WHITESPACE.sub(" ", line).strip().lower()
+
+
+def _line_set(text: str) -> Set[str]:
+    return {line for line in (_normalize_line(line) for line in text.splitlines()) if line}
+
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to roughly max_tokens, preferring whole lines"""
+    # Leave room for the rounding in estimate_tokens and the ellipsis
+    max_chars = max(1, max_tokens - 1) * CHARS_PER_TOKEN - 2
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind("\n", 0, max_chars)
+    if cut <= 0:
+        cut = text.rfind(" ", 0, max_chars)
+    if cut <= 0:
+        cut = max_chars
+    return text[:cut].rstrip() + " …"
+
+
+def pack_context(hits: Sequence[Dict[str, Any]], budget_tokens: int) -> PackedContext:
+    """
+    Pack retrieved snippets into a token budget
+
+    Args:
+        hits: Retrieved documents ({"id", "text", optional "score"}), best first when unscored
+        budget_tokens: Maximum estimated tokens for the packed context
+
+    Returns:
+        PackedContext with the highest-scoring distinct snippets that fit; the last one
+        may be truncated at a line boundary
+    """
+    # Stable sort, so unscored hits keep their retrieval rank
+    ranked = sorted(hits, key=lambda hit: -(hit.get("score") or 0.0))
+
+    packed = PackedContext(text="", tokens=0)
+    parts: List[str] = []
+    kept_lines: List[Set[str]] = []
+    kept_texts: List[str] = []
+    separator_tokens = estimate_tokens(SNIPPET_SEPARATOR)
+
+    for hit in ranked:
+        text = (hit.get("text") or "").strip()
+        if not text:
+            continue
+
+        # Drop exact and overlapping duplicates: contained in a kept snippet, or mostly the same lines
+        normalized = _normalize_line(text)
+        lines = _line_set(text)
+        if any(normalized in kept for kept in kept_texts) or any(
+            lines and len(lines & kept) / len(lines) >= LINE_OVERLAP_THRESHOLD for kept in kept_lines
+        ):
+            packed.duplicates += 1
+            continue
+
+        remaining = budget_tokens - packed.tokens - (separator_tokens if parts else 0)
+        tokens = estimate_tokens(text)
+        if tokens > remaining:
+            if remaining < MIN_PARTIAL_TOKENS:
+                packed.dropped += 1
+                continue
+            text = _truncate_to_tokens(text, remaining)
+            tokens = estimate_tokens(text)
+            packed.truncated += 1
+
+        if parts:
+            packed.tokens += separator_tokens
+        parts.append(text)
+        packed.tokens += tokens
+        kept_texts.append(normalized)
+        kept_lines.append(lines)
+        if hit.get("id") is not None:
+            packed.doc_ids.append(hit["id"])
+
+    packed.text = SNIPPET_SEPARATOR.join(parts)
+    if packed.duplicates or packed.truncated or packed.dropped:
+        logger.info(f"Packed {len(parts)} snippets into {packed.tokens}/{budget_tokens} tokens "
+                    f"({packed.duplicates} duplicate, {packed.truncated} truncated, {packed.dropped} dropped)")
+    return packed
+
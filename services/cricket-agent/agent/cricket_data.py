@@ -0,0 +1,532 @@
+"""
+In-memory cricket data for Cricket Agent
+Versioned, immutable snapshots of the normalised PlayHQ models, built by the sync job and indexed
+for direct lookups so structured questions are answered without the LLM
+"""
+
+import bisect
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from models.fixture import Fixture, MatchStatus
+from models.ladder import Ladder, LadderEntry
+from models.roster import Roster
+from models.scorecard import BattingStats, Scorecard
+from models.team import Team
+
+logger = logging.getLogger(__name__)
+
+# Last published snapshot, kept for a fast start without waiting for a sync
+DATA_SNAPSHOT_PATH = "/tmp/cricket-data/snapshot.json"
+DATA_SNAPSHOT_GCS_PATH = "cricket_data/snapshot.json"
+DATA_SNAPSHOT_FORMAT = 1
+
+
+def to_utc(dt: datetime) -> datetime:
+    """Timezone-aware UTC datetime; naive values are taken as UTC"""
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def _name_key(name: str) -> str:
+    return " ".join(name.lower().split())
+
+
+class CricketDataSnapshot:
+    """One published version of the synced data; indexes are built once and never change"""
+
+    def __init__(
+        self,
+        version: str = "",
+        created_at: Optional[datetime] = None,
+        teams: Iterable[Team] = (),
+        fixtures: Iterable[Tuple[str, Fixture]] = (),
+        ladders: Iterable[Ladder] = (),
+        rosters: Iterable[Roster] = (),
+        scorecards: Iterable[Scorecard] = ()
+    ):
+        """
+        Args:
+            version: Content version of the snapshot
+            created_at: When the snapshot was built
+            teams: Teams
+            fixtures: (team_id, fixture) pairs for the teams we sync fixtures for
+            ladders: Ladders, one per grade
+            rosters: Rosters, one per team
+            scorecards: Scorecards of completed matches
+        """
+        self.version = version
+        self.created_at = created_at
+        self.teams: Dict[str, Team] = {team.id: team for team in teams}
+        self.ladders: Dict[str, Ladder] = {ladder.grade_id: ladder for ladder in ladders}
+        self.rosters: Dict[str, Roster] = {roster.team_id: roster for roster in rosters}
+        self.scorecards: Dict[str, Scorecard] = {scorecard.id: scorecard for scorecard in scorecards}
+        self.fixtures: Dict[str, Fixture] = {}
+
+        # Team names: team records win over names seen on fixtures and rosters
+        self._team_ids: Dict[str, str] = {}  # lower-case name -> team_id
+        self._team_names: Dict[str, str] = {}  # team_id -> display name
+        for team in self.teams.values():
+            self._add_name(team.name, team.id, replace=True)
+
+        # Fixtures: (date, id) keys sorted per team, and across all teams for date ranges
+        self._fixture_team: Dict[str, str] = {}
+        self._team_fixture_keys: Dict[str, List[Tuple[datetime, str]]] = {}
+        for team_id, fixture in fixtures:
+            self.fixtures[fixture.id] = fixture
+            self._fixture_team[fixture.id] = team_id
+            self._team_fixture_keys.setdefault(team_id, []).append((to_utc(fixture.date), fixture.id))
+            self._add_name(fixture.home_team if fixture.home_team_id == team_id else fixture.away_team, team_id)
+        for keys in self._team_fixture_keys.values():
+            keys.sort()
+        self._fixture_keys = sorted((to_utc(fixture.date), fixture.id) for fixture in self.fixtures.values())
+
+        # Ladders: each team's entry, and the teams in each grade
+        self._ladder_entries: Dict[str, Tuple[str, LadderEntry]] = {}  # team_id -> (grade_id, entry)
+        self._grade_teams: Dict[str, List[str]] = {}
+        for ladder in self.ladders.values():
+            for entry in ladder.entries:
+                self._ladder_entries[entry.team_id] = (ladder.grade_id, entry)
+                self._grade_teams.setdefault(ladder.grade_id, []).append(entry.team_id)
+        for team in self.teams.values():
+            if team.grade_id and team.id not in self._grade_teams.get(team.grade_id, []):
+                self._grade_teams.setdefault(team.grade_id, []).append(team.id)
+
+        # Players: the teams they are listed or have batted for, and their innings in date order
+        self._player_teams: Dict[str, List[str]] = {}
+        for roster in self.rosters.values():
+            self._add_name(roster.team_name, roster.team_id)
+            for player in roster.players:
+                self._add_player_team(player.name, roster.team_id)
+        self._innings: Dict[str, List[Tuple[datetime, str, int]]] = {}  # name -> (date, scorecard_id, batting index)
+        for scorecard in self.scorecards.values():
+            for team_scorecard in (scorecard.home_team, scorecard.away_team):
+                for position, batting in enumerate(team_scorecard.batting):
+                    self._innings.setdefault(_name_key(batting.player_name), []).append(
+                        (to_utc(scorecard.date), scorecard.id, position if team_scorecard is scorecard.home_team else -1 - position)
+                    )
+                    self._add_player_team(batting.player_name, team_scorecard.team_id)
+        for innings in self._innings.values():
+            innings.sort()
+
+    def is_empty(self) -> bool:
+        """True if the snapshot holds no data"""
+        return not (self.teams or self.fixtures or self.ladders or self.rosters or self.scorecards)
+
+    def team_id_for_name(self, name: str) -> Optional[str]:
+        """Team ID for an exact (case-insensitive) team name"""
+        return self._team_ids.get(name.lower().strip())
+
+    def team_name(self, team_id: str) -> Optional[str]:
+        """Display name of a team"""
+        return self._team_names.get(team_id)
+
+    def team_names(self) -> Dict[str, str]:
+        """Known lower-case team names and their IDs"""
+        return self._team_ids
+
+    def teams_in_grade(self, grade_id: str) -> List[str]:
+        """IDs of the teams in a grade"""
+        return list(self._grade_teams.get(grade_id, []))
+
+    def has_fixtures(self, team_id: str) -> bool:
+        """Whether any fixtures were synced for a team"""
+        return bool(self._team_fixture_keys.get(team_id))
+
+    def fixtures_for_team(self, team_id: str) -> List[Fixture]:
+        """A team's fixtures in date order"""
+        return [self.fixtures[fixture_id] for _, fixture_id in self._team_fixture_keys.get(team_id, [])]
+
+    def next_fixture(self, team_id: str, now: Optional[datetime] = None) -> Optional[Fixture]:
+        """
+        First scheduled fixture for a team at or after now
+
+        Args:
+            team_id: Team ID
+            now: Reference time (defaults to the current time)
+
+        Returns:
+            The next scheduled fixture, or None if there is none
+        """
+        now = to_utc(now) if now else datetime.now(timezone.utc)
+        keys = self._team_fixture_keys.get(team_id, [])
+        for _, fixture_id in keys[bisect.bisect_left(keys, (now, "")):]:
+            fixture = self.fixtures[fixture_id]
+            if fixture.status == MatchStatus.SCHEDULED:
+                return fixture
+        return None
+
+    def fixtures_between(self, start: datetime, end: datetime) -> List[Fixture]:
+        """Fixtures of all synced teams with start <= date < end, in date order"""
+        low = bisect.bisect_left(self._fixture_keys, (to_utc(start), ""))
+        high = bisect.bisect_left(self._fixture_keys, (to_utc(end), ""))
+        return [self.fixtures[fixture_id] for _, fixture_id in self._fixture_keys[low:high]]
+
+    def ladder(self, grade_id: str) -> Optional[Ladder]:
+        """A grade's ladder"""
+        return self.ladders.get(grade_id)
+
+    def ladder_position(self, team_id: str) -> Optional[Tuple[Ladder, LadderEntry]]:
+        """A team's ladder and its entry on it"""
+        found = self._ladder_entries.get(team_id)
+        if found is None:
+            return None
+        grade_id, entry = found
+        return self.ladders[grade_id], entry
+
+    def roster(self, team_id: str) -> Optional[Roster]:
+        """A team's roster"""
+        return self.rosters.get(team_id)
+
+    def player_teams(self, name: str) -> List[str]:
+        """IDs of the teams a player is listed or has batted for"""
+        return list(self._player_teams.get(_name_key(name), []))
+
+    def last_innings(self, name: str) -> Optional[Tuple[Scorecard, BattingStats]]:
+        """A player's most recent innings, with the scorecard it is on"""
+        innings = self._innings.get(_name_key(name))
+        if not innings:
+            return None
+        _, scorecard_id, position = innings[-1]
+        scorecard = self.scorecards[scorecard_id]
+        if position >= 0:
+            return scorecard, scorecard.home_team.batting[position]
+        return scorecard, scorecard.away_team.batting[-1 - position]
+
+    def fixture_pairs(self) -> List[Tuple[str, Fixture]]:
+        """(team_id, fixture) pairs the snapshot was built from"""
+        return [(self._fixture_team[fixture_id], fixture) for fixture_id, fixture in self.fixtures.items()]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get snapshot statistics"""
+        return {
+            "version": self.version,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "teams": len(self.teams),
+            "fixtures": len(self.fixtures),
+            "ladders": len(self.ladders),
+            "rosters": len(self.rosters),
+            "scorecards": len(self.scorecards),
+            "players": len(self._player_teams)
+        }
+
+    def _add_name(self, name: str, team_id: str, replace: bool = False) -> None:
+        """Index a team name"""
+        if not name or not team_id:
+            return
+        if replace or team_id not in self._team_names:
+            self._team_names[team_id] = name
+        if replace:
+            self._team_ids[name.lower()] = team_id
+        else:
+            self._team_ids.setdefault(name.lower(), team_id)
+
+    def _add_player_team(self, name: str, team_id: str) -> None:
+        """Index a team a player belongs to"""
+        teams = self._player_teams.setdefault(_name_key(name), [])
+        if team_id and team_id not in teams:
+            teams.append(team_id)
+
+
+class CricketDataBuilder:
+    """Collects models during a sync and builds the next snapshot"""
+
+    def __init__(self, base: Optional[CricketDataSnapshot] = None):
+        """
+        Args:
+            base: Snapshot to start from, so a partial refresh keeps the data it didn't fetch
+        """
+        self._lock = threading.Lock()
+        self.teams: Dict[str, Team] = dict(base.teams) if base else {}
+        self.fixtures: Dict[str, Tuple[str, Fixture]] = (
+            {fixture.id: (team_id, fixture) for team_id, fixture in base.fixture_pairs()} if base else {}
+        )
+        self.ladders: Dict[str, Ladder] = dict(base.ladders) if base else {}
+        self.rosters: Dict[str, Roster] = dict(base.rosters) if base else {}
+        self.scorecards: Dict[str, Scorecard] = dict(base.scorecards) if base else {}
+
+    def add_team(self, team: Optional[Team]) -> None:
+        """Add or replace a team"""
+        if team is not None:
+            with self._lock:
+                self.teams[team.id] = team
+
+    def add_fixture(self, fixture: Optional[Fixture], team_id: str) -> None:
+        """Add or replace a fixture of one of our teams"""
+        if fixture is not None:
+            with self._lock:
+                self.fixtures[fixture.id] = (team_id, fixture)
+
+    def add_ladder(self, ladder: Optional[Ladder]) -> None:
+        """Add or replace a grade's ladder"""
+        if ladder is not None:
+            with self._lock:
+                self.ladders[ladder.grade_id] = ladder
+
+    def add_roster(self, roster: Optional[Roster]) -> None:
+        """Add or replace a team's roster"""
+        if roster is not None:
+            with self._lock:
+                self.rosters[roster.team_id] = roster
+
+    def add_scorecard(self, scorecard: Optional[Scorecard]) -> None:
+        """Add or replace a match scorecard"""
+        if scorecard is not None:
+            with self._lock:
+                self.scorecards[scorecard.id] = scorecard
+
+    def rebase(self, base: CricketDataSnapshot) -> "CricketDataBuilder":
+        """Builder seeded with base, with everything added here laid over it"""
+        builder = CricketDataBuilder(base)
+        with self._lock:
+            builder.teams.update(self.teams)
+            builder.fixtures.update(self.fixtures)
+            builder.ladders.update(self.ladders)
+            builder.rosters.update(self.rosters)
+            builder.scorecards.update(self.scorecards)
+        return builder
+
+    def build(self) -> CricketDataSnapshot:
+        """Build an immutable snapshot, versioned by a hash of its content"""
+        with self._lock:
+            teams = list(self.teams.values())
+            fixtures = list(self.fixtures.values())
+            ladders = list(self.ladders.values())
+            rosters = list(self.rosters.values())
+            scorecards = list(self.scorecards.values())
+
+        body = _encode_body(teams, fixtures, ladders, rosters, scorecards)
+        version = hashlib.sha1(json.dumps(body, sort_keys=True, separators=(",", ":")).encode()).hexdigest()[:16]
+        return CricketDataSnapshot(version, datetime.now(timezone.utc), teams, fixtures, ladders, rosters, scorecards)
+
+
+def _dump(model: Any) -> Dict[str, Any]:
+    return model.model_dump(mode="json", exclude_none=True)
+
+
+def _encode_body(teams, fixtures, ladders, rosters, scorecards) -> Dict[str, Any]:
+    """JSON-ready snapshot content"""
+    return {
+        "teams": [_dump(team) for team in teams],
+        "fixtures": [{"team_id": team_id, "fixture": _dump(fixture)} for team_id, fixture in fixtures],
+        "ladders": [_dump(ladder) for ladder in ladders],
+        "rosters": [_dump(roster) for roster in rosters],
+        "scorecards": [_dump(scorecard) for scorecard in scorecards]
+    }
+
+
+def encode_data_snapshot(snapshot: CricketDataSnapshot) -> bytes:
+    """Serialise a snapshot to compact JSON"""
+    payload = {
+        "format": DATA_SNAPSHOT_FORMAT,
+        "version": snapshot.version,
+        "created_at": snapshot.created_at.isoformat() if snapshot.created_at else None,
+        **_encode_body(
+            snapshot.teams.values(), snapshot.fixture_pairs(), snapshot.ladders.values(),
+            snapshot.rosters.values(), snapshot.scorecards.values()
+        )
+    }
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def decode_data_snapshot(data: bytes) -> CricketDataSnapshot:
+    """Rebuild a snapshot and its indexes from encode_data_snapshot output"""
+    payload = json.loads(data)
+    if payload.get("format") != DATA_SNAPSHOT_FORMAT:
+        raise ValueError(f"Unsupported cricket data snapshot format: {payload.get('format')}")
+
+    created_at = payload.get("created_at")
+    return CricketDataSnapshot(
+        version=payload.get("version", ""),
+        created_at=datetime.fromisoformat(created_at) if created_at else None,
+        teams=[Team.model_validate(team) for team in payload.get("teams", [])],
+        fixtures=[(item["team_id"], Fixture.model_validate(item["fixture"])) for item in payload.get("fixtures", [])],
+        ladders=[Ladder.model_validate(ladder) for ladder in payload.get("ladders", [])],
+        rosters=[Roster.model_validate(roster) for roster in payload.get("rosters", [])],
+        scorecards=[Scorecard.model_validate(scorecard) for scorecard in payload.get("scorecards", [])]
+    )
+
+
+class CricketDataStore:
+    """Holds the current snapshot; publishing swaps it whole, so readers never see a sync half-applied"""
+
+    # Seconds between checks of the GCS copy for a snapshot published elsewhere
+    VERSION_CHECK_INTERVAL_SECONDS = 5.0
+
+    def __init__(self, path: str = DATA_SNAPSHOT_PATH, gcs_bucket: Optional[str] = None):
+        """
+        Args:
+            path: Local snapshot file
+            gcs_bucket: Optional GCS bucket for a copy shared with other instances and the sync job
+        """
+        self.path = path
+        self.gcs_bucket = gcs_bucket
+        self.snapshot = CricketDataSnapshot()
+        self._lock = threading.Lock()
+
+        # Generation of the GCS copy the current snapshot came from (or was saved as)
+        self._gcs_generation: Optional[int] = None
+        self._gcs_client = None
+        self._checked_at = float("-inf")
+        self._refreshing = False
+        self._refresh_lock = threading.Lock()
+
+    def is_empty(self) -> bool:
+        """True until a snapshot with data has been published or loaded"""
+        return self.snapshot.is_empty()
+
+    def builder(self) -> CricketDataBuilder:
+        """Builder for the next snapshot, seeded with the current one"""
+        return CricketDataBuilder(self.snapshot)
+
+    def publish(self, snapshot: CricketDataSnapshot, persist: bool = True) -> bool:
+        """
+        Make a snapshot current
+
+        Args:
+            snapshot: Newly built snapshot
+            persist: Also save it for the next startup
+
+        Returns:
+            False if the current snapshot already had this version
+        """
+        with self._lock:
+            if snapshot.version and snapshot.version == self.snapshot.version:
+                return False
+            self.snapshot = snapshot
+
+        logger.info(f"Published cricket data snapshot {snapshot.version}", extra=snapshot.get_stats())
+        if persist:
+            try:
+                self.save(snapshot)
+            except Exception as e:
+                logger.warning(f"Failed to persist cricket data snapshot: {e}")
+        return True
+
+    def save(self, snapshot: CricketDataSnapshot) -> None:
+        """Atomically write the snapshot file, then copy it to GCS"""
+        payload = encode_data_snapshot(snapshot)
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".snapshot-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        if self.gcs_bucket:
+            try:
+                blob = self._bucket().blob(DATA_SNAPSHOT_GCS_PATH)
+                blob.upload_from_string(payload, content_type="application/json")
+                # Our own write; the version check shouldn't load it back
+                self._gcs_generation = blob.generation
+            except Exception as e:
+                logger.warning(f"Cricket data snapshot GCS copy failed: {e}")
+
+    def load(self) -> bool:
+        """
+        Load the last saved snapshot: the GCS copy, which every sync writes, else the local file
+
+        Returns:
+            Whether a snapshot was loaded
+        """
+        if self.refresh(force=True):
+            return True
+
+        try:
+            if not os.path.exists(self.path):
+                return False
+            with open(self.path, "rb") as f:
+                snapshot = decode_data_snapshot(f.read())
+        except Exception as e:
+            logger.warning(f"Failed to load cricket data snapshot: {e}")
+            return False
+
+        self.publish(snapshot, persist=False)
+        return True
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Load the GCS copy if its generation changed, i.e. another instance or the sync job published
+
+        The check is one metadata read, made at most every VERSION_CHECK_INTERVAL_SECONDS.
+
+        Args:
+            force: Check regardless of the interval
+
+        Returns:
+            True if a newer snapshot was published
+        """
+        if not self.gcs_bucket:
+            return False
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.VERSION_CHECK_INTERVAL_SECONDS:
+            return False
+
+        with self._refresh_lock:
+            self._checked_at = now
+            try:
+                blob = self._bucket().get_blob(DATA_SNAPSHOT_GCS_PATH)
+                if blob is None or blob.generation == self._gcs_generation:
+                    return False
+                snapshot = decode_data_snapshot(blob.download_as_bytes(if_generation_match=blob.generation))
+            except Exception as e:
+                logger.warning(f"Failed to refresh cricket data snapshot from GCS: {e}")
+                return False
+            self._gcs_generation = blob.generation
+
+        return self.publish(snapshot, persist=False)
+
+    def refresh_in_background(self) -> None:
+        """Run refresh() on a daemon thread when a check is due; readers keep the current snapshot meanwhile"""
+        if not self.gcs_bucket or time.monotonic() - self._checked_at < self.VERSION_CHECK_INTERVAL_SECONDS:
+            return
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._background_refresh, name="cricket-data-refresh", daemon=True).start()
+
+    def _background_refresh(self) -> None:
+        try:
+            self.refresh()
+        finally:
+            self._refreshing = False
+
+    def _bucket(self):
+        """GCS bucket holding the shared copy, with one client per store"""
+        if self._gcs_client is None:
+            from google.cloud import storage
+            self._gcs_client = storage.Client()
+        return self._gcs_client.bucket(self.gcs_bucket)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get statistics of the current snapshot"""
+        return self.snapshot.get_stats()
+
+
+# Global store, shared by the sync job and the router
+_cricket_data: Optional[CricketDataStore] = None
+_cricket_data_lock = threading.Lock()
+
+
+def get_cricket_data() -> CricketDataStore:
+    """Get the global cricket data store"""
+    global _cricket_data
+    with _cricket_data_lock:
+        if _cricket_data is None:
+            from app.config import get_settings
+            _cricket_data = CricketDataStore(gcs_bucket=get_settings().gcs_bucket)
+        return _cricket_data
@@ -0,0 +1,142 @@
+"""
+Bounded executors for blocking Vertex AI calls
+Runs synchronous gapic calls off the event loop with backpressure, timeouts and cancellation
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """Raised when no executor slot frees up within the queue timeout"""
+
+
+class BoundedExecutor:
+    """Thread pool with a bounded number of in-flight calls; excess callers wait, then fail fast"""
+
+    def __init__(self, name: str, max_workers: int = 8, max_queued: int = 32, queue_timeout: float = 5.0):
+        """
+        Args:
+            name: Executor name, used for thread names and logs
+            max_workers: Calls that run concurrently
+            max_queued: Calls that may wait for a worker before new callers are held back
+            queue_timeout: Seconds a caller waits for a slot before ExecutorSaturatedError
+        """
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_queued = max(0, max_queued)
+        self.queue_timeout = queue_timeout
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"{name}-call")
+        # Slots are created per event loop; an asyncio.Semaphore cannot be shared across loops
+        self._slots: Dict[int, asyncio.Semaphore] = {}
+        self._slots_lock = threading.Lock()
+
+        self.in_flight = 0
+        self.timeouts = 0
+        self.rejected = 0
+
+    async def run(self, fn: Callable[..., T], *args: Any, timeout: Optional[float] = None, **kwargs: Any) -> T:
+        """
+        Run a blocking callable in the pool
+
+        Args:
+            fn: Blocking callable
+            timeout: Seconds to wait for the result; the caller gets asyncio.TimeoutError after this
+            *args, **kwargs: Passed to fn
+
+        Returns:
+            The callable's result
+
+        Raises:
+            ExecutorSaturatedError: If every slot stayed busy for queue_timeout seconds
+            asyncio.TimeoutError: If the call did not finish within timeout
+        """
+        loop = asyncio.get_running_loop()
+        slots = self._loop_slots(loop)
+
+        try:
+            await asyncio.wait_for(slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise ExecutorSaturatedError(f"{self.name} executor saturated ({self.max_workers} running, {self.max_queued} queued)")
+
+        self.in_flight += 1
+        future = self._pool.submit(lambda: fn(*args, **kwargs))
+
+        def release(_):
+            # The slot is held until the thread is really done, even if the caller gave up earlier
+            try:
+                loop.call_soon_threadsafe(self._release, slots)
+            except RuntimeError:
+                # Event loop already closed; nothing is waiting on its slots
+                pass
+
+        future.add_done_callback(release)
+
+        try:
+            # Cancelling or timing out the wrapper also cancels the call if it has not started yet
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.warning(f"{self.name} call timed out after {timeout}s")
+            raise
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get executor statistics"""
+        return {
+            "max_workers": self.max_workers,
+            "max_queued": self.max_queued,
+            "in_flight": self.in_flight,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected
+        }
+
+    def shutdown(self) -> None:
+        """Stop accepting calls and cancel queued ones"""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _release(self, slots: asyncio.Semaphore) -> None:
+        """Free a slot (runs on the event loop thread)"""
+        self.in_flight -= 1
+        slots.release()
+
+    def _loop_slots(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        """Get the semaphore bounding in-flight calls for this event loop"""
+        with self._slots_lock:
+            slots = self._slots.get(id(loop))
+            if slots is None:
+                slots = asyncio.Semaphore(self.max_workers + self.max_queued)
+                self._slots[id(loop)] = slots
+            return slots
+
+
+# Global executors, one per kind of upstream call so a burst of one cannot starve the other
+_executors: Dict[str, BoundedExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(name: str) -> BoundedExecutor:
+    """Get the shared executor for "llm" or "vector" (query embedding and retrieval) calls"""
+    with _executors_lock:
+        executor = _executors.get(name)
+        if executor is None:
+            settings = get_settings()
+            max_workers = settings.llm_max_concurrency if name == "llm" else settings.vector_max_concurrency
+            executor = BoundedExecutor(name, max_workers=max_workers, max_queued=settings.executor_max_queued)
+            _executors[name] = executor
+        return executor
+
+
+def get_executor_stats() -> Dict[str, Dict[str, Any]]:
+    """Get statistics for every executor created so far"""
+    with _executors_lock:
+        return {name: executor.get_stats() for name, executor in _executors.items()}
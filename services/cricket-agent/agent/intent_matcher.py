@@ -0,0 +1,228 @@
+"""
+Intent matching for Cricket Agent
+One precompiled keyword automaton that detects intent and extracts entities in a single linear pass
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Set, Tuple, Union
+
+# A cue is one keyword fragment, or a tuple of fragments that must all appear somewhere in the query.
+# Fragments are fixed phrases (small alternations and optional suffixes only, no unbounded repetition),
+# so matching costs a bounded amount of work per character.
+Cue = Union[str, Tuple[str, ...]]
+
+# Intents in priority order: when cues of several intents appear, the first listed wins.
+# "open_ended" marks questions (reasons, comparisons, performances) that need retrieval and the LLM.
+INTENT_CUES: Dict[str, List[Cue]] = {
+    "open_ended": [
+        "why", "how come", "compare", "compared", "best", "most", "average",
+        "wickets?", "bowl(?:ed|ing|er|ers)?", "bat(?:ted|ting|ter|ters)?", "highest", "lowest"
+    ],
+    "player_last_runs": [
+        "runs?", "scored", "score", "performance",
+        ("last", "(?:match|game|innings)")
+    ],
+    "next_fixture": [
+        "next (?:fixture|match|game|round)", "next matches", "play(?:ing)? next",
+        ("when", "play(?:ing)?")
+    ],
+    "fixtures_list": [
+        "fixtures?", "schedule", "upcoming (?:games|matches)"
+    ],
+    "ladder_position": [
+        "ladder", "standings", "table", "position", "rank(?:ed|ing)?"
+    ],
+    "roster_list": [
+        "roster", "squad", "players", "team members", "team list", "line ?up", "who (?:is|are) in"
+    ],
+    "player_team": [
+        "which team", "what team", "plays? for", "part of"
+    ]
+}
+
+# Intents that only make sense with a player name; without one the next matching intent is tried
+PLAYER_INTENTS = {"player_team"}
+
+# Capitalised words that are never a player's first name
+_NOT_NAMES = {
+    "i", "we", "our", "the", "what", "which", "who", "when", "where", "how", "show", "list", "for",
+    "is", "are", "did", "does", "in", "on", "of", "and", "u10", "u12", "u14", "u16", "cscc", "wrjca"
+}
+
+# Words that start a "for ..." phrase that isn't a team, e.g. "fixtures for this season", "top of the ladder"
+_NOT_TEAM_STARTS = {
+    "this", "next", "last", "me", "us", "them", "him", "her", "it", "today", "tomorrow",
+    "ladder", "table", "standings", "season", "year", "week", "round", "match", "game", "team", "club"
+}
+
+_NON_WORD = re.compile(r"[^\w']+")
+_CLAUSE_BREAK = re.compile(r"[,;:?!.\n]+")
+_WORD = re.compile(r"[\w][\w'-]*")
+
+
+@dataclass
+class IntentMatch:
+    """Detected intent with its entities and every intent whose cues appeared"""
+    intent: str
+    entities: Dict[str, str] = field(default_factory=dict)
+    candidates: List[str] = field(default_factory=list)
+    teams: List[str] = field(default_factory=list)  # canonical names of every team alias mentioned
+
+
+class IntentMatcher:
+    """Keyword automaton over all intents, compiled once"""
+
+    def __init__(self, cues: Dict[str, Sequence[Cue]], team_aliases: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            cues: Intent -> cue list, in priority order
+            team_aliases: Lower-case alias -> canonical team name
+        """
+        self.intents = list(cues)
+        self.team_aliases = dict(team_aliases or {})
+
+        # Each distinct fragment becomes one named group; a rule is satisfied when all its fragments matched
+        fragments: Dict[str, str] = {}  # fragment -> group name
+        self._group_rules: Dict[str, List[int]] = {}
+        self._rules: List[Tuple[str, int]] = []  # (intent, fragments required)
+        for intent, intent_cues in cues.items():
+            for cue in intent_cues:
+                parts = (cue,) if isinstance(cue, str) else tuple(cue)
+                rule_id = len(self._rules)
+                self._rules.append((intent, len(set(parts))))
+                for part in set(parts):
+                    group = fragments.setdefault(part, f"k{len(fragments)}")
+                    self._group_rules.setdefault(group, []).append(rule_id)
+
+        # Multi-word fragments first: where two fragments match at the same position only the first
+        # alternative is recorded, and "plays for" says more than "play"
+        ordered = sorted(fragments.items(), key=lambda item: (item[0].count(" "), len(item[0])), reverse=True)
+        alias_group = ""
+        if self.team_aliases:
+            aliases = sorted(self.team_aliases, key=len, reverse=True)
+            alias_group = "(?P<team>" + "|".join(re.escape(alias) for alias in aliases) + ")|"
+        self.pattern = re.compile(
+            r"\b(?:" + alias_group + "|".join(f"(?P<{group}>{fragment})" for fragment, group in ordered) + r")\b"
+        )
+
+    def match(self, text: str) -> Optional[IntentMatch]:
+        """
+        Detect intent and entities in one scan of the query
+
+        Args:
+            text: User query text
+
+        Returns:
+            IntentMatch, or None if no intent's cues appeared
+        """
+        normalized = " ".join(_NON_WORD.sub(" ", text.lower()).split())
+
+        seen: Dict[int, int] = {}
+        seen_groups: Set[str] = set()
+        teams: List[str] = []
+        for found in self.pattern.finditer(normalized):
+            group = found.lastgroup
+            if group == "team":
+                name = self.team_aliases[found.group("team")]
+                if name not in teams:
+                    teams.append(name)
+                continue
+            if group in seen_groups:
+                continue
+            seen_groups.add(group)
+            for rule_id in self._group_rules[group]:
+                seen[rule_id] = seen.get(rule_id, 0) + 1
+
+        matched = {intent for rule_id, (intent, required) in enumerate(self._rules) if seen.get(rule_id, 0) >= required}
+        candidates = [intent for intent in self.intents if intent in matched]
+        if not candidates:
+            return None
+
+        entities = self._entities(text, teams)
+        for intent in candidates:
+            if intent in PLAYER_INTENTS and "player" not in entities:
+                continue
+            return IntentMatch(intent, self._entities_for(intent, entities), candidates, teams)
+        return IntentMatch(candidates[0], self._entities_for(candidates[0], entities), candidates, teams)
+
+    def mentions(self, text: str) -> List[str]:
+        """
+        Teams and player a query names, whether or not any intent's cues appeared
+
+        Args:
+            text: User query text
+
+        Returns:
+            Every team named by alias (or the team after "for"/"of"), then the player name if any
+        """
+        normalized = " ".join(_NON_WORD.sub(" ", text.lower()).split())
+        teams: List[str] = []
+        for found in self.pattern.finditer(normalized):
+            if found.lastgroup == "team":
+                name = self.team_aliases[found.group("team")]
+                if name not in teams:
+                    teams.append(name)
+
+        entities = self._entities(text, teams)
+        names = teams or ([entities["team"]] if "team" in entities else [])
+        if "player" in entities:
+            names.append(entities["player"])
+        return names
+
+    def _entities(self, text: str, teams: List[str]) -> Dict[str, str]:
+        """Team (the first alias found, else a "for ..." phrase) and player a query names"""
+        entities: Dict[str, str] = {}
+        team = teams[0] if teams else self._team_phrase(text)
+        if team:
+            entities["team"] = team
+        player = self._player_name(text, team)
+        if player:
+            entities["player"] = player
+        return entities
+
+    def _entities_for(self, intent: str, entities: Dict[str, str]) -> Dict[str, str]:
+        """Entities an intent uses"""
+        if intent in ("player_team", "player_last_runs"):
+            return {key: value for key, value in entities.items() if key == "player"} or dict(entities)
+        return {key: value for key, value in entities.items() if key == "team"}
+
+    def _team_phrase(self, text: str) -> Optional[str]:
+        """Team named after the last "for"/"of" in a clause, e.g. "fixtures for Caroline Springs Blue U10" """
+        for clause in reversed(_CLAUSE_BREAK.split(text)):
+            words = clause.split()
+            lowered = [word.lower() for word in words]
+            for position in range(len(words) - 1, -1, -1):
+                if lowered[position] in ("for", "of"):
+                    phrase = words[position + 1:]
+                    if phrase and phrase[0].lower() == "the":
+                        phrase = phrase[1:]
+                    if phrase and phrase[0].lower() not in _NOT_TEAM_STARTS:
+                        name = " ".join(phrase)
+                        return self.team_aliases.get(name.lower(), name)
+                    break
+        return None
+
+    def _player_name(self, text: str, team: Optional[str]) -> Optional[str]:
+        """First run of capitalised words that isn't the opening word or part of the team name"""
+        team_words = {word.lower() for word in (team or "").split()}
+        for name in self.team_aliases.values():
+            team_words.update(word.lower() for word in name.split())
+
+        run: List[str] = []
+        for position, found in enumerate(_WORD.finditer(text)):
+            word = found.group(0)
+            if word.endswith("'s"):
+                word = word[:-2]
+            lowered = word.lower()
+            is_name = (
+                position > 0 and word[:1].isupper()
+                and lowered not in _NOT_NAMES and lowered not in team_words
+            )
+            if is_name:
+                run.append(word)
+                if found.group(0).endswith("'s"):
+                    break
+            elif run:
+                break
+        return " ".join(run) or None
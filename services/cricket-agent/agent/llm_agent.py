@@ -3,12 +3,16 @@ LLM Agent for Cricket Assistant
 Wrapper for Vertex AI chat (Gemini 1.5 Flash) with cricket-specific prompts
 """
 
+import asyncio
+import functools
 import json
 import logging
-from typing import Dict, List, Any, Optional
+import threading
+from typing import AsyncIterator, Dict, List, Any, Optional
 from datetime import datetime
 
 from app.config import get_settings
+from agent.executor import get_executor
 
 logger = logging.getLogger(__name__)
 
@@ -87,7 +91,43 @@ Respond with JSON only:
             return "I don't have that information."
         
         try:
-            prompt = f"""Based on the following cricket data, answer the user's question concisely and accurately.
+            response = await self._call_vertex_ai(self._summary_prompt(context, query), temperature=0.2)
+            return response.strip()
+            
+        except Exception as e:
+            logger.error(f"Summarization failed: {e}")
+            return "I don't have that information."
+    
+    async def summarise_stream(self, context: str, query: str) -> AsyncIterator[str]:
+        """
+        Summarize context to answer query, yielding text as the model generates it
+        
+        Args:
+            context: Relevant context information
+            query: User query
+            
+        Yields:
+            Answer text chunks
+        """
+        if not self.initialized:
+            yield "I don't have that information."
+            return
+        
+        streamed = False
+        try:
+            async for chunk in self._stream_vertex_ai(self._summary_prompt(context, query), temperature=0.2):
+                streamed = True
+                yield chunk
+                
+        except Exception as e:
+            logger.error(f"Streaming summarization failed: {e}")
+            # Mid-answer failures just end the stream; the client already has the partial answer
+            if not streamed:
+                yield "I don't have that information."
+    
+    def _summary_prompt(self, context: str, query: str) -> str:
+        """Build the prompt used to answer a query from retrieved context"""
+        return f"""Based on the following cricket data, answer the user's question concisely and accurately.
 
 Context:
 {context}
@@ -101,13 +141,68 @@ Guidelines:
 - Be helpful but don't make up information
 
 Answer:"""
+    
+    async def _stream_vertex_ai(self, prompt: str, temperature: float = 0.1) -> AsyncIterator[str]:
+        """
+        Call Vertex AI streaming generation with the given prompt
+        
+        The blocking response iterator is drained in the LLM executor; chunks are handed
+        to the event loop as they arrive.
+        
+        Args:
+            prompt: Input prompt
+            temperature: Sampling temperature
             
-            response = await self._call_vertex_ai(prompt, temperature=0.2)
-            return response.strip()
-            
-        except Exception as e:
-            logger.error(f"Summarization failed: {e}")
-            return "I don't have that information."
+        Yields:
+            Generated text chunks
+        """
+        if not self.initialized or not self.client:
+            raise Exception("Vertex AI client not initialized")
+        
+        endpoint = f"projects/{self.settings.gcp_project}/locations/{self.location}/publishers/google/models/{self.model_name}"
+        request = {
+            "model": endpoint,
+            "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+            "generation_config": {
+                "temperature": temperature,
+                "max_output_tokens": 1000,
+                "top_p": 0.8,
+                "top_k": 40
+            }
+        }
+        timeout = self.settings.llm_timeout_seconds
+        
+        loop = asyncio.get_running_loop()
+        chunks: asyncio.Queue = asyncio.Queue()
+        finished = object()
+        stop = threading.Event()
+        
+        def pump() -> None:
+            for response in self.client.stream_generate_content(request=request, timeout=timeout):
+                if stop.is_set():
+                    return
+                for candidate in response.candidates[:1]:
+                    for part in candidate.content.parts:
+                        if part.text:
+                            loop.call_soon_threadsafe(chunks.put_nowait, part.text)
+        
+        task = asyncio.ensure_future(get_executor("llm").run(pump, timeout=timeout))
+        # Queued after every chunk the pump scheduled, whether it succeeded or not
+        task.add_done_callback(lambda _: chunks.put_nowait(finished))
+        
+        try:
+            while True:
+                chunk = await chunks.get()
+                if chunk is finished:
+                    break
+                yield chunk
+            # Surface errors and timeouts from the pump
+            task.result()
+        finally:
+            # The consumer went away (e.g. client disconnected): stop reading the stream
+            stop.set()
+            if not task.done():
+                task.cancel()
     
     async def _call_vertex_ai(self, prompt: str, temperature: float = 0.1) -> str:
         """
@@ -145,11 +240,17 @@ Answer:"""
             # Make the prediction
             endpoint = f"projects/{self.settings.gcp_project}/locations/{self.location}/publishers/google/models/{self.model_name}"
             
-            response = self.client.predict(
+            # predict() blocks, so it runs in the bounded LLM executor and the event loop stays free.
+            # The gapic timeout lets the worker thread give up when the awaiting caller does.
+            timeout = self.settings.llm_timeout_seconds
+            predict = functools.partial(
+                self.client.predict,
                 endpoint=endpoint,
                 instances=request["instances"],
-                parameters=request["parameters"]
+                parameters=request["parameters"],
+                timeout=timeout
             )
+            response = await get_executor("llm").run(predict, timeout=timeout)
             
             # Extract the response
             if response.predictions:
@@ -200,6 +301,12 @@ class MockLLMAgent(LLMAgent):
         """Mock summarization"""
         return f"Based on the context: {context[:100]}... I can help with your query: {query}"
     
+    async def summarise_stream(self, context: str, query: str) -> AsyncIterator[str]:
+        """Mock streaming summarization, one word per chunk"""
+        answer = await self.summarise(context, query)
+        for position, word in enumerate(answer.split(" ")):
+            yield word if position == 0 else f" {word}"
+    
     def is_available(self) -> bool:
         """Mock availability check"""
         return True
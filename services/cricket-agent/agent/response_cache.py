@@ -0,0 +1,174 @@
+"""
+Response cache for Cricket Agent
+Bounded LRU/TTL cache keyed on canonicalised queries, with an optional shared Redis tier
+"""
+
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Filler words that never change the answer
+QUERY_STOPWORDS = frozenset({"a", "an", "the", "for", "of", "please", "me", "is", "are", "s"})
+
+_NON_WORD = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize(text: str) -> str:
+    """Lowercase and replace punctuation with single spaces"""
+    return _WHITESPACE.sub(" ", _NON_WORD.sub(" ", text.lower())).strip()
+
+
+def canonical_query(text: str, aliases: Optional[Dict[str, str]] = None) -> str:
+    """
+    Canonicalise a query so trivial variants share a cache entry
+
+    Args:
+        text: Raw query text
+        aliases: Optional alias -> canonical name mapping (e.g. team nicknames)
+
+    Returns:
+        Lowercased text without punctuation or filler words, with aliases replaced
+    """
+    normalized = _normalize(text)
+    if aliases:
+        # Canonical names map to themselves so "caroline springs blue u10" isn't re-matched as "blue u10"
+        names = {_normalize(name): name for name in aliases.values()}
+        names.update(aliases)
+        # One pass, longest name first, so replacements are never re-matched
+        pattern = r"\b(" + "|".join(re.escape(name) for name in sorted(names, key=len, reverse=True)) + r")\b"
+        normalized = re.sub(pattern, lambda match: _normalize(names[match.group(1)]), normalized)
+    return " ".join(word for word in normalized.split(" ") if word and word not in QUERY_STOPWORDS)
+
+
+class ResponseCache:
+    """Size-bounded LRU cache with per-entry expiry; every operation is O(1)"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 30 * 60, redis_url: Optional[str] = None,
+                 redis_prefix: str = "cricket_agent:response:"):
+        """
+        Args:
+            max_entries: Maximum entries held in memory before the least recently used is evicted
+            ttl_seconds: Seconds an entry stays valid
+            redis_url: Optional Redis URL for a tier shared across instances
+            redis_prefix: Key prefix for Redis entries
+        """
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.redis_prefix = redis_prefix
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.redis_client = None
+
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+
+        if redis_url and REDIS_AVAILABLE:
+            try:
+                self.redis_client = redis.from_url(
+                    redis_url,
+                    decode_responses=True,
+                    socket_connect_timeout=2,
+                    socket_timeout=2
+                )
+                self.redis_client.ping()
+                logger.info("Shared response cache connected to Redis")
+            except Exception as e:
+                logger.warning(f"Shared response cache unavailable, using local cache only: {e}")
+                self.redis_client = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a cached response
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached response, or None if absent or expired
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, response = entry
+                if now < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return response
+                del self._entries[key]
+
+        response = self._get_shared(key)
+        if response is not None:
+            self.hits += 1
+            self.shared_hits += 1
+            self._set_local(key, response, now + self.ttl_seconds)
+            return response
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, response: Dict[str, Any]) -> None:
+        """Cache a response in memory and, if configured, in Redis"""
+        self._set_local(key, response, time.time() + self.ttl_seconds)
+
+        if self.redis_client is not None:
+            try:
+                self.redis_client.setex(self._redis_key(key), int(self.ttl_seconds), json.dumps(response, default=str))
+            except Exception as e:
+                logger.warning(f"Failed to write shared response cache: {e}")
+
+    def clear(self) -> None:
+        """Drop all in-memory entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared_hits": self.shared_hits,
+            "shared_tier": self.redis_client is not None
+        }
+
+    def _set_local(self, key: str, response: Dict[str, Any], expires_at: float) -> None:
+        """Insert or refresh an in-memory entry, evicting the least recently used"""
+        with self._lock:
+            self._entries[key] = (expires_at, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _get_shared(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look a key up in the Redis tier"""
+        if self.redis_client is None:
+            return None
+        try:
+            payload = self.redis_client.get(self._redis_key(key))
+            return json.loads(payload) if payload else None
+        except Exception as e:
+            logger.warning(f"Failed to read shared response cache: {e}")
+            return None
+
+    def _redis_key(self, key: str) -> str:
+        return self.redis_prefix + hashlib.sha256(key.encode("utf-8")).hexdigest()
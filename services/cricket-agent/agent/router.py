@@ -7,7 +7,7 @@ import re
 import json
 import time
 import logging
-from typing import Dict, List, Any, Optional, Tuple
+from typing import AsyncIterator, Dict, List, Any, Optional, Tuple
 from datetime import datetime, timezone
 import pytz
 
@@ -17,64 +17,69 @@ from agent.tools.playhq import initialize_playhq_client
 from agent.tools.normalize import CricketDataNormalizer, CricketSnippetGenerator
 from agent.prompt import SYSTEM_PROMPT, format_response
 from agent.llm_agent import LLMAgent
+from agent.executor import get_executor
+from agent.response_cache import ResponseCache, canonical_query
+from agent.semantic_cache import SemanticCache
+from agent.context_packer import PackedContext, estimate_tokens, pack_context
+from agent.cricket_data import CricketDataSnapshot, get_cricket_data, to_utc
+from agent.intent_matcher import INTENT_CUES, IntentMatcher
+from models.fixture import Fixture
+from app.observability import get_metrics
 
 logger = logging.getLogger(__name__)
 
-# In-memory cache for performance
-_cache: Dict[str, Dict[str, Any]] = {}
+# Response cache limits
+_cache_max_entries = 1024
 _cache_ttl = 30 * 60  # 30 minutes
+_semantic_cache_max_entries = 256
+
+# Fixed answers for retrieval misses and failures
+NO_CONTEXT_ANSWER = "I don't have information about that. Could you try asking about fixtures, ladder positions, player information, or team rosters?"
+ERROR_ANSWER = "I'm sorry, I encountered an error processing your request. Please try again."
+
+# Common variations of configured team names
+TEAM_ALIASES = {
+    "blue 10s": "Caroline Springs Blue U10",
+    "blue u10": "Caroline Springs Blue U10",
+    "blue 10": "Caroline Springs Blue U10",
+    "white 10s": "Caroline Springs White U10",
+    "white u10": "Caroline Springs White U10",
+    "white 10": "Caroline Springs White U10"
+}
+
+# Intent detection and entity extraction in one precompiled pass
+INTENT_MATCHER = IntentMatcher(INTENT_CUES, TEAM_ALIASES)
+
+# Intents the fast path answers from synced data
+FAST_PATH_INTENTS = ("next_fixture", "fixtures_list", "ladder_position", "roster_list", "player_last_runs", "player_team")
+PLAYER_FAST_PATH_INTENTS = ("player_last_runs", "player_team")
+
+# Most fixtures listed in one fast-path answer
+_FAST_PATH_FIXTURE_LIMIT = 10
 
 class IntentRouter:
     """Cricket agent intent router with RAG and tool fallback"""
     
+    # Shared, compiled once at import
+    intent_matcher = INTENT_MATCHER
+    
     def __init__(self):
         self.settings = get_settings()
         self.vector_client = get_vector_client()
         self.normalizer = CricketDataNormalizer()
         self.snippet_generator = CricketSnippetGenerator()
         self.llm_agent = LLMAgent()
-        
-        # Intent patterns for regex detection
-        self.intent_patterns = {
-            "player_team": [
-                r"which team.*is\s+(\w+).*in",
-                r"what team.*(\w+).*in",
-                r"(\w+).*team",
-                r"team.*(\w+)",
-                r"(\w+).*plays"
-            ],
-            "player_last_runs": [
-                r"how many runs.*(\w+).*score.*last\s+match",
-                r"(\w+).*runs.*last\s+match",
-                r"(\w+).*scored.*last\s+game",
-                r"last\s+match.*(\w+).*runs"
-            ],
-            "fixtures_list": [
-                r"list.*fixtures.*(.*?)(?:\s+for|\s+of|\s*$)",
-                r"fixtures.*(.*?)(?:\s+for|\s+of|\s*$)",
-                r"upcoming.*matches.*(.*?)(?:\s+for|\s+of|\s*$)",
-                r"schedule.*(.*?)(?:\s+for|\s+of|\s*$)"
-            ],
-            "ladder_position": [
-                r"ladder.*for\s+(.*)",
-                r"show.*ladder.*for\s+(.*)",
-                r"ladder\s+(.*)",
-                r"standings.*for\s+(.*)",
-                r"position.*for\s+(.*)"
-            ],
-            "next_fixture": [
-                r"next.*fixture.*(\w+.*\w+)",
-                r"next.*match.*(\w+.*\w+)",
-                r"upcoming.*(\w+.*\w+).*fixture",
-                r"when.*(\w+.*\w+).*play.*next"
-            ],
-            "roster_list": [
-                r"list.*players.*(.*?)(?:\s+for|\s+of|\s*$)",
-                r"roster.*(.*?)(?:\s+for|\s+of|\s*$)",
-                r"players.*(.*?)(?:\s+for|\s+of|\s*$)",
-                r"team.*members.*(.*?)(?:\s+for|\s+of|\s*$)"
-            ]
-        }
+        self.response_cache = ResponseCache(
+            max_entries=_cache_max_entries,
+            ttl_seconds=_cache_ttl,
+            redis_url=self.settings.response_cache_redis_url
+        )
+        self.semantic_cache = SemanticCache(
+            max_entries=_semantic_cache_max_entries,
+            threshold=self.settings.semantic_cache_threshold,
+            ttl_seconds=_cache_ttl
+        ) if self.settings.semantic_cache_enabled else None
+        self.cricket_data = get_cricket_data()
     
     async def route_query(self, text: str, source: str = "web", team_hint: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -92,20 +97,49 @@ class IntentRouter:
         request_id = f"req_{int(start_time * 1000)}"
         
         try:
-            # Check cache first
-            cache_key = f"{text}_{team_hint or ''}"
+            # Tier 1: structured questions answered straight from synced data
+            fast = self._fast_path(text, team_hint)
+            if fast is not None:
+                intent, entities, answer = fast
+                total_latency = int((time.time() - start_time) * 1000)
+                get_metrics().record_request(total_latency, True, intent)
+                logger.info(f"Fast path answered request {request_id}", extra={
+                    "request_id": request_id,
+                    "intent": intent,
+                    "latency_ms": total_latency
+                })
+                return {
+                    "answer": answer,
+                    "meta": {
+                        "intent": intent,
+                        "entities": entities,
+                        "tier": "fast_path",
+                        "rag_ms": 0,
+                        "api_ms": 0,
+                        "latency_ms": total_latency,
+                        "tokens_in": 0,
+                        "tokens_out": 0,
+                        "source": source,
+                        "request_id": request_id
+                    }
+                }
+            
+            # Tier 2: a recent answer to the same question
+            cache_key = await self._cache_key(text, team_hint)
             cached_response = self._get_from_cache(cache_key)
             if cached_response:
                 logger.info(f"Cache hit for request {request_id}")
-                return cached_response
+                get_metrics().record_request(int((time.time() - start_time) * 1000), True, cached_response.get("meta", {}).get("intent"))
+                return {**cached_response, "meta": {**cached_response.get("meta", {}), "tier": "cache"}}
             
-            # Use LLM-driven RAG approach instead of complex regex patterns
+            # Tier 3: open-ended questions go to LLM-driven RAG
+            intent = "llm_rag"
+            usage = {"tokens_in": 0, "tokens_out": 0}
             rag_start = time.time()
-            answer = await self._llm_driven_rag(text, team_hint)
+            answer = await self._llm_driven_rag(text, team_hint, usage=usage)
             rag_ms = int((time.time() - rag_start) * 1000)
+            tier = "semantic_cache" if usage.get("semantic_cache") else "llm"
             
-            # Set intent to llm_rag for consistency
-            intent = "llm_rag"
             entities = {}
             api_ms = 0
             
@@ -117,19 +151,24 @@ class IntentRouter:
                 "meta": {
                     "intent": intent,
                     "entities": entities,
+                    "tier": tier,
                     "rag_ms": rag_ms,
                     "api_ms": api_ms,
                     "latency_ms": total_latency,
+                    "tokens_in": usage["tokens_in"],
+                    "tokens_out": usage["tokens_out"],
                     "source": source,
                     "request_id": request_id
                 }
             }
             
             self._cache_response(cache_key, response)
+            get_metrics().record_request(total_latency, True, intent, usage["tokens_in"], usage["tokens_out"])
             
             logger.info(f"Query processed successfully", extra={
                 "request_id": request_id,
                 "intent": intent,
+                "tier": tier,
                 "rag_ms": rag_ms,
                 "api_ms": api_ms,
                 "latency_ms": total_latency
@@ -139,8 +178,9 @@ class IntentRouter:
             
         except Exception as e:
             logger.error(f"Query processing failed: {e}", extra={"request_id": request_id})
+            get_metrics().record_request(int((time.time() - start_time) * 1000), False, "error")
             return {
-                "answer": "I'm sorry, I encountered an error processing your request. Please try again.",
+                "answer": ERROR_ANSWER,
                 "meta": {
                     "intent": "error",
                     "entities": {},
@@ -154,16 +194,14 @@ class IntentRouter:
             }
     
     async def _detect_intent(self, text: str) -> Dict[str, Any]:
-        """Detect intent using regex first, then LLM fallback"""
-        text_lower = text.lower()
-        
-        # Try regex patterns first
-        for intent, patterns in self.intent_patterns.items():
-            for pattern in patterns:
-                match = re.search(pattern, text_lower, re.IGNORECASE)
-                if match:
-                    entities = self._extract_entities_from_match(match, intent)
-                    return {"intent": intent, "entities": entities}
+        """Detect intent with the precompiled intent matcher, then LLM fallback"""
+        # One linear scan; open-ended questions are left to the LLM
+        match = self.intent_matcher.match(text)
+        if match is not None and match.intent != "open_ended":
+            entities = dict(match.entities)
+            if "team" in entities:
+                entities["team"] = self._normalize_team_name(entities["team"])
+            return {"intent": match.intent, "entities": entities}
         
         # Fallback to LLM classification
         try:
@@ -173,35 +211,157 @@ class IntentRouter:
             logger.warning(f"LLM intent classification failed: {e}")
             return {"intent": "unknown", "entities": {}}
     
-    def _extract_entities_from_match(self, match: re.Match, intent: str) -> Dict[str, str]:
-        """Extract entities from regex match"""
-        entities = {}
-        
-        if intent == "player_team":
-            entities["player"] = match.group(1)
-        elif intent == "player_last_runs":
-            entities["player"] = match.group(1)
-        elif intent in ["fixtures_list", "ladder_position", "next_fixture", "roster_list"]:
-            team_name = match.group(1)
-            entities["team"] = self._normalize_team_name(team_name)
-        
-        return entities
-    
     def _normalize_team_name(self, team_name: str) -> str:
         """Normalize team name to match configured teams"""
-        # Map common variations to configured team names
-        team_mapping = {
-            "blue 10s": "Caroline Springs Blue U10",
-            "blue u10": "Caroline Springs Blue U10",
-            "blue 10": "Caroline Springs Blue U10",
-            "white 10s": "Caroline Springs White U10",
-            "white u10": "Caroline Springs White U10",
-            "white 10": "Caroline Springs White U10"
-        }
-        
         normalized = team_name.lower().strip()
-        return team_mapping.get(normalized, team_name)
-    
+        return TEAM_ALIASES.get(normalized, team_name)
+
+    def _fast_path(self, text: str, team_hint: Optional[str] = None) -> Optional[Tuple[str, Dict[str, str], str]]:
+        """
+        Answer a fixtures, ladder, roster or player question straight from synced data
+
+        Args:
+            text: User query text
+            team_hint: Optional team hint for disambiguation
+
+        Returns:
+            (intent, entities, answer), or None when the question needs the LLM
+        """
+        # Pick up syncs published by other instances; the check runs off the request path
+        self.cricket_data.refresh_in_background()
+        # One snapshot for the whole answer, even if a sync publishes a new one meanwhile
+        data = self.cricket_data.snapshot
+        if not self.settings.fast_path_enabled or data.is_empty():
+            return None
+
+        match = self.intent_matcher.match(text)
+        if match is None or match.intent not in FAST_PATH_INTENTS:
+            return None
+        intent = match.intent
+
+        try:
+            if intent in PLAYER_FAST_PATH_INTENTS:
+                player = match.entities.get("player")
+                answer = self._answer_player_from_data(data, intent, player) if player else None
+                entities = {"player": player}
+            else:
+                team = self._resolve_team(data, text.lower(), match.teams, team_hint)
+                if team is None:
+                    return None
+                team_id, team_name = team
+                answer = self._answer_from_data(data, intent, team_id, team_name)
+                entities = {"team": team_name}
+        except Exception as e:
+            logger.warning(f"Fast path failed for intent {intent}: {e}")
+            return None
+        if answer is None:
+            return None
+        return intent, entities, answer
+
+    def _resolve_team(self, data: CricketDataSnapshot, text_lower: str, alias_teams: List[str],
+                      team_hint: Optional[str] = None) -> Optional[Tuple[str, str]]:
+        """The single team a question names (by alias or synced name), else the team hint, as (team_id, team_name)"""
+        names = set(alias_teams)
+        names.update(name for name in data.team_names() if name in text_lower)
+        if not names and team_hint:
+            names.add(self._normalize_team_name(team_hint))
+
+        teams = {}
+        for name in names:
+            team_id = data.team_id_for_name(name) or self._get_team_id_from_name(name)
+            if team_id:
+                teams.setdefault(team_id, name if name in TEAM_ALIASES.values() else data.team_name(team_id) or name)
+
+        # Ambiguous or unknown teams are left to the LLM
+        if len(teams) != 1:
+            return None
+        return next(iter(teams.items()))
+
+    def _answer_from_data(self, data: CricketDataSnapshot, intent: str, team_id: str, team_name: str) -> Optional[str]:
+        """Format a structured answer from synced data, or None if the data isn't there"""
+
+        if intent == "next_fixture":
+            if not data.has_fixtures(team_id):
+                return None
+            fixture = data.next_fixture(team_id)
+            if fixture is None:
+                return f"No upcoming fixtures for **{team_name}**."
+            date_str = self._format_fixture_date(to_utc(fixture.date).isoformat())
+            return f"**{team_name}**'s next fixture:\n• **{date_str}** – vs {self._opponent(fixture, team_id)}\n• Venue: {fixture.venue or 'TBD'}"
+
+        if intent == "fixtures_list":
+            fixtures = data.fixtures_for_team(team_id)
+            if not fixtures:
+                return None
+            # From today on; once the season is over, its last fixtures
+            now = datetime.now(timezone.utc)
+            upcoming = [fixture for fixture in fixtures if to_utc(fixture.date) >= now]
+            shown = upcoming[:_FAST_PATH_FIXTURE_LIMIT] or fixtures[-_FAST_PATH_FIXTURE_LIMIT:]
+
+            response_lines = [f"**{team_name}** fixtures:"]
+            for fixture in shown:
+                date_str = self._format_fixture_date(to_utc(fixture.date).isoformat())
+                response_lines.append(f"• **{date_str}** – {self._opponent(fixture, team_id)} – {fixture.venue or 'TBD'} – {fixture.status.value}")
+            return "\n".join(response_lines)
+
+        if intent == "ladder_position":
+            found = data.ladder_position(team_id)
+            if found is None:
+                return None
+            ladder, entry = found
+            as_of = to_utc(ladder.last_updated) if ladder.last_updated else datetime.now(timezone.utc)
+            as_of_str = as_of.astimezone(pytz.timezone('Australia/Melbourne')).strftime("%d %b %Y")
+            return (f"**{team_name}** is in **{entry.position}** position on the ladder (as of {as_of_str}):\n"
+                    f"• Points: {entry.points}\n• Played: {entry.matches_played}\n• Won: {entry.matches_won}\n• Lost: {entry.matches_lost}")
+
+        if intent == "roster_list":
+            roster = data.roster(team_id)
+            if roster is None or not roster.players:
+                return None
+            # Respect privacy mode: contact details only in private mode
+            player_names = []
+            for player in roster.players:
+                name = player.name
+                if is_private_mode() and player.email:
+                    name += f" ({player.email})"
+                player_names.append(name)
+
+            response_lines = [f"**{team_name}** roster:"]
+            for player in sorted(player_names):
+                response_lines.append(f"• {player}")
+            return "\n".join(response_lines)
+
+        return None
+
+    def _answer_player_from_data(self, data: CricketDataSnapshot, intent: str, player: str) -> Optional[str]:
+        """Format a player answer from synced scorecards and rosters, or None if the player isn't known"""
+        if intent == "player_last_runs":
+            found = data.last_innings(player)
+            if found is None:
+                return None
+            scorecard, batting = found
+            if any(entry is batting for entry in scorecard.home_team.batting):
+                team, opponent = scorecard.home_team, scorecard.away_team
+            else:
+                team, opponent = scorecard.away_team, scorecard.home_team
+            date_str = self._format_fixture_date(to_utc(scorecard.date).isoformat())
+            how_out = f", {batting.how_out}" if batting.how_out else ""
+            return (f"**{batting.player_name}** scored **{batting.runs}** ({batting.balls} balls{how_out}) "
+                    f"for {team.team_name} vs {opponent.team_name} on {date_str}.")
+
+        if intent == "player_team":
+            team_names = [data.team_name(team_id) for team_id in data.player_teams(player)]
+            team_names = [name for name in team_names if name]
+            if not team_names:
+                return None
+            return f"**{player}** plays for " + " and ".join(f"**{name}**" for name in team_names) + "."
+
+        return None
+
+    def _opponent(self, fixture: Fixture, team_id: str) -> str:
+        """The other team in a fixture"""
+        return fixture.away_team if fixture.home_team_id == team_id else fixture.home_team
+
     async def _query_rag(self, text: str, entities: Dict[str, str]) -> List[str]:
         """Query vector store for relevant snippets"""
         try:
@@ -219,20 +379,12 @@ class IntentRouter:
             if "grade_id" in entities:
                 filters["grade_id"] = entities["grade_id"]
             
-            # Query vector store to get document IDs
-            doc_ids = self.vector_client.query(text, filters, k=6)
-            
-            # Retrieve actual document content
-            results = []
-            for doc_id in doc_ids:
-                try:
-                    # Get document content from vector store
-                    doc_content = self.vector_client.get_document(doc_id)
-                    if doc_content:
-                        results.append(doc_content)
-                except Exception as e:
-                    logger.warning(f"Failed to retrieve document {doc_id}: {e}")
-                    continue
+            # Query vector store; document content comes back with the hits in one bulk fetch
+            hits = await get_executor("vector").run(
+                self.vector_client.query_with_documents, text, filters, 6,
+                timeout=self.settings.vector_timeout_seconds
+            )
+            results = [hit["text"] for hit in hits]
             
             logger.info(f"RAG query returned {len(results)} document contents")
             return results
@@ -600,36 +752,208 @@ class IntentRouter:
         except:
             return date_str
     
+    async def _data_version(self) -> str:
+        """Vector store data version, checked in the vector executor (a changed version reloads the store)"""
+        try:
+            return await get_executor("vector").run(
+                self.vector_client.get_data_version, timeout=self.settings.vector_timeout_seconds
+            )
+        except Exception as e:
+            logger.warning(f"Failed to get data version: {e}")
+            return ""
+    
+    async def _cache_key(self, text: str, team_hint: Optional[str] = None) -> str:
+        """Canonical cache key: normalised query, team hint and the vector store data version"""
+        hint = canonical_query(self._normalize_team_name(team_hint), TEAM_ALIASES) if team_hint else ""
+        version = await self._data_version()
+        return f"{version}|{canonical_query(text, TEAM_ALIASES)}|{hint}"
+    
     def _get_from_cache(self, key: str) -> Optional[Dict[str, Any]]:
         """Get response from cache"""
-        if key in _cache:
-            entry = _cache[key]
-            if time.time() - entry["timestamp"] < _cache_ttl:
-                return entry["response"]
-            else:
-                del _cache[key]
-        return None
+        response = self.response_cache.get(key)
+        if response is not None:
+            get_metrics().record_cache_hit()
+        else:
+            get_metrics().record_cache_miss()
+        return response
     
     def _cache_response(self, key: str, response: Dict[str, Any]) -> None:
         """Cache response"""
-        _cache[key] = {
-            "response": response,
-            "timestamp": time.time()
-        }
+        self.response_cache.put(key, response)
+
+    async def _semantic_cache_scope(self, text: str, team_hint: Optional[str] = None) -> Tuple[str, str]:
+        """
+        Data version and partition that a semantic cache entry must match
+        
+        Questions that differ only in the team or player they name embed as near-paraphrases,
+        so the named teams and player are part of the partition alongside the team hint.
+        """
+        version = await self._data_version()
+        hint = canonical_query(self._normalize_team_name(team_hint), TEAM_ALIASES) if team_hint else ""
+        mentions = sorted({name.lower() for name in self.intent_matcher.mentions(text)})
+        return version, "|".join([hint, *mentions])
+    
+    def _get_semantic_answer(self, query_embedding: List[float], version: str, scope: str) -> Optional[str]:
+        """Answer of a recent paraphrase of this query, if one was generated from the same data"""
+        if self.semantic_cache is None or not query_embedding or not version:
+            return None
+        cached = self.semantic_cache.get(query_embedding, version, scope)
+        if cached is None:
+            return None
+        logger.info(f"Semantic cache hit (similarity {cached['similarity']:.3f})")
+        get_metrics().record_cache_hit()
+        return cached["response"]["answer"]
+    
+    def _cache_semantic_answer(self, query_embedding: List[float], version: str, scope: str, answer: str) -> None:
+        """Remember an LLM answer for later paraphrases"""
+        if self.semantic_cache is None or not query_embedding or not version or not answer:
+            return
+        self.semantic_cache.put(query_embedding, version, {"answer": answer}, scope)
+    
+    def _context_intent(self, text: str) -> str:
+        """Intent whose context token budget applies to an LLM answer: the matcher's, else llm_rag"""
+        match = self.intent_matcher.match(text)
+        return match.intent if match is not None else "llm_rag"
+    
+    def _pack_context(self, hits: List[Dict[str, Any]], intent: str) -> PackedContext:
+        """Deduplicate and fit retrieved snippets, best scored first, into the intent's context token budget"""
+        budget = self.settings.context_token_budgets.get(intent, self.settings.context_token_budget)
+        return pack_context(hits, budget)
+    
+    async def _embed_query(self, text: str) -> List[float]:
+        """Embed query text in the vector executor (the Vertex AI call blocks)"""
+        stage_start = time.perf_counter()
+        try:
+            return await get_executor("vector").run(
+                self.vector_client.embed_query, text, timeout=self.settings.vector_timeout_seconds
+            )
+        finally:
+            get_metrics().record_stage("embedding", (time.perf_counter() - stage_start) * 1000)
+    
+    async def _retrieve(self, text: str, query_embedding: List[float], k: int = 6) -> List[Dict[str, Any]]:
+        """Semantic search with document content inline, run in the vector executor"""
+        return await get_executor("vector").run(
+            self.vector_client.query_with_documents, text, k=k, query_embedding=query_embedding,
+            timeout=self.settings.vector_timeout_seconds
+        )
+    
+    async def route_query_stream(self, text: str, source: str = "web", team_hint: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Route cricket query and stream the answer as it is generated
         
-        # Clean old entries
-        current_time = time.time()
-        keys_to_remove = [k for k, v in _cache.items() if current_time - v["timestamp"] > _cache_ttl]
-        for k in keys_to_remove:
-            del _cache[k]
+        Args:
+            text: User query text
+            source: Query source (web, whatsapp)
+            team_hint: Optional team hint for disambiguation
+            
+        Yields:
+            Events in order: one "retrieval" event (intent, documents, rag_ms), "token"
+            events carrying answer text, then a trailing "done" event with the final
+            meta including latency_ms and ttft_ms; an "error" event precedes "done" on failure
+        """
+        start_time = time.time()
+        request_id = f"req_{int(start_time * 1000)}"
+        meta = {
+            "intent": "llm_rag",
+            "entities": {},
+            "rag_ms": 0,
+            "api_ms": 0,
+            "source": source,
+            "request_id": request_id,
+            "tokens_in": 0,
+            "tokens_out": 0,
+            "tier": "llm",
+            "cached": False
+        }
+        ttft_ms = None
 
-    async def _llm_driven_rag(self, text: str, team_hint: Optional[str] = None) -> str:
+        try:
+            query_embedding: List[float] = []
+            version = scope = ""
+
+            # Same tiers as route_query: synced data, then caches, then the LLM
+            fast = self._fast_path(text, team_hint)
+            if fast is not None:
+                meta["intent"], meta["entities"], answer = fast
+                meta["tier"] = "fast_path"
+            else:
+                cache_key = await self._cache_key(text, team_hint)
+                cached_response = self._get_from_cache(cache_key)
+                if cached_response:
+                    answer = cached_response["answer"]
+                    meta["tier"] = "cache"
+                else:
+                    rag_start = time.time()
+                    query_embedding = await self._embed_query(text)
+                    version, scope = await self._semantic_cache_scope(text, team_hint)
+                    answer = self._get_semantic_answer(query_embedding, version, scope)
+                    if answer is not None:
+                        meta["tier"] = "semantic_cache"
+
+            if answer is not None:
+                meta["cached"] = meta["tier"] != "fast_path"
+                yield {"event": "retrieval", "data": {**meta, "documents": []}}
+                ttft_ms = int((time.time() - start_time) * 1000)
+                yield {"event": "token", "data": {"text": answer}}
+            else:
+                hits = await self._retrieve(text, query_embedding)
+                meta["rag_ms"] = int((time.time() - rag_start) * 1000)
+                yield {"event": "retrieval", "data": {**meta, "documents": [hit["id"] for hit in hits]}}
+                
+                context = self._pack_context(hits, self._context_intent(text))
+                if context.text:
+                    chunks = []
+                    llm_start = time.perf_counter()
+                    async for chunk in self.llm_agent.summarise_stream(context.text, text):
+                        if ttft_ms is None:
+                            ttft_ms = int((time.time() - start_time) * 1000)
+                        chunks.append(chunk)
+                        yield {"event": "token", "data": {"text": chunk}}
+                    get_metrics().record_stage("llm", (time.perf_counter() - llm_start) * 1000)
+                    answer = "".join(chunks).strip()
+                    self._cache_semantic_answer(query_embedding, version, scope, answer)
+                    meta["tokens_in"] = context.tokens + estimate_tokens(text)
+                    meta["tokens_out"] = estimate_tokens(answer)
+                else:
+                    answer = NO_CONTEXT_ANSWER
+                    ttft_ms = int((time.time() - start_time) * 1000)
+                    yield {"event": "token", "data": {"text": answer}}
+            
+            meta["latency_ms"] = int((time.time() - start_time) * 1000)
+            meta["ttft_ms"] = ttft_ms
+            if meta["tier"] in ("llm", "semantic_cache"):
+                self._cache_response(cache_key, {"answer": answer, "meta": {k: v for k, v in meta.items() if k != "cached"}})
+            get_metrics().record_request(meta["latency_ms"], True, meta["intent"], meta["tokens_in"], meta["tokens_out"])
+            
+            logger.info(f"Streamed query processed successfully", extra={
+                "request_id": request_id,
+                "tier": meta["tier"],
+                "rag_ms": meta["rag_ms"],
+                "ttft_ms": ttft_ms,
+                "latency_ms": meta["latency_ms"]
+            })
+            yield {"event": "done", "data": meta}
+            
+        except Exception as e:
+            logger.error(f"Streamed query processing failed: {e}", extra={"request_id": request_id})
+            meta["intent"] = "error"
+            meta["latency_ms"] = int((time.time() - start_time) * 1000)
+            meta["ttft_ms"] = ttft_ms
+            get_metrics().record_request(meta["latency_ms"], False, "error")
+            yield {"event": "error", "data": {"message": ERROR_ANSWER, "error": str(e)}}
+            yield {"event": "done", "data": meta}
+    
+    async def _llm_driven_rag(self, text: str, team_hint: Optional[str] = None, intent: Optional[str] = None,
+                              usage: Optional[Dict[str, int]] = None) -> str:
         """
         LLM-driven RAG approach that uses semantic search and LLM for response generation
         
         Args:
             text: User query text
             team_hint: Optional team hint for disambiguation
+            intent: Intent whose context token budget applies; by default the intent matcher's for text
+            usage: Optional dict that receives estimated tokens_in/tokens_out of the LLM call,
+                and semantic_cache=True when a paraphrase's answer was reused
             
         Returns:
             Generated response based on retrieved context
@@ -638,51 +962,40 @@ class IntentRouter:
             # Step 1: Semantic search using vector database
             logger.info(f"Performing semantic search for: '{text}'")
             
-            # Query vector store for relevant documents
-            doc_ids = self.vector_client.query(text, k=6)
-            logger.info(f"Vector search returned {len(doc_ids)} document IDs")
+            # Embed once: the same vector keys the semantic cache and drives retrieval
+            query_embedding = await self._embed_query(text)
+            version, scope = await self._semantic_cache_scope(text, team_hint)
             
-            # Retrieve document contents
-            retrieved_docs = []
-            for doc_id in doc_ids:
-                doc_content = self.vector_client.get_document(doc_id)
-                if doc_content:
-                    retrieved_docs.append(doc_content)
+            cached = self._get_semantic_answer(query_embedding, version, scope)
+            if cached is not None:
+                if usage is not None:
+                    usage["semantic_cache"] = True
+                return cached
             
-            logger.info(f"Retrieved {len(retrieved_docs)} document contents")
+            # Query vector store for relevant documents, with their content inline
+            hits = await self._retrieve(text, query_embedding)
+            logger.info(f"Vector search returned {len(hits)} documents")
             
-            # Step 2: Use LLM to generate response based on retrieved context
-            if retrieved_docs:
-                # Combine retrieved documents as context
-                context = "\n\n".join(retrieved_docs)
-                
-                # Create prompt for LLM
-                prompt = f"""
-You are a cricket assistant for Caroline Springs Cricket Club. Use the following context to answer the user's question.
-
-Context:
-{context}
-
-User Question: {text}
-
-Instructions:
-- If the information is available in the context, provide a helpful and accurate answer
-- If the information is not available, politely say you don't have that information
-- Be conversational and friendly
-- Focus on cricket-related information like teams, players, fixtures, ladder positions, etc.
-
-Answer:"""
-                
-                # Use LLM to generate response
-                response = await self.llm_agent.summarise(context, text)
-                return response
-            else:
+            # Step 2: Use LLM to generate response from the packed context
+            context = self._pack_context(hits, intent or self._context_intent(text))
+            if not context.text:
                 # No relevant documents found
-                return "I don't have information about that. Could you try asking about fixtures, ladder positions, player information, or team rosters?"
+                return NO_CONTEXT_ANSWER
+            
+            llm_start = time.perf_counter()
+            try:
+                response = await self.llm_agent.summarise(context.text, text)
+            finally:
+                get_metrics().record_stage("llm", (time.perf_counter() - llm_start) * 1000)
+            self._cache_semantic_answer(query_embedding, version, scope, response)
+            if usage is not None:
+                usage["tokens_in"] = context.tokens + estimate_tokens(text)
+                usage["tokens_out"] = estimate_tokens(response)
+            return response
                 
         except Exception as e:
             logger.error(f"LLM-driven RAG failed: {e}")
-            return "I'm sorry, I encountered an error processing your request. Please try again."
+            return ERROR_ANSWER
 
 # Global router instance
 _router_instance: Optional[IntentRouter] = None
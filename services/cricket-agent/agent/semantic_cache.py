@@ -0,0 +1,138 @@
+"""
+Semantic answer cache for Cricket Agent
+Reuses answers for paraphrased questions by cosine similarity of their query embeddings
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """Fixed-size ring of unit-normalised query embeddings and their answers"""
+
+    def __init__(self, max_entries: int = 256, threshold: float = 0.92, ttl_seconds: float = 30 * 60):
+        """
+        Args:
+            max_entries: Maximum cached answers; the oldest is overwritten when full
+            threshold: Minimum cosine similarity for a cached answer to be reused
+            ttl_seconds: Seconds an answer stays valid
+        """
+        self.max_entries = max(1, max_entries)
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.dimensions: Optional[int] = None
+        self._lock = threading.Lock()
+
+        # Row-aligned ring storage
+        self._matrix: Optional[np.ndarray] = None
+        self._expires_at = np.zeros(self.max_entries, dtype=np.float64)
+        self._scopes = np.full(self.max_entries, None, dtype=object)
+        self._responses: List[Optional[Dict[str, Any]]] = [None] * self.max_entries
+        self._next = 0
+        self._size = 0
+        # Answers are only valid for the data version they were generated from
+        self._version: Optional[str] = None
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def get(self, embedding: List[float], version: str, scope: str = "") -> Optional[Dict[str, Any]]:
+        """
+        Find the answer to the most similar cached query
+
+        Args:
+            embedding: Query embedding
+            version: Data version the answer must have been generated from
+            scope: Exact-match partition (e.g. the team hint)
+
+        Returns:
+            Cached response with its similarity, or None if nothing is close enough
+        """
+        vector = self._unit(embedding)
+        with self._lock:
+            if vector is None or version != self._version or self._size == 0:
+                self.misses += 1
+                return None
+
+            now = time.time()
+            rows = self._size
+            similarities = self._matrix[:rows] @ vector
+            usable = (self._expires_at[:rows] > now) & (self._scopes[:rows] == scope)
+            similarities[~usable] = -1.0
+
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < self.threshold:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return {"response": self._responses[best], "similarity": similarity}
+
+    def put(self, embedding: List[float], version: str, response: Dict[str, Any], scope: str = "") -> None:
+        """Cache an answer; a new data version discards every older answer"""
+        vector = self._unit(embedding)
+        if vector is None:
+            return
+
+        with self._lock:
+            if version != self._version:
+                self._reset(version)
+            if self.dimensions is None:
+                self.dimensions = int(vector.shape[0])
+                self._matrix = np.zeros((self.max_entries, self.dimensions), dtype=np.float32)
+            if vector.shape[0] != self.dimensions:
+                logger.warning(f"Skipping semantic cache entry: embedding has {vector.shape[0]} dims, cache expects {self.dimensions}")
+                return
+
+            row = self._next
+            self._matrix[row] = vector
+            self._expires_at[row] = time.time() + self.ttl_seconds
+            self._scopes[row] = scope
+            self._responses[row] = response
+            self._next = (row + 1) % self.max_entries
+            self._size = min(self._size + 1, self.max_entries)
+
+    def clear(self) -> None:
+        """Drop all cached answers"""
+        with self._lock:
+            self._reset(None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        return {
+            "entries": self._size,
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+    def _reset(self, version: Optional[str]) -> None:
+        """Empty the ring and pin it to a data version (caller holds the lock)"""
+        self._version = version
+        self._expires_at[:] = 0.0
+        self._scopes[:] = None
+        self._responses = [None] * self.max_entries
+        self._next = 0
+        self._size = 0
+
+    @staticmethod
+    def _unit(embedding: Optional[List[float]]) -> Optional[np.ndarray]:
+        """Unit-normalised float32 copy of an embedding, or None if it is empty"""
+        if embedding is None or len(embedding) == 0:
+            return None
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(vector))
+        if norm == 0.0:
+            return None
+        return vector / norm
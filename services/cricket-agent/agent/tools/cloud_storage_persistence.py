@@ -7,21 +7,37 @@ import json
 import logging
 import os
 import tempfile
-from typing import Dict, List, Optional, Any
+import uuid
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
 
 try:
     from google.cloud import storage
+    from google.api_core.exceptions import NotFound, PreconditionFailed
     CLOUD_STORAGE_AVAILABLE = True
 except ImportError:
     CLOUD_STORAGE_AVAILABLE = False
     logging.warning("Cloud Storage not available")
 
+from .vector_snapshot import decode_snapshot, encode_snapshot, read_snapshot, write_snapshot
+
 logger = logging.getLogger(__name__)
 
+# Manifest listing the base snapshot plus append-only delta segments (current layout)
+MANIFEST_BLOB = "vector_store/manifest.json"
+SEGMENT_PREFIX = "vector_store/segments/"
+# Single-blob snapshot and legacy JSON layouts, still readable and adopted as a manifest base
+SNAPSHOT_BLOB = "vector_store/documents.snapshot"
+LEGACY_DOCUMENTS_BLOB = "vector_store/documents.json"
+
 class CloudStoragePersistence:
     """Cloud Storage-based persistent storage for vector documents"""
     
+    # Segments accumulated before append_documents compacts them into a new base
+    MAX_SEGMENTS = 16
+    # Attempts at a conditional manifest update before giving up
+    MANIFEST_RETRIES = 3
+    
     def __init__(self, project_id: str = None, bucket_name: str = None):
         self.project_id = project_id or "virtual-stratum-473511-u5"
         self.bucket_name = bucket_name or f"{self.project_id}-cricket-persistent-storage"
@@ -65,6 +81,7 @@ class CloudStoragePersistence:
             os.makedirs(self.fallback_dir, exist_ok=True)
             
             self.fallback_file = os.path.join(self.fallback_dir, "storage.json")
+            self.fallback_snapshot_file = os.path.join(self.fallback_dir, "documents.snapshot")
             
             # Load existing data
             if os.path.exists(self.fallback_file):
@@ -77,41 +94,48 @@ class CloudStoragePersistence:
                     "last_updated": None
                 }
             
+            # Documents live in the snapshot once one has been written
+            snapshot = read_snapshot(self.fallback_snapshot_file)
+            if snapshot is not None:
+                self.fallback_data["documents"] = dict(snapshot)
+            
             logger.info("Fallback storage initialized")
             
         except Exception as e:
             logger.error(f"Failed to initialize fallback storage: {e}")
             self.fallback_data = {"documents": {}, "metadata": {}}
     
-    def store_documents(self, documents: Dict[str, Any]) -> bool:
-        """Store documents in Cloud Storage"""
+    def store_documents(self, documents: Dict[str, Any]) -> Optional[str]:
+        """Store documents in Cloud Storage; returns the version written (as get_version), or None on failure"""
         try:
             logger.info(f"store_documents called with {len(documents)} documents")
             logger.info(f"self.bucket is None: {self.bucket is None}")
             logger.info(f"self.bucket_name: {self.bucket_name}")
             
             if self.bucket:
-                # Store in Cloud Storage
+                # Store in Cloud Storage as a new base snapshot that replaces all segments
                 logger.info(f"Attempting to store to Cloud Storage bucket: {self.bucket_name}")
-                blob = self.bucket.blob("vector_store/documents.json")
+                base_name = self._upload_snapshot("base", documents)
                 
-                # Prepare data
-                data = {
-                    "documents": documents,
-                    "metadata": {
-                        "total_documents": len(documents),
-                        "last_updated": datetime.utcnow().isoformat(),
-                        "storage_type": "cloud_storage"
-                    }
-                }
+                for _ in range(self.MANIFEST_RETRIES):
+                    manifest, generation = self._read_manifest()
+                    new_manifest = self._new_manifest(base_name, [], len(documents))
+                    written = self._write_manifest(new_manifest, generation)
+                    if written is not None:
+                        break
+                else:
+                    self._delete_blobs([base_name])
+                    raise Exception("Manifest changed concurrently, giving up")
                 
-                # Upload to Cloud Storage
-                blob.upload_from_string(
-                    json.dumps(data, indent=2),
-                    content_type='application/json'
-                )
+                if manifest:
+                    # Superseded blobs are only removed after the new manifest is visible
+                    self._delete_blobs([
+                        name for name in [manifest.get("base")] + manifest.get("segments", [])
+                        if name and name.startswith(SEGMENT_PREFIX)
+                    ])
                 
                 logger.info(f"✅ Successfully stored {len(documents)} documents in Cloud Storage!")
+                return str(written)
                 
             else:
                 # Store in fallback storage
@@ -124,41 +148,207 @@ class CloudStoragePersistence:
                 }
                 
                 # Save to file
-                with open(self.fallback_file, 'w') as f:
-                    json.dump(self.fallback_data, f, indent=2)
+                write_snapshot(self.fallback_snapshot_file, self.fallback_data["documents"])
+                self._write_fallback_file()
                 
                 logger.warning(f"⚠️ Stored {len(documents)} documents in FALLBACK storage (NOT PERSISTENT!)")
-            
-            return True
+                return self.get_version()
             
         except Exception as e:
             logger.error(f"❌ Failed to store documents: {e}")
-            return False
+            return None
+    
+    def append_documents(self, documents: Dict[str, Any], total_documents: Optional[int] = None) -> Optional[str]:
+        """
+        Persist changed documents as an append-only segment
+        
+        Args:
+            documents: Changed documents (id -> document)
+            total_documents: Size of the full store, recorded in the manifest
+            
+        Returns:
+            Manifest generation our write produced (as get_version), or None if the segment was not committed
+        """
+        try:
+            if not self.bucket:
+                # Fallback storage merges into its local snapshot
+                return self.store_documents(documents)
+            
+            if not documents:
+                return self.get_version()
+            
+            manifest, _ = self._read_manifest()
+            if manifest and len(manifest.get("segments", [])) >= self.MAX_SEGMENTS:
+                return self._compact(documents)
+            
+            segment_name = self._upload_snapshot("segment", documents)
+            
+            for _ in range(self.MANIFEST_RETRIES):
+                manifest, generation = self._read_manifest()
+                if manifest is None:
+                    # First append over a single-blob store: adopt it as the base
+                    manifest = self._new_manifest(self._existing_base(), [], total_documents or len(documents))
+                manifest["segments"] = manifest.get("segments", []) + [segment_name]
+                manifest["total_documents"] = total_documents if total_documents is not None else manifest.get("total_documents", 0)
+                manifest["last_updated"] = datetime.utcnow().isoformat()
+                written = self._write_manifest(manifest, generation)
+                if written is not None:
+                    logger.info(f"Appended {len(documents)} documents as segment {segment_name}")
+                    return str(written)
+            
+            self._delete_blobs([segment_name])
+            logger.error("Manifest changed concurrently, segment not committed")
+            return None
+            
+        except Exception as e:
+            logger.error(f"Failed to append documents: {e}")
+            return None
+    
+    def _compact(self, documents: Dict[str, Any]) -> Optional[str]:
+        """Fold the base, every segment and the new documents into a fresh base snapshot"""
+        for _ in range(self.MANIFEST_RETRIES):
+            manifest, generation = self._read_manifest()
+            logger.info(f"Compacting {len(manifest.get('segments', []))} segments into a new base snapshot")
+            try:
+                merged = self._load_manifest_documents(manifest)
+            except NotFound:
+                continue
+            merged.update(documents)
+            
+            base_name = self._upload_snapshot("base", merged)
+            written = self._write_manifest(self._new_manifest(base_name, [], len(merged)), generation)
+            if written is not None:
+                self._delete_blobs([
+                    name for name in [manifest.get("base")] + manifest.get("segments", [])
+                    if name and name.startswith(SEGMENT_PREFIX)
+                ])
+                return str(written)
+            # Someone appended meanwhile; their segment must be folded in too
+            self._delete_blobs([base_name])
+        
+        logger.error("Manifest changed concurrently, compaction abandoned")
+        return None
+    
+    def _load_manifest_documents(self, manifest: Dict[str, Any]) -> Dict[str, Any]:
+        """Load the base snapshot and apply each segment in order"""
+        documents = self._load_blob_documents(manifest["base"]) if manifest.get("base") else {}
+        for segment_name in manifest.get("segments", []):
+            documents.update(self._load_blob_documents(segment_name))
+        return documents
+    
+    def _upload_snapshot(self, kind: str, documents: Dict[str, Any]) -> str:
+        """Upload documents as a uniquely named snapshot blob and return its name"""
+        name = f"{SEGMENT_PREFIX}{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{kind}-{uuid.uuid4().hex[:8]}.snapshot"
+        payload = encode_snapshot(documents)
+        self.bucket.blob(name).upload_from_string(payload, content_type='application/octet-stream')
+        logger.info(f"Uploaded {kind} snapshot {name} ({len(documents)} documents, {len(payload)} bytes)")
+        return name
+    
+    def _new_manifest(self, base: Optional[str], segments: List[str], total_documents: int) -> Dict[str, Any]:
+        """Build a manifest document"""
+        return {
+            "base": base,
+            "segments": segments,
+            "total_documents": total_documents,
+            "last_updated": datetime.utcnow().isoformat(),
+            "storage_type": "cloud_storage"
+        }
+    
+    def _read_manifest(self) -> Tuple[Optional[Dict[str, Any]], int]:
+        """Read the manifest and its generation (0 if it does not exist yet)"""
+        blob = self.bucket.get_blob(MANIFEST_BLOB)
+        if blob is None:
+            return None, 0
+        return json.loads(blob.download_as_text()), blob.generation
+    
+    def _write_manifest(self, manifest: Dict[str, Any], generation: int) -> Optional[int]:
+        """Write the manifest only if nobody else changed it since it was read; returns the new generation"""
+        blob = self.bucket.blob(MANIFEST_BLOB)
+        try:
+            blob.upload_from_string(
+                json.dumps(manifest),
+                content_type='application/json',
+                if_generation_match=generation
+            )
+            return blob.generation
+        except PreconditionFailed:
+            logger.info("Manifest changed concurrently, retrying")
+            return None
+    
+    def _existing_base(self) -> Optional[str]:
+        """Name of a pre-manifest single-blob store, if any"""
+        for name in (SNAPSHOT_BLOB, LEGACY_DOCUMENTS_BLOB):
+            if self.bucket.blob(name).exists():
+                return name
+        return None
+    
+    def _load_blob_documents(self, name: str) -> Dict[str, Any]:
+        """Load documents from a snapshot blob or a legacy JSON blob"""
+        blob = self.bucket.blob(name)
+        if name.endswith(".json"):
+            return json.loads(blob.download_as_text()).get("documents", {})
+        return decode_snapshot(blob.download_as_bytes())
+    
+    def _delete_blobs(self, names: List[str]) -> None:
+        """Best-effort removal of superseded blobs"""
+        for name in names:
+            try:
+                self.bucket.blob(name).delete()
+            except Exception as e:
+                logger.warning(f"Failed to delete blob {name}: {e}")
     
     def load_documents(self) -> Dict[str, Any]:
-        """Load documents from Cloud Storage"""
+        """Load documents from Cloud Storage, migrating a legacy JSON store to a snapshot"""
         try:
             if self.bucket:
+                # Load base plus segments; a concurrent compaction may delete a segment mid-read
+                for _ in range(self.MANIFEST_RETRIES):
+                    manifest, _ = self._read_manifest()
+                    if manifest is None:
+                        break
+                    try:
+                        documents = self._load_manifest_documents(manifest)
+                        logger.info(f"Loaded {len(documents)} documents from Cloud Storage ({len(manifest.get('segments', []))} segments)")
+                        return documents
+                    except NotFound:
+                        logger.info("Snapshot blob disappeared during load, re-reading manifest")
+                
                 # Load from Cloud Storage
-                blob = self.bucket.blob("vector_store/documents.json")
+                blob = self.bucket.blob(SNAPSHOT_BLOB)
                 
                 if blob.exists():
-                    data = json.loads(blob.download_as_text())
+                    documents = decode_snapshot(blob.download_as_bytes())
+                    logger.info(f"Loaded {len(documents)} documents from Cloud Storage")
+                    return documents
+                
+                legacy_blob = self.bucket.blob(LEGACY_DOCUMENTS_BLOB)
+                if legacy_blob.exists():
+                    data = json.loads(legacy_blob.download_as_text())
                     documents = data.get("documents", {})
+                    # Migrate once; the legacy blob is left in place as a fallback
+                    if documents and self.store_documents(documents):
+                        logger.info(f"Migrated {len(documents)} documents from legacy JSON to snapshot")
                     logger.info(f"Loaded {len(documents)} documents from Cloud Storage")
                     return documents
-                else:
-                    logger.info("No documents found in Cloud Storage")
-                    return {}
+                
+                logger.info("No documents found in Cloud Storage")
+                return {}
                     
             else:
                 # Load from fallback storage
+                documents = read_snapshot(self.fallback_snapshot_file)
+                if documents is not None:
+                    logger.info(f"Loaded {len(documents)} documents from fallback storage")
+                    return documents
+                
                 if os.path.exists(self.fallback_file):
                     with open(self.fallback_file, 'r') as f:
                         data = json.load(f)
-                        documents = data.get("documents", {})
-                        logger.info(f"Loaded {len(documents)} documents from fallback storage")
-                        return documents
+                    documents = data.get("documents", {})
+                    if documents:
+                        write_snapshot(self.fallback_snapshot_file, documents)
+                    logger.info(f"Loaded {len(documents)} documents from fallback storage")
+                    return documents
                 else:
                     logger.info("No fallback storage file found")
                     return {}
@@ -167,15 +357,121 @@ class CloudStoragePersistence:
             logger.error(f"Failed to load documents: {e}")
             return {}
     
+    def _write_fallback_file(self) -> None:
+        """Write fallback metadata and manifests (documents live in the snapshot file)"""
+        data = {key: value for key, value in self.fallback_data.items() if key != "documents"}
+        with open(self.fallback_file, 'w') as f:
+            json.dump(data, f, indent=2)
+    
+    def get_version(self) -> Optional[str]:
+        """Get a cheap change marker for the stored documents (blob generation)"""
+        try:
+            if self.bucket:
+                # Metadata-only requests; do not download the payload
+                blob = self.bucket.get_blob(MANIFEST_BLOB) or self.bucket.get_blob(SNAPSHOT_BLOB) or \
+                    self.bucket.get_blob(LEGACY_DOCUMENTS_BLOB)
+                return str(blob.generation) if blob else None
+            else:
+                for path in (self.fallback_snapshot_file, self.fallback_file):
+                    if os.path.exists(path):
+                        return str(os.stat(path).st_mtime_ns)
+                return None
+                
+        except Exception as e:
+            logger.warning(f"Failed to get storage version: {e}")
+            return None
+    
+    def store_content_hashes(self, content_hashes: Dict[str, str]) -> bool:
+        """Store the delta-upsert hash manifest (doc_id -> content hash)"""
+        try:
+            if self.bucket:
+                blob = self.bucket.blob("vector_store/content_hashes.json")
+                blob.upload_from_string(
+                    json.dumps(content_hashes),
+                    content_type='application/json'
+                )
+                logger.info(f"Stored {len(content_hashes)} content hashes in Cloud Storage")
+            else:
+                self.fallback_data["content_hashes"] = content_hashes
+                self._write_fallback_file()
+                logger.info(f"Stored {len(content_hashes)} content hashes in fallback storage")
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to store content hashes: {e}")
+            return False
+    
+    def load_content_hashes(self) -> Dict[str, str]:
+        """Load the delta-upsert hash manifest"""
+        try:
+            if self.bucket:
+                blob = self.bucket.blob("vector_store/content_hashes.json")
+                if blob.exists():
+                    return json.loads(blob.download_as_text())
+                return {}
+            else:
+                return dict(self.fallback_data.get("content_hashes", {}))
+                
+        except Exception as e:
+            logger.error(f"Failed to load content hashes: {e}")
+            return {}
+    
+    def store_embedding_cache(self, keys: bytes, vectors: bytes, meta: Dict[str, Any]) -> bool:
+        """Mirror the embedding cache files to Cloud Storage"""
+        try:
+            if not self.bucket:
+                # The local cache files are already the fallback copy
+                return False
+            
+            self.bucket.blob("vector_store/embedding_cache/vectors.f32").upload_from_string(
+                vectors, content_type='application/octet-stream'
+            )
+            self.bucket.blob("vector_store/embedding_cache/keys.bin").upload_from_string(
+                keys, content_type='application/octet-stream'
+            )
+            self.bucket.blob("vector_store/embedding_cache/meta.json").upload_from_string(
+                json.dumps(meta), content_type='application/json'
+            )
+            logger.info(f"Mirrored embedding cache ({len(vectors)} bytes) to Cloud Storage")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to store embedding cache: {e}")
+            return False
+    
+    def load_embedding_cache(self) -> Optional[Tuple[bytes, bytes, Dict[str, Any]]]:
+        """Load the mirrored embedding cache files (keys, vectors, meta) from Cloud Storage"""
+        try:
+            if not self.bucket:
+                return None
+            
+            meta_blob = self.bucket.blob("vector_store/embedding_cache/meta.json")
+            if not meta_blob.exists():
+                return None
+            
+            meta = json.loads(meta_blob.download_as_text())
+            keys = self.bucket.blob("vector_store/embedding_cache/keys.bin").download_as_bytes()
+            vectors = self.bucket.blob("vector_store/embedding_cache/vectors.f32").download_as_bytes()
+            return keys, vectors, meta
+            
+        except Exception as e:
+            logger.error(f"Failed to load embedding cache: {e}")
+            return None
+    
     def get_document(self, doc_id: str) -> Optional[Dict[str, Any]]:
         """Get specific document by ID"""
+        return self.get_documents([doc_id]).get(doc_id)
+    
+    def get_documents(self, doc_ids: List[str]) -> Dict[str, Any]:
+        """Get several documents with a single load of the store; missing ids are omitted"""
         try:
             documents = self.load_documents()
-            return documents.get(doc_id)
+            return {doc_id: documents[doc_id] for doc_id in doc_ids if doc_id in documents}
                 
         except Exception as e:
-            logger.error(f"Failed to get document {doc_id}: {e}")
-            return None
+            logger.error(f"Failed to get {len(doc_ids)} documents: {e}")
+            return {}
     
     def delete_document(self, doc_id: str) -> bool:
         """Delete specific document"""
@@ -183,7 +479,7 @@ class CloudStoragePersistence:
             documents = self.load_documents()
             if doc_id in documents:
                 del documents[doc_id]
-                return self.store_documents(documents)
+                return self.store_documents(documents) is not None
             return False
                 
         except Exception as e:
@@ -194,11 +490,31 @@ class CloudStoragePersistence:
         """Get storage metadata"""
         try:
             if self.bucket:
-                # Get from Cloud Storage
-                blob = self.bucket.blob("vector_store/documents.json")
+                manifest, _ = self._read_manifest()
+                if manifest is not None:
+                    return {
+                        "storage_type": "cloud_storage",
+                        "total_documents": manifest.get("total_documents", 0),
+                        "last_updated": manifest.get("last_updated"),
+                        "segments": len(manifest.get("segments", [])),
+                        "cloud_storage_connected": True
+                    }
                 
-                if blob.exists():
-                    data = json.loads(blob.download_as_text())
+                # Get from Cloud Storage blob metadata
+                blob = self.bucket.get_blob(SNAPSHOT_BLOB)
+                
+                if blob is not None:
+                    metadata = blob.metadata or {}
+                    return {
+                        "storage_type": "cloud_storage",
+                        "total_documents": int(metadata.get("total_documents", 0)),
+                        "last_updated": metadata.get("last_updated"),
+                        "cloud_storage_connected": True
+                    }
+                
+                legacy_blob = self.bucket.blob(LEGACY_DOCUMENTS_BLOB)
+                if legacy_blob.exists():
+                    data = json.loads(legacy_blob.download_as_text())
                     return {
                         "storage_type": "cloud_storage",
                         "total_documents": len(data.get("documents", {})),
@@ -219,7 +535,7 @@ class CloudStoragePersistence:
                         data = json.load(f)
                         return {
                             "storage_type": "fallback",
-                            "total_documents": len(data.get("documents", {})),
+                            "total_documents": len(self.fallback_data.get("documents", {})),
                             "last_updated": data.get("metadata", {}).get("last_updated"),
                             "cloud_storage_connected": False
                         }
@@ -240,8 +556,11 @@ class CloudStoragePersistence:
         try:
             if self.bucket:
                 # Clear Cloud Storage
-                blob = self.bucket.blob("vector_store/documents.json")
-                if blob.exists():
+                for blob_name in (MANIFEST_BLOB, SNAPSHOT_BLOB, LEGACY_DOCUMENTS_BLOB, "vector_store/content_hashes.json"):
+                    blob = self.bucket.blob(blob_name)
+                    if blob.exists():
+                        blob.delete()
+                for blob in self.bucket.list_blobs(prefix=SEGMENT_PREFIX):
                     blob.delete()
                 logger.info("Cleared all documents from Cloud Storage")
             else:
@@ -250,6 +569,8 @@ class CloudStoragePersistence:
                 if os.path.exists(self.fallback_file):
                     with open(self.fallback_file, 'w') as f:
                         json.dump(self.fallback_data, f, indent=2)
+                if os.path.exists(self.fallback_snapshot_file):
+                    os.remove(self.fallback_snapshot_file)
                 logger.info("Cleared all documents from fallback storage")
             
             return True
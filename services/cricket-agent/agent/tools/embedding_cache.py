@@ -0,0 +1,240 @@
+"""
+Content-addressed embedding cache for Cricket Agent
+Append-only memory-mapped store keyed by sha256(model + text), mirrored to Cloud Storage
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+KEY_BYTES = 32
+
+
+def embedding_cache_key(model: str, text: str) -> bytes:
+    """Content address for an embedding: sha256 of the model name and the exact text"""
+    return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """Persistent text -> embedding cache backed by append-only key and vector files"""
+
+    def __init__(self, model: str, cache_dir: str = "/tmp/cricket-vectors/embedding_cache", remote: Any = None):
+        """
+        Args:
+            model: Embedding model name (part of every key)
+            cache_dir: Local directory holding keys.bin, vectors.f32 and meta.json
+            remote: Optional backend with load_embedding_cache/store_embedding_cache for mirroring
+        """
+        self.model = model
+        self.cache_dir = cache_dir
+        self.remote = remote
+        self.keys_path = os.path.join(cache_dir, "keys.bin")
+        self.vectors_path = os.path.join(cache_dir, "vectors.f32")
+        self.meta_path = os.path.join(cache_dir, "meta.json")
+
+        self.dimensions: Optional[int] = None
+        self._rows: Dict[bytes, int] = {}
+        self._vectors: Optional[np.ndarray] = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """
+        Look up embeddings for texts
+
+        Args:
+            texts: Texts to look up
+
+        Returns:
+            List aligned with texts; None where the text is not cached
+        """
+        results: List[Optional[List[float]]] = []
+        with self._lock:
+            for text in texts:
+                row = self._rows.get(embedding_cache_key(self.model, text))
+                if row is None:
+                    results.append(None)
+                    continue
+                results.append(self._vectors[row].tolist())
+        hits = sum(1 for result in results if result is not None)
+        self.hits += hits
+        self.misses += len(results) - hits
+        return results
+
+    def put_many(self, texts: Sequence[str], embeddings: Sequence[Optional[List[float]]]) -> int:
+        """Append new embeddings to the cache; returns how many were added"""
+        keys = []
+        vectors = []
+        with self._lock:
+            start = len(self._rows)
+            for text, embedding in zip(texts, embeddings):
+                if not embedding:
+                    continue
+                key = embedding_cache_key(self.model, text)
+                if key in self._rows:
+                    continue
+                vector = np.asarray(embedding, dtype=np.float32).ravel()
+                if self.dimensions is None:
+                    self.dimensions = int(vector.shape[0])
+                    self._write_meta()
+                if vector.shape[0] != self.dimensions:
+                    continue
+                self._rows[key] = len(self._rows)
+                keys.append(key)
+                vectors.append(vector)
+
+            if not keys:
+                return 0
+
+            try:
+                # Keys are written last so a crash never leaves a key without its vector
+                with open(self.vectors_path, "ab") as f:
+                    f.write(np.vstack(vectors).tobytes())
+                with open(self.keys_path, "ab") as f:
+                    f.write(b"".join(keys))
+            except Exception as e:
+                logger.warning(f"Failed to append to embedding cache: {e}")
+                # Drop the batch so row numbers keep matching the files
+                for key in keys:
+                    del self._rows[key]
+                try:
+                    self._truncate(start)
+                except OSError:
+                    pass
+                return 0
+            # Remap so the new rows are read from the file rather than held in memory
+            self._map(len(self._rows))
+            self._dirty = True
+        return len(keys)
+
+    def flush(self) -> bool:
+        """Mirror the local cache files to the remote backend if anything was added"""
+        if not self._dirty or self.remote is None:
+            return False
+        try:
+            with self._lock:
+                with open(self.keys_path, "rb") as f:
+                    keys = f.read()
+                with open(self.vectors_path, "rb") as f:
+                    vectors = f.read()
+                meta = {"model": self.model, "dimensions": self.dimensions}
+            if self.remote.store_embedding_cache(keys, vectors, meta):
+                self._dirty = False
+                return True
+        except Exception as e:
+            logger.warning(f"Failed to mirror embedding cache: {e}")
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        return {
+            "entries": len(self._rows),
+            "hits": self.hits,
+            "misses": self.misses,
+            "dimensions": self.dimensions
+        }
+
+    def _load(self) -> None:
+        """Map the local cache files, pulling them from the remote backend first if absent"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            if not os.path.exists(self.keys_path) and self.remote is not None:
+                self._pull_remote()
+
+            if not os.path.exists(self.meta_path) or not os.path.exists(self.keys_path):
+                # Rows can't be numbered without both files: clear any leftovers before appending
+                self._reset_files()
+                return
+
+            with open(self.meta_path, "r") as f:
+                meta = json.load(f)
+            if meta.get("model") != self.model or not meta.get("dimensions"):
+                logger.info("Embedding cache was built for a different model, starting fresh")
+                self._reset_files()
+                return
+            self.dimensions = int(meta["dimensions"])
+
+            with open(self.keys_path, "rb") as f:
+                keys = f.read()
+            row_bytes = self.dimensions * 4
+            vector_rows = os.path.getsize(self.vectors_path) // row_bytes if os.path.exists(self.vectors_path) else 0
+            # Tolerate a torn append: only rows present in both files are usable
+            rows = min(len(keys) // KEY_BYTES, vector_rows)
+
+            self._map(rows)
+            for row in range(rows):
+                self._rows[keys[row * KEY_BYTES:(row + 1) * KEY_BYTES]] = row
+
+            if rows != len(keys) // KEY_BYTES or rows != vector_rows:
+                self._truncate(rows)
+
+            logger.info(f"Loaded {rows} cached embeddings")
+        except Exception as e:
+            logger.warning(f"Failed to load embedding cache: {e}, starting empty")
+            self._rows = {}
+            self._vectors = None
+            self.dimensions = None
+            try:
+                self._reset_files()
+            except OSError:
+                pass
+
+    def _pull_remote(self) -> None:
+        """Seed the local cache files from the remote mirror"""
+        try:
+            payload = self.remote.load_embedding_cache()
+            if not payload:
+                return
+            keys, vectors, meta = payload
+            with open(self.vectors_path, "wb") as f:
+                f.write(vectors)
+            with open(self.keys_path, "wb") as f:
+                f.write(keys)
+            with open(self.meta_path, "w") as f:
+                json.dump(meta, f)
+            logger.info(f"Pulled {len(keys) // KEY_BYTES} cached embeddings from remote storage")
+        except Exception as e:
+            logger.warning(f"Failed to pull embedding cache from remote storage: {e}")
+
+    def _map(self, rows: int) -> None:
+        """Memory-map the first rows of the vectors file"""
+        if rows:
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dimensions))
+        else:
+            self._vectors = None
+
+    def _write_meta(self) -> None:
+        """Record the model and dimensions the cache files were written with"""
+        try:
+            with open(self.meta_path, "w") as f:
+                json.dump({"model": self.model, "dimensions": self.dimensions}, f)
+        except Exception as e:
+            logger.warning(f"Failed to write embedding cache metadata: {e}")
+
+    def _truncate(self, rows: int) -> None:
+        """Cut both files back to a consistent row count"""
+        for path, size in ((self.keys_path, rows * KEY_BYTES), (self.vectors_path, rows * self.dimensions * 4)):
+            if os.path.exists(path):
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+
+    def _reset_files(self) -> None:
+        """Remove the local cache files"""
+        for path in (self.keys_path, self.vectors_path, self.meta_path):
+            if os.path.exists(path):
+                os.remove(path)
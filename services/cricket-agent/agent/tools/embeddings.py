@@ -0,0 +1,112 @@
+"""
+Batched embedding generation for Cricket Agent
+Packs texts into multi-instance predict calls and runs them with bounded concurrency
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# text-embedding-005 request limits
+MAX_INSTANCES_PER_REQUEST = 250
+MAX_TOKENS_PER_REQUEST = 20000
+# Each input is truncated by the model beyond this many tokens
+MAX_TOKENS_PER_INSTANCE = 2048
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token), capped at the per-input limit"""
+    return min(max(1, len(text) // 4 + 1), MAX_TOKENS_PER_INSTANCE)
+
+
+class BatchEmbedder:
+    """Embeds many texts per predict call, keeping results aligned with the inputs"""
+
+    def __init__(
+        self,
+        predict_fn: Callable[[List[Dict[str, Any]]], Any],
+        max_instances: int = MAX_INSTANCES_PER_REQUEST,
+        max_tokens: int = MAX_TOKENS_PER_REQUEST,
+        max_concurrency: int = 4,
+    ):
+        """
+        Args:
+            predict_fn: Callable taking a list of instances and returning a predict response
+            max_instances: Maximum instances per request
+            max_tokens: Maximum estimated tokens per request
+            max_concurrency: Maximum requests in flight at once
+        """
+        self.predict_fn = predict_fn
+        self.max_instances = max(1, max_instances)
+        self.max_tokens = max(1, max_tokens)
+        self.max_concurrency = max(1, max_concurrency)
+
+    def plan_batches(self, texts: Sequence[str]) -> List[List[int]]:
+        """Group input positions into requests that respect the instance and token limits"""
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = 0
+
+        for position, text in enumerate(texts):
+            tokens = estimate_tokens(text)
+            if current and (len(current) >= self.max_instances or current_tokens + tokens > self.max_tokens):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(position)
+            current_tokens += tokens
+
+        if current:
+            batches.append(current)
+        return batches
+
+    def embed(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """
+        Embed texts in batched, concurrent requests
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            List aligned with texts; an entry is None when its request failed
+        """
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        batches = self.plan_batches(texts)
+        if not batches:
+            return results
+
+        def run(positions: List[int]) -> None:
+            embeddings = self._predict([texts[p] for p in positions])
+            for position, embedding in zip(positions, embeddings):
+                results[position] = embedding
+
+        if len(batches) == 1:
+            run(batches[0])
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(batches))) as executor:
+                list(executor.map(run, batches))
+
+        failed = sum(1 for embedding in results if embedding is None)
+        if failed:
+            logger.warning(f"Failed to embed {failed}/{len(texts)} texts")
+        return results
+
+    def _predict(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Run one predict request; every row of a failed request maps to None"""
+        try:
+            response = self.predict_fn([{"content": text} for text in texts])
+            predictions = list(response.predictions or [])
+        except Exception as e:
+            logger.error(f"Embedding request for {len(texts)} texts failed: {e}")
+            return [None] * len(texts)
+
+        if len(predictions) != len(texts):
+            logger.error(f"Embedding request returned {len(predictions)} predictions for {len(texts)} texts")
+            return [None] * len(texts)
+
+        embeddings = []
+        for prediction in predictions:
+            values = prediction.get("embeddings", {}).get("values", [])
+            embeddings.append(list(values) if values else None)
+        return embeddings
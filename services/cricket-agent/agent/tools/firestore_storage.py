@@ -5,6 +5,7 @@ Free tier alternative to Redis for Cloud Run persistent storage
 
 import json
 import logging
+import os
 import time
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
@@ -16,6 +17,8 @@ except ImportError:
     FIRESTORE_AVAILABLE = False
     logging.warning("Firestore not available")
 
+from .vector_snapshot import embedding_to_list
+
 logger = logging.getLogger(__name__)
 
 class FirestoreStorage:
@@ -26,6 +29,9 @@ class FirestoreStorage:
         self.db = None
         self.collection_name = "cricket_agent_documents"
         self.metadata_doc_id = "metadata"
+        # Delta-upsert hash manifest, sharded to stay under the 1 MiB document limit
+        self.content_hashes_collection = "cricket_agent_content_hashes"
+        self.content_hashes_shard_size = 5000
         
         # Initialize Firestore connection
         self._initialize_firestore()
@@ -74,7 +80,7 @@ class FirestoreStorage:
             logger.error(f"Failed to initialize fallback storage: {e}")
             self.fallback_data = {"documents": {}, "metadata": {}}
     
-    def store_documents(self, documents: Dict[str, Any]) -> bool:
+    def store_documents(self, documents: Dict[str, Any], total_documents: Optional[int] = None) -> bool:
         """Store documents in Firestore"""
         try:
             if self.db:
@@ -87,7 +93,7 @@ class FirestoreStorage:
                         "id": doc_id,
                         "text": doc_data.get("text", ""),
                         "metadata": doc_data.get("metadata", {}),
-                        "embedding": doc_data.get("embedding", []),
+                        "embedding": embedding_to_list(doc_data.get("embedding")),
                         "created_at": datetime.utcnow(),
                         "updated_at": datetime.utcnow()
                     })
@@ -95,7 +101,7 @@ class FirestoreStorage:
                 # Update metadata
                 metadata_ref = self.db.collection(self.collection_name).document(self.metadata_doc_id)
                 batch.set(metadata_ref, {
-                    "total_documents": len(documents),
+                    "total_documents": total_documents if total_documents is not None else len(documents),
                     "last_updated": datetime.utcnow(),
                     "storage_type": "firestore"
                 })
@@ -106,7 +112,10 @@ class FirestoreStorage:
                 
             else:
                 # Store in fallback storage
-                self.fallback_data["documents"].update(documents)
+                self.fallback_data["documents"].update({
+                    doc_id: dict(doc_data, embedding=embedding_to_list(doc_data.get("embedding")))
+                    for doc_id, doc_data in documents.items()
+                })
                 self.fallback_data["metadata"] = {
                     "total_documents": len(self.fallback_data["documents"]),
                     "last_updated": datetime.utcnow().isoformat(),
@@ -161,6 +170,76 @@ class FirestoreStorage:
             logger.error(f"Failed to load documents: {e}")
             return {}
     
+    def get_version(self) -> Optional[str]:
+        """Get a cheap change marker for the stored documents (metadata doc timestamp)"""
+        try:
+            if self.db:
+                metadata_ref = self.db.collection(self.collection_name).document(self.metadata_doc_id)
+                metadata_doc = metadata_ref.get()
+                if metadata_doc.exists:
+                    last_updated = metadata_doc.to_dict().get("last_updated")
+                    return last_updated.isoformat() if last_updated else None
+                return None
+            else:
+                if os.path.exists(self.fallback_file):
+                    return str(os.stat(self.fallback_file).st_mtime_ns)
+                return None
+                
+        except Exception as e:
+            logger.warning(f"Failed to get storage version: {e}")
+            return None
+    
+    def store_content_hashes(self, content_hashes: Dict[str, str]) -> bool:
+        """Store the delta-upsert hash manifest (doc_id -> content hash)"""
+        try:
+            if self.db:
+                collection = self.db.collection(self.content_hashes_collection)
+                items = sorted(content_hashes.items())
+                shard_count = 0
+                batch = self.db.batch()
+                
+                for start in range(0, len(items), self.content_hashes_shard_size):
+                    shard = dict(items[start:start + self.content_hashes_shard_size])
+                    batch.set(collection.document(f"shard-{shard_count}"), {
+                        "hashes": shard,
+                        "updated_at": datetime.utcnow()
+                    })
+                    shard_count += 1
+                
+                # Drop shards left over from a larger manifest
+                for doc in collection.stream():
+                    if doc.id.startswith("shard-") and int(doc.id.split("-", 1)[1]) >= shard_count:
+                        batch.delete(doc.reference)
+                
+                batch.commit()
+                logger.info(f"Stored {len(content_hashes)} content hashes in Firestore ({shard_count} shards)")
+            else:
+                self.fallback_data["content_hashes"] = content_hashes
+                with open(self.fallback_file, 'w') as f:
+                    json.dump(self.fallback_data, f, indent=2)
+                logger.info(f"Stored {len(content_hashes)} content hashes in fallback storage")
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to store content hashes: {e}")
+            return False
+    
+    def load_content_hashes(self) -> Dict[str, str]:
+        """Load the delta-upsert hash manifest"""
+        try:
+            if self.db:
+                content_hashes = {}
+                for doc in self.db.collection(self.content_hashes_collection).stream():
+                    content_hashes.update(doc.to_dict().get("hashes", {}))
+                return content_hashes
+            else:
+                return dict(self.fallback_data.get("content_hashes", {}))
+                
+        except Exception as e:
+            logger.error(f"Failed to load content hashes: {e}")
+            return {}
+    
     def get_document(self, doc_id: str) -> Optional[Dict[str, Any]]:
         """Get specific document by ID"""
         try:
@@ -186,6 +265,32 @@ class FirestoreStorage:
             logger.error(f"Failed to get document {doc_id}: {e}")
             return None
     
+    def get_documents(self, doc_ids: List[str]) -> Dict[str, Any]:
+        """Get several documents in one batched read; missing ids are omitted"""
+        try:
+            if not doc_ids:
+                return {}
+            
+            if self.db:
+                collection = self.db.collection(self.collection_name)
+                documents = {}
+                for doc in self.db.get_all([collection.document(doc_id) for doc_id in doc_ids]):
+                    if doc.exists:
+                        doc_data = doc.to_dict()
+                        documents[doc.id] = {
+                            "text": doc_data.get("text", ""),
+                            "metadata": doc_data.get("metadata", {}),
+                            "embedding": doc_data.get("embedding", [])
+                        }
+                return documents
+            else:
+                documents = self.load_documents()
+                return {doc_id: documents[doc_id] for doc_id in doc_ids if doc_id in documents}
+                
+        except Exception as e:
+            logger.error(f"Failed to get {len(doc_ids)} documents: {e}")
+            return {}
+    
     def delete_document(self, doc_id: str) -> bool:
         """Delete specific document"""
         try:
@@ -262,6 +367,8 @@ class FirestoreStorage:
                 
                 for doc in docs:
                     batch.delete(doc.reference)
+                for doc in self.db.collection(self.content_hashes_collection).stream():
+                    batch.delete(doc.reference)
                 
                 batch.commit()
                 logger.info("Cleared all documents from Firestore")
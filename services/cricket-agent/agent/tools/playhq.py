@@ -5,17 +5,35 @@ Implements retries, pagination, and error handling
 """
 
 import asyncio
+import hashlib
+import json
+import os
+import re
+import tempfile
 import time
-from typing import Dict, Any, List, Optional, AsyncGenerator
+from typing import Dict, Any, List, Optional, AsyncGenerator, Tuple
 from dataclasses import dataclass
 import httpx
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 import logging
 
 from app.config import get_settings, get_playhq_headers
+from app.observability import get_metrics
 
 logger = logging.getLogger(__name__)
 
+# Seconds a cached GET response is served without asking PlayHQ (unless the caller revalidates); stale entries are revalidated
+# with If-None-Match/If-Modified-Since. First matching pattern wins, unmatched endpoints always revalidate.
+PLAYHQ_CACHE_TTLS: List[Tuple[str, int]] = [
+    (r"^(/organisations/[^/]+)?/seasons$", 3 * 24 * 3600),
+    (r"^/seasons/[^/]+/grades$", 24 * 3600),
+    (r"^/grades/[^/]+/teams$", 24 * 3600),
+    (r"^/teams/[^/]+/fixtures$", 30 * 60),
+    (r"^/summary/[^/]+$", 10 * 60),
+    (r"^/ladder/[^/]+$", 5 * 60),
+    (r"^/games$", 5 * 60),
+]
+
 @dataclass
 class PlayHQResponse:
     """PlayHQ API response wrapper"""
@@ -24,40 +42,176 @@ class PlayHQResponse:
     has_more: bool
     cursor: Optional[str] = None
 
+def cache_ttl(endpoint: str) -> int:
+    """TTL in seconds for a PlayHQ endpoint path"""
+    for pattern, ttl in PLAYHQ_CACHE_TTLS:
+        if re.match(pattern, endpoint):
+            return ttl
+    return 0
+
+class PlayHQCache:
+    """On-disk cache of PlayHQ GET responses with their validators (ETag / Last-Modified)"""
+    
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+        except Exception as e:
+            logger.warning(f"Failed to create PlayHQ cache directory {cache_dir}: {e}")
+    
+    @staticmethod
+    def key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Cache key for a GET request"""
+        query = json.dumps(sorted((params or {}).items()), default=str)
+        return hashlib.sha256(f"{url}?{query}".encode("utf-8")).hexdigest()
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a cached entry, reading it from disk on first use"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry
+        
+        path = os.path.join(self.cache_dir, f"{key}.json")
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+            self._entries[key] = entry
+            return entry
+        except Exception as e:
+            logger.warning(f"Failed to read PlayHQ cache entry {key}: {e}")
+            return None
+    
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        """Store an entry in memory and atomically on disk"""
+        self._entries[key] = entry
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".entry-")
+            with os.fdopen(fd, "w") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, os.path.join(self.cache_dir, f"{key}.json"))
+        except Exception as e:
+            logger.warning(f"Failed to write PlayHQ cache entry {key}: {e}")
+    
+    def clear(self) -> None:
+        """Remove all cached entries"""
+        self._entries.clear()
+        try:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".json"):
+                    os.remove(os.path.join(self.cache_dir, name))
+        except Exception as e:
+            logger.warning(f"Failed to clear PlayHQ cache: {e}")
+
+_caches: Dict[str, PlayHQCache] = {}
+
+def get_playhq_cache(cache_dir: str) -> PlayHQCache:
+    """Get the process-wide cache for a directory, shared by every client instance"""
+    if cache_dir not in _caches:
+        _caches[cache_dir] = PlayHQCache(cache_dir)
+    return _caches[cache_dir]
+
 class PlayHQClient:
     """PlayHQ API client with retry logic and pagination"""
     
-    def __init__(self):
+    CACHE_DIR = "/tmp/cricket-playhq-cache"
+    
+    def __init__(self, max_concurrency: Optional[int] = None):
         self.settings = get_settings()
         self.headers = get_playhq_headers()
         self.base_url = self.settings.playhq_base_url
         self.timeout = 30.0
+        # Requests in flight at once, shared by everything using this client
+        self.max_concurrency = max(1, int(max_concurrency or self.settings.playhq_max_concurrency))
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.cache = get_playhq_cache(self.CACHE_DIR)
         
         # HTTP client with retry configuration
         self.client = httpx.AsyncClient(
             headers=self.headers,
             timeout=self.timeout,
-            limits=httpx.Limits(max_keepalive_connections=5, max_connections=10)
+            limits=httpx.Limits(
+                max_keepalive_connections=self.max_concurrency,
+                max_connections=max(10, self.max_concurrency)
+            )
         )
     
     async def __aenter__(self):
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+    
+    async def close(self) -> None:
+        """Close the underlying HTTP connection pool"""
         await self.client.aclose()
     
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        """Semaphore bounding concurrent requests (created on first use, inside the running loop)"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+    
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=4, max=10),
         retry=retry_if_exception_type((httpx.TimeoutException, httpx.HTTPStatusError))
     )
-    async def _make_request(self, method: str, endpoint: str, **kwargs) -> httpx.Response:
-        """Make HTTP request with retry logic"""
+    async def _make_request(self, method: str, endpoint: str, revalidate: bool = False, **kwargs) -> httpx.Response:
+        """
+        Make HTTP request with retry logic, serving GETs from the response cache when possible
+        
+        Args:
+            method: HTTP method
+            endpoint: Path below the API base URL
+            revalidate: Ask PlayHQ even if the cached entry is within its TTL (max-age 0),
+                for callers that must publish PlayHQ's current data
+        """
         url = f"{self.base_url}{endpoint}"
         
+        cache_key = None
+        cached = None
+        if method == "GET":
+            cache_key = self.cache.key(url, kwargs.get("params"))
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                if not revalidate and time.time() - cached["stored_at"] < cache_ttl(endpoint):
+                    get_metrics().record_playhq_cache("hit")
+                    return self._cached_response(method, url, cached)
+                
+                # Stale or revalidating: ask PlayHQ whether it changed
+                headers = dict(kwargs.pop("headers", None) or {})
+                if cached.get("etag"):
+                    headers["If-None-Match"] = cached["etag"]
+                if cached.get("last_modified"):
+                    headers["If-Modified-Since"] = cached["last_modified"]
+                kwargs["headers"] = headers
+        
         try:
-            response = await self.client.request(method, url, **kwargs)
+            # Hold a slot only for the request itself, not the retry backoff
+            async with self.semaphore:
+                response = await self.client.request(method, url, **kwargs)
+            
+            if response.status_code == 304 and cached is not None:
+                cached["stored_at"] = time.time()
+                self.cache.put(cache_key, cached)
+                get_metrics().record_playhq_cache("revalidated")
+                return self._cached_response(method, url, cached)
+            
             response.raise_for_status()
+            
+            if cache_key is not None:
+                get_metrics().record_playhq_cache("miss")
+                self.cache.put(cache_key, {
+                    "body": response.text,
+                    "content_type": response.headers.get("content-type", "application/json"),
+                    "etag": response.headers.get("etag"),
+                    "last_modified": response.headers.get("last-modified"),
+                    "stored_at": time.time()
+                })
             return response
         except httpx.HTTPStatusError as e:
             if e.response.status_code == 429:
@@ -76,12 +230,22 @@ class PlayHQClient:
             logger.error(f"Unexpected error calling PlayHQ API: {e}")
             raise
     
-    async def get_seasons(self, org_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    @staticmethod
+    def _cached_response(method: str, url: str, entry: Dict[str, Any]) -> httpx.Response:
+        """Rebuild an httpx response from a cache entry"""
+        return httpx.Response(
+            200,
+            content=entry["body"].encode("utf-8"),
+            headers={"content-type": entry.get("content_type") or "application/json"},
+            request=httpx.Request(method, url)
+        )
+    
+    async def get_seasons(self, org_id: Optional[str] = None, *, revalidate: bool = False) -> List[Dict[str, Any]]:
         """Get seasons for an organization"""
         endpoint = f"/organisations/{org_id}/seasons" if org_id else "/seasons"
         
         try:
-            response = await self._make_request("GET", endpoint)
+            response = await self._make_request("GET", endpoint, revalidate=revalidate)
             data = response.json()
             
             # Handle pagination if present
@@ -96,12 +260,12 @@ class PlayHQClient:
             logger.error(f"Failed to get seasons: {e}")
             return []
     
-    async def get_grades(self, season_id: str) -> List[Dict[str, Any]]:
+    async def get_grades(self, season_id: str, *, revalidate: bool = False) -> List[Dict[str, Any]]:
         """Get grades for a season"""
         endpoint = f"/seasons/{season_id}/grades"
         
         try:
-            response = await self._make_request("GET", endpoint)
+            response = await self._make_request("GET", endpoint, revalidate=revalidate)
             data = response.json()
             
             if isinstance(data, dict) and "data" in data:
@@ -115,12 +279,12 @@ class PlayHQClient:
             logger.error(f"Failed to get grades for season {season_id}: {e}")
             return []
     
-    async def get_teams(self, grade_id: str) -> List[Dict[str, Any]]:
+    async def get_teams(self, grade_id: str, *, revalidate: bool = False) -> List[Dict[str, Any]]:
         """Get teams for a grade"""
         endpoint = f"/grades/{grade_id}/teams"
         
         try:
-            response = await self._make_request("GET", endpoint)
+            response = await self._make_request("GET", endpoint, revalidate=revalidate)
             data = response.json()
             
             if isinstance(data, dict) and "data" in data:
@@ -134,7 +298,7 @@ class PlayHQClient:
             logger.error(f"Failed to get teams for grade {grade_id}: {e}")
             return []
     
-    async def get_team_fixtures(self, team_id: str, season_id: str) -> List[Dict[str, Any]]:
+    async def get_team_fixtures(self, team_id: str, season_id: str, *, revalidate: bool = False) -> List[Dict[str, Any]]:
         """Get fixtures for a team in a season"""
         endpoint = f"/teams/{team_id}/fixtures"
         params = {"season": season_id}
@@ -148,7 +312,7 @@ class PlayHQClient:
                 if cursor:
                     params["cursor"] = cursor
                 
-                response = await self._make_request("GET", endpoint, params=params)
+                response = await self._make_request("GET", endpoint, params=params, revalidate=revalidate)
                 data = response.json()
                 
                 if isinstance(data, dict):
@@ -169,12 +333,12 @@ class PlayHQClient:
             logger.error(f"Failed to get fixtures for team {team_id}: {e}")
             return []
     
-    async def get_game_summary(self, game_id: str) -> Optional[Dict[str, Any]]:
+    async def get_game_summary(self, game_id: str, *, revalidate: bool = False) -> Optional[Dict[str, Any]]:
         """Get summary for a specific game"""
         endpoint = f"/summary/{game_id}"
         
         try:
-            response = await self._make_request("GET", endpoint)
+            response = await self._make_request("GET", endpoint, revalidate=revalidate)
             data = response.json()
             
             return data if isinstance(data, dict) else None
@@ -183,12 +347,12 @@ class PlayHQClient:
             logger.error(f"Failed to get game summary for {game_id}: {e}")
             return None
     
-    async def get_ladder(self, grade_id: str) -> List[Dict[str, Any]]:
+    async def get_ladder(self, grade_id: str, *, revalidate: bool = False) -> List[Dict[str, Any]]:
         """Get ladder for a grade"""
         endpoint = f"/ladder/{grade_id}"
         
         try:
-            response = await self._make_request("GET", endpoint)
+            response = await self._make_request("GET", endpoint, revalidate=revalidate)
             data = response.json()
             
             if isinstance(data, dict) and "data" in data:
@@ -206,7 +370,9 @@ class PlayHQClient:
                        team_id: Optional[str] = None,
                        season_id: Optional[str] = None,
                        grade_id: Optional[str] = None,
-                       status: Optional[str] = None) -> List[Dict[str, Any]]:
+                       status: Optional[str] = None,
+                       *,
+                       revalidate: bool = False) -> List[Dict[str, Any]]:
         """Get games with optional filters"""
         endpoint = "/games"
         params = {}
@@ -229,7 +395,7 @@ class PlayHQClient:
                 if cursor:
                     params["cursor"] = cursor
                 
-                response = await self._make_request("GET", endpoint, params=params)
+                response = await self._make_request("GET", endpoint, params=params, revalidate=revalidate)
                 data = response.json()
                 
                 if isinstance(data, dict):
@@ -250,7 +416,7 @@ class PlayHQClient:
             logger.error(f"Failed to get games: {e}")
             return []
     
-    async def search_players(self, query: str, team_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    async def search_players(self, query: str, team_id: Optional[str] = None, *, revalidate: bool = False) -> List[Dict[str, Any]]:
         """Search for players by name"""
         endpoint = "/players/search"
         params = {"q": query}
@@ -259,7 +425,7 @@ class PlayHQClient:
             params["team"] = team_id
         
         try:
-            response = await self._make_request("GET", endpoint, params=params)
+            response = await self._make_request("GET", endpoint, params=params, revalidate=revalidate)
             data = response.json()
             
             if isinstance(data, dict) and "data" in data:
@@ -273,7 +439,7 @@ class PlayHQClient:
             logger.error(f"Failed to search players: {e}")
             return []
     
-    async def get_player_stats(self, player_id: str, season_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    async def get_player_stats(self, player_id: str, season_id: Optional[str] = None, *, revalidate: bool = False) -> Optional[Dict[str, Any]]:
         """Get player statistics"""
         endpoint = f"/players/{player_id}/stats"
         params = {}
@@ -282,7 +448,7 @@ class PlayHQClient:
             params["season"] = season_id
         
         try:
-            response = await self._make_request("GET", endpoint, params=params)
+            response = await self._make_request("GET", endpoint, params=params, revalidate=revalidate)
             data = response.json()
             
             return data if isinstance(data, dict) else None
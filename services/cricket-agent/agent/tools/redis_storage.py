@@ -5,6 +5,7 @@ Replaces singleton pattern with persistent shared storage
 
 import json
 import logging
+import os
 import time
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
@@ -16,6 +17,8 @@ except ImportError:
     REDIS_AVAILABLE = False
     logging.warning("Redis not available, falling back to file-based storage")
 
+from .vector_snapshot import embedding_to_list
+
 logger = logging.getLogger(__name__)
 
 class RedisStorage:
@@ -38,6 +41,8 @@ class RedisStorage:
         self.documents_key = f"cricket_agent:documents:{self.project_id}"
         self.metadata_key = f"cricket_agent:metadata:{self.project_id}"
         self.lock_key = f"cricket_agent:lock:{self.project_id}"
+        self.version_key = f"cricket_agent:version:{self.project_id}"
+        self.content_hashes_key = f"cricket_agent:content_hashes:{self.project_id}"
         
     def _initialize_redis(self):
         """Initialize Redis connection with fallback"""
@@ -182,13 +187,19 @@ class RedisStorage:
         except Exception as e:
             logger.warning(f"Failed to release lock: {e}")
     
-    def store_documents(self, documents: Dict[str, Any]) -> bool:
+    def store_documents(self, documents: Dict[str, Any], total_documents: Optional[int] = None) -> bool:
         """Store documents in shared storage"""
         try:
             if not self._acquire_lock():
                 logger.warning("Failed to acquire lock, skipping store")
                 return False
             
+            # Snapshot-loaded embeddings are numpy rows; JSON needs plain lists
+            documents = {
+                doc_id: dict(doc_data, embedding=embedding_to_list(doc_data.get("embedding")))
+                for doc_id, doc_data in documents.items()
+            }
+            
             try:
                 if self.redis_client:
                     # Store in Redis
@@ -199,11 +210,12 @@ class RedisStorage:
                     
                     # Update metadata
                     metadata = {
-                        "total_documents": len(documents),
+                        "total_documents": total_documents if total_documents is not None else len(documents),
                         "last_updated": datetime.utcnow().isoformat(),
                         "storage_type": "redis"
                     }
                     self.redis_client.hset(self.metadata_key, mapping=metadata)
+                    self.redis_client.incr(self.version_key)
                     
                     logger.info(f"Stored {len(documents)} documents in Redis")
                     
@@ -279,6 +291,59 @@ class RedisStorage:
             logger.error(f"Failed to load documents: {e}")
             return {}
     
+    def get_version(self) -> Optional[str]:
+        """Get a cheap change marker for the stored documents (Redis version key)"""
+        try:
+            if self.redis_client:
+                return self.redis_client.get(self.version_key)
+            else:
+                if os.path.exists(self.fallback_file):
+                    return str(os.stat(self.fallback_file).st_mtime_ns)
+                return None
+                
+        except Exception as e:
+            logger.warning(f"Failed to get storage version: {e}")
+            return None
+    
+    def store_content_hashes(self, content_hashes: Dict[str, str]) -> bool:
+        """Store the delta-upsert hash manifest (doc_id -> content hash)"""
+        try:
+            if self.redis_client:
+                # Replace the manifest atomically so dropped entries do not linger
+                pipeline = self.redis_client.pipeline()
+                pipeline.delete(self.content_hashes_key)
+                if content_hashes:
+                    pipeline.hset(self.content_hashes_key, mapping=content_hashes)
+                pipeline.execute()
+                logger.info(f"Stored {len(content_hashes)} content hashes in Redis")
+            else:
+                self.fallback_data["content_hashes"] = content_hashes
+                try:
+                    self._save_to_gcs()
+                except Exception as e:
+                    logger.warning(f"Failed to save content hashes to Cloud Storage: {e}")
+                    with open(self.fallback_file, 'w') as f:
+                        json.dump(self.fallback_data, f, indent=2)
+                logger.info(f"Stored {len(content_hashes)} content hashes in fallback storage")
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to store content hashes: {e}")
+            return False
+    
+    def load_content_hashes(self) -> Dict[str, str]:
+        """Load the delta-upsert hash manifest"""
+        try:
+            if self.redis_client:
+                return self.redis_client.hgetall(self.content_hashes_key)
+            else:
+                return dict(self.fallback_data.get("content_hashes", {}))
+                
+        except Exception as e:
+            logger.error(f"Failed to load content hashes: {e}")
+            return {}
+    
     def get_document(self, doc_id: str) -> Optional[Dict[str, Any]]:
         """Get specific document by ID"""
         try:
@@ -297,6 +362,30 @@ class RedisStorage:
             logger.error(f"Failed to get document {doc_id}: {e}")
             return None
     
+    def get_documents(self, doc_ids: List[str]) -> Dict[str, Any]:
+        """Get several documents with one HMGET; missing ids are omitted"""
+        try:
+            if not doc_ids:
+                return {}
+            
+            if self.redis_client:
+                documents = {}
+                for doc_id, doc_json in zip(doc_ids, self.redis_client.hmget(self.documents_key, doc_ids)):
+                    if not doc_json:
+                        continue
+                    try:
+                        documents[doc_id] = json.loads(doc_json)
+                    except json.JSONDecodeError:
+                        logger.warning(f"Failed to parse document {doc_id}")
+                return documents
+            else:
+                documents = self.load_documents()
+                return {doc_id: documents[doc_id] for doc_id in doc_ids if doc_id in documents}
+                
+        except Exception as e:
+            logger.error(f"Failed to get {len(doc_ids)} documents: {e}")
+            return {}
+    
     def delete_document(self, doc_id: str) -> bool:
         """Delete specific document"""
         try:
@@ -358,6 +447,8 @@ class RedisStorage:
                 # Clear Redis
                 self.redis_client.delete(self.documents_key)
                 self.redis_client.delete(self.metadata_key)
+                self.redis_client.delete(self.content_hashes_key)
+                self.redis_client.incr(self.version_key)
                 logger.info("Cleared all documents from Redis")
             else:
                 # Clear fallback storage
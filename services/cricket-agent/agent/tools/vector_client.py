@@ -6,7 +6,11 @@ Vertex RAG integration with metadata filtering and delta upserts
 import hashlib
 import json
 import logging
-from typing import Dict, List, Optional, Any
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
 
 from google.cloud import aiplatform
@@ -22,6 +26,11 @@ except ImportError:
     logger.warning("Matching Engine not available, using mock implementation")
 
 from app.config import get_settings
+from app.observability import get_metrics
+from .vector_index import VectorIndex
+from .embeddings import BatchEmbedder
+from .embedding_cache import EmbeddingCache
+from .vector_snapshot import embedding_to_list, read_snapshot, write_snapshot
 
 # Import Matching Engine
 try:
@@ -60,15 +69,33 @@ logger = logging.getLogger(__name__)
 class VectorClient:
     """Vertex RAG vector client with metadata filtering and delta upserts"""
     
+    # Minimum seconds between storage version checks on the query path
+    VERSION_CHECK_INTERVAL_SECONDS = 5.0
+    
+    # Local directory for the content-addressed embedding cache
+    EMBEDDING_CACHE_DIR = "/tmp/cricket-vectors/embedding_cache"
+    
+    # Seconds after an unflushed upsert before a background flush runs (None disables the timer)
+    FLUSH_INTERVAL_SECONDS: Optional[float] = None
+    
+    # Seconds before a single embedding predict call is abandoned
+    PREDICT_TIMEOUT_SECONDS = 30.0
+    
+    # Recent query embeddings kept so callers can reuse them without another predict call
+    QUERY_EMBEDDING_CACHE_SIZE = 256
+    
     def __init__(self, project_id: str, location: str = "us-central1"):
         self.project_id = project_id
         self.location = location
         self.embedding_model = "text-embedding-005"
         
         # Initialize shared storage paths
-        self.shared_storage_path = "/tmp/cricket-vectors/shared_storage.json"
+        self.shared_storage_path = "/tmp/cricket-vectors/shared_storage.snapshot"
+        self.legacy_shared_storage_path = "/tmp/cricket-vectors/shared_storage.json"
+        self.local_storage_path = "/tmp/cricket-vectors/stored_documents.snapshot"
+        self.legacy_local_storage_path = "/tmp/cricket-vectors/stored_documents.json"
         self.gcs_bucket = f"{project_id}-cricket-vectors"
-        self.gcs_path = "vector_store/shared_storage.json"
+        self.gcs_path = "vector_store/shared_storage.snapshot"
         
         # Initialize Cloud Storage persistence for cross-request persistence (primary)
         self.cloud_storage_persistence = None
@@ -100,8 +127,19 @@ class VectorClient:
                 logger.warning(f"Failed to initialize Redis storage: {e}")
                 self.redis_storage = None
         
-        # Initialize local storage
-        self._stored_documents = {}
+        # Documents and their resident search index, published together as one tuple so
+        # concurrent queries never see a document store paired with another store's index
+        self._store: Tuple[Dict[str, Any], VectorIndex] = ({}, VectorIndex())
+        
+        # Version marker of the shared-storage snapshot currently held in memory
+        self._loaded_version: Optional[str] = None
+        self._version_checked_at = float("-inf")
+        self._load_lock = threading.Lock()
+        
+        # Write-behind persistence: ids changed in memory but not yet flushed to storage
+        self._dirty_ids: set = set()
+        self._flush_lock = threading.RLock()
+        self._flush_timer: Optional[threading.Timer] = None
         
         # Initialize Vertex AI
         aiplatform.init(project=project_id, location=location)
@@ -110,6 +148,20 @@ class VectorClient:
         self.embedding_client = aiplatform.gapic.PredictionServiceClient(
             client_options={"api_endpoint": f"{location}-aiplatform.googleapis.com"}
         )
+        self.embedder = BatchEmbedder(self._predict_embeddings)
+        self._query_embeddings: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._query_embeddings_lock = threading.Lock()
+        
+        # Embedding cache for document snippets, mirrored to Cloud Storage
+        self.embedding_cache = None
+        try:
+            self.embedding_cache = EmbeddingCache(
+                self.embedding_model,
+                cache_dir=self.EMBEDDING_CACHE_DIR,
+                remote=self.cloud_storage_persistence
+            )
+        except Exception as e:
+            logger.warning(f"Failed to initialize embedding cache: {e}")
         
         # Initialize matching engine client
         self.matching_engine_client = aiplatform.gapic.IndexServiceClient(
@@ -126,12 +178,15 @@ class VectorClient:
                 logger.warning(f"Failed to initialize Matching Engine: {e}")
                 self.matching_engine = None
         
-        # Cache for content hashes to enable delta upserts
+        # Cache for content hashes to enable delta upserts (loaded lazily from shared storage)
         self.content_hashes: Dict[str, str] = {}
+        self._content_hashes_loaded = False
+        self.content_hashes_path = "/tmp/cricket-vectors/content_hashes.json"
+        self.stats = {"upserts": 0, "skipped_upserts": 0}
         
         # Load from shared storage on initialization (PRIMARY)
         try:
-            self._load_from_shared_storage()
+            self._refresh_from_shared_storage(force=True)
             logger.info(f"Loaded {len(self._stored_documents)} documents from shared storage on startup")
         except Exception as e:
             logger.warning(f"Failed to load from shared storage on startup: {e}")
@@ -151,29 +206,58 @@ class VectorClient:
         
         logger.info(f"VectorClient initialized for project {project_id} in {location}")
     
+    def _predict_embeddings(self, instances: List[Dict[str, Any]]) -> Any:
+        """Call text-embedding-005 with a batch of instances"""
+        return self.embedding_client.predict(
+            endpoint=f"projects/{self.project_id}/locations/{self.location}/publishers/google/models/{self.embedding_model}",
+            instances=instances,
+            timeout=self.PREDICT_TIMEOUT_SECONDS
+        )
+    
     def _generate_embedding(self, text: str) -> List[float]:
         """Generate embedding for text using text-embedding-005"""
-        try:
-            # Prepare the request
-            instances = [{"content": text}]
-            
-            # Call the embedding model
-            response = self.embedding_client.predict(
-                endpoint=f"projects/{self.project_id}/locations/{self.location}/publishers/google/models/{self.embedding_model}",
-                instances=instances
-            )
-            
-            # Extract embedding from response
-            if response.predictions and len(response.predictions) > 0:
-                embedding = response.predictions[0].get("embeddings", {}).get("values", [])
-                return embedding
-            else:
-                logger.error("No embeddings returned from model")
-                return []
-                
-        except Exception as e:
-            logger.error(f"Failed to generate embedding: {e}")
+        embedding = self.embedder.embed([text])[0]
+        if not embedding:
+            logger.error("No embeddings returned from model")
             return []
+        return embedding
+    
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed query text, reusing the embedding of a recently seen identical query
+        
+        The result can be passed to query() and to the router's semantic cache so a
+        question is embedded once per request.
+        """
+        with self._query_embeddings_lock:
+            embedding = self._query_embeddings.get(text)
+            if embedding is not None:
+                self._query_embeddings.move_to_end(text)
+                return embedding
+        
+        embedding = self._generate_embedding(text)
+        if embedding:
+            with self._query_embeddings_lock:
+                self._query_embeddings[text] = embedding
+                while len(self._query_embeddings) > self.QUERY_EMBEDDING_CACHE_SIZE:
+                    self._query_embeddings.popitem(last=False)
+        return embedding
+    
+    def _embed_documents(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Embed document texts, serving unchanged snippets from the embedding cache"""
+        if self.embedding_cache is None:
+            return self.embedder.embed(texts)
+        
+        embeddings = self.embedding_cache.get_many(texts)
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            fresh = self.embedder.embed([texts[i] for i in missing])
+            for i, embedding in zip(missing, fresh):
+                embeddings[i] = embedding
+            self.embedding_cache.put_many([texts[i] for i in missing], fresh)
+        
+        logger.info(f"Embedded {len(texts)} texts ({len(texts) - len(missing)} from cache)")
+        return embeddings
     
     def _generate_content_hash(self, doc: Dict[str, Any]) -> str:
         """Generate content hash for delta detection"""
@@ -199,11 +283,61 @@ class VectorClient:
         
         return False
     
-    def upsert(self, docs: List[Dict[str, Any]]) -> None:
+    def _ensure_content_hashes(self) -> None:
+        """Load the persisted hash manifest once so delta upserts survive restarts"""
+        if self._content_hashes_loaded:
+            return
+        self._content_hashes_loaded = True
+        
+        loaded: Dict[str, str] = {}
+        for backend in (self.cloud_storage_persistence, self.firestore_storage, self.redis_storage):
+            if backend is None:
+                continue
+            try:
+                loaded = backend.load_content_hashes()
+                if loaded:
+                    break
+            except Exception as e:
+                logger.warning(f"Failed to load content hashes from {type(backend).__name__}: {e}")
+        
+        if not loaded and os.path.exists(self.content_hashes_path):
+            try:
+                with open(self.content_hashes_path, 'r') as f:
+                    loaded = json.load(f)
+            except Exception as e:
+                logger.warning(f"Failed to load content hashes from file storage: {e}")
+        
+        # A hash is only trustworthy if its document actually made it into the store
+        loaded = {doc_id: content_hash for doc_id, content_hash in loaded.items() if doc_id in self._stored_documents}
+        for doc_id, content_hash in loaded.items():
+            self.content_hashes.setdefault(doc_id, content_hash)
+        logger.info(f"Loaded {len(loaded)} content hashes from shared storage")
+    
+    def _save_content_hashes(self) -> None:
+        """Persist the hash manifest to the first shared storage backend that accepts it"""
+        for backend in (self.cloud_storage_persistence, self.firestore_storage, self.redis_storage):
+            if backend is None:
+                continue
+            try:
+                if backend.store_content_hashes(self.content_hashes):
+                    return
+            except Exception as e:
+                logger.warning(f"Failed to save content hashes to {type(backend).__name__}: {e}")
+        
+        try:
+            os.makedirs(os.path.dirname(self.content_hashes_path), exist_ok=True)
+            with open(self.content_hashes_path, 'w') as f:
+                json.dump(self.content_hashes, f)
+        except Exception as e:
+            logger.warning(f"Failed to save content hashes to file storage: {e}")
+    
+    def upsert(self, docs: List[Dict[str, Any]], flush: bool = True) -> None:
         """
         Upsert documents to vector store with delta logic
         
         Args:
+            flush: Persist changed documents before returning; when False they are
+                written by the next flush() (or the background timer, if enabled)
             docs: List of documents with structure:
                 {
                     "id": str,
@@ -222,7 +356,9 @@ class VectorClient:
             return
         
         # Filter documents that need upserting
+        self._ensure_content_hashes()
         docs_to_upsert = [doc for doc in docs if self._should_upsert(doc)]
+        self.stats["skipped_upserts"] += len(docs) - len(docs_to_upsert)
         
         if not docs_to_upsert:
             logger.info("No documents changed, skipping upsert")
@@ -230,60 +366,64 @@ class VectorClient:
         
         logger.info(f"Upserting {len(docs_to_upsert)} documents (filtered from {len(docs)} total)")
         
+        # Process documents in batches large enough to keep every embedding request slot busy
+        batch_size = self.embedder.max_instances * self.embedder.max_concurrency
+        i = 0
         try:
-            # Process documents in batches
-            batch_size = 100
             for i in range(0, len(docs_to_upsert), batch_size):
                 batch = docs_to_upsert[i:i + batch_size]
                 self._upsert_batch(batch)
                 
         except Exception as e:
             logger.error(f"Failed to upsert documents: {e}")
+            # Batches that never made it to storage must be retried on the next sync
+            for doc in docs_to_upsert[i:]:
+                self.content_hashes.pop(doc.get("id"), None)
             raise
+        
+        finally:
+            if flush:
+                self.flush()
+            elif self.FLUSH_INTERVAL_SECONDS:
+                self._schedule_flush()
     
     def _upsert_batch(self, docs: List[Dict[str, Any]]) -> None:
         """Upsert a batch of documents"""
         try:
-            # Generate embeddings for the batch
-            embeddings = []
-            for doc in docs:
-                embedding = self._generate_embedding(doc["text"])
-                if embedding:
-                    embeddings.append(embedding)
-                else:
-                    logger.warning(f"Failed to generate embedding for doc {doc.get('id')}")
-                    continue
-            
-            if not embeddings:
+            # Generate embeddings for the batch; results stay aligned with docs
+            embeddings = self._embed_documents([doc["text"] for doc in docs])
+            
+            failed_ids = [doc.get("id") for doc, embedding in zip(docs, embeddings) if not embedding]
+            if failed_ids:
+                logger.warning(f"Failed to generate embeddings for {len(failed_ids)} docs: {failed_ids[:10]}")
+                # Forget their hashes so the next sync retries them
+                for doc_id in failed_ids:
+                    self.content_hashes.pop(doc_id, None)
+            
+            pairs = [(doc, embedding) for doc, embedding in zip(docs, embeddings) if embedding]
+            if not pairs:
                 logger.warning("No valid embeddings generated for batch")
                 return
-            
-            # Prepare upsert data
-            upsert_data = []
-            for i, doc in enumerate(docs):
-                if i < len(embeddings):
-                    upsert_data.append({
-                        "id": doc["id"],
-                        "embedding": embeddings[i],
-                        "metadata": doc.get("metadata", {})
-                    })
+            docs = [doc for doc, _ in pairs]
+            embeddings = [embedding for _, embedding in pairs]
+            self.stats["upserts"] += len(docs)
             
             # Store documents in a persistent way that can be upgraded to Matching Engine
             # For now, use a combination of local storage and GCS for persistence
             
-            # Initialize local storage if not exists
-            if not hasattr(self, '_stored_documents'):
-                self._stored_documents = {}
-            
             # Store documents with their text and metadata
-            for i, doc in enumerate(docs):
-                if i < len(embeddings):
-                    doc_id = doc["id"]
-                    self._stored_documents[doc_id] = {
-                        "text": doc["text"],
-                        "metadata": doc.get("metadata", {}),
-                        "embedding": embeddings[i]
-                    }
+            for doc, embedding in zip(docs, embeddings):
+                self._stored_documents[doc["id"]] = {
+                    "text": doc["text"],
+                    "metadata": doc.get("metadata", {}),
+                    "embedding": embedding
+                }
+                    
+            # Update the search index incrementally instead of rebuilding it
+            self._index.upsert_many(
+                (doc["id"], embedding, doc.get("metadata", {}))
+                for doc, embedding in zip(docs, embeddings)
+            )
             
             # Store in Matching Engine if available
             if self.matching_engine:
@@ -294,11 +434,48 @@ class VectorClient:
                 except Exception as e:
                     logger.warning(f"Failed to store in Matching Engine: {e}")
             
+            # Persistence is write-behind; flush() writes these once per upsert call
+            self._dirty_ids.update(doc["id"] for doc in docs)
+            
+            logger.info(f"Successfully stored {len(docs)} documents in memory (total: {len(self._stored_documents)})")
+            
+        except Exception as e:
+            logger.error(f"Failed to upsert batch: {e}")
+            raise
+    
+    def flush(self) -> bool:
+        """
+        Write documents changed since the last flush to storage
+        
+        Shared storage receives only the changed documents (an append-only segment on
+        Cloud Storage), so a sync of N batches costs N deltas rather than N full rewrites.
+        
+        Returns:
+            True if anything was written
+        """
+        with self._flush_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            
+            if not self._dirty_ids:
+                return False
+            
+            dirty_ids, self._dirty_ids = self._dirty_ids, set()
+            dirty = {doc_id: self._stored_documents[doc_id] for doc_id in dirty_ids if doc_id in self._stored_documents}
+            
             # Store in shared storage for persistence across requests
             try:
-                self._save_to_shared_storage()
+                # Our in-memory copy already reflects this write; don't reload it on the next query.
+                # The version is the one our write produced, so a segment appended by someone else
+                # right after it still triggers a reload.
+                self._loaded_version = self._save_to_shared_storage(dirty)
+                self._version_checked_at = time.monotonic()
             except Exception as e:
                 logger.warning(f"Failed to persist to shared storage: {e}")
+                # Keep them dirty so the next flush retries
+                self._dirty_ids |= dirty_ids
+                return False
             
             # Also store in local storage for backup
             try:
@@ -308,17 +485,29 @@ class VectorClient:
             
             # Also store in GCS for backup
             try:
-                self._persist_to_gcs(docs, embeddings)
+                self._persist_to_gcs(
+                    [{"id": doc_id, **doc_data} for doc_id, doc_data in dirty.items()],
+                    [embedding_to_list(doc_data.get("embedding")) for doc_data in dirty.values()]
+                )
             except Exception as e:
                 logger.warning(f"Failed to persist to GCS: {e}")
             
-            logger.info(f"Successfully stored {len(docs)} documents (total: {len(self._stored_documents)})")
+            if self.embedding_cache is not None:
+                self.embedding_cache.flush()
+            self._save_content_hashes()
             
-        except Exception as e:
-            logger.error(f"Failed to upsert batch: {e}")
-            raise
+            logger.info(f"Flushed {len(dirty)} changed documents (total: {len(self._stored_documents)})")
+            return True
+    
+    def _schedule_flush(self) -> None:
+        """Arm the background flush timer if it is not already pending"""
+        with self._flush_lock:
+            if self._flush_timer is None and self._dirty_ids:
+                self._flush_timer = threading.Timer(self.FLUSH_INTERVAL_SECONDS, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
     
-    def query(self, text: str, filters: Dict[str, Any] = None, k: int = 6) -> List[str]:
+    def query(self, text: str, filters: Dict[str, Any] = None, k: int = 6, query_embedding: Optional[List[float]] = None) -> List[str]:
         """
         Query vector store with text and metadata filters
         
@@ -326,13 +515,20 @@ class VectorClient:
             text: Query text
             filters: Metadata filters (team_id, season_id, grade_id, type)
             k: Number of results to return
+            query_embedding: Embedding of text from embed_query(), if the caller already has it
             
         Returns:
             List of document IDs matching the query
         """
+        return [doc_id for doc_id, _ in self._query_scored(text, filters, k, query_embedding)]
+    
+    def _query_scored(self, text: str, filters: Dict[str, Any] = None, k: int = 6,
+                      query_embedding: Optional[List[float]] = None) -> List[Tuple[str, Optional[float]]]:
+        """query(), keeping each hit's similarity (None for text-search hits)"""
         try:
-            # Generate embedding for query text
-            query_embedding = self._generate_embedding(text)
+            # Generate embedding for query text unless the caller already did
+            if not query_embedding:
+                query_embedding = self.embed_query(text)
             if not query_embedding:
                 logger.error("Failed to generate query embedding")
                 return []
@@ -352,15 +548,15 @@ class VectorClient:
             logger.info(f"Querying vector store with text: '{text[:50]}...', filters: {filters}, k: {k}")
             
             try:
-                # CRITICAL FIX: Always load from shared storage first to handle Cloud Run's stateless nature
+                # Cloud Run instances are stateless, so pick up writes from other instances,
+                # but only reload when the shared storage version has actually changed
                 try:
-                    self._load_from_shared_storage()
-                    logger.info(f"Loaded {len(self._stored_documents)} documents from shared storage before query")
+                    self._refresh_from_shared_storage()
                 except Exception as e:
-                    logger.warning(f"Failed to load from shared storage: {e}")
+                    logger.warning(f"Failed to refresh from shared storage: {e}")
                 
-                # Get stored documents from the local cache (now loaded from shared storage)
-                stored_docs = getattr(self, '_stored_documents', {})
+                # Read the published store once; a concurrent reload swaps in a new pair
+                stored_docs, index = self._store
                 
                 if not stored_docs:
                     logger.warning("No documents stored in vector store after loading from shared storage")
@@ -371,7 +567,7 @@ class VectorClient:
                     try:
                         logger.info("Using Vertex Matching Engine for query")
                         matching_results = self.matching_engine.query(query_embedding, k, filters)
-                        results = [result["id"] for result in matching_results]
+                        results = [(result["id"], result.get("score")) for result in matching_results]
                         logger.info(f"Matching Engine returned {len(results)} results")
                         return results
                     except Exception as e:
@@ -379,7 +575,7 @@ class VectorClient:
                 
                 # Fallback to local semantic search
                 logger.info("Using local semantic search")
-                results = self._semantic_search(text, query_embedding, stored_docs, filters, k)
+                results = self._semantic_search(text, query_embedding, stored_docs, index, filters, k)
                 
                 logger.info(f"Vector store query returned {len(results)} results")
                 return results
@@ -392,18 +588,30 @@ class VectorClient:
             logger.error(f"Failed to query vector store: {e}")
             return []
     
+    def get_data_version(self) -> str:
+        """Version of the documents being served; changes whenever shared storage is written"""
+        try:
+            self._refresh_from_shared_storage()
+        except Exception as e:
+            logger.warning(f"Failed to refresh from shared storage: {e}")
+        return self._loaded_version or ""
+    
     def get_stats(self) -> Dict[str, Any]:
         """Get vector store statistics"""
         return {
+            "upserts": self.stats["upserts"],
+            "skipped_upserts": self.stats["skipped_upserts"],
             "total_documents": len(self.content_hashes),
             "project_id": self.project_id,
             "location": self.location,
-            "embedding_model": self.embedding_model
+            "embedding_model": self.embedding_model,
+            "embedding_cache": self.embedding_cache.get_stats() if self.embedding_cache is not None else None
         }
     
     def clear_cache(self) -> None:
         """Clear content hash cache"""
         self.content_hashes.clear()
+        self._content_hashes_loaded = True
         logger.info("Content hash cache cleared")
     
     def initialize_matching_engine(self) -> bool:
@@ -470,7 +678,7 @@ class VectorClient:
             
             # Reinitialize storage
             os.makedirs(storage_dir, exist_ok=True)
-            self._stored_documents = {}
+            self._set_documents({})
             
             logger.info("Storage cleared and reinitialized")
             
@@ -565,7 +773,7 @@ class VectorClient:
             # Load documents
             try:
                 blobs = bucket.list_blobs(prefix="vectors/")
-                self._stored_documents = {}
+                documents = {}
                 loaded_count = 0
                 
                 for blob in blobs:
@@ -576,7 +784,7 @@ class VectorClient:
                             
                             doc_id = doc_data.get('id')
                             if doc_id:
-                                self._stored_documents[doc_id] = {
+                                documents[doc_id] = {
                                     "text": doc_data.get('text', ''),
                                     "metadata": doc_data.get('metadata', {}),
                                     "embedding": doc_data.get('embedding', [])
@@ -586,6 +794,7 @@ class VectorClient:
                         except Exception as e:
                             logger.warning(f"Failed to load document {blob.name}: {e}")
                 
+                self._set_documents(documents)
                 logger.info(f"Successfully loaded {loaded_count} documents from GCS")
                 
             except Exception as e:
@@ -597,54 +806,35 @@ class VectorClient:
             # Don't raise exception, just log the error
             logger.warning("Continuing without GCS data")
     
-    def _semantic_search(self, text: str, query_embedding: List[float], stored_docs: Dict, filters: Dict[str, Any], k: int) -> List[str]:
-        """Perform semantic search using cosine similarity"""
-        import numpy as np
-        
+    @property
+    def _stored_documents(self) -> Dict[str, Any]:
+        """Documents currently published"""
+        return self._store[0]
+    
+    @property
+    def _index(self) -> VectorIndex:
+        """Search index over the documents currently published"""
+        return self._store[1]
+    
+    def _set_documents(self, documents: Dict[str, Any]) -> None:
+        """Replace the in-memory document store, publishing it with a search index built from it"""
+        self._store = (documents, VectorIndex.from_documents(documents))
+    
+    def _semantic_search(self, text: str, query_embedding: List[float], stored_docs: Dict, index: VectorIndex,
+                         filters: Dict[str, Any], k: int) -> List[Tuple[str, Optional[float]]]:
+        """Perform semantic search using cosine similarity over the resident index of stored_docs"""
         if not query_embedding:
-            # Fallback to text search
-            return self._text_search(text, stored_docs, filters, k)
-        
-        # Calculate cosine similarity for each document
-        similarities = []
-        
-        for doc_id, doc_data in stored_docs.items():
-            doc_embedding = doc_data.get('embedding', [])
-            metadata = doc_data.get('metadata', {})
-            
-            # Apply metadata filters
-            if filters:
-                matches_filter = True
-                for key, value in filters.items():
-                    if value and metadata.get(key) != value:
-                        matches_filter = False
-                        break
-                if not matches_filter:
-                    continue
-            
-            if doc_embedding and len(doc_embedding) == len(query_embedding):
-                # Calculate cosine similarity
-                try:
-                    query_vec = np.array(query_embedding)
-                    doc_vec = np.array(doc_embedding)
-                    
-                    # Normalize vectors
-                    query_norm = np.linalg.norm(query_vec)
-                    doc_norm = np.linalg.norm(doc_vec)
-                    
-                    if query_norm > 0 and doc_norm > 0:
-                        similarity = np.dot(query_vec, doc_vec) / (query_norm * doc_norm)
-                        similarities.append((doc_id, similarity))
-                except Exception as e:
-                    logger.warning(f"Similarity calculation failed for {doc_id}: {e}")
-                    continue
+            # Fallback to text search, which has no similarity to report
+            return [(doc_id, None) for doc_id in self._text_search(text, stored_docs, filters, k)]
         
-        # Sort by similarity and return top k
-        similarities.sort(key=lambda x: x[1], reverse=True)
-        results = [doc_id for doc_id, _ in similarities[:k]]
+        try:
+            hits = index.search(query_embedding, filters, k)
+        except Exception as e:
+            logger.warning(f"Index search failed: {e}")
+            return []
         
-        logger.info(f"Semantic search found {len(results)} results")
-        return results
+        logger.info(f"Semantic search found {len(hits)} results")
+        return hits
     
     def _text_search(self, text: str, stored_docs: Dict, filters: Dict[str, Any], k: int) -> List[str]:
         """Fallback text-based search"""
@@ -677,56 +867,98 @@ class VectorClient:
     def _persist_to_local_storage(self) -> None:
         """Persist documents to local storage"""
         try:
-            import json
-            import os
-            
-            # Create data directory if it doesn't exist
-            data_dir = "/tmp/cricket-vectors"
-            os.makedirs(data_dir, exist_ok=True)
-            
-            # Save documents to local file
-            storage_file = os.path.join(data_dir, "stored_documents.json")
-            
-            with open(storage_file, 'w') as f:
-                json.dump(self._stored_documents, f, indent=2)
-            
-            logger.info(f"Persisted {len(self._stored_documents)} documents to local storage")
+            payload = write_snapshot(self.local_storage_path, self._stored_documents)
+            logger.info(f"Persisted {len(self._stored_documents)} documents to local storage ({len(payload)} bytes)")
             
         except Exception as e:
             logger.error(f"Local storage persistence failed: {e}")
             raise
     
     def _load_from_local_storage(self) -> None:
-        """Load documents from local storage"""
+        """Load documents from local storage, migrating a legacy JSON file to a snapshot"""
         try:
-            import json
-            import os
-            
-            # Check if local storage file exists
-            data_dir = "/tmp/cricket-vectors"
-            storage_file = os.path.join(data_dir, "stored_documents.json")
+            documents = read_snapshot(self.local_storage_path)
+            if documents is not None:
+                self._set_documents(documents)
+                logger.info(f"Loaded {len(self._stored_documents)} documents from local storage")
+                return
             
-            if not os.path.exists(storage_file):
+            if not os.path.exists(self.legacy_local_storage_path):
                 logger.info("No local storage file found")
                 return
             
-            # Load documents from local file
-            with open(storage_file, 'r') as f:
-                self._stored_documents = json.load(f)
+            # Legacy JSON store: load it once and rewrite it as a snapshot (the JSON file is left in place)
+            with open(self.legacy_local_storage_path, 'r') as f:
+                self._set_documents(json.load(f))
+            self._persist_to_local_storage()
             
-            logger.info(f"Loaded {len(self._stored_documents)} documents from local storage")
+            logger.info(f"Loaded {len(self._stored_documents)} documents from legacy local storage and migrated to snapshot")
             
         except Exception as e:
             logger.error(f"Local storage loading failed: {e}")
             raise
     
+    def _get_storage_version(self) -> Optional[str]:
+        """Get the change marker of the primary shared storage backend without loading documents"""
+        for backend in (self.cloud_storage_persistence, self.firestore_storage, self.redis_storage):
+            if backend:
+                version = backend.get_version()
+                return f"{type(backend).__name__}:{version}" if version else None
+        
+        if os.path.exists(self.shared_storage_path):
+            return f"file:{os.stat(self.shared_storage_path).st_mtime_ns}"
+        return None
+    
+    def _refresh_from_shared_storage(self, force: bool = False) -> bool:
+        """
+        Reload documents from shared storage only if its version marker changed
+        
+        Concurrent callers that observe the same new version share a single load.
+        
+        Args:
+            force: Reload regardless of the version marker
+            
+        Returns:
+            True if documents were reloaded
+        """
+        # Throttled even without a version marker, which would otherwise mean a reload per query
+        now = time.monotonic()
+        if not force and now - self._version_checked_at < self.VERSION_CHECK_INTERVAL_SECONDS:
+            return False
+        
+        version = self._get_storage_version()
+        self._version_checked_at = now
+        if not force and version is not None and version == self._loaded_version:
+            return False
+        
+        with self._load_lock:
+            # Another caller may have loaded this version while we waited
+            if not force and version is not None and version == self._loaded_version:
+                return False
+            
+            # Documents not yet flushed must survive the reload
+            with self._flush_lock:
+                pending = {doc_id: self._stored_documents[doc_id] for doc_id in self._dirty_ids if doc_id in self._stored_documents}
+            
+            self._load_from_shared_storage()
+            self._loaded_version = version
+            
+            if pending:
+                self._stored_documents.update(pending)
+                self._index.upsert_many(
+                    (doc_id, doc_data["embedding"], doc_data.get("metadata", {}))
+                    for doc_id, doc_data in pending.items()
+                )
+            logger.info(f"Loaded {len(self._stored_documents)} documents from shared storage (version {version})")
+            return True
+    
     def _load_from_shared_storage(self) -> None:
         """Load documents from shared storage (Cloud Storage, Firestore, Redis, or file-based)"""
         try:
             # Try Cloud Storage persistence first (primary)
             if self.cloud_storage_persistence:
                 try:
-                    self._stored_documents = self.cloud_storage_persistence.load_documents()
+                    self._set_documents(self.cloud_storage_persistence.load_documents())
                     logger.info(f"Loaded {len(self._stored_documents)} documents from Cloud Storage persistence")
                     return
                 except Exception as e:
@@ -735,7 +967,7 @@ class VectorClient:
             # Try Firestore storage second
             if self.firestore_storage:
                 try:
-                    self._stored_documents = self.firestore_storage.load_documents()
+                    self._set_documents(self.firestore_storage.load_documents())
                     logger.info(f"Loaded {len(self._stored_documents)} documents from Firestore storage")
                     return
                 except Exception as e:
@@ -744,7 +976,7 @@ class VectorClient:
             # Try Redis storage third (fallback)
             if self.redis_storage:
                 try:
-                    self._stored_documents = self.redis_storage.load_documents()
+                    self._set_documents(self.redis_storage.load_documents())
                     logger.info(f"Loaded {len(self._stored_documents)} documents from Redis storage")
                     return
                 except Exception as e:
@@ -760,10 +992,20 @@ class VectorClient:
             # Try to load from shared storage file
             if os.path.exists(self.shared_storage_path):
                 try:
-                    with open(self.shared_storage_path, 'r') as f:
+                    self._set_documents(read_snapshot(self.shared_storage_path))
+                    logger.info(f"Loaded {len(self._stored_documents)} documents from file storage")
+                except Exception as e:
+                    logger.warning(f"Failed to load from shared storage: {e}")
+                    # Try to load from GCS as fallback
+                    self._load_from_gcs()
+            elif os.path.exists(self.legacy_shared_storage_path):
+                try:
+                    with open(self.legacy_shared_storage_path, 'r') as f:
                         data = json.load(f)
-                        self._stored_documents = data.get('documents', {})
-                        logger.info(f"Loaded {len(self._stored_documents)} documents from file storage")
+                    self._set_documents(data.get('documents', {}))
+                    # Migrate to a snapshot; the legacy JSON file stays as a fallback
+                    write_snapshot(self.shared_storage_path, self._stored_documents)
+                    logger.info(f"Loaded {len(self._stored_documents)} documents from legacy file storage and migrated to snapshot")
                 except json.JSONDecodeError as e:
                     logger.warning(f"Corrupted shared storage file: {e}")
                     # Try to load from GCS as fallback
@@ -781,16 +1023,24 @@ class VectorClient:
             # Fallback to local storage
             self._load_from_local_storage()
     
-    def _save_to_shared_storage(self) -> None:
-        """Save documents to shared storage (Cloud Storage, Firestore, Redis, or file-based)"""
+    def _save_to_shared_storage(self, documents: Dict[str, Any]) -> Optional[str]:
+        """
+        Save changed documents to shared storage (Cloud Storage, Firestore, Redis, or file-based)
+        
+        Args:
+            documents: Documents changed since the last save (id -> document)
+            
+        Returns:
+            Storage version after the save, in the format of _get_storage_version
+        """
         try:
-            # Try Cloud Storage persistence first (primary)
+            # Try Cloud Storage persistence first (primary): append a segment
             if self.cloud_storage_persistence:
                 try:
-                    success = self.cloud_storage_persistence.store_documents(self._stored_documents)
-                    if success:
-                        logger.info(f"Saved {len(self._stored_documents)} documents to Cloud Storage persistence")
-                        return
+                    version = self.cloud_storage_persistence.append_documents(documents, total_documents=len(self._stored_documents))
+                    if version:
+                        logger.info(f"Saved {len(documents)} changed documents to Cloud Storage persistence")
+                        return f"{type(self.cloud_storage_persistence).__name__}:{version}"
                     else:
                         logger.warning("Failed to save to Cloud Storage persistence, falling back to Firestore")
                 except Exception as e:
@@ -799,10 +1049,10 @@ class VectorClient:
             # Try Firestore storage second
             if self.firestore_storage:
                 try:
-                    success = self.firestore_storage.store_documents(self._stored_documents)
+                    success = self.firestore_storage.store_documents(documents, total_documents=len(self._stored_documents))
                     if success:
-                        logger.info(f"Saved {len(self._stored_documents)} documents to Firestore storage")
-                        return
+                        logger.info(f"Saved {len(documents)} changed documents to Firestore storage")
+                        return self._get_storage_version()
                     else:
                         logger.warning("Failed to save to Firestore storage, falling back to Redis")
                 except Exception as e:
@@ -811,10 +1061,10 @@ class VectorClient:
             # Try Redis storage third (fallback)
             if self.redis_storage:
                 try:
-                    success = self.redis_storage.store_documents(self._stored_documents)
+                    success = self.redis_storage.store_documents(documents, total_documents=len(self._stored_documents))
                     if success:
-                        logger.info(f"Saved {len(self._stored_documents)} documents to Redis storage")
-                        return
+                        logger.info(f"Saved {len(documents)} changed documents to Redis storage")
+                        return self._get_storage_version()
                     else:
                         logger.warning("Failed to save to Redis storage, falling back to file storage")
                 except Exception as e:
@@ -827,30 +1077,25 @@ class VectorClient:
             # Create shared storage directory if it doesn't exist
             os.makedirs(os.path.dirname(self.shared_storage_path), exist_ok=True)
             
-            # Save to shared storage file
-            data = {
-                'documents': self._stored_documents,
-                'last_updated': datetime.utcnow().isoformat(),
-                'total_documents': len(self._stored_documents)
-            }
-            
-            with open(self.shared_storage_path, 'w') as f:
-                json.dump(data, f, indent=2)
+            # Save to shared storage file as a binary snapshot (local, so a full rewrite is cheap)
+            payload = write_snapshot(self.shared_storage_path, self._stored_documents)
             
-            logger.info(f"Saved {len(self._stored_documents)} documents to file storage")
+            logger.info(f"Saved {len(self._stored_documents)} documents to file storage ({len(payload)} bytes)")
             
             # Also save to GCS as backup
             try:
-                self._persist_to_gcs_backup(data)
+                self._persist_to_gcs_backup(payload)
             except Exception as e:
                 logger.warning(f"GCS backup failed: {e}")
+            
+            return self._get_storage_version()
                 
         except Exception as e:
             logger.error(f"Shared storage saving failed: {e}")
             raise
     
-    def _persist_to_gcs_backup(self, data: Dict[str, Any]) -> None:
-        """Persist data to GCS as backup"""
+    def _persist_to_gcs_backup(self, payload: bytes) -> None:
+        """Persist a snapshot payload to GCS as backup"""
         try:
             from google.cloud import storage
             
@@ -858,13 +1103,13 @@ class VectorClient:
             bucket = client.bucket(self.gcs_bucket)
             blob = bucket.blob(self.gcs_path)
             
-            # Upload data to GCS
+            # Upload snapshot to GCS
             blob.upload_from_string(
-                json.dumps(data, indent=2),
-                content_type='application/json'
+                payload,
+                content_type='application/octet-stream'
             )
             
-            logger.info(f"Backed up {len(data.get('documents', {}))} documents to GCS")
+            logger.info(f"Backed up {len(self._stored_documents)} documents to GCS ({len(payload)} bytes)")
             
         except Exception as e:
             logger.warning(f"GCS backup failed: {e}")
@@ -872,69 +1117,90 @@ class VectorClient:
     
     def get_document(self, doc_id: str) -> Optional[str]:
         """Get document content by ID"""
-        try:
-            # Try Cloud Storage persistence first (primary)
-            if self.cloud_storage_persistence:
-                try:
-                    doc_data = self.cloud_storage_persistence.get_document(doc_id)
-                    if doc_data:
-                        return doc_data.get('text', '')
-                except Exception as e:
-                    logger.warning(f"Failed to get document from Cloud Storage persistence: {e}")
-            
-            # Try Firestore storage second
-            if self.firestore_storage:
-                try:
-                    doc_data = self.firestore_storage.get_document(doc_id)
-                    if doc_data:
-                        return doc_data.get('text', '')
-                except Exception as e:
-                    logger.warning(f"Failed to get document from Firestore: {e}")
+        text = self.get_documents([doc_id]).get(doc_id)
+        if text is None:
+            logger.warning(f"Document {doc_id} not found")
+        return text
+    
+    def get_documents(self, doc_ids: List[str]) -> Dict[str, str]:
+        """
+        Get the content of several documents at once
+        
+        Documents already held in memory (kept current by the storage version check)
+        cost nothing; any others are fetched with one bulk read per storage backend.
+        
+        Args:
+            doc_ids: Document IDs
             
-            # Try Redis storage third (fallback)
-            if self.redis_storage:
+        Returns:
+            Mapping of document ID to text; IDs that could not be found are omitted
+        """
+        try:
+            if not getattr(self, '_stored_documents', None):
                 try:
-                    doc_data = self.redis_storage.get_document(doc_id)
-                    if doc_data:
-                        return doc_data.get('text', '')
+                    self._refresh_from_shared_storage()
                 except Exception as e:
-                    logger.warning(f"Failed to get document from Redis: {e}")
+                    logger.warning(f"Failed to refresh from shared storage: {e}")
             
-            # Fallback to local cache
             stored_docs = getattr(self, '_stored_documents', {})
+            texts = {doc_id: stored_docs[doc_id].get('text', '') for doc_id in doc_ids if doc_id in stored_docs}
+            missing = [doc_id for doc_id in doc_ids if doc_id not in texts]
             
-            if doc_id in stored_docs:
-                doc_data = stored_docs[doc_id]
-                return doc_data.get('text', '')
-            
-            # Try to load from shared storage if not in cache
-            if not stored_docs:
-                try:
-                    self._load_from_shared_storage()
-                    stored_docs = getattr(self, '_stored_documents', {})
-                    if doc_id in stored_docs:
-                        doc_data = stored_docs[doc_id]
-                        return doc_data.get('text', '')
-                except Exception as e:
-                    logger.warning(f"Failed to load from shared storage: {e}")
-            
-            # Try to load from GCS if not in cache
-            if not stored_docs:
+            # Ids served by a remote index (e.g. Matching Engine) may not be resident yet
+            for backend in (self.cloud_storage_persistence, self.firestore_storage, self.redis_storage):
+                if not missing:
+                    break
+                if backend is None:
+                    continue
                 try:
-                    self._load_from_gcs()
-                    stored_docs = getattr(self, '_stored_documents', {})
-                    if doc_id in stored_docs:
-                        doc_data = stored_docs[doc_id]
-                        return doc_data.get('text', '')
+                    found = backend.get_documents(missing)
                 except Exception as e:
-                    logger.warning(f"Failed to load from GCS: {e}")
+                    logger.warning(f"Failed to get documents from {type(backend).__name__}: {e}")
+                    continue
+                for doc_id, doc_data in found.items():
+                    texts[doc_id] = doc_data.get('text', '')
+                missing = [doc_id for doc_id in missing if doc_id not in texts]
             
-            logger.warning(f"Document {doc_id} not found")
-            return None
+            if missing:
+                logger.warning(f"{len(missing)} documents not found: {missing[:10]}")
+            return texts
             
         except Exception as e:
-            logger.error(f"Failed to get document {doc_id}: {e}")
-            return None
+            logger.error(f"Failed to get {len(doc_ids)} documents: {e}")
+            return {}
+    
+    def query_with_documents(self, text: str, filters: Dict[str, Any] = None, k: int = 6,
+                             query_embedding: Optional[List[float]] = None) -> List[Dict[str, Any]]:
+        """
+        Query vector store and return the matching documents' content inline
+        
+        Args:
+            text: Query text
+            filters: Metadata filters (team_id, season_id, grade_id, type)
+            k: Number of results to return
+            query_embedding: Embedding of text from embed_query(), if the caller already has it
+            
+        Returns:
+            Ranked list of {"id", "text", "metadata", "score"} with score the cosine similarity
+            (None for text-search hits); hits whose content is unavailable are dropped
+        """
+        stage_start = time.perf_counter()
+        hits = self._query_scored(text, filters, k, query_embedding=query_embedding)
+        doc_ids = [doc_id for doc_id, _ in hits]
+        fetch_start = time.perf_counter()
+        texts = self.get_documents(doc_ids)
+        get_metrics().record_stage("retrieval", (fetch_start - stage_start) * 1000)
+        get_metrics().record_stage("document_fetch", (time.perf_counter() - fetch_start) * 1000)
+        stored_docs = getattr(self, '_stored_documents', {})
+        return [
+            {
+                "id": doc_id,
+                "text": texts[doc_id],
+                "metadata": stored_docs[doc_id].get("metadata", {}) if doc_id in stored_docs else {},
+                "score": score
+            }
+            for doc_id, score in hits if texts.get(doc_id)
+        ]
 
 class MockVectorClient:
     """Mock vector client for testing"""
@@ -947,6 +1213,8 @@ class MockVectorClient:
         self.documents: Dict[str, Dict[str, Any]] = {}
         self.queries: List[Dict[str, Any]] = []
         self.stats = {"upserts": 0, "queries": 0, "skipped_upserts": 0}
+        self.flushes = 0
+        self._pending_flush = False
         
         logger.info(f"MockVectorClient initialized for project {project_id} in {location}")
     
@@ -974,7 +1242,7 @@ class MockVectorClient:
         
         return False
     
-    def upsert(self, docs: List[Dict[str, Any]]) -> None:
+    def upsert(self, docs: List[Dict[str, Any]], flush: bool = True) -> None:
         """Mock upsert implementation"""
         if not docs:
             return
@@ -996,8 +1264,25 @@ class MockVectorClient:
         skipped_count = len(docs) - len(docs_to_upsert)
         if skipped_count > 0:
             self.stats["skipped_upserts"] += skipped_count
+        
+        if docs_to_upsert:
+            self._pending_flush = True
+        if flush:
+            self.flush()
+    
+    def flush(self) -> bool:
+        """Mock flush implementation"""
+        if not self._pending_flush:
+            return False
+        self._pending_flush = False
+        self.flushes += 1
+        return True
     
-    def query(self, text: str, filters: Dict[str, Any] = None, k: int = 6) -> List[str]:
+    def embed_query(self, text: str) -> List[float]:
+        """Mock query embedding (none, so semantic caching is skipped)"""
+        return []
+    
+    def query(self, text: str, filters: Dict[str, Any] = None, k: int = 6, query_embedding: Optional[List[float]] = None) -> List[str]:
         """Mock query implementation"""
         logger.info(f"Mock querying with text: '{text[:50]}...', filters: {filters}, k: {k}")
         
@@ -1026,6 +1311,27 @@ class MockVectorClient:
         
         return results[:k]
     
+    def get_document(self, doc_id: str) -> Optional[str]:
+        """Mock document lookup"""
+        doc = self.documents.get(doc_id)
+        return doc.get("text", "") if doc else None
+    
+    def get_documents(self, doc_ids: List[str]) -> Dict[str, str]:
+        """Mock bulk document lookup"""
+        return {doc_id: self.documents[doc_id].get("text", "") for doc_id in doc_ids if doc_id in self.documents}
+    
+    def query_with_documents(self, text: str, filters: Dict[str, Any] = None, k: int = 6,
+                             query_embedding: Optional[List[float]] = None) -> List[Dict[str, Any]]:
+        """Mock query returning content inline"""
+        return [
+            {"id": doc_id, "text": self.documents[doc_id].get("text", ""), "metadata": self.documents[doc_id].get("metadata", {}), "score": None}
+            for doc_id in self.query(text, filters, k, query_embedding=query_embedding)
+        ]
+    
+    def get_data_version(self) -> str:
+        """Mock data version, bumped by every upsert"""
+        return str(self.stats["upserts"])
+    
     def get_stats(self) -> Dict[str, Any]:
         """Get mock statistics"""
         return {
@@ -1062,12 +1368,11 @@ def get_vector_client() -> VectorClient:
             location=settings.vertex_location
         )
         
-        # Ensure shared storage is loaded
+        # Ensure shared storage is current (no-op if the startup load is still fresh)
         try:
-            client._load_from_shared_storage()
-            logger.info(f"Loaded {len(client._stored_documents)} documents from shared storage")
+            client._refresh_from_shared_storage()
         except Exception as e:
-            logger.warning(f"Failed to load from shared storage: {e}")
+            logger.warning(f"Failed to refresh from shared storage: {e}")
         
         return client
 
@@ -0,0 +1,277 @@
+"""
+In-memory vector index for Cricket Agent
+Contiguous float32 embedding matrix with metadata columns for fast filtered top-k
+"""
+
+import logging
+from typing import Dict, List, Optional, Any, Iterable, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Metadata fields that get a dedicated column up front; any other field is
+# materialised lazily the first time it is used as a filter
+INDEXED_FIELDS = ("team_id", "season_id", "grade_id", "type")
+
+
+class VectorIndex:
+    """Resident index of pre-normalised embeddings with per-field metadata columns"""
+
+    def __init__(self, dimensions: Optional[int] = None, initial_capacity: int = 1024):
+        self.dimensions = dimensions
+        self._capacity = 0
+        self._size = 0
+
+        # Row-aligned storage
+        self._matrix: Optional[np.ndarray] = None
+        self._ids: np.ndarray = np.empty(0, dtype=object)
+        self._metadata: List[Dict[str, Any]] = []
+        # Dictionary-encoded metadata columns: field -> int32 codes, plus value -> code vocabularies
+        self._columns: Dict[str, np.ndarray] = {}
+        self._vocabularies: Dict[str, Dict[Any, int]] = {}
+        self._alive: np.ndarray = np.zeros(0, dtype=bool)
+
+        # doc_id -> row
+        self._rows: Dict[str, int] = {}
+        self._initial_capacity = max(1, initial_capacity)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._rows
+
+    @classmethod
+    def from_documents(cls, documents: Dict[str, Dict[str, Any]]) -> "VectorIndex":
+        """Build an index from a stored-documents mapping (id -> {embedding, metadata, ...})"""
+        if getattr(documents, "matrix", None) is not None and documents.matrix.shape[0] == len(documents):
+            index = cls.from_matrix(documents.ids, documents.matrix, [documents[doc_id].get("metadata") or {} for doc_id in documents.ids], documents.present)
+            # Odd-sized embeddings kept outside the matrix are rejected by upsert like any other mismatch
+            index.upsert_many(
+                (doc_id, documents[doc_id]["embedding"], documents[doc_id].get("metadata") or {})
+                for row, doc_id in enumerate(documents.ids)
+                if not documents.present[row] and len(documents[doc_id].get("embedding") or []) > 0
+            )
+            return index
+
+        entries = [
+            (doc_id, doc_data.get("embedding"), doc_data.get("metadata") or {})
+            for doc_id, doc_data in documents.items()
+            if doc_data.get("embedding") is not None and len(doc_data.get("embedding")) > 0
+        ]
+        index = cls(initial_capacity=max(len(entries), 1))
+        index.upsert_many(entries)
+        return index
+
+    @classmethod
+    def from_matrix(cls, ids: List[str], matrix: np.ndarray, metadata: List[Dict[str, Any]], present: Optional[np.ndarray] = None) -> "VectorIndex":
+        """
+        Build an index over an existing embedding matrix (e.g. a memory-mapped snapshot)
+
+        The matrix is adopted without copying when its rows are already unit length; otherwise a
+        normalised copy is made. A read-only matrix is copied on the first write to it.
+        """
+        count, dimensions = matrix.shape
+        index = cls(dimensions=dimensions or None, initial_capacity=max(count, 1))
+        if count == 0 or dimensions == 0:
+            return index
+
+        present = np.ones(count, dtype=bool) if present is None else np.asarray(present, dtype=bool)
+        matrix = np.asarray(matrix, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1)
+        if not np.allclose(norms[present], 1.0, atol=1e-3):
+            norms[norms == 0] = 1.0
+            matrix = matrix / norms[:, None]
+
+        index._matrix = matrix
+        index._capacity = count
+        index._size = count
+        index._ids = np.empty(count, dtype=object)
+        index._ids[:] = ids
+        index._metadata = list(metadata)
+        index._alive = present.copy()
+        index._rows = {doc_id: row for row, doc_id in enumerate(ids) if present[row]}
+        index._columns = {}
+        for field in INDEXED_FIELDS:
+            index._column(field)
+        return index
+
+    def upsert(self, doc_id: str, embedding: Iterable[float], metadata: Optional[Dict[str, Any]] = None) -> bool:
+        """Insert or replace a single document"""
+        return self.upsert_many([(doc_id, embedding, metadata or {})]) == 1
+
+    def upsert_many(self, entries: Iterable[Tuple[str, Iterable[float], Dict[str, Any]]]) -> int:
+        """Insert or replace documents in place, growing the matrix geometrically"""
+        entries = list(entries)
+        if not entries:
+            return 0
+
+        vectors = []
+        accepted = []
+        for doc_id, embedding, metadata in entries:
+            vector = np.asarray(embedding, dtype=np.float32).ravel()
+            if self.dimensions is None:
+                self.dimensions = int(vector.shape[0])
+            if vector.shape[0] != self.dimensions or vector.shape[0] == 0:
+                logger.warning(f"Skipping {doc_id}: embedding has {vector.shape[0]} dims, index expects {self.dimensions}")
+                continue
+            vectors.append(vector)
+            accepted.append((doc_id, metadata or {}))
+
+        if not accepted:
+            return 0
+
+        block = np.vstack(vectors)
+        norms = np.linalg.norm(block, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        block /= norms
+
+        new_count = sum(1 for doc_id, _ in accepted if doc_id not in self._rows)
+        self._ensure_capacity(self._size + new_count)
+
+        for offset, (doc_id, metadata) in enumerate(accepted):
+            row = self._rows.get(doc_id)
+            if row is None:
+                row = self._size
+                self._size += 1
+                self._rows[doc_id] = row
+                self._ids[row] = doc_id
+                self._metadata.append(metadata)
+            else:
+                self._metadata[row] = metadata
+
+            self._matrix[row] = block[offset]
+            self._alive[row] = True
+            for field, column in self._columns.items():
+                column[row] = self._encode(field, metadata.get(field))
+
+        return len(accepted)
+
+    def remove(self, doc_id: str) -> bool:
+        """Tombstone a document; its row is masked out of every search"""
+        row = self._rows.pop(doc_id, None)
+        if row is None:
+            return False
+        self._alive[row] = False
+        return True
+
+    def search(self, query_embedding: Iterable[float], filters: Optional[Dict[str, Any]] = None, k: int = 6) -> List[Tuple[str, float]]:
+        """
+        Top-k cosine similarity search
+
+        Args:
+            query_embedding: Query vector (any scale, normalised here)
+            filters: Metadata equality filters; falsy values are ignored
+            k: Number of results to return
+
+        Returns:
+            List of (doc_id, similarity) ordered by descending similarity
+        """
+        if self._size == 0 or k <= 0:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32).ravel()
+        if query.shape[0] != self.dimensions:
+            logger.warning(f"Query embedding has {query.shape[0]} dims, index expects {self.dimensions}")
+            return []
+
+        query_norm = np.linalg.norm(query)
+        if query_norm == 0:
+            return []
+        query = query / query_norm
+
+        mask = self._filter_mask(filters)
+        candidates = np.flatnonzero(mask)
+        if candidates.size == 0:
+            return []
+
+        if candidates.size == self._size:
+            scores = self._matrix[:self._size] @ query
+        else:
+            scores = self._matrix[candidates] @ query
+
+        top_k = min(k, candidates.size)
+        if top_k < candidates.size:
+            top = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            top = np.arange(candidates.size)
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        rows = candidates[top]
+        return [(self._ids[row], float(scores[i])) for row, i in zip(rows, top)]
+
+    def _filter_mask(self, filters: Optional[Dict[str, Any]]) -> np.ndarray:
+        """Boolean row mask for live documents matching all filters"""
+        mask = self._alive[:self._size].copy()
+        if not filters:
+            return mask
+
+        for field, value in filters.items():
+            if not value:
+                continue
+            column = self._column(field)
+            try:
+                code = self._vocabularies.get(field, {}).get(value)
+            except TypeError:
+                code = None
+            if code is None:
+                mask[:] = False
+                break
+            mask &= column[:self._size] == code
+        return mask
+
+    def _encode(self, field: str, value: Any) -> int:
+        """Map a metadata value to its integer code, assigning a new code if unseen"""
+        if value is None:
+            return -1
+        vocabulary = self._vocabularies.setdefault(field, {})
+        try:
+            code = vocabulary.get(value)
+            if code is None:
+                code = len(vocabulary)
+                vocabulary[value] = code
+            return code
+        except TypeError:
+            # Unhashable values (lists, dicts) can never be matched by an equality filter
+            return -2
+
+    def _column(self, field: str) -> np.ndarray:
+        """Get (or lazily materialise) the metadata column for a field"""
+        column = self._columns.get(field)
+        if column is None:
+            column = np.full(self._capacity, -1, dtype=np.int32)
+            for row, metadata in enumerate(self._metadata):
+                column[row] = self._encode(field, metadata.get(field))
+            self._columns[field] = column
+        return column
+
+    def _ensure_capacity(self, required: int) -> None:
+        """Grow row storage geometrically so upserts stay amortised O(1)"""
+        if required <= self._capacity and self._matrix is not None and self._matrix.flags.writeable:
+            return
+
+        new_capacity = max(self._initial_capacity, self._capacity)
+        while new_capacity < required:
+            new_capacity *= 2
+
+        matrix = np.zeros((new_capacity, self.dimensions), dtype=np.float32)
+        ids = np.empty(new_capacity, dtype=object)
+        alive = np.zeros(new_capacity, dtype=bool)
+        if self._size:
+            matrix[:self._size] = self._matrix[:self._size]
+            ids[:self._size] = self._ids[:self._size]
+            alive[:self._size] = self._alive[:self._size]
+
+        columns = {}
+        for field in set(INDEXED_FIELDS) | set(self._columns):
+            column = np.full(new_capacity, -1, dtype=np.int32)
+            if field in self._columns and self._size:
+                column[:self._size] = self._columns[field][:self._size]
+            columns[field] = column
+
+        self._matrix = matrix
+        self._ids = ids
+        self._alive = alive
+        self._columns = columns
+        self._capacity = new_capacity
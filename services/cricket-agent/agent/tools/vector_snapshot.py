@@ -0,0 +1,180 @@
+"""
+Binary snapshot format for the Cricket Agent vector store
+Raw float32 embedding block plus a JSON text/metadata section, readable zero-copy via np.memmap
+
+Layout (little-endian):
+    8 bytes   magic b"CRVSNAP1"
+    8 bytes   uint64 header length
+    N bytes   JSON header {"count", "dimensions", "ids", "records", "missing"}
+    padding   to a 64-byte boundary
+    count * dimensions float32 embedding rows, in ids order
+"""
+
+import json
+import logging
+import os
+import struct
+import tempfile
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"CRVSNAP1"
+SNAPSHOT_ALIGNMENT = 64
+_PREFIX = struct.Struct("<8sQ")
+
+
+class SnapshotDocuments(dict):
+    """Documents mapping decoded from a snapshot, carrying the shared embedding matrix"""
+
+    def __init__(self, documents: Dict[str, Any], ids: List[str], matrix: np.ndarray, present: np.ndarray):
+        super().__init__(documents)
+        self.ids = ids
+        self.matrix = matrix
+        # Rows whose embedding lives in the matrix (False for docs without a usable embedding)
+        self.present = present
+
+    def _detach(self) -> None:
+        """Forget the matrix once the mapping diverges from it"""
+        self.matrix = None
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._detach()
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        self._detach()
+        super().__delitem__(key)
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        self._detach()
+        super().update(*args, **kwargs)
+
+    def pop(self, *args: Any) -> Any:
+        self._detach()
+        return super().pop(*args)
+
+
+def embedding_to_list(embedding: Any) -> List[float]:
+    """Convert an embedding (list or numpy row) to a plain list for JSON/Firestore/Redis"""
+    if embedding is None:
+        return []
+    if isinstance(embedding, np.ndarray):
+        return embedding.tolist()
+    return list(embedding)
+
+
+def encode_snapshot(documents: Dict[str, Any]) -> bytes:
+    """Serialise a documents mapping (id -> {text, metadata, embedding}) to snapshot bytes"""
+    ids = list(documents.keys())
+    dimensions = 0
+    for doc_data in documents.values():
+        embedding = doc_data.get("embedding")
+        if embedding is not None and len(embedding) > 0:
+            dimensions = len(embedding)
+            break
+
+    matrix = np.zeros((len(ids), dimensions), dtype="<f4")
+    records = []
+    missing = []
+    for row, doc_id in enumerate(ids):
+        doc_data = documents[doc_id]
+        record = {"text": doc_data.get("text", ""), "metadata": doc_data.get("metadata", {})}
+        embedding = doc_data.get("embedding")
+        if embedding is None or len(embedding) == 0:
+            missing.append(row)
+        elif len(embedding) != dimensions:
+            # Keep odd-sized embeddings losslessly in the header rather than the matrix
+            logger.warning(f"Document {doc_id} has {len(embedding)} dims, snapshot uses {dimensions}")
+            record["embedding"] = embedding_to_list(embedding)
+            missing.append(row)
+        else:
+            matrix[row] = embedding
+        records.append(record)
+
+    header = json.dumps({
+        "count": len(ids),
+        "dimensions": dimensions,
+        "ids": ids,
+        "records": records,
+        "missing": missing
+    }).encode("utf-8")
+    padding = -(_PREFIX.size + len(header)) % SNAPSHOT_ALIGNMENT
+    return b"".join([
+        _PREFIX.pack(SNAPSHOT_MAGIC, len(header)),
+        header,
+        b"\x00" * padding,
+        matrix.tobytes()
+    ])
+
+
+def decode_snapshot(data: Union[bytes, np.ndarray]) -> SnapshotDocuments:
+    """
+    Decode snapshot bytes (or a uint8 memmap) without copying the embedding block
+
+    Args:
+        data: Snapshot bytes, or a uint8 array such as an np.memmap over a snapshot file
+
+    Returns:
+        SnapshotDocuments whose embeddings are read-only float32 views into data
+    """
+    buffer = data if isinstance(data, np.ndarray) else np.frombuffer(data, dtype=np.uint8)
+    magic, header_length = _PREFIX.unpack(bytes(buffer[:_PREFIX.size]))
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("Not a vector store snapshot")
+
+    header = json.loads(bytes(buffer[_PREFIX.size:_PREFIX.size + header_length]).decode("utf-8"))
+    count = header["count"]
+    dimensions = header["dimensions"]
+    offset = _PREFIX.size + header_length
+    offset += -offset % SNAPSHOT_ALIGNMENT
+
+    block = buffer[offset:offset + count * dimensions * 4]
+    if block.size != count * dimensions * 4:
+        raise ValueError(f"Truncated snapshot: expected {count * dimensions * 4} embedding bytes, found {block.size}")
+    matrix = block.view("<f4").reshape(count, dimensions)
+
+    present = np.ones(count, dtype=bool)
+    present[header["missing"]] = False
+
+    documents = {}
+    for row, (doc_id, record) in enumerate(zip(header["ids"], header["records"])):
+        if present[row]:
+            embedding = matrix[row]
+        else:
+            embedding = record.get("embedding", [])
+        documents[doc_id] = {
+            "text": record.get("text", ""),
+            "metadata": record.get("metadata", {}),
+            "embedding": embedding
+        }
+
+    return SnapshotDocuments(documents, header["ids"], matrix, present)
+
+
+def write_snapshot(path: str, documents: Dict[str, Any]) -> bytes:
+    """Atomically write a snapshot file and return its payload; readers of the old file keep a valid mapping"""
+    payload = encode_snapshot(documents)
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".snapshot-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return payload
+
+
+def read_snapshot(path: str) -> Optional[SnapshotDocuments]:
+    """Memory-map a snapshot file; returns None if the file does not exist"""
+    if not os.path.exists(path):
+        return None
+    if os.path.getsize(path) < _PREFIX.size:
+        raise ValueError(f"Snapshot file {path} is too small")
+    return decode_snapshot(np.memmap(path, dtype=np.uint8, mode="r"))
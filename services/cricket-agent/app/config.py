@@ -46,10 +46,33 @@ class Settings(BaseSettings):
     # PlayHQ configuration
     playhq_mode: str = Field(default="public", description="PlayHQ mode: public, private")
     playhq_base_url: str = Field(default="https://api.playhq.com/v1", description="PlayHQ API base URL")
+    playhq_max_concurrency: int = Field(default=5, description="Maximum concurrent PlayHQ requests")
+    
+    # Blocking Vertex AI calls run in bounded executors off the event loop
+    llm_max_concurrency: int = Field(default=8, description="Maximum concurrent LLM calls per instance")
+    llm_timeout_seconds: float = Field(default=30.0, description="Per-call LLM timeout in seconds")
+    vector_max_concurrency: int = Field(default=8, description="Maximum concurrent query embedding and retrieval calls per instance")
+    vector_timeout_seconds: float = Field(default=10.0, description="Per-call query embedding and retrieval timeout in seconds")
+    executor_max_queued: int = Field(default=32, description="Calls allowed to wait for an executor slot before callers are rejected")
+    
+    # Prompt context budgets (estimated tokens), per intent with a default
+    context_token_budget: int = Field(default=1500, description="Default token budget for retrieved context in LLM prompts")
+    context_token_budgets: Dict[str, int] = Field(
+        default_factory=lambda: {"roster_list": 2000, "fixtures_list": 2000, "next_fixture": 800, "ladder_position": 800},
+        description="Per-intent overrides of the context token budget"
+    )
+    
+    # Structured questions (fixtures, ladder, roster) answered from synced data without the LLM
+    fast_path_enabled: bool = Field(default=True, description="Answer structured questions directly from synced data")
     
     # Vector store configuration
     vector_backend: str = Field(default="vertex_rag", description="Vector store backend")
     
+    # Response cache configuration
+    response_cache_redis_url: Optional[str] = Field(default=None, description="Redis URL for a response cache shared across instances")
+    semantic_cache_enabled: bool = Field(default=True, description="Reuse answers for paraphrased questions")
+    semantic_cache_threshold: float = Field(default=0.92, description="Minimum query embedding cosine similarity for a semantic cache hit")
+    
     # GCS configuration
     gcs_bucket: Optional[str] = Field(default=None, description="GCS bucket for data storage")
     
@@ -0,0 +1,161 @@
+"""
+Latency histograms for Cricket Agent metrics
+Fixed-memory, log-bucketed (HDR-style) histograms over a rolling time window
+"""
+
+import math
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Percentiles exposed for every histogram
+DEFAULT_QUANTILES = (0.5, 0.95, 0.99)
+
+
+class LatencyHistogram:
+    """
+    Rolling-window latency histogram
+
+    Values fall into logarithmic buckets, so every bucket is within `precision` of the values
+    it holds. The window is a ring of time slices; a slice is cleared when it is reused, so
+    memory is fixed and recording costs O(1) whatever the request rate.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 300.0,
+        slices: int = 5,
+        max_ms: float = 120_000.0,
+        precision: float = 0.02,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            window_seconds: Span of the rolling window percentiles are computed over
+            slices: Time slices in the window; the window advances one slice at a time
+            max_ms: Largest distinguishable value; anything larger lands in the last bucket
+            precision: Relative error of a reported value
+            clock: Time source in seconds
+        """
+        self.slices = slices
+        self.slice_seconds = window_seconds / slices
+        self._clock = clock
+
+        # Bucket 0 holds values below 1ms; bucket i >= 1 holds [growth^(i-1), growth^i)
+        self._growth = 1 + 2 * precision
+        self._log_growth = math.log(self._growth)
+        self.bucket_count = 2 + int(math.log(max_ms) / self._log_growth)
+
+        self._counts: List[List[int]] = [[0] * self.bucket_count for _ in range(slices)]
+        self._slice_ids: List[int] = [-1] * slices
+        self._lock = threading.Lock()
+
+        # Cumulative totals since start, for Prometheus _count/_sum
+        self.count = 0
+        self.sum = 0.0
+
+    def record(self, value_ms: float) -> None:
+        """Record one latency in milliseconds"""
+        value_ms = max(float(value_ms), 0.0)
+        if value_ms < 1.0:
+            bucket = 0
+        else:
+            bucket = min(1 + int(math.log(value_ms) / self._log_growth), self.bucket_count - 1)
+
+        slice_id = int(self._clock() // self.slice_seconds)
+        position = slice_id % self.slices
+        with self._lock:
+            if self._slice_ids[position] != slice_id:
+                # Reusing a slice that has left the window
+                self._counts[position] = [0] * self.bucket_count
+                self._slice_ids[position] = slice_id
+            self._counts[position][bucket] += 1
+            self.count += 1
+            self.sum += value_ms
+
+    def percentiles(self, quantiles: Sequence[float] = DEFAULT_QUANTILES) -> Dict[str, float]:
+        """
+        Percentiles over the rolling window
+
+        Args:
+            quantiles: Quantiles between 0 and 1
+
+        Returns:
+            {"p50": ..., "p95": ..., "p99": ...} in milliseconds; 0 when the window is empty
+        """
+        merged = self._window_counts()
+        total = sum(merged)
+        result: Dict[str, float] = {}
+        for quantile in quantiles:
+            result[quantile_label(quantile)] = self._value_at(merged, quantile * total) if total else 0.0
+        return result
+
+    def window_count(self) -> int:
+        """Number of values recorded in the rolling window"""
+        return sum(self._window_counts())
+
+    def _window_counts(self) -> List[int]:
+        """Bucket counts summed over the slices still in the window"""
+        oldest = int(self._clock() // self.slice_seconds) - self.slices + 1
+        merged = [0] * self.bucket_count
+        with self._lock:
+            for position, slice_id in enumerate(self._slice_ids):
+                if slice_id >= oldest:
+                    for bucket, count in enumerate(self._counts[position]):
+                        if count:
+                            merged[bucket] += count
+        return merged
+
+    def _value_at(self, counts: List[int], rank: float) -> float:
+        """Representative value of the bucket holding the value of a given rank"""
+        seen = 0
+        for bucket, count in enumerate(counts):
+            seen += count
+            if count and seen >= rank:
+                return self._bucket_value(bucket)
+        return self._bucket_value(self.bucket_count - 1)
+
+    def _bucket_value(self, bucket: int) -> float:
+        """Geometric midpoint of a bucket, within `precision` of any value in it"""
+        if bucket == 0:
+            return 0.5
+        return round(self._growth ** (bucket - 0.5), 2)
+
+
+def quantile_label(quantile: float) -> str:
+    """0.95 -> "p95", 0.999 -> "p99.9" """
+    return "p" + f"{quantile * 100:g}"
+
+
+class HistogramFamily:
+    """Histograms keyed by a label value (stage, intent), created on first use"""
+
+    def __init__(self, max_labels: int = 50, **histogram_args):
+        """
+        Args:
+            max_labels: Most distinct label values; later ones share an "other" histogram
+            histogram_args: Arguments for each LatencyHistogram
+        """
+        self.max_labels = max_labels
+        self._histogram_args = histogram_args
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def record(self, label: Optional[str], value_ms: float) -> None:
+        """Record a latency under a label"""
+        self.get(label or "unknown").record(value_ms)
+
+    def get(self, label: str) -> LatencyHistogram:
+        """Histogram for a label"""
+        histogram = self._histograms.get(label)
+        if histogram is None:
+            with self._lock:
+                if label not in self._histograms and len(self._histograms) >= self.max_labels:
+                    label = "other"
+                histogram = self._histograms.setdefault(label, LatencyHistogram(**self._histogram_args))
+        return histogram
+
+    def items(self) -> List[Tuple[str, LatencyHistogram]]:
+        """(label, histogram) pairs"""
+        with self._lock:
+            return sorted(self._histograms.items())
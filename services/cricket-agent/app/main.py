@@ -3,6 +3,7 @@ Caroline Springs CC Cricket Agent
 Main FastAPI application entry point
 """
 
+import json
 import logging
 import time
 import uuid
@@ -12,7 +13,7 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request, HTTPException, Depends, Header
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
 
 from .config import get_settings
@@ -63,7 +64,12 @@ async def lifespan(app: FastAPI):
         
         # Initialize vector store
         # TODO: Initialize Vertex RAG or knowledge service
-        
+
+        # Load the last published cricket data snapshot so the fast path works before the first sync
+        from agent.cricket_data import get_cricket_data
+        if get_cricket_data().load():
+            logger.info("Cricket data snapshot loaded", extra=get_cricket_data().get_stats())
+
         logger.info("Cricket Agent initialized successfully")
         
     except Exception as e:
@@ -168,6 +174,10 @@ async def detailed_health_check():
         }
         health_status["status"] = "unhealthy"
     
+    # Executors for blocking Vertex AI calls
+    from agent.executor import get_executor_stats
+    health_status["checks"]["executors"] = get_executor_stats()
+    
     return health_status
 
 @app.get("/metrics")
@@ -251,6 +261,41 @@ async def ask_cricket_agent(request: AskRequest):
         })
         raise HTTPException(status_code=500, detail=f"Failed to process query: {str(e)}")
 
+@app.post("/v1/ask/stream")
+async def ask_cricket_agent_stream(request: AskRequest):
+    """
+    Streaming variant of /v1/ask (Server-Sent Events)
+    Emits a "retrieval" event, then "token" events as the answer is generated,
+    and a trailing "done" event with latency_ms, rag_ms and ttft_ms
+    """
+    request_id = str(uuid.uuid4())
+    
+    logger.info(f"Streaming cricket query: {request.text[:100]}...", extra={
+        "request_id": request_id,
+        "source": request.source,
+        "team_hint": request.team_hint
+    })
+    
+    from agent.router import get_router
+    router = get_router()
+    
+    async def event_stream():
+        async for event in router.route_query_stream(
+            text=request.text,
+            source=request.source or "web",
+            team_hint=request.team_hint
+        ):
+            if event["event"] in ("retrieval", "done"):
+                event["data"]["request_id"] = request_id
+            yield f"event: {event['event']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        # Stop proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/internal/refresh", response_model=RefreshResponse)
 async def refresh_data(
     request: RefreshRequest,
@@ -282,7 +327,7 @@ async def refresh_data(
         
         # Route to appropriate sync function
         if request.scope == "all":
-            result = await run_full_refresh()
+            result = await run_full_refresh(revalidate=True)
         elif request.scope == "team":
             if not request.id:
                 raise HTTPException(status_code=400, detail="Team ID required for team scope")
@@ -12,6 +12,8 @@ from typing import Dict, Any, Optional, List
 from datetime import datetime
 import structlog
 from google.cloud import logging as cloud_logging
+
+from .histogram import DEFAULT_QUANTILES, HistogramFamily, LatencyHistogram, quantile_label
 try:
     from google.cloud import error_reporting
 except ImportError:
@@ -101,8 +103,14 @@ class CricketAgentMetrics:
         self.cache_hits = 0
         self.cache_misses = 0
         
-        # Latency tracking for p95 calculation
-        self.latency_samples: List[int] = []
+        # PlayHQ HTTP cache outcomes (hit, revalidated, miss)
+        self.playhq_cache_counts: Dict[str, int] = {"hit": 0, "revalidated": 0, "miss": 0}
+        
+        # Rolling-window latency histograms: whole requests, per intent and per pipeline stage
+        # (embedding, retrieval, document_fetch, llm)
+        self.latency = LatencyHistogram()
+        self.intent_latency = HistogramFamily()
+        self.stage_latency = HistogramFamily()
         
         # Intent tracking
         self.intent_counts: Dict[str, int] = {}
@@ -143,11 +151,21 @@ class CricketAgentMetrics:
                 description="Request duration in milliseconds"
             )
             
+            self.stage_histogram = self.meter.create_histogram(
+                name="cricket_agent_stage_duration_ms",
+                description="Pipeline stage duration in milliseconds"
+            )
+            
             self.playhq_counter = self.meter.create_counter(
                 name="cricket_agent_playhq_calls_total",
                 description="Total PlayHQ API calls"
             )
             
+            self.playhq_cache_counter = self.meter.create_counter(
+                name="cricket_agent_playhq_cache_total",
+                description="PlayHQ HTTP cache lookups by outcome"
+            )
+            
             self.vector_counter = self.meter.create_counter(
                 name="cricket_agent_vector_queries_total",
                 description="Total vector store queries"
@@ -166,11 +184,8 @@ class CricketAgentMetrics:
         """Record a request metric with enhanced tracking"""
         self.request_count += 1
         self.total_latency_ms += latency_ms
-        self.latency_samples.append(latency_ms)
-        
-        # Keep only last 1000 samples for p95 calculation
-        if len(self.latency_samples) > 1000:
-            self.latency_samples = self.latency_samples[-1000:]
+        self.latency.record(latency_ms)
+        self.intent_latency.record(intent, latency_ms)
         
         # Track tokens
         self.tokens_in += tokens_in
@@ -192,6 +207,15 @@ class CricketAgentMetrics:
         except Exception:
             pass  # Ignore telemetry errors
     
+    def record_stage(self, stage: str, latency_ms: float):
+        """Record the duration of one pipeline stage (embedding, retrieval, document_fetch, llm)"""
+        self.stage_latency.record(stage, latency_ms)
+        
+        try:
+            self.stage_histogram.record(latency_ms, {"stage": stage})
+        except Exception:
+            pass
+    
     def record_playhq_call(self, endpoint: str = None, status_code: int = None):
         """Record a PlayHQ API call with enhanced tracking"""
         self.playhq_api_calls += 1
@@ -204,6 +228,15 @@ class CricketAgentMetrics:
         except Exception:
             pass
     
+    def record_playhq_cache(self, outcome: str):
+        """Record a PlayHQ HTTP cache lookup (hit, revalidated or miss)"""
+        self.playhq_cache_counts[outcome] = self.playhq_cache_counts.get(outcome, 0) + 1
+        
+        try:
+            self.playhq_cache_counter.add(1, {"outcome": outcome})
+        except Exception:
+            pass
+    
     def record_vector_query(self, query_type: str = None):
         """Record a vector store query with enhanced tracking"""
         self.vector_store_queries += 1
@@ -235,25 +268,24 @@ class CricketAgentMetrics:
             pass
     
     def get_metrics(self) -> Dict[str, Any]:
-        """Get comprehensive metrics including p95 latency"""
+        """Get comprehensive metrics including rolling-window latency percentiles"""
         avg_latency = self.total_latency_ms / max(self.request_count, 1)
         error_rate = self.error_count / max(self.request_count, 1)
         cache_hit_rate = self.cache_hits / max(self.cache_hits + self.cache_misses, 1)
         
-        # Calculate p95 latency
-        p95_latency = 0
-        if self.latency_samples:
-            sorted_samples = sorted(self.latency_samples)
-            p95_index = int(len(sorted_samples) * 0.95)
-            p95_latency = sorted_samples[p95_index] if p95_index < len(sorted_samples) else sorted_samples[-1]
+        latency_percentiles = self.latency.percentiles()
         
         return {
             "request_count": self.request_count,
             "error_count": self.error_count,
             "error_rate": error_rate,
             "avg_latency_ms": avg_latency,
-            "p95_latency_ms": p95_latency,
+            "p95_latency_ms": latency_percentiles["p95"],
+            "latency_percentiles": latency_percentiles,
+            "intent_latency": {intent: histogram.percentiles() for intent, histogram in self.intent_latency.items()},
+            "stage_latency": {stage: histogram.percentiles() for stage, histogram in self.stage_latency.items()},
             "playhq_api_calls": self.playhq_api_calls,
+            "playhq_cache": dict(self.playhq_cache_counts),
             "vector_store_queries": self.vector_store_queries,
             "cache_hit_rate": cache_hit_rate,
             "cache_hits": self.cache_hits,
@@ -505,11 +537,24 @@ def get_prometheus_metrics() -> str:
     prometheus_lines.append(f"# TYPE cricket_agent_p95_latency_ms gauge")
     prometheus_lines.append(f"cricket_agent_p95_latency_ms {metrics['p95_latency_ms']}")
     
+    # Rolling-window latency percentiles, per intent and per pipeline stage
+    _append_summary(prometheus_lines, "cricket_agent_request_latency_ms",
+                    "Request latency percentiles in milliseconds", None, [(None, _metrics.latency)])
+    _append_summary(prometheus_lines, "cricket_agent_intent_latency_ms",
+                    "Request latency percentiles by intent in milliseconds", "intent", _metrics.intent_latency.items())
+    _append_summary(prometheus_lines, "cricket_agent_stage_latency_ms",
+                    "Pipeline stage latency percentiles in milliseconds", "stage", _metrics.stage_latency.items())
+    
     # API call metrics
     prometheus_lines.append(f"# HELP cricket_agent_playhq_calls_total Total PlayHQ API calls")
     prometheus_lines.append(f"# TYPE cricket_agent_playhq_calls_total counter")
     prometheus_lines.append(f"cricket_agent_playhq_calls_total {metrics['playhq_api_calls']}")
     
+    prometheus_lines.append(f"# HELP cricket_agent_playhq_cache_total PlayHQ HTTP cache lookups by outcome")
+    prometheus_lines.append(f"# TYPE cricket_agent_playhq_cache_total counter")
+    for outcome, count in metrics['playhq_cache'].items():
+        prometheus_lines.append(f'cricket_agent_playhq_cache_total{{outcome="{outcome}"}} {count}')
+    
     prometheus_lines.append(f"# HELP cricket_agent_vector_queries_total Total vector store queries")
     prometheus_lines.append(f"# TYPE cricket_agent_vector_queries_total counter")
     prometheus_lines.append(f"cricket_agent_vector_queries_total {metrics['vector_store_queries']}")
@@ -529,3 +574,16 @@ def get_prometheus_metrics() -> str:
     prometheus_lines.append(f"cricket_agent_cache_hit_rate {metrics['cache_hit_rate']:.4f}")
     
     return "\n".join(prometheus_lines)
+
+def _append_summary(lines: List[str], name: str, description: str, label: Optional[str], histograms) -> None:
+    """Append latency histograms as a Prometheus summary: windowed quantiles plus cumulative count and sum"""
+    lines.append(f"# HELP {name} {description}")
+    lines.append(f"# TYPE {name} summary")
+    for value, histogram in histograms:
+        labels = f'{label}="{value}",' if label else ""
+        percentiles = histogram.percentiles()
+        for quantile in DEFAULT_QUANTILES:
+            lines.append(f'{name}{{{labels}quantile="{quantile}"}} {percentiles[quantile_label(quantile)]}')
+        suffix = f"{{{labels.rstrip(',')}}}" if label else ""
+        lines.append(f"{name}_count{suffix} {histogram.count}")
+        lines.append(f"{name}_sum{suffix} {histogram.sum:.2f}")
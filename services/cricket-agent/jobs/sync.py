@@ -4,11 +4,14 @@ Handles data synchronization from PlayHQ to vector store and GCS
 """
 
 import asyncio
+import functools
 import hashlib
 import json
 import os
 import tempfile
-from typing import List, Dict, Any, Optional
+import time
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional, AsyncIterator, Awaitable, Callable
 from datetime import datetime, timedelta
 import logging
 from pathlib import Path
@@ -20,6 +23,7 @@ from agent.tools.normalize import (
     normalize_playhq_data, generate_snippet
 )
 from agent.tools.vector_client import get_vector_client
+from agent.cricket_data import CricketDataBuilder, get_cricket_data
 from models.fixture import Fixture, MatchStatus
 from models.ladder import Ladder, LadderEntry
 from models.team import Team, Player
@@ -83,20 +87,105 @@ class GCSStorage:
         logger.info(f"Wrote JSON to local storage: {local_path}")
         return str(local_path)
 
+class UpsertBuffer:
+    """
+    Collects vector store documents and hands them to the vector client in bulk
+    
+    The vector client embeds and writes synchronously, so flushes run in a worker
+    thread, one at a time, leaving the event loop to the other sync phases.
+    """
+    
+    def __init__(self, vector_client: Any, max_docs: int = 500, max_age_seconds: float = 30.0):
+        """
+        Args:
+            vector_client: Vector client receiving the documents
+            max_docs: Upsert once this many documents are pending
+            max_age_seconds: Upsert and persist once the oldest pending document is this old
+        """
+        self.vector_client = vector_client
+        self.max_docs = max(1, max_docs)
+        self.max_age_seconds = max_age_seconds
+        self._pending: List[Dict[str, Any]] = []
+        self._first_added_at: Optional[float] = None
+        self._flush_lock = asyncio.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._pending)
+    
+    async def add(self, doc: Dict[str, Any]) -> None:
+        """Queue a document, flushing if a threshold is reached"""
+        if not self._pending:
+            self._first_added_at = time.monotonic()
+        self._pending.append(doc)
+        
+        if len(self._pending) >= self.max_docs:
+            await self.flush()
+        elif time.monotonic() - self._first_added_at >= self.max_age_seconds:
+            await self.flush(persist=True)
+    
+    async def flush(self, persist: bool = False) -> int:
+        """
+        Upsert pending documents in one call
+        
+        Args:
+            persist: Also write the vector store to storage
+            
+        Returns:
+            Number of documents handed to the vector client
+        """
+        docs, self._pending = self._pending, []
+        self._first_added_at = None
+        
+        async with self._flush_lock:
+            if docs:
+                try:
+                    await asyncio.to_thread(self.vector_client.upsert, docs, flush=False)
+                    logger.info(f"Upserted {len(docs)} buffered documents")
+                except Exception as e:
+                    # Content hashes are not recorded for failed docs, so the next sync retries them
+                    logger.error(f"Failed to upsert {len(docs)} buffered documents: {e}")
+                    docs = []
+            
+            if persist:
+                try:
+                    await asyncio.to_thread(self.vector_client.flush)
+                except Exception as e:
+                    logger.error(f"Failed to persist vector store: {e}")
+        
+        return len(docs)
+
+def sync_phase(phase: Callable[..., Awaitable[None]]) -> Callable[..., Awaitable[None]]:
+    """Mark a CricketDataSync phase: whatever it queued is embedded and upserted in bulk when it ends"""
+    @functools.wraps(phase)
+    async def run(self: "CricketDataSync", *args: Any, **kwargs: Any) -> None:
+        try:
+            await phase(self, *args, **kwargs)
+        finally:
+            await self.upsert_buffer.flush()
+    return run
+
 class CricketDataSync:
     """Cricket data synchronization job"""
     
-    def __init__(self):
+    def __init__(self, revalidate: bool = False):
         self.settings = get_settings()
+        # Refreshes must publish PlayHQ's current data, so they revalidate cached responses within their TTL
+        self.revalidate = revalidate
         self.cscc_team_ids = get_cscc_team_ids()
         self.cscc_org_id = get_cscc_org_id()
         self.cscc_season_id = get_cscc_season_id()
         self.cscc_grade_id = get_cscc_grade_id()
         self.last_sync = None
         self.vector_client = get_vector_client()
+        self.upsert_buffer = UpsertBuffer(self.vector_client)
         self.normalizer = CricketDataNormalizer()
         self.snippet_generator = CricketSnippetGenerator()
         self.storage = GCSStorage(self.settings.gcs_bucket)
+        # Typed models for the router's fast path, alongside the snippets, published as one snapshot
+        self.cricket_data = get_cricket_data()
+        self.data_builder = self.cricket_data.builder()
+        # Shared PlayHQ client while run_phases is active
+        self._playhq_client: Optional[PlayHQClient] = None
         self.sync_stats = {
             "fixtures_updated": 0,
             "ladders_updated": 0,
@@ -116,13 +205,21 @@ class CricketDataSync:
         try:
             # Reset stats
             self.sync_stats = {key: 0 for key in self.sync_stats}
+            # A full sync starts empty, so fixtures, teams and players removed upstream are dropped
+            self.data_builder = CricketDataBuilder()
+            
+            # Phases fetch independent data, so run them together
+            await self.run_phases(
+                self.sync_teams,
+                self.sync_fixtures,
+                self.sync_ladders,
+                self.sync_recent_scorecards,
+                self.sync_rosters
+            )
             
-            # Sync in order of dependency
-            await self.sync_teams()
-            await self.sync_fixtures()
-            await self.sync_ladders()
-            await self.sync_recent_scorecards()
-            await self.sync_rosters()
+            # Persist everything upserted during the sync in one write
+            await self.upsert_buffer.flush(persist=True)
+            self.publish_data(partial=self.sync_stats["errors"] > 0)
             
             self.last_sync = datetime.utcnow()
             duration = (self.last_sync - start_time).total_seconds()
@@ -148,138 +245,204 @@ class CricketDataSync:
             logger.error(f"Cricket data sync failed: {e}")
             self.sync_stats["errors"] += 1
             
+            # Keep whatever was upserted before the failure
+            await self.upsert_buffer.flush(persist=True)
+            self.publish_data(partial=True)
+            
             return {
                 "status": "error",
                 "error": str(e),
                 "stats": self.sync_stats
             }
     
+    @sync_phase
     async def sync_teams(self) -> None:
         """Sync team data"""
         logger.info("Syncing team data")
         
         try:
-            playhq_client = await initialize_playhq_client()
-            
-            # Get seasons
-            seasons = await playhq_client.get_seasons(self.cscc_org_id)
-            if not seasons:
-                logger.warning("No seasons found")
-                return
-            
-            # Get grades for current season
-            grades = await playhq_client.get_grades(self.cscc_org_id, self.cscc_season_id)
-            
-            for grade in grades:
-                teams = await playhq_client.get_teams(self.cscc_org_id, self.cscc_season_id, grade["id"])
+            async with self._playhq() as playhq_client:
+                # Seasons and grades are independent lookups
+                seasons, grades = await asyncio.gather(
+                    playhq_client.get_seasons(self.cscc_org_id, revalidate=self.revalidate),
+                    playhq_client.get_grades(self.cscc_org_id, self.cscc_season_id)
+                )
+                if not seasons:
+                    logger.warning("No seasons found")
+                    return
                 
+                teams_by_grade = await asyncio.gather(*[
+                    playhq_client.get_teams(self.cscc_org_id, self.cscc_season_id, grade["id"])
+                    for grade in grades
+                ])
+            
+            for grade, teams in zip(grades, teams_by_grade):
                 for team_data in teams:
                     if team_data["id"] in self.cscc_team_ids:
                         await self._process_team(team_data, grade, seasons[0])
-            
-            await playhq_client.close()
                                 
         except Exception as e:
             logger.error(f"Failed to sync teams: {e}")
             self.sync_stats["errors"] += 1
     
+    @sync_phase
     async def sync_fixtures(self) -> None:
         """Sync fixture data"""
         logger.info("Syncing fixture data")
         
         try:
-            playhq_client = await initialize_playhq_client()
-            
-            for team_id in self.cscc_team_ids:
-                # Get current season fixtures
-                fixtures = await playhq_client.get_team_fixtures(team_id, self.cscc_season_id)
-                
+            async with self._playhq() as playhq_client:
+                # Get current season fixtures for every team at once
+                fixtures_by_team = await asyncio.gather(*[
+                    playhq_client.get_team_fixtures(team_id, self.cscc_season_id, revalidate=self.revalidate)
+                    for team_id in self.cscc_team_ids
+                ])
+            
+            for team_id, fixtures in zip(self.cscc_team_ids, fixtures_by_team):
                 for fixture_data in fixtures:
                     await self._process_fixture(fixture_data, team_id)
-            
-            await playhq_client.close()
                         
         except Exception as e:
             logger.error(f"Failed to sync fixtures: {e}")
             self.sync_stats["errors"] += 1
     
+    @sync_phase
     async def sync_ladders(self) -> None:
         """Sync ladder data"""
         logger.info("Syncing ladder data")
         
         try:
-            playhq_client = await initialize_playhq_client()
-            
-            # Get grades and their ladders
-            grades = await playhq_client.get_grades(self.cscc_org_id, self.cscc_season_id)
-            
-            for grade in grades:
-                ladder_data = await playhq_client.get_ladder(grade["id"])
+            async with self._playhq() as playhq_client:
+                # Get grades and their ladders
+                grades = await playhq_client.get_grades(self.cscc_org_id, self.cscc_season_id)
+                ladders = await asyncio.gather(*[
+                    playhq_client.get_ladder(grade["id"], revalidate=self.revalidate) for grade in grades
+                ])
+            
+            for grade, ladder_data in zip(grades, ladders):
                 if ladder_data:
                     await self._process_ladder(ladder_data, grade)
-            
-            await playhq_client.close()
                         
         except Exception as e:
             logger.error(f"Failed to sync ladders: {e}")
             self.sync_stats["errors"] += 1
     
+    @sync_phase
     async def sync_recent_scorecards(self) -> None:
         """Sync recent scorecard data"""
         logger.info("Syncing recent scorecard data")
         
         try:
-            playhq_client = await initialize_playhq_client()
-            
-            # Get recent games
-            recent_games = await playhq_client.get_games(
-                status="completed",
-                season_id=self.cscc_season_id
-            )
-            
-            # Filter for CSCC teams and recent games
-            cscc_games = [
-                game for game in recent_games
-                if any(team_id in [game.get("homeTeam", {}).get("id"), game.get("awayTeam", {}).get("id")]
-                       for team_id in self.cscc_team_ids)
-            ]
+            async with self._playhq() as playhq_client:
+                # Get recent games
+                recent_games = await playhq_client.get_games(
+                    status="completed",
+                    season_id=self.cscc_season_id,
+                    revalidate=self.revalidate
+                )
+                
+                # Filter for CSCC teams and recent games
+                cscc_games = [
+                    game for game in recent_games
+                    if any(team_id in [game.get("homeTeam", {}).get("id"), game.get("awayTeam", {}).get("id")]
+                           for team_id in self.cscc_team_ids)
+                ][:10]  # Limit to 10 most recent
+                
+                # Get scorecards for recent games
+                scorecards = await asyncio.gather(*[
+                    playhq_client.get_game_summary(game["id"], revalidate=self.revalidate) for game in cscc_games
+                ])
             
-            # Get scorecards for recent games
-            for game in cscc_games[:10]:  # Limit to 10 most recent
-                scorecard = await playhq_client.get_game_summary(game["id"])
+            for game, scorecard in zip(cscc_games, scorecards):
                 if scorecard:
                     await self._process_scorecard(scorecard, game)
-            
-            await playhq_client.close()
                         
         except Exception as e:
             logger.error(f"Failed to sync scorecards: {e}")
             self.sync_stats["errors"] += 1
     
+    @sync_phase
     async def sync_rosters(self) -> None:
         """Sync roster data"""
         logger.info("Syncing roster data")
         
         try:
-            playhq_client = await initialize_playhq_client()
+            async with self._playhq() as playhq_client:
+                # Get team rosters
+                rosters = await asyncio.gather(*[
+                    playhq_client.get_team_roster(team_id) for team_id in self.cscc_team_ids
+                ])
             
-            for team_id in self.cscc_team_ids:
-                # Get team roster
-                roster_data = await playhq_client.get_team_roster(team_id)
+            for team_id, roster_data in zip(self.cscc_team_ids, rosters):
                 if roster_data:
                     await self._process_roster(roster_data, team_id)
-            
-            await playhq_client.close()
                         
         except Exception as e:
             logger.error(f"Failed to sync rosters: {e}")
             self.sync_stats["errors"] += 1
     
+    def publish_data(self, partial: bool = False) -> None:
+        """
+        Publish the typed models collected so far as the router's new data snapshot
+        
+        Args:
+            partial: Some phases failed; keep the current data they would have replaced
+        """
+        try:
+            builder = self.data_builder.rebase(self.cricket_data.snapshot) if partial else self.data_builder
+            self.cricket_data.publish(builder.build())
+        except Exception as e:
+            logger.error(f"Failed to publish cricket data snapshot: {e}")
+            self.sync_stats["errors"] += 1
+
+    async def run_phases(self, *phases: Callable[[], Awaitable[None]]) -> None:
+        """
+        Run sync phases concurrently over one shared PlayHQ client
+        
+        Phases fetch independent data, so wall-clock time follows the slowest
+        request chain; the client's semaphore keeps total requests within PlayHQ limits.
+        
+        Args:
+            phases: Sync phase coroutine functions (e.g. self.sync_teams)
+        """
+        try:
+            self._playhq_client = await initialize_playhq_client()
+        except Exception as e:
+            logger.warning(f"Failed to create shared PlayHQ client, phases will open their own: {e}")
+        
+        try:
+            results = await asyncio.gather(*[phase() for phase in phases], return_exceptions=True)
+        finally:
+            client, self._playhq_client = self._playhq_client, None
+            if client is not None:
+                try:
+                    await client.close()
+                except Exception as e:
+                    logger.warning(f"Failed to close PlayHQ client: {e}")
+        
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+    
+    @asynccontextmanager
+    async def _playhq(self) -> AsyncIterator[PlayHQClient]:
+        """Use the shared client while phases run together, otherwise a client for this call"""
+        if self._playhq_client is not None:
+            yield self._playhq_client
+            return
+        
+        playhq_client = await initialize_playhq_client()
+        try:
+            yield playhq_client
+        finally:
+            await playhq_client.close()
+    
     async def _process_team(self, team_data: Dict[str, Any], grade: Dict[str, Any], season: Dict[str, Any]) -> None:
         """Process and store team data"""
         try:
             # Normalize team data
             normalized_team = self.normalizer.normalize_team(team_data, grade, season)
+            self.data_builder.add_team(normalized_team)
             
             # Generate snippet for embedding
             snippet = self.snippet_generator.generate_team_snippet(normalized_team)
@@ -297,8 +460,8 @@ class CricketDataSync:
                 }
             }
             
-            # Upsert to vector store
-            self.vector_client.upsert([doc])
+            # Queue for a bulk upsert to the vector store
+            await self.upsert_buffer.add(doc)
             self.sync_stats["vector_upserts"] += 1
             
             self.sync_stats["teams_updated"] += 1
@@ -313,6 +476,7 @@ class CricketDataSync:
         try:
             # Normalize fixture data
             normalized_fixture = self.normalizer.normalize_fixture(fixture_data, team_id)
+            self.data_builder.add_fixture(normalized_fixture, team_id)
             
             # Generate snippet for embedding
             snippet = self.snippet_generator.generate_fixture_snippet(normalized_fixture)
@@ -330,8 +494,8 @@ class CricketDataSync:
                 }
             }
             
-            # Upsert to vector store
-            self.vector_client.upsert([doc])
+            # Queue for a bulk upsert to the vector store
+            await self.upsert_buffer.add(doc)
             self.sync_stats["vector_upserts"] += 1
             
             self.sync_stats["fixtures_updated"] += 1
@@ -345,7 +509,10 @@ class CricketDataSync:
         """Process and store ladder data"""
         try:
             # Normalize ladder data
-            normalized_ladder = self.normalizer.normalize_ladder(ladder_data, grade, self.cscc_season_id)
+            normalized_ladder = self.normalizer.normalize_ladder(ladder_data, grade)
+            if normalized_ladder:
+                normalized_ladder.season_id = self.cscc_season_id
+            self.data_builder.add_ladder(normalized_ladder)
             
             # Generate snippet for embedding
             snippet = self.snippet_generator.generate_ladder_snippet(normalized_ladder)
@@ -363,8 +530,8 @@ class CricketDataSync:
                 }
             }
             
-            # Upsert to vector store
-            self.vector_client.upsert([doc])
+            # Queue for a bulk upsert to the vector store
+            await self.upsert_buffer.add(doc)
             self.sync_stats["vector_upserts"] += 1
             
             self.sync_stats["ladders_updated"] += 1
@@ -379,6 +546,7 @@ class CricketDataSync:
         try:
             # Normalize scorecard data
             normalized_scorecard = self.normalizer.normalize_scorecard(scorecard_data, game_data)
+            self.data_builder.add_scorecard(normalized_scorecard)
             
             # Generate snippet for embedding
             snippet = self.snippet_generator.generate_scorecard_snippet(normalized_scorecard)
@@ -396,8 +564,8 @@ class CricketDataSync:
                 }
             }
             
-            # Upsert to vector store
-            self.vector_client.upsert([doc])
+            # Queue for a bulk upsert to the vector store
+            await self.upsert_buffer.add(doc)
             self.sync_stats["vector_upserts"] += 1
             
             self.sync_stats["scorecards_updated"] += 1
@@ -412,6 +580,7 @@ class CricketDataSync:
         try:
             # Normalize roster data
             normalized_roster = self.normalizer.normalize_roster(roster_data, team_id)
+            self.data_builder.add_roster(normalized_roster)
             
             # Generate snippet for embedding
             snippet = self.snippet_generator.generate_roster_snippet(normalized_roster)
@@ -429,8 +598,8 @@ class CricketDataSync:
                 }
             }
             
-            # Upsert to vector store
-            self.vector_client.upsert([doc])
+            # Queue for a bulk upsert to the vector store
+            await self.upsert_buffer.add(doc)
             self.sync_stats["vector_upserts"] += 1
             
             self.sync_stats["rosters_updated"] += 1
@@ -447,6 +616,7 @@ class CricketDataSync:
             "stats": self.sync_stats,
             "cscc_team_ids": self.cscc_team_ids,
             "vector_stats": self.vector_client.get_stats(),
+            "cricket_data": self.cricket_data.get_stats(),
             "settings": {
                 "org_id": self.cscc_org_id,
                 "season_id": self.cscc_season_id,
@@ -485,10 +655,15 @@ async def run_sync_job(scope: str = "all", target_id: Optional[str] = None) -> D
         return {"status": "error", "message": f"Invalid scope: {scope}"}
 
 # New entrypoint functions for Task 6
-async def run_full_refresh() -> Dict[str, Any]:
-    """Run full refresh for all configured teams"""
+async def run_full_refresh(revalidate: bool = False) -> Dict[str, Any]:
+    """
+    Run full refresh for all configured teams
+    
+    Args:
+        revalidate: Ask PlayHQ for every response instead of serving cached ones within their TTL
+    """
     try:
-        sync = CricketDataSync()
+        sync = CricketDataSync(revalidate=revalidate)
         return await sync.sync_all()
     except Exception as e:
         logger.error(f"Full refresh failed: {e}")
@@ -499,7 +674,7 @@ async def run_full_refresh() -> Dict[str, Any]:
 
 async def run_team_refresh(team_id: str) -> Dict[str, Any]:
     """Run refresh for a specific team"""
-    sync = CricketDataSync()
+    sync = CricketDataSync(revalidate=True)
     
     if team_id not in sync.cscc_team_ids:
         return {"status": "error", "message": f"Team {team_id} not in configured teams"}
@@ -511,13 +686,15 @@ async def run_team_refresh(team_id: str) -> Dict[str, Any]:
         # Reset stats for this team
         sync.sync_stats = {key: 0 for key in sync.sync_stats}
         
-        # Sync team-specific data
-        await sync.sync_teams()
-        await sync.sync_fixtures()
-        await sync.sync_rosters()
-        
-        # Get recent scorecards for this team
-        await sync.sync_recent_scorecards()
+        # Sync team-specific data and recent scorecards together
+        await sync.run_phases(
+            sync.sync_teams,
+            sync.sync_fixtures,
+            sync.sync_rosters,
+            sync.sync_recent_scorecards
+        )
+        await sync.upsert_buffer.flush(persist=True)
+        sync.publish_data()
         
         duration = (datetime.utcnow() - start_time).total_seconds()
         
@@ -555,12 +732,14 @@ async def run_match_refresh(match_id: str) -> Dict[str, Any]:
         
         # Get match summary
         playhq_client = await initialize_playhq_client()
-        match_summary = await playhq_client.get_game_summary(match_id)
+        match_summary = await playhq_client.get_game_summary(match_id, revalidate=True)
         await playhq_client.close()
         
         if match_summary:
             # Process the match summary
             await sync._process_scorecard(match_summary, {"id": match_id})
+            await sync.upsert_buffer.flush(persist=True)
+            sync.publish_data()
             
             # Write to GCS
             team_slug = "unknown-team"  # Could be extracted from match data
@@ -606,13 +785,15 @@ async def run_ladder_refresh(grade_id: str) -> Dict[str, Any]:
         
         # Get ladder data
         playhq_client = await initialize_playhq_client()
-        ladder_data = await playhq_client.get_ladder(grade_id)
+        ladder_data = await playhq_client.get_ladder(grade_id, revalidate=True)
         await playhq_client.close()
         
         if ladder_data:
             # Process the ladder
             grade_info = {"id": grade_id, "name": f"Grade {grade_id}"}
             await sync._process_ladder(ladder_data, grade_info)
+            await sync.upsert_buffer.flush(persist=True)
+            sync.publish_data()
             
             # Write to GCS
             date_path = datetime.utcnow().strftime("%Y/%m/%d")
@@ -0,0 +1,126 @@
+"""
+Tests for token-budgeted context packing
+"""
+
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+
+from agent.context_packer import estimate_tokens, pack_context
+from agent.router import IntentRouter
+from agent.cricket_data import CricketDataStore
+
+
+class TestPackContext:
+    """Test deduplication, ordering and truncation"""
+
+    def test_orders_by_score(self):
+        """Test that higher-scoring snippets come first"""
+        hits = [
+            {"id": "low", "text": "Ladder: Blue U10 3rd", "score": 0.2},
+            {"id": "high", "text": "Next fixture: Saturday", "score": 0.9},
+        ]
+
+        packed = pack_context(hits, budget_tokens=500)
+
+        assert packed.doc_ids == ["high", "low"]
+        assert packed.text.startswith("Next fixture")
+
+    def test_unscored_hits_keep_rank(self):
+        """Test that retrieval order is kept without scores"""
+        hits = [{"id": "a", "text": "first"}, {"id": "b", "text": "second"}]
+
+        assert pack_context(hits, budget_tokens=500).doc_ids == ["a", "b"]
+
+    def test_duplicates_removed(self):
+        """Test that contained and mostly-overlapping snippets are dropped"""
+        roster = "Team: Blue U10\nPlayer: Ava\nPlayer: Ben\nPlayer: Cal\nPlayer: Dev"
+        hits = [
+            {"id": "roster", "text": roster},
+            {"id": "same", "text": roster.upper()},
+            {"id": "part", "text": "Player: Ava"},
+            {"id": "overlap", "text": roster + "\nPlayer: Eli"},
+            {"id": "other", "text": "Ladder: Blue U10 3rd"},
+        ]
+
+        packed = pack_context(hits, budget_tokens=500)
+
+        assert packed.doc_ids == ["roster", "other"]
+        assert packed.duplicates == 3
+
+    def test_budget_respected(self):
+        """Test that packing stops at the budget and truncates the last snippet on a line"""
+        scorecard = "\n".join(f"Batter {i}: {i * 3} runs off {i * 4} balls" for i in range(100))
+        hits = [{"id": "short", "text": "Result: Blue U10 won"}, {"id": "scorecard", "text": scorecard}]
+
+        packed = pack_context(hits, budget_tokens=120)
+
+        assert packed.tokens <= 120
+        assert estimate_tokens(packed.text) <= 120
+        assert packed.truncated == 1
+        assert packed.text.endswith("…")
+        assert "Batter 0: 0 runs" in packed.text
+
+    def test_no_room_drops(self):
+        """Test that snippets that cannot usefully fit are dropped"""
+        hits = [{"id": "a", "text": "x" * 400}, {"id": "b", "text": "y" * 400}]
+
+        packed = pack_context(hits, budget_tokens=110)
+
+        assert packed.doc_ids == ["a"]
+        assert packed.dropped == 1
+
+
+def _inline_executor():
+    """Executor stand-in running calls on the test's thread, so no settings are needed"""
+    return Mock(run=AsyncMock(side_effect=lambda fn, *args, timeout=None, **kwargs: fn(*args, **kwargs)))
+
+
+class TestRouterTokenUsage:
+    """Test that token estimates reach the metrics"""
+
+    def _router(self):
+        router = IntentRouter.__new__(IntentRouter)
+        router.settings = Mock(vector_timeout_seconds=5.0, context_token_budget=1500, context_token_budgets={})
+        router.semantic_cache = None
+        router.cricket_data = CricketDataStore()
+        router.response_cache = Mock(get=Mock(return_value=None))
+        router.vector_client = Mock()
+        router.vector_client.get_data_version.return_value = "v1"
+        router.vector_client.embed_query.return_value = []
+        router.vector_client.query_with_documents.return_value = [{"id": "doc-1", "text": "Blue U10 play Saturday at Springside"}]
+        router.llm_agent = Mock()
+        router.llm_agent.summarise = AsyncMock(return_value="Saturday")
+        return router
+
+    @pytest.mark.asyncio
+    async def test_route_query_records_tokens(self):
+        """Test that record_request receives non-zero token counts"""
+        router = self._router()
+        metrics = Mock()
+
+        with patch('agent.router.get_metrics', return_value=metrics), \
+             patch('agent.router.get_executor', return_value=_inline_executor()):
+            response = await router.route_query("when do blue u10 play")
+
+        latency_ms, success, intent, tokens_in, tokens_out = metrics.record_request.call_args[0]
+        assert success is True
+        assert tokens_in > 0 and tokens_out > 0
+        assert response["meta"]["tokens_in"] == tokens_in
+
+    @pytest.mark.asyncio
+    async def test_budget_follows_matched_intent(self):
+        """Test that LLM answers use the context budget of the intent the matcher detects"""
+        router = self._router()
+        router.settings.context_token_budgets = {"next_fixture": 800}
+
+        with patch('agent.router.get_metrics'), \
+             patch('agent.router.get_executor', return_value=_inline_executor()), \
+             patch('agent.router.pack_context', wraps=pack_context) as packer:
+            await router._llm_driven_rag("When do the blue 10s play next?")
+            await router._llm_driven_rag("Tell me about cricket rules")
+
+        assert [call[0][1] for call in packer.call_args_list] == [800, 1500]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
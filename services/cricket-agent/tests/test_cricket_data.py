@@ -0,0 +1,262 @@
+"""
+Tests for the versioned in-memory cricket data snapshots
+"""
+
+import os
+import time
+from unittest.mock import Mock
+
+import pytest
+from datetime import datetime, timedelta, timezone
+
+from agent.cricket_data import (
+    CricketDataBuilder, CricketDataSnapshot, CricketDataStore, decode_data_snapshot, encode_data_snapshot
+)
+from models.fixture import Fixture, MatchStatus
+from models.ladder import Ladder, LadderEntry
+from models.roster import Roster
+from models.scorecard import BattingStats, Scorecard, TeamScorecard
+from models.team import Player, Team
+
+BLUE = "Caroline Springs Blue U10"
+BLUE_ID = "team-blue"
+
+
+def _fixture(fixture_id, days, status=MatchStatus.SCHEDULED, opponent="Melton Cricket Club"):
+    return Fixture(
+        id=fixture_id,
+        home_team=BLUE,
+        away_team=opponent,
+        home_team_id=BLUE_ID,
+        away_team_id="team-melton",
+        date=datetime.now(timezone.utc) + timedelta(days=days),
+        venue="Springside Reserve",
+        status=status
+    )
+
+
+def _scorecard(scorecard_id, days, runs):
+    return Scorecard(
+        id=scorecard_id,
+        match_id=f"match-{scorecard_id}",
+        date=datetime.now(timezone.utc) + timedelta(days=days),
+        home_team=TeamScorecard(team_id=BLUE_ID, team_name=BLUE, batting=[
+            BattingStats(player_id="p1", player_name="Alex Chen", runs=runs, balls=20, how_out="bowled")
+        ]),
+        away_team=TeamScorecard(team_id="team-melton", team_name="Melton Cricket Club", batting=[
+            BattingStats(player_id="m1", player_name="Jo Park", runs=7, balls=9)
+        ])
+    )
+
+
+def _builder():
+    builder = CricketDataBuilder()
+    builder.add_team(Team(id=BLUE_ID, name=BLUE, grade_id="g1"))
+    builder.add_fixture(_fixture("f-past", -7, MatchStatus.COMPLETED), BLUE_ID)
+    builder.add_fixture(_fixture("f-later", 14, opponent="Sunbury"), BLUE_ID)
+    builder.add_fixture(_fixture("f-next", 3), BLUE_ID)
+    builder.add_ladder(Ladder(
+        id="ladder-g1", grade_id="g1", grade_name="U10 Blue",
+        entries=[LadderEntry(position=2, team_id=BLUE_ID, team_name=BLUE, points=12, matches_played=4, matches_won=3, matches_lost=1)]
+    ))
+    builder.add_roster(Roster(team_id=BLUE_ID, team_name=BLUE, players=[
+        Player(id="p2", name="Sam Lee", email="sam@example.com"),
+        Player(id="p1", name="Alex Chen")
+    ]))
+    builder.add_scorecard(_scorecard("s-old", -14, 12))
+    builder.add_scorecard(_scorecard("s-last", -7, 31))
+    return builder
+
+
+class TestCricketDataSnapshot:
+    """Test snapshot indexes"""
+
+    def test_next_fixture_skips_past_games(self):
+        """Test that the next fixture is the earliest scheduled one from now"""
+        snapshot = _builder().build()
+
+        assert snapshot.next_fixture(BLUE_ID).id == "f-next"
+        assert [fixture.id for fixture in snapshot.fixtures_for_team(BLUE_ID)] == ["f-past", "f-next", "f-later"]
+
+    def test_fixtures_between_dates(self):
+        """Test date-range lookups across teams"""
+        snapshot = _builder().build()
+        now = datetime.now(timezone.utc)
+
+        assert [fixture.id for fixture in snapshot.fixtures_between(now, now + timedelta(days=30))] == ["f-next", "f-later"]
+        assert snapshot.fixtures_between(now + timedelta(days=30), now + timedelta(days=60)) == []
+
+    def test_ladder_grade_and_roster_lookups(self):
+        """Test ladder, grade and roster lookups by ID"""
+        snapshot = _builder().build()
+
+        ladder, entry = snapshot.ladder_position(BLUE_ID)
+        assert ladder.grade_id == "g1" and entry.position == 2
+        assert snapshot.teams_in_grade("g1") == [BLUE_ID]
+        assert len(snapshot.roster(BLUE_ID).players) == 2
+        assert snapshot.team_id_for_name(BLUE.upper()) == BLUE_ID
+        assert snapshot.ladder_position("team-unknown") is None
+
+    def test_player_lookups(self):
+        """Test a player's teams and most recent innings by name"""
+        snapshot = _builder().build()
+
+        scorecard, batting = snapshot.last_innings("alex  CHEN")
+        assert scorecard.id == "s-last" and batting.runs == 31
+        assert snapshot.player_teams("Alex Chen") == [BLUE_ID]
+        assert snapshot.player_teams("Jo Park") == ["team-melton"]
+        assert snapshot.last_innings("Nobody") is None
+
+    def test_empty_snapshot(self):
+        """Test that a snapshot without data reports itself empty"""
+        builder = CricketDataBuilder()
+        builder.add_roster(None)
+
+        assert CricketDataSnapshot().is_empty()
+        assert builder.build().is_empty()
+
+
+class TestCricketDataBuilder:
+    """Test building and versioning snapshots"""
+
+    def test_version_follows_content(self):
+        """Test that identical content gets the same version and changes get a new one"""
+        first = _builder().build()
+        same = CricketDataBuilder(first).build()
+
+        builder = CricketDataBuilder(first)
+        builder.add_fixture(_fixture("f-next", 20), BLUE_ID)
+        changed = builder.build()
+
+        assert first.version and first.version == same.version
+        assert changed.version != first.version
+
+    def test_partial_refresh_keeps_other_data(self):
+        """Test that a builder seeded from a snapshot replaces only what it re-fetched"""
+        first = _builder().build()
+        builder = CricketDataBuilder(first)
+        builder.add_fixture(_fixture("f-next", 20), BLUE_ID)
+        snapshot = builder.build()
+
+        assert snapshot.next_fixture(BLUE_ID).id == "f-later"
+        assert len(snapshot.fixtures_for_team(BLUE_ID)) == 3
+        assert snapshot.roster(BLUE_ID) is first.roster(BLUE_ID)
+        assert first.next_fixture(BLUE_ID).id == "f-next"
+
+
+    def test_rebase_overlays_new_data(self):
+        """Test that a rebased builder keeps the base and prefers what was added"""
+        first = _builder().build()
+        builder = CricketDataBuilder()
+        builder.add_fixture(_fixture("f-next", 20), BLUE_ID)
+        snapshot = builder.rebase(first).build()
+
+        assert len(snapshot.fixtures_for_team(BLUE_ID)) == 3
+        assert snapshot.next_fixture(BLUE_ID).id == "f-later"
+        assert snapshot.roster(BLUE_ID) is first.roster(BLUE_ID)
+
+
+class TestCricketDataStore:
+    """Test publishing, persisting and loading snapshots"""
+
+    def test_publish_swaps_snapshot(self, tmp_path):
+        """Test that readers holding the old snapshot are unaffected by a publish"""
+        store = CricketDataStore(path=str(tmp_path / "snapshot.json"))
+        old = store.snapshot
+        snapshot = _builder().build()
+
+        assert store.publish(snapshot, persist=False)
+        assert not store.publish(CricketDataBuilder(snapshot).build(), persist=False)
+        assert store.snapshot is snapshot and old.is_empty()
+
+    def test_round_trip(self, tmp_path):
+        """Test that a saved snapshot loads back with its version and indexes"""
+        path = str(tmp_path / "data" / "snapshot.json")
+        snapshot = _builder().build()
+        CricketDataStore(path=path).publish(snapshot)
+
+        store = CricketDataStore(path=path)
+        assert store.load()
+        assert store.snapshot.version == snapshot.version
+        assert store.snapshot.next_fixture(BLUE_ID).id == "f-next"
+        assert store.snapshot.last_innings("Alex Chen")[1].runs == 31
+        assert [name for name in os.listdir(tmp_path / "data")] == ["snapshot.json"]
+
+    def test_load_missing_or_corrupt(self, tmp_path):
+        """Test that a missing or unreadable snapshot leaves the store empty"""
+        path = tmp_path / "snapshot.json"
+        assert not CricketDataStore(path=str(path)).load()
+
+        path.write_text("{not json")
+        store = CricketDataStore(path=str(path))
+        assert not store.load()
+        assert store.is_empty()
+
+
+    def test_refresh_follows_gcs_generation(self, tmp_path):
+        """Test that a snapshot published elsewhere is loaded once, and our own writes are not reloaded"""
+        snapshot = _builder().build()
+        blob = Mock(generation=1)
+        blob.download_as_bytes.return_value = encode_data_snapshot(snapshot)
+        bucket = Mock()
+        bucket.get_blob.return_value = blob
+        store = CricketDataStore(path=str(tmp_path / "snapshot.json"), gcs_bucket="bucket")
+        store._bucket = Mock(return_value=bucket)
+        store.VERSION_CHECK_INTERVAL_SECONDS = 0
+
+        assert store.refresh()
+        assert store.snapshot.version == snapshot.version
+        assert not store.refresh()
+        blob.download_as_bytes.assert_called_once_with(if_generation_match=1)
+
+        bucket.blob.return_value = Mock(generation=2)
+        store.publish(CricketDataBuilder().build())
+        blob.generation = 2
+        assert not store.refresh()
+
+    def test_refresh_is_throttled(self, tmp_path):
+        """Test that GCS is checked at most once per interval"""
+        bucket = Mock()
+        bucket.get_blob.return_value = None
+        store = CricketDataStore(path=str(tmp_path / "snapshot.json"), gcs_bucket="bucket")
+        store._bucket = Mock(return_value=bucket)
+
+        assert not store.refresh()
+        assert not store.refresh()
+        bucket.get_blob.assert_called_once()
+
+
+class TestCricketDataPerformance:
+    """Micro-benchmark: lookups don't grow with the season, startup load stays fast"""
+
+    @pytest.mark.slow
+    def test_lookups_and_load(self):
+        """Test lookup cost and decode time on a season-sized snapshot"""
+        builder = CricketDataBuilder()
+        for team in range(40):
+            team_id = f"team-{team}"
+            for week in range(30):
+                builder.add_fixture(Fixture(
+                    id=f"f-{team}-{week}", home_team=f"Team {team}", away_team="Opponent",
+                    home_team_id=team_id, away_team_id="team-opp",
+                    date=datetime.now(timezone.utc) + timedelta(days=7 * week - 100)
+                ), team_id)
+        snapshot = builder.build()
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            snapshot.next_fixture("team-7")
+        lookup_ms = (time.perf_counter() - start) * 1000 / 1000
+
+        payload = encode_data_snapshot(snapshot)
+        start = time.perf_counter()
+        loaded = decode_data_snapshot(payload)
+        load_ms = (time.perf_counter() - start) * 1000
+
+        assert loaded.version == snapshot.version
+        assert lookup_ms < 0.1
+        assert load_ms < 500
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,113 @@
+"""
+Unit tests for the embedding cache
+Tests lookups, persistence across instances, and remote mirroring
+"""
+
+import os
+
+import pytest
+from unittest.mock import Mock
+
+from agent.tools.embedding_cache import EmbeddingCache, KEY_BYTES
+
+
+class TestEmbeddingCache:
+    """Test EmbeddingCache functionality"""
+    
+    @pytest.fixture
+    def cache_dir(self, tmp_path):
+        """Directory for the cache files"""
+        return str(tmp_path / "cache")
+    
+    def test_get_many_hits_and_misses(self, cache_dir):
+        """Test lookups return cached rows aligned with the inputs"""
+        cache = EmbeddingCache("text-embedding-005", cache_dir=cache_dir)
+        cache.put_many(["a", "b"], [[1.0, 0.0], [0.0, 1.0]])
+        
+        results = cache.get_many(["b", "c", "a"])
+        
+        assert results == [[0.0, 1.0], None, [1.0, 0.0]]
+        assert cache.get_stats()["hits"] == 2
+        assert cache.get_stats()["misses"] == 1
+    
+    def test_persists_across_instances(self, cache_dir):
+        """Test that a new instance maps the existing files"""
+        EmbeddingCache("text-embedding-005", cache_dir=cache_dir).put_many(["a"], [[0.5, 0.25]])
+        
+        cache = EmbeddingCache("text-embedding-005", cache_dir=cache_dir)
+        
+        assert len(cache) == 1
+        assert cache.get_many(["a"]) == [[0.5, 0.25]]
+        # Appends after reopening land after the mapped rows
+        cache.put_many(["b"], [[1.0, 1.0]])
+        assert cache.get_many(["a", "b"]) == [[0.5, 0.25], [1.0, 1.0]]
+    
+    def test_model_is_part_of_key(self, cache_dir):
+        """Test that a different model does not reuse embeddings"""
+        EmbeddingCache("text-embedding-004", cache_dir=cache_dir).put_many(["a"], [[1.0, 0.0]])
+        
+        cache = EmbeddingCache("text-embedding-005", cache_dir=cache_dir)
+        
+        assert cache.get_many(["a"]) == [None]
+    
+    def test_skips_failed_and_duplicate_rows(self, cache_dir):
+        """Test that None embeddings and known texts are not appended"""
+        cache = EmbeddingCache("text-embedding-005", cache_dir=cache_dir)
+        
+        assert cache.put_many(["a", "b"], [[1.0, 0.0], None]) == 1
+        assert cache.put_many(["a"], [[1.0, 0.0]]) == 0
+        assert len(cache) == 1
+    
+    def test_torn_append_is_truncated(self, cache_dir):
+        """Test that a key without its vector is dropped on load"""
+        cache = EmbeddingCache("text-embedding-005", cache_dir=cache_dir)
+        cache.put_many(["a"], [[1.0, 0.0]])
+        with open(cache.keys_path, "ab") as f:
+            f.write(b"\x00" * KEY_BYTES)
+        
+        reopened = EmbeddingCache("text-embedding-005", cache_dir=cache_dir)
+        
+        assert len(reopened) == 1
+        assert reopened.get_many(["a"]) == [[1.0, 0.0]]
+    
+    def test_appends_are_read_from_the_mapped_file(self, cache_dir):
+        """Test that appended rows are remapped rather than kept in memory"""
+        cache = EmbeddingCache("text-embedding-005", cache_dir=cache_dir)
+        cache.put_many(["a"], [[1.0, 0.0]])
+        cache.put_many(["b", "c"], [[0.0, 1.0], [0.5, 0.5]])
+        
+        assert cache._vectors.shape == (3, 2)
+        assert cache.get_many(["c", "a"]) == [[0.5, 0.5], [1.0, 0.0]]
+    
+    def test_keys_without_meta_are_reset(self, cache_dir):
+        """Test that keys left without meta.json don't shift the numbering of new rows"""
+        cache = EmbeddingCache("text-embedding-005", cache_dir=cache_dir)
+        cache.put_many(["a"], [[1.0, 0.0]])
+        os.remove(cache.meta_path)
+        
+        reopened = EmbeddingCache("text-embedding-005", cache_dir=cache_dir)
+        reopened.put_many(["b"], [[0.0, 1.0]])
+        
+        assert reopened.get_many(["a", "b"]) == [None, [0.0, 1.0]]
+        assert os.path.getsize(reopened.keys_path) == KEY_BYTES
+    
+    def test_flush_mirrors_and_pulls_from_remote(self, tmp_path):
+        """Test that a cold instance seeds itself from the remote mirror"""
+        remote = Mock()
+        remote.load_embedding_cache.return_value = None
+        remote.store_embedding_cache.return_value = True
+        
+        cache = EmbeddingCache("text-embedding-005", cache_dir=str(tmp_path / "one"), remote=remote)
+        cache.put_many(["a"], [[0.0, 2.0]])
+        assert cache.flush() is True
+        assert cache.flush() is False  # nothing new since the last mirror
+        
+        keys, vectors, meta = remote.store_embedding_cache.call_args[0]
+        remote.load_embedding_cache.return_value = (keys, vectors, meta)
+        cold = EmbeddingCache("text-embedding-005", cache_dir=str(tmp_path / "two"), remote=remote)
+        
+        assert cold.get_many(["a"]) == [[0.0, 2.0]]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
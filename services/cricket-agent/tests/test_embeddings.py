@@ -0,0 +1,99 @@
+"""
+Unit tests for batched embedding generation
+Tests request packing, alignment, and failure handling
+"""
+
+import pytest
+import threading
+import time
+from unittest.mock import Mock
+
+from agent.tools.embeddings import BatchEmbedder, estimate_tokens
+
+
+def fake_predict(instances):
+    """Return an embedding derived from each instance's text"""
+    return Mock(predictions=[
+        {"embeddings": {"values": [float(len(instance["content"])), 1.0]}}
+        for instance in instances
+    ])
+
+
+class TestBatchEmbedder:
+    """Test BatchEmbedder functionality"""
+    
+    def test_plan_respects_instance_limit(self):
+        """Test that batches never exceed the instance limit"""
+        embedder = BatchEmbedder(fake_predict, max_instances=250)
+        batches = embedder.plan_batches(["x"] * 600)
+        
+        assert [len(batch) for batch in batches] == [250, 250, 100]
+    
+    def test_plan_respects_token_limit(self):
+        """Test that batches never exceed the token budget"""
+        embedder = BatchEmbedder(fake_predict, max_tokens=1000)
+        texts = ["y" * 1600] * 5  # ~401 tokens each
+        batches = embedder.plan_batches(texts)
+        
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+        assert all(sum(estimate_tokens(texts[i]) for i in batch) <= 1000 for batch in batches)
+    
+    def test_embed_results_aligned(self):
+        """Test that results line up with inputs across batches"""
+        embedder = BatchEmbedder(fake_predict, max_instances=3)
+        texts = ["a" * n for n in range(1, 11)]
+        
+        embeddings = embedder.embed(texts)
+        
+        assert [embedding[0] for embedding in embeddings] == [float(n) for n in range(1, 11)]
+    
+    def test_failed_request_maps_to_none(self):
+        """Test that only rows of a failed request come back as None"""
+        def predict(instances):
+            if any(instance["content"] == "boom" for instance in instances):
+                raise RuntimeError("deadline exceeded")
+            return fake_predict(instances)
+        
+        embedder = BatchEmbedder(predict, max_instances=2)
+        embeddings = embedder.embed(["ok", "fine", "boom", "x", "last"])
+        
+        assert embeddings[2] is None and embeddings[3] is None
+        assert [embeddings[i][0] for i in (0, 1, 4)] == [2.0, 4.0, 4.0]
+    
+    def test_prediction_count_mismatch(self):
+        """Test that a short response fails the whole request rather than misaligning"""
+        embedder = BatchEmbedder(lambda instances: Mock(predictions=[{"embeddings": {"values": [1.0]}}]))
+        
+        assert embedder.embed(["a", "b"]) == [None, None]
+    
+    def test_bounded_concurrency(self):
+        """Test that no more than max_concurrency requests run at once"""
+        in_flight = 0
+        peak = 0
+        lock = threading.Lock()
+        
+        def predict(instances):
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            time.sleep(0.02)
+            with lock:
+                in_flight -= 1
+            return fake_predict(instances)
+        
+        embedder = BatchEmbedder(predict, max_instances=1, max_concurrency=3)
+        embeddings = embedder.embed(["t"] * 12)
+        
+        assert all(embeddings)
+        assert 1 < peak <= 3
+    
+    def test_empty_input(self):
+        """Test embedding no texts"""
+        embedder = BatchEmbedder(fake_predict)
+        
+        assert embedder.embed([]) == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,86 @@
+"""
+Tests for the bounded executors that run blocking Vertex AI calls
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from agent.executor import BoundedExecutor, ExecutorSaturatedError
+
+
+class TestBoundedExecutor:
+    """Test concurrency, backpressure and timeouts"""
+
+    @pytest.mark.asyncio
+    async def test_calls_run_concurrently(self):
+        """Test that throughput scales with the worker count instead of serialising"""
+        executor = BoundedExecutor("test", max_workers=4)
+
+        start = time.monotonic()
+        results = await asyncio.gather(*(executor.run(time.sleep, 0.2) for _ in range(4)))
+        elapsed = time.monotonic() - start
+
+        assert results == [None] * 4
+        assert elapsed < 0.6
+
+    @pytest.mark.asyncio
+    async def test_event_loop_stays_responsive(self):
+        """Test that a blocking call does not stall other coroutines"""
+        executor = BoundedExecutor("test", max_workers=1)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            for _ in range(5):
+                await asyncio.sleep(0.02)
+                ticks += 1
+
+        await asyncio.gather(executor.run(time.sleep, 0.2), ticker())
+
+        assert ticks == 5
+
+    @pytest.mark.asyncio
+    async def test_timeout_raises_and_frees_slot(self):
+        """Test that a slow call times out and its slot returns once the thread finishes"""
+        executor = BoundedExecutor("test", max_workers=1, max_queued=0)
+
+        with pytest.raises(asyncio.TimeoutError):
+            await executor.run(time.sleep, 0.2, timeout=0.05)
+        assert executor.get_stats()["timeouts"] == 1
+
+        assert await executor.run(lambda: "ok", timeout=1) == "ok"
+        assert executor.get_stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_saturation_rejected(self):
+        """Test that callers beyond workers plus queue are turned away"""
+        executor = BoundedExecutor("test", max_workers=1, max_queued=0, queue_timeout=0.05)
+        release = threading.Event()
+
+        running = asyncio.ensure_future(executor.run(release.wait, 1))
+        await asyncio.sleep(0.01)
+
+        with pytest.raises(ExecutorSaturatedError):
+            await executor.run(lambda: None)
+
+        release.set()
+        assert await running is True
+        assert executor.get_stats()["rejected"] == 1
+
+    @pytest.mark.asyncio
+    async def test_errors_propagate(self):
+        """Test that exceptions from the call reach the caller"""
+        executor = BoundedExecutor("test")
+
+        def fail():
+            raise ValueError("bad request")
+
+        with pytest.raises(ValueError):
+            await executor.run(fail)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
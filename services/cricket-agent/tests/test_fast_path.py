@@ -0,0 +1,164 @@
+"""
+Tests for the router's fast path over the in-memory cricket data
+"""
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, Mock, patch
+
+from agent.cricket_data import CricketDataBuilder, CricketDataStore
+from agent.router import IntentRouter
+from models.fixture import Fixture, MatchStatus
+from models.ladder import Ladder, LadderEntry
+from models.roster import Roster
+from models.scorecard import BattingStats, Scorecard, TeamScorecard
+from models.team import Player
+
+BLUE = "Caroline Springs Blue U10"
+BLUE_ID = "team-blue"
+
+
+def _fixture(fixture_id, days, status=MatchStatus.SCHEDULED, opponent="Melton Cricket Club"):
+    return Fixture(
+        id=fixture_id,
+        home_team=BLUE,
+        away_team=opponent,
+        home_team_id=BLUE_ID,
+        away_team_id="team-melton",
+        date=datetime.now(timezone.utc) + timedelta(days=days),
+        venue="Springside Reserve",
+        status=status
+    )
+
+
+def _builder():
+    builder = CricketDataBuilder()
+    builder.add_fixture(_fixture("f-past", -7, MatchStatus.COMPLETED), BLUE_ID)
+    builder.add_fixture(_fixture("f-later", 14, opponent="Sunbury"), BLUE_ID)
+    builder.add_fixture(_fixture("f-next", 3), BLUE_ID)
+    builder.add_ladder(Ladder(
+        id="ladder-g1", grade_id="g1", grade_name="U10 Blue",
+        entries=[LadderEntry(position=2, team_id=BLUE_ID, team_name=BLUE, points=12, matches_played=4, matches_won=3, matches_lost=1)]
+    ))
+    builder.add_roster(Roster(team_id=BLUE_ID, team_name=BLUE, players=[
+        Player(id="p2", name="Sam Lee", email="sam@example.com"),
+        Player(id="p1", name="Alex Chen")
+    ]))
+    builder.add_scorecard(Scorecard(
+        id="s-1", match_id="m-1", date=datetime.now(timezone.utc) - timedelta(days=7),
+        home_team=TeamScorecard(team_id=BLUE_ID, team_name=BLUE, batting=[
+            BattingStats(player_id="p1", player_name="Alex Chen", runs=31, balls=20, how_out="bowled")
+        ]),
+        away_team=TeamScorecard(team_id="team-melton", team_name="Melton Cricket Club")
+    ))
+    return builder
+
+
+def _store(builder=None):
+    store = CricketDataStore(path="/tmp/cricket-data-test/snapshot.json")
+    store.publish((builder or _builder()).build(), persist=False)
+    return store
+
+
+class TestRouterFastPath:
+    """Test that structured questions skip the LLM"""
+
+    def _router(self, store=None):
+        router = IntentRouter.__new__(IntentRouter)
+        router.settings = Mock(fast_path_enabled=True, vector_timeout_seconds=5.0, context_token_budget=1500, context_token_budgets={})
+        router.cricket_data = store if store is not None else _store()
+        router.semantic_cache = None
+        router.response_cache = Mock(get=Mock(return_value=None))
+        router.vector_client = Mock()
+        router.vector_client.get_data_version.return_value = "v1"
+        router.vector_client.embed_query.return_value = []
+        router.vector_client.query_with_documents.return_value = [{"id": "doc-1", "text": "Blue U10 notes"}]
+        router.llm_agent = Mock()
+        router.llm_agent.summarise = AsyncMock(return_value="From the LLM")
+        return router
+
+    @pytest.mark.asyncio
+    async def test_next_fixture_answered_from_data(self):
+        """Test that a next-fixture question is answered without the LLM"""
+        router = self._router()
+
+        with patch('agent.router.get_metrics'):
+            response = await router.route_query("When do the blue 10s play next?")
+
+        assert response["meta"]["tier"] == "fast_path"
+        assert response["meta"]["intent"] == "next_fixture"
+        assert response["meta"]["entities"] == {"team": BLUE}
+        assert "Melton Cricket Club" in response["answer"]
+        router.llm_agent.summarise.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_ladder_and_roster_answered_from_data(self):
+        """Test ladder and roster questions, with contact details hidden in public mode"""
+        router = self._router()
+
+        with patch('agent.router.get_metrics'), patch('agent.router.is_private_mode', return_value=False):
+            ladder = await router.route_query("Where are Blue U10 on the ladder?")
+            roster = await router.route_query("Who is in the squad?", team_hint="blue u10")
+
+        assert "**2**" in ladder["answer"] and "Points: 12" in ladder["answer"]
+        assert roster["meta"]["intent"] == "roster_list"
+        assert roster["answer"].index("Alex Chen") < roster["answer"].index("Sam Lee")
+        assert "sam@example.com" not in roster["answer"]
+
+    @pytest.mark.asyncio
+    async def test_open_ended_question_uses_llm(self):
+        """Test that performance questions still go to LLM-driven RAG"""
+        router = self._router()
+
+        with patch('agent.router.get_metrics'):
+            response = await router.route_query("Who scored the most runs for blue u10 last match?")
+
+        assert response["meta"]["tier"] == "llm"
+        assert response["answer"] == "From the LLM"
+
+    @pytest.mark.asyncio
+    async def test_missing_data_falls_back_to_llm(self):
+        """Test that a structured question without synced data is not answered from guesses"""
+        builder = CricketDataBuilder()
+        builder.add_roster(Roster(team_id=BLUE_ID, team_name=BLUE, players=[Player(id="p1", name="Alex Chen")]))
+        router = self._router(_store(builder))
+
+        with patch('agent.router.get_metrics'):
+            response = await router.route_query("Next game for blue u10?")
+
+        assert response["meta"]["tier"] == "llm"
+        router.llm_agent.summarise.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_player_questions_answered_from_data(self):
+        """Test last-innings and player-team questions from synced scorecards and rosters"""
+        router = self._router()
+
+        with patch('agent.router.get_metrics'):
+            runs = await router.route_query("How many runs did Alex Chen score in last match?")
+            team = await router.route_query("Which team player Sam Lee is part of?")
+
+        assert runs["meta"]["tier"] == "fast_path"
+        assert runs["meta"]["entities"] == {"player": "Alex Chen"}
+        assert "**31**" in runs["answer"] and "Melton Cricket Club" in runs["answer"]
+        assert team["meta"]["intent"] == "player_team"
+        assert BLUE in team["answer"]
+        router.llm_agent.summarise.assert_not_called()
+
+    def test_unknown_player_not_fast_pathed(self):
+        """Test that a player without synced data is left to the LLM"""
+        router = self._router()
+
+        assert router._fast_path("How many runs did Jo Smith score in last match?") is None
+
+    def test_ambiguous_team_not_fast_pathed(self):
+        """Test that a question naming two teams is left to the LLM"""
+        builder = _builder()
+        builder.add_roster(Roster(team_id="team-white", team_name="Caroline Springs White U10", players=[]))
+        router = self._router(_store(builder))
+
+        assert router._fast_path("Ladder for blue u10 and white u10") is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
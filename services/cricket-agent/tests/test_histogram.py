@@ -0,0 +1,150 @@
+"""
+Tests for the rolling-window latency histograms and their Prometheus exposition
+"""
+
+import random
+import time
+
+import pytest
+
+from app.histogram import HistogramFamily, LatencyHistogram
+from app.observability import CricketAgentMetrics
+
+
+class FakeClock:
+    """Settable time source"""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestLatencyHistogram:
+    """Test percentile accuracy and the rolling window"""
+
+    def test_percentiles_within_precision(self):
+        """Test that percentiles match exact ones within the configured relative error"""
+        histogram = LatencyHistogram(precision=0.02)
+        rng = random.Random(7)
+        values = [rng.lognormvariate(5, 1) for _ in range(20_000)]
+        for value in values:
+            histogram.record(value)
+
+        ordered = sorted(values)
+        percentiles = histogram.percentiles()
+        for label, quantile in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+            exact = ordered[int(quantile * len(ordered)) - 1]
+            assert abs(percentiles[label] - exact) / exact < 0.05
+
+    def test_empty_and_out_of_range_values(self):
+        """Test that an empty window reports zeros and extreme values are clamped"""
+        histogram = LatencyHistogram(max_ms=1000)
+        assert histogram.percentiles() == {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+
+        histogram.record(-5)
+        histogram.record(10_000_000)
+        percentiles = histogram.percentiles()
+        assert percentiles["p50"] == 0.5
+        assert 1000 <= percentiles["p99"] < 1100
+        assert histogram.count == 2
+
+    def test_window_drops_old_slices(self):
+        """Test that old latencies age out of percentiles but stay in the cumulative count"""
+        clock = FakeClock()
+        histogram = LatencyHistogram(window_seconds=60, slices=6, clock=clock)
+        for _ in range(100):
+            histogram.record(5000)
+
+        clock.now += 30
+        for _ in range(100):
+            histogram.record(10)
+        assert histogram.percentiles()["p99"] > 4000
+
+        clock.now += 45
+        assert histogram.window_count() == 100
+        assert histogram.percentiles()["p99"] < 11
+
+        clock.now += 600
+        assert histogram.window_count() == 0
+        assert histogram.count == 200
+
+    def test_memory_is_fixed(self):
+        """Test that recording never grows the histogram"""
+        histogram = LatencyHistogram()
+        buckets = [len(counts) for counts in histogram._counts]
+        for value in range(100_000):
+            histogram.record(value % 3000)
+
+        assert [len(counts) for counts in histogram._counts] == buckets
+
+
+class TestHistogramFamily:
+    """Test per-label histograms"""
+
+    def test_labels_capped(self):
+        """Test that unbounded label values share an "other" histogram"""
+        family = HistogramFamily(max_labels=2)
+        for label in ("llm", "retrieval", "surprise", "another"):
+            family.record(label, 10)
+        family.record(None, 10)
+
+        assert [label for label, _ in family.items()] == ["llm", "other", "retrieval"]
+        assert family.get("other").count == 3
+
+
+class TestMetricsExposition:
+    """Test per-stage and per-intent percentiles on /metrics"""
+
+    def test_prometheus_summaries(self):
+        """Test that request, intent and stage summaries are exposed"""
+        from app import observability
+
+        metrics = CricketAgentMetrics()
+        metrics.record_request(120, True, "next_fixture")
+        metrics.record_request(2400, True, "llm_rag", 800, 60)
+        metrics.record_stage("llm", 2100)
+        metrics.record_stage("retrieval", 40)
+
+        original = observability._metrics
+        observability._metrics = metrics
+        try:
+            text = observability.get_prometheus_metrics()
+        finally:
+            observability._metrics = original
+
+        assert "# TYPE cricket_agent_stage_latency_ms summary" in text
+        assert 'cricket_agent_stage_latency_ms{stage="llm",quantile="0.99"}' in text
+        assert 'cricket_agent_intent_latency_ms{intent="next_fixture",quantile="0.5"}' in text
+        assert 'cricket_agent_stage_latency_ms_count{stage="retrieval"} 1' in text
+        assert "cricket_agent_request_latency_ms_count 2" in text
+        assert metrics.get_metrics()["stage_latency"]["llm"]["p50"] > 2000
+
+
+class TestLatencyHistogramPerformance:
+    """Micro-benchmark: recording is constant time and scrapes don't depend on traffic"""
+
+    @pytest.mark.slow
+    def test_record_and_scrape_cost(self):
+        """Test per-record cost and scrape time after heavy traffic"""
+        histogram = LatencyHistogram()
+        rng = random.Random(3)
+        values = [rng.lognormvariate(6, 1.5) for _ in range(100_000)]
+
+        start = time.perf_counter()
+        for value in values:
+            histogram.record(value)
+        record_us = (time.perf_counter() - start) * 1e6 / len(values)
+
+        start = time.perf_counter()
+        for _ in range(100):
+            histogram.percentiles()
+        scrape_ms = (time.perf_counter() - start) * 1000 / 100
+
+        assert record_us < 20
+        assert scrape_ms < 5
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,129 @@
+"""
+Tests for the precompiled intent matcher, with a micro-benchmark on realistic and adversarial input
+"""
+
+import time
+
+import pytest
+
+from agent.intent_matcher import INTENT_CUES, IntentMatcher
+from agent.router import TEAM_ALIASES
+
+BLUE = "Caroline Springs Blue U10"
+
+REALISTIC_QUERIES = [
+    "Which team player John Smith is part of?",
+    "How many runs did John Smith score in last match?",
+    "List all fixtures for Caroline Springs Blue U10",
+    "Where are Caroline Springs Blue U10 on the ladder?",
+    "Next fixture for Caroline Springs Blue U10",
+    "List all players for Caroline Springs Blue U10",
+    "When do the blue 10s play next?",
+    "For Caroline Springs White 10s, next fixture venue and start time?",
+    "Who scored the most runs for blue u10 last match?",
+    "Tell me about cricket rules"
+]
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return IntentMatcher(INTENT_CUES, TEAM_ALIASES)
+
+
+class TestIntentMatcher:
+    """Test intent detection and entity extraction"""
+
+    @pytest.mark.parametrize("text,intent,entities", [
+        ("Which team player John Smith is part of?", "player_team", {"player": "John Smith"}),
+        ("How many runs did John Smith score in last match?", "player_last_runs", {"player": "John Smith"}),
+        ("Show me Harshvardhan's last performance", "player_last_runs", {"player": "Harshvardhan"}),
+        ("List all fixtures for Caroline Springs Blue U10", "fixtures_list", {"team": BLUE}),
+        ("Where are the blue 10s on the ladder?", "ladder_position", {"team": BLUE}),
+        ("Next fixture for Caroline Springs Blue U10", "next_fixture", {"team": BLUE}),
+        ("When do the blue 10s play next?", "next_fixture", {"team": BLUE}),
+        ("List all players for Caroline Springs Blue U10", "roster_list", {"team": BLUE}),
+        ("For Caroline Springs White 10s, list all players", "roster_list", {"team": "Caroline Springs White U10"}),
+    ])
+    def test_structured_queries(self, matcher, text, intent, entities):
+        """Test intent and entities for the structured question types"""
+        match = matcher.match(text)
+
+        assert match.intent == intent
+        assert match.entities == entities
+
+    def test_open_ended_outranks_structured(self, matcher):
+        """Test that performance questions are marked for the LLM even when they name a fixture"""
+        match = matcher.match("Who scored the most runs for blue u10 last match?")
+
+        assert match.intent == "open_ended"
+        assert "player_last_runs" in match.candidates
+
+    def test_player_intent_needs_a_player(self, matcher):
+        """Test that "which team" without a player name falls through to the next intent"""
+        match = matcher.match("Which team is top of the ladder?")
+
+        assert match.intent == "ladder_position"
+        assert match.entities == {}
+
+    def test_every_team_alias_reported(self, matcher):
+        """Test that all mentioned teams are reported so callers can spot ambiguity"""
+        match = matcher.match("Ladder for blue u10 and white 10s")
+
+        assert match.teams == [BLUE, "Caroline Springs White U10"]
+
+    def test_mentions_without_cues(self, matcher):
+        """Test that teams and players are reported even when no intent matches"""
+        assert matcher.mentions("Tell me about John Smith") == ["John Smith"]
+        assert matcher.mentions("Compare blue u10 and white 10s") == [BLUE, "Caroline Springs White U10"]
+        assert matcher.mentions("next game for Blue U10") == [BLUE]
+        assert matcher.mentions("Tell me about cricket rules") == []
+
+    def test_no_cues(self, matcher):
+        """Test that unrelated questions don't match"""
+        assert matcher.match("Tell me about cricket rules") is None
+        assert matcher.match("") is None
+
+
+def _best_of(runs, fn):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+class TestIntentMatcherPerformance:
+    """Micro-benchmark: matching stays fast and linear in the input length"""
+
+    @pytest.mark.slow
+    def test_realistic_queries(self, matcher):
+        """Test the per-query cost on typical questions"""
+        elapsed = _best_of(3, lambda: [matcher.match(query) for _ in range(100) for query in REALISTIC_QUERIES])
+        per_query_ms = elapsed * 1000 / (100 * len(REALISTIC_QUERIES))
+
+        assert per_query_ms < 1.0
+
+    @pytest.mark.slow
+    @pytest.mark.parametrize("unit", [
+        "lorem ipsum ",            # long chat message without cues
+        "for ",                    # repeated anchor of the old ".*for\\s+(.*)" patterns
+        "next ",                   # repeated prefix of multi-word cues
+        "a",                       # one very long word
+        "when blue 10s play, ",    # cues, aliases and clause breaks throughout
+    ])
+    def test_adversarial_input_is_linear(self, matcher, unit):
+        """Test that 4x the input costs roughly 4x the time, never quadratic"""
+        small = unit * (20_000 // len(unit))
+        large = small * 4
+
+        small_time = _best_of(3, lambda: matcher.match(small))
+        large_time = _best_of(3, lambda: matcher.match(large))
+
+        assert large_time < 1.0
+        # Linear scaling gives ~4x; quadratic would give ~16x
+        assert large_time < max(small_time, 1e-3) * 8
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -9,7 +9,9 @@ from unittest.mock import AsyncMock, patch, MagicMock
 from httpx import Response, HTTPStatusError
 import json
 
-from agent.tools.playhq import PlayHQClient, get_cscc_fixtures, get_cscc_ladder, get_cscc_player_stats
+from agent.tools.playhq import (
+    PlayHQClient, PlayHQCache, cache_ttl, get_cscc_fixtures, get_cscc_ladder, get_cscc_player_stats
+)
 
 # Mock JSON responses
 MOCK_SEASONS_RESPONSE = {
@@ -166,9 +168,10 @@ class TestPlayHQClient:
     """Test PlayHQ client functionality"""
     
     @pytest.fixture
-    def mock_client(self):
+    def mock_client(self, tmp_path):
         """Create mock PlayHQ client"""
-        with patch('agent.tools.playhq.get_settings') as mock_settings:
+        with patch('agent.tools.playhq.get_settings') as mock_settings, \
+             patch.object(PlayHQClient, 'CACHE_DIR', str(tmp_path / "playhq_cache")):
             mock_settings.return_value.playhq_base_url = "https://api.playhq.com/v1"
             mock_settings.return_value.timeout = 30.0
             
@@ -312,6 +315,116 @@ class TestPlayHQClient:
                 # The important thing is that retry was attempted
                 assert mock_request.call_count >= 1
 
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_bounded(self, mock_client):
+        """Test that in-flight requests never exceed max_concurrency"""
+        mock_client.max_concurrency = 2
+        in_flight = []
+        peak = []
+        
+        async def request(method, url, **kwargs):
+            in_flight.append(url)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.remove(url)
+            return Response(200, content=json.dumps(MOCK_SEASONS_RESPONSE), request=MagicMock())
+        
+        with patch.object(mock_client.client, 'request', side_effect=request):
+            await asyncio.gather(*[mock_client.get_game_summary(f"game-{i}") for i in range(6)])
+        
+        assert max(peak) == 2
+        assert len(peak) == 6
+
+class TestPlayHQCache:
+    """Test the PlayHQ HTTP response cache"""
+    
+    @pytest.fixture
+    def client(self, tmp_path):
+        """Create a PlayHQ client with an isolated cache directory"""
+        with patch('agent.tools.playhq.get_settings') as mock_settings, \
+             patch('agent.tools.playhq.get_playhq_headers', return_value={"x-api-key": "test-key"}), \
+             patch.object(PlayHQClient, 'CACHE_DIR', str(tmp_path / "playhq_cache")):
+            mock_settings.return_value.playhq_base_url = "https://api.playhq.com/v1"
+            mock_settings.return_value.playhq_max_concurrency = 2
+            return PlayHQClient()
+    
+    def _response(self, status_code, payload=None, headers=None):
+        content = json.dumps(payload) if payload is not None else b""
+        return Response(status_code, content=content, headers=headers or {}, request=MagicMock())
+    
+    def test_ttls_follow_change_frequency(self):
+        """Test that rarely changing endpoints are cached longer"""
+        assert cache_ttl("/organisations/org-1/seasons") > cache_ttl("/teams/team-1/fixtures")
+        assert cache_ttl("/teams/team-1/fixtures") > cache_ttl("/ladder/grade-1")
+        assert cache_ttl("/players/search") == 0
+    
+    @pytest.mark.asyncio
+    async def test_fresh_entry_skips_network(self, client):
+        """Test that a fresh cached response is served without a request"""
+        with patch.object(client.client, 'request', AsyncMock(return_value=self._response(200, MOCK_SEASONS_RESPONSE))) as request:
+            first = await client.get_seasons("org-123")
+            second = await client.get_seasons("org-123")
+        
+        assert first == second == MOCK_SEASONS_RESPONSE["data"]
+        assert request.call_count == 1
+    
+    @pytest.mark.asyncio
+    async def test_revalidate_bypasses_ttl(self, client):
+        """Test that revalidate asks PlayHQ about a fresh entry and reuses it on 304"""
+        responses = [
+            self._response(200, MOCK_LADDER_RESPONSE, {"ETag": '"v1"'}),
+            self._response(304)
+        ]
+        with patch.object(client.client, 'request', AsyncMock(side_effect=responses)) as request:
+            await client.get_ladder("grade-456")
+            ladder = await client.get_ladder("grade-456", revalidate=True)
+        
+        assert ladder == MOCK_LADDER_RESPONSE["data"]
+        assert request.call_count == 2
+        assert request.call_args_list[1][1]["headers"]["If-None-Match"] == '"v1"'
+    
+    @pytest.mark.asyncio
+    async def test_stale_entry_revalidated(self, client):
+        """Test that a stale entry is revalidated with its ETag and reused on 304"""
+        responses = [
+            self._response(200, MOCK_PLAYER_STATS_RESPONSE, {"ETag": '"v1"', "Last-Modified": "Wed, 01 Oct 2025 00:00:00 GMT"}),
+            self._response(304)
+        ]
+        with patch.object(client.client, 'request', AsyncMock(side_effect=responses)) as request:
+            await client.get_player_stats("player-401")
+            stats = await client.get_player_stats("player-401")
+        
+        assert stats == MOCK_PLAYER_STATS_RESPONSE
+        headers = request.call_args_list[1][1]["headers"]
+        assert headers["If-None-Match"] == '"v1"'
+        assert headers["If-Modified-Since"] == "Wed, 01 Oct 2025 00:00:00 GMT"
+    
+    @pytest.mark.asyncio
+    async def test_cache_survives_restart(self, client):
+        """Test that entries are reloaded from disk by a new cache instance"""
+        with patch.object(client.client, 'request', AsyncMock(return_value=self._response(200, MOCK_LADDER_RESPONSE))):
+            await client.get_ladder("grade-456")
+        
+        restarted = PlayHQCache(client.cache.cache_dir)
+        entry = restarted.get(restarted.key("https://api.playhq.com/v1/ladder/grade-456"))
+        
+        assert json.loads(entry["body"]) == MOCK_LADDER_RESPONSE
+    
+    @pytest.mark.asyncio
+    async def test_outcomes_recorded_in_metrics(self, client):
+        """Test that cache outcomes are exported through the metrics collector"""
+        from app.observability import get_metrics
+        before = dict(get_metrics().playhq_cache_counts)
+        
+        with patch.object(client.client, 'request', AsyncMock(return_value=self._response(200, MOCK_SEASONS_RESPONSE))):
+            await client.get_seasons("org-123")
+            await client.get_seasons("org-123")
+        
+        after = get_metrics().playhq_cache_counts
+        assert after["miss"] == before["miss"] + 1
+        assert after["hit"] == before["hit"] + 1
+
+
 class TestConvenienceFunctions:
     """Test convenience functions"""
     
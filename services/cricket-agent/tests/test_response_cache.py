@@ -0,0 +1,135 @@
+"""
+Tests for the router response cache
+"""
+
+import json
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+
+from agent.response_cache import ResponseCache, canonical_query
+from agent.router import IntentRouter, TEAM_ALIASES
+
+
+class TestCanonicalQuery:
+    """Test query canonicalisation"""
+
+    def test_trivial_variants_share_key(self):
+        """Test that case, punctuation, filler words and aliases are normalised"""
+        variants = [
+            "Next fixture for Blue U10?",
+            "next fixture blue u10",
+            "NEXT fixture, for the Caroline Springs Blue U10!",
+        ]
+        keys = {canonical_query(text, TEAM_ALIASES) for text in variants}
+
+        assert keys == {"next fixture caroline springs blue u10"}
+
+    def test_alias_replaced_once(self):
+        """Test that a replaced alias is not matched again"""
+        assert canonical_query("ladder white 10s", TEAM_ALIASES) == "ladder caroline springs white u10"
+
+    def test_different_questions_differ(self):
+        """Test that meaningful words are kept"""
+        assert canonical_query("next fixture blue u10", TEAM_ALIASES) != canonical_query("ladder blue u10", TEAM_ALIASES)
+
+
+class TestResponseCache:
+    """Test the LRU/TTL response cache"""
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted at capacity"""
+        cache = ResponseCache(max_entries=2)
+        cache.put("a", {"answer": "a"})
+        cache.put("b", {"answer": "b"})
+        cache.get("a")
+        cache.put("c", {"answer": "c"})
+
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert cache.get("a") == {"answer": "a"}
+        assert cache.get("c") == {"answer": "c"}
+
+    def test_expired_entry_missed(self):
+        """Test that entries expire after the TTL"""
+        cache = ResponseCache(ttl_seconds=30)
+        with patch('agent.response_cache.time.time', return_value=1000.0):
+            cache.put("a", {"answer": "a"})
+        with patch('agent.response_cache.time.time', return_value=1031.0):
+            assert cache.get("a") is None
+
+        assert len(cache) == 0
+        assert cache.get_stats()["misses"] == 1
+
+    def test_shared_tier_read_through(self):
+        """Test that a local miss is served from Redis and then kept locally"""
+        redis_client = Mock()
+        redis_client.get.return_value = json.dumps({"answer": "shared"})
+        cache = ResponseCache()
+        cache.redis_client = redis_client
+
+        assert cache.get("a") == {"answer": "shared"}
+        assert cache.get("a") == {"answer": "shared"}
+
+        redis_client.get.assert_called_once()
+        assert cache.get_stats()["shared_hits"] == 1
+
+    def test_shared_tier_written(self):
+        """Test that puts are mirrored to Redis with the TTL"""
+        redis_client = Mock()
+        cache = ResponseCache(ttl_seconds=60)
+        cache.redis_client = redis_client
+
+        cache.put("a", {"answer": "a"})
+
+        key, ttl, payload = redis_client.setex.call_args[0]
+        assert key.startswith("cricket_agent:response:")
+        assert ttl == 60
+        assert json.loads(payload) == {"answer": "a"}
+
+    def test_redis_unavailable_falls_back(self):
+        """Test that a failing Redis connection leaves a local-only cache"""
+        with patch('agent.response_cache.redis') as mock_redis:
+            mock_redis.from_url.return_value.ping.side_effect = ConnectionError("refused")
+            cache = ResponseCache(redis_url="redis://localhost:6379")
+
+        assert cache.redis_client is None
+
+
+class TestRouterCacheKey:
+    """Test router cache keys"""
+
+    @pytest.mark.asyncio
+    async def test_key_tracks_data_version(self):
+        """Test that a new data version invalidates cached answers, checked in the vector executor"""
+        router = IntentRouter.__new__(IntentRouter)
+        router.settings = Mock(vector_timeout_seconds=5.0)
+        router.vector_client = Mock()
+        router.vector_client.get_data_version.return_value = "v1"
+        executor = Mock(run=AsyncMock(side_effect=lambda fn, *args, timeout=None, **kwargs: fn(*args, **kwargs)))
+
+        with patch('agent.router.get_executor', return_value=executor):
+            first = await router._cache_key("Next fixture for Blue U10?")
+            assert first == await router._cache_key("next fixture blue u10")
+
+            router.vector_client.get_data_version.return_value = "v2"
+            assert await router._cache_key("next fixture blue u10") != first
+
+        executor.run.assert_awaited_with(router.vector_client.get_data_version, timeout=5.0)
+
+    def test_hits_and_misses_recorded(self):
+        """Test that cache lookups feed the metrics collector"""
+        router = IntentRouter.__new__(IntentRouter)
+        router.response_cache = ResponseCache()
+        metrics = Mock()
+
+        with patch('agent.router.get_metrics', return_value=metrics):
+            router._get_from_cache("key")
+            router._cache_response("key", {"answer": "a"})
+            router._get_from_cache("key")
+
+        metrics.record_cache_miss.assert_called_once()
+        metrics.record_cache_hit.assert_called_once()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
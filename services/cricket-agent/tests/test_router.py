@@ -46,7 +46,7 @@ class TestIntentRouter:
         assert mock_router.settings is not None
         assert mock_router.vector_client is not None
         assert mock_router.llm_agent is not None
-        assert len(mock_router.intent_patterns) == 6
+        assert len([intent for intent in mock_router.intent_matcher.intents if intent != "open_ended"]) == 6
     
     def test_intent_patterns(self, mock_router):
         """Test intent pattern matching"""
@@ -87,19 +87,14 @@ class TestIntentRouter:
         assert "team" in result["entities"]
     
     def test_entity_extraction(self, mock_router):
-        """Test entity extraction from regex matches"""
+        """Test entity extraction by the router's intent matcher"""
         # Test player entity extraction
-        import re
-        pattern = r"which team.*player\s+(\w+).*is\s+part\s+of"
-        match = re.search(pattern, "which team player John Smith is part of")
-        entities = mock_router._extract_entities_from_match(match, "player_team")
-        assert entities["player"] == "John Smith"
+        match = mock_router.intent_matcher.match("Which team player John Smith is part of?")
+        assert match.entities["player"] == "John Smith"
         
         # Test team entity extraction
-        pattern = r"list.*fixtures.*(\w+.*\w+)"
-        match = re.search(pattern, "list fixtures for Caroline Springs Blue U10")
-        entities = mock_router._extract_entities_from_match(match, "fixtures_list")
-        assert entities["team"] == "Caroline Springs Blue U10"
+        match = mock_router.intent_matcher.match("list fixtures for Caroline Springs Blue U10")
+        assert match.entities["team"] == "Caroline Springs Blue U10"
     
     def test_team_name_normalization(self, mock_router):
         """Test team name normalization"""
@@ -171,7 +166,10 @@ class TestIntentRouter:
     def test_rag_query(self, mock_router):
         """Test RAG query functionality"""
         # Mock vector client query
-        mock_router.vector_client.query.return_value = ["Mock result 1", "Mock result 2"]
+        mock_router.vector_client.query_with_documents.return_value = [
+            {"id": "doc-1", "text": "Mock result 1", "metadata": {}},
+            {"id": "doc-2", "text": "Mock result 2", "metadata": {}}
+        ]
         
         # Test RAG query
         entities = {"team": "Caroline Springs Blue U10"}
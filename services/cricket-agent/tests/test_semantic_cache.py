@@ -0,0 +1,136 @@
+"""
+Tests for the semantic answer cache
+"""
+
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+
+from agent.semantic_cache import SemanticCache
+from agent.router import IntentRouter
+
+
+class TestSemanticCache:
+    """Test similarity lookups in the semantic cache"""
+
+    def test_paraphrase_hit(self):
+        """Test that a nearby embedding reuses the cached answer"""
+        cache = SemanticCache(threshold=0.9)
+        cache.put([1.0, 0.0, 0.0], "v1", {"answer": "Saturday"})
+
+        cached = cache.get([0.98, 0.1, 0.0], "v1")
+
+        assert cached["response"] == {"answer": "Saturday"}
+        assert cached["similarity"] > 0.9
+
+    def test_dissimilar_query_missed(self):
+        """Test that an unrelated embedding is not served"""
+        cache = SemanticCache(threshold=0.9)
+        cache.put([1.0, 0.0, 0.0], "v1", {"answer": "Saturday"})
+
+        assert cache.get([0.0, 1.0, 0.0], "v1") is None
+        assert cache.get_stats()["misses"] == 1
+
+    def test_new_version_invalidates(self):
+        """Test that answers from older data are never served"""
+        cache = SemanticCache()
+        cache.put([1.0, 0.0], "v1", {"answer": "old"})
+
+        assert cache.get([1.0, 0.0], "v2") is None
+
+        cache.put([0.0, 1.0], "v2", {"answer": "new"})
+        assert len(cache) == 1
+        assert cache.get([1.0, 0.0], "v1") is None
+
+    def test_scope_must_match(self):
+        """Test that a different team hint does not share answers"""
+        cache = SemanticCache()
+        cache.put([1.0, 0.0], "v1", {"answer": "blue"}, scope="blue")
+
+        assert cache.get([1.0, 0.0], "v1", scope="white") is None
+        assert cache.get([1.0, 0.0], "v1", scope="blue")["response"] == {"answer": "blue"}
+
+    def test_expired_entry_missed(self):
+        """Test that answers expire after the TTL"""
+        cache = SemanticCache(ttl_seconds=30)
+        with patch('agent.semantic_cache.time.time', return_value=1000.0):
+            cache.put([1.0, 0.0], "v1", {"answer": "a"})
+        with patch('agent.semantic_cache.time.time', return_value=1031.0):
+            assert cache.get([1.0, 0.0], "v1") is None
+
+    def test_ring_overwrites_oldest(self):
+        """Test that the cache stays bounded"""
+        cache = SemanticCache(max_entries=2)
+        cache.put([1.0, 0.0, 0.0], "v1", {"answer": "a"})
+        cache.put([0.0, 1.0, 0.0], "v1", {"answer": "b"})
+        cache.put([0.0, 0.0, 1.0], "v1", {"answer": "c"})
+
+        assert len(cache) == 2
+        assert cache.get([1.0, 0.0, 0.0], "v1") is None
+        assert cache.get([0.0, 0.0, 1.0], "v1")["response"] == {"answer": "c"}
+
+    def test_empty_embedding_ignored(self):
+        """Test that a missing embedding neither hits nor stores"""
+        cache = SemanticCache()
+        cache.put([], "v1", {"answer": "a"})
+
+        assert len(cache) == 0
+        assert cache.get([], "v1") is None
+
+
+class TestRouterSemanticCache:
+    """Test the semantic cache in front of LLM-driven RAG"""
+
+    def _router(self):
+        router = IntentRouter.__new__(IntentRouter)
+        router.settings = Mock(vector_timeout_seconds=5.0, context_token_budget=1500, context_token_budgets={})
+        router.semantic_cache = SemanticCache(threshold=0.9)
+        router.vector_client = Mock()
+        router.vector_client.get_data_version.return_value = "v1"
+        router.vector_client.query_with_documents.return_value = [{"id": "doc-1", "text": "Blue U10 play Saturday", "metadata": {}}]
+        router.llm_agent = Mock()
+        router.llm_agent.summarise = AsyncMock(return_value="Saturday at Springside")
+        return router
+
+    @pytest.mark.asyncio
+    async def test_paraphrase_skips_llm(self):
+        """Test that a paraphrase is answered without retrieval or the LLM"""
+        router = self._router()
+        router.vector_client.embed_query.side_effect = [[1.0, 0.0], [0.99, 0.05]]
+
+        with patch('agent.router.get_metrics'):
+            first = await router._llm_driven_rag("when do the blue 10s play next")
+            second = await router._llm_driven_rag("next game for Blue U10")
+
+        assert first == second == "Saturday at Springside"
+        router.llm_agent.summarise.assert_awaited_once()
+        router.vector_client.query_with_documents.assert_called_once_with("when do the blue 10s play next", k=6, query_embedding=[1.0, 0.0])
+
+    @pytest.mark.asyncio
+    async def test_different_player_bypasses_cache(self):
+        """Test that questions differing only in the player named don't share an answer"""
+        router = self._router()
+        router.vector_client.embed_query.return_value = [1.0, 0.0]
+
+        with patch('agent.router.get_metrics'):
+            await router._llm_driven_rag("How many runs did John Smith score last match?")
+            await router._llm_driven_rag("How many runs did Sam Lee score last match?")
+            await router._llm_driven_rag("How many runs did Sam Lee score in the last match?")
+
+        assert router.llm_agent.summarise.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_data_change_bypasses_cache(self):
+        """Test that a sync between questions forces a fresh answer"""
+        router = self._router()
+        router.vector_client.embed_query.return_value = [1.0, 0.0]
+
+        with patch('agent.router.get_metrics'):
+            await router._llm_driven_rag("next game for Blue U10")
+            router.vector_client.get_data_version.return_value = "v2"
+            await router._llm_driven_rag("next game for Blue U10")
+
+        assert router.llm_agent.summarise.await_count == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
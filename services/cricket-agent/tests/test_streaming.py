@@ -0,0 +1,132 @@
+"""
+Tests for streaming answers
+"""
+
+import pytest
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from agent.llm_agent import LLMAgent
+from agent.response_cache import ResponseCache
+from agent.router import IntentRouter, NO_CONTEXT_ANSWER
+from agent.cricket_data import CricketDataStore
+
+
+def _chunk(text):
+    """Build a fake stream_generate_content response carrying one text part"""
+    return SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[SimpleNamespace(text=text)]))])
+
+
+@pytest.fixture
+def llm_agent():
+    """LLMAgent with a fake streaming Vertex client"""
+    agent = LLMAgent.__new__(LLMAgent)
+    agent.settings = Mock(gcp_project="test-project", llm_timeout_seconds=5.0)
+    agent.location = "us-central1"
+    agent.model_name = "gemini-1.5-flash"
+    agent.initialized = True
+    agent.client = Mock()
+    return agent
+
+
+class TestLLMStreaming:
+    """Test token streaming from Vertex AI"""
+
+    @pytest.mark.asyncio
+    async def test_chunks_yielded_in_order(self, llm_agent):
+        """Test that generated chunks reach the caller as they arrive"""
+        llm_agent.client.stream_generate_content.return_value = iter([_chunk("Blue U10 "), _chunk("play "), _chunk("Saturday")])
+
+        chunks = [chunk async for chunk in llm_agent.summarise_stream("context", "when do blue play")]
+
+        assert chunks == ["Blue U10 ", "play ", "Saturday"]
+        request = llm_agent.client.stream_generate_content.call_args[1]["request"]
+        assert request["model"].endswith("/models/gemini-1.5-flash")
+
+    @pytest.mark.asyncio
+    async def test_failure_before_first_token_falls_back(self, llm_agent):
+        """Test that a failed stream still produces an answer"""
+        llm_agent.client.stream_generate_content.side_effect = RuntimeError("unavailable")
+
+        chunks = [chunk async for chunk in llm_agent.summarise_stream("context", "query")]
+
+        assert chunks == ["I don't have that information."]
+
+
+class TestRouterStreaming:
+    """Test streamed routing events"""
+
+    def _router(self):
+        router = IntentRouter.__new__(IntentRouter)
+        router.settings = Mock(vector_timeout_seconds=5.0, context_token_budget=1500, context_token_budgets={})
+        router.response_cache = ResponseCache()
+        router.semantic_cache = None
+        router.cricket_data = CricketDataStore()
+        router.vector_client = Mock()
+        router.vector_client.get_data_version.return_value = "v1"
+        router.vector_client.embed_query.return_value = []
+        router.vector_client.query_with_documents.return_value = [{"id": "doc-1", "text": "Blue U10 play Saturday", "metadata": {}}]
+
+        async def summarise_stream(context, query):
+            for chunk in ("Saturday ", "at Springside"):
+                yield chunk
+
+        router.llm_agent = Mock()
+        router.llm_agent.summarise_stream = summarise_stream
+        return router
+
+    @pytest.mark.asyncio
+    async def test_retrieval_then_tokens_then_done(self):
+        """Test the event order and the trailing timings"""
+        router = self._router()
+
+        with patch('agent.router.get_metrics'):
+            events = [event async for event in router.route_query_stream("when do blue u10 play")]
+
+        assert [event["event"] for event in events] == ["retrieval", "token", "token", "done"]
+        assert events[0]["data"]["documents"] == ["doc-1"]
+        assert "".join(event["data"]["text"] for event in events[1:3]) == "Saturday at Springside"
+        done = events[-1]["data"]
+        assert {"latency_ms", "rag_ms", "ttft_ms"} <= set(done)
+        assert done["ttft_ms"] <= done["latency_ms"]
+
+    @pytest.mark.asyncio
+    async def test_streamed_answer_cached(self):
+        """Test that a repeated question is served from the response cache in one token"""
+        router = self._router()
+
+        with patch('agent.router.get_metrics'):
+            [event async for event in router.route_query_stream("when do blue u10 play")]
+            events = [event async for event in router.route_query_stream("When do Blue U10 play?")]
+
+        assert [event["event"] for event in events] == ["retrieval", "token", "done"]
+        assert events[1]["data"]["text"] == "Saturday at Springside"
+        assert events[-1]["data"]["cached"] is True
+        router.vector_client.query_with_documents.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_no_documents(self):
+        """Test that a retrieval miss streams the fixed answer without the LLM"""
+        router = self._router()
+        router.vector_client.query_with_documents.return_value = []
+
+        with patch('agent.router.get_metrics'):
+            events = [event async for event in router.route_query_stream("who won in 1982")]
+
+        assert events[1] == {"event": "token", "data": {"text": NO_CONTEXT_ANSWER}}
+
+    @pytest.mark.asyncio
+    async def test_failure_emits_error_then_done(self):
+        """Test that a failure still closes the stream with a done event"""
+        router = self._router()
+        router.vector_client.query_with_documents.side_effect = RuntimeError("storage down")
+
+        with patch('agent.router.get_metrics'):
+            events = [event async for event in router.route_query_stream("when do blue u10 play")]
+
+        assert [event["event"] for event in events] == ["error", "done"]
+        assert events[-1]["data"]["intent"] == "error"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -3,17 +3,21 @@ Tests for cricket data sync functionality
 """
 
 import pytest
+import asyncio
 import json
 import tempfile
+import time
 from unittest.mock import Mock, patch, AsyncMock, MagicMock
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
 
 from jobs.sync import (
-    CricketDataSync, GCSStorage, 
+    CricketDataSync, GCSStorage, UpsertBuffer,
     run_full_refresh, run_team_refresh, run_match_refresh, run_ladder_refresh
 )
 from app.config import get_settings
+from agent.cricket_data import CricketDataBuilder, CricketDataStore
+from models.fixture import Fixture
 
 
 class TestGCSStorage:
@@ -234,6 +238,7 @@ class TestSyncEntrypoints:
             assert result["status"] == "success"
             assert result["match_id"] == "match-1"
             assert "duration_seconds" in result
+            mock_client.get_game_summary.assert_called_once_with("match-1", revalidate=True)
     
     @pytest.mark.asyncio
     async def test_run_ladder_refresh(self):
@@ -254,6 +259,7 @@ class TestSyncEntrypoints:
             assert result["status"] == "success"
             assert result["grade_id"] == "grade-1"
             assert "duration_seconds" in result
+            mock_client.get_ladder.assert_called_once_with("grade-1", revalidate=True)
 
 
 class TestSyncDeltaLogic:
@@ -400,6 +406,234 @@ class TestSyncErrorHandling:
             assert "error" in result
 
 
+class TestUpsertBuffer:
+    """Test bulk upserts from the sync job"""
+    
+    def _doc(self, i):
+        return {"id": f"fixture-{i}", "text": f"Fixture {i}", "metadata": {"type": "fixture"}}
+    
+    @pytest.mark.asyncio
+    async def test_size_threshold_upserts_in_bulk(self):
+        """Test that documents are upserted together once the buffer fills"""
+        vector_client = Mock()
+        buffer = UpsertBuffer(vector_client, max_docs=3)
+        
+        for i in range(7):
+            await buffer.add(self._doc(i))
+        
+        assert vector_client.upsert.call_count == 2
+        vector_client.upsert.assert_called_with([self._doc(3), self._doc(4), self._doc(5)], flush=False)
+        vector_client.flush.assert_not_called()
+        assert len(buffer) == 1
+    
+    @pytest.mark.asyncio
+    async def test_time_threshold_persists(self):
+        """Test that an old buffer is upserted and persisted"""
+        vector_client = Mock()
+        buffer = UpsertBuffer(vector_client, max_age_seconds=0)
+        
+        await buffer.add(self._doc(1))
+        
+        vector_client.upsert.assert_called_once_with([self._doc(1)], flush=False)
+        vector_client.flush.assert_called_once()
+        assert len(buffer) == 0
+    
+    @pytest.mark.asyncio
+    async def test_failed_upsert_is_logged(self):
+        """Test that a failed bulk upsert does not raise"""
+        vector_client = Mock()
+        vector_client.upsert.side_effect = RuntimeError("embedding quota exceeded")
+        buffer = UpsertBuffer(vector_client)
+        await buffer.add(self._doc(1))
+        
+        assert await buffer.flush(persist=True) == 0
+        vector_client.flush.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_flush_leaves_event_loop_free(self):
+        """Test that the blocking upsert runs off the event loop"""
+        ticks = []
+        
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.01)
+        
+        vector_client = Mock()
+        vector_client.upsert.side_effect = lambda docs, flush: time.sleep(0.1)
+        buffer = UpsertBuffer(vector_client)
+        await buffer.add(self._doc(1))
+        
+        await asyncio.gather(buffer.flush(), ticker())
+        
+        assert len(ticks) == 5
+        assert max(b - a for a, b in zip(ticks, ticks[1:])) < 0.08
+    
+    @pytest.mark.asyncio
+    async def test_sync_all_persists_once(self):
+        """Test that a full sync upserts per phase and persists once"""
+        with patch('jobs.sync.get_settings') as mock_get_settings, \
+             patch('jobs.sync.get_cscc_team_ids') as mock_get_team_ids, \
+             patch('jobs.sync.get_cscc_org_id') as mock_get_org_id, \
+             patch('jobs.sync.get_cscc_season_id') as mock_get_season_id, \
+             patch('jobs.sync.get_cscc_grade_id') as mock_get_grade_id, \
+             patch('jobs.sync.get_vector_client') as mock_get_vector_client, \
+             patch('jobs.sync.initialize_playhq_client') as mock_init_client:
+            
+            mock_settings = Mock()
+            mock_settings.gcs_bucket = None
+            mock_get_settings.return_value = mock_settings
+            mock_get_team_ids.return_value = ["team-1"]
+            mock_get_org_id.return_value = "org-1"
+            mock_get_season_id.return_value = "season-1"
+            mock_get_grade_id.return_value = "grade-1"
+            
+            mock_vector_client = Mock()
+            mock_get_vector_client.return_value = mock_vector_client
+            
+            mock_playhq_client = AsyncMock()
+            mock_playhq_client.get_seasons.return_value = [{"id": "season-1", "name": "2024 Season"}]
+            mock_playhq_client.get_grades.return_value = []
+            mock_playhq_client.get_team_fixtures.return_value = [
+                {"id": f"game-{i}", "date": "2025-10-01T09:00:00Z"} for i in range(20)
+            ]
+            mock_playhq_client.get_games.return_value = []
+            mock_playhq_client.get_team_roster.return_value = None
+            mock_init_client.return_value = mock_playhq_client
+            
+            sync = CricketDataSync()
+            sync.normalizer = Mock()
+            sync.snippet_generator = Mock()
+            sync.snippet_generator.generate_fixture_snippet.return_value = "fixture"
+            
+            await sync.sync_all()
+            
+            upserted = [call[0][0] for call in mock_vector_client.upsert.call_args_list]
+            assert [len(docs) for docs in upserted] == [20]
+            mock_vector_client.flush.assert_called_once()
+
+            # One pooled client shared by every phase
+            mock_init_client.assert_called_once()
+            mock_playhq_client.close.assert_awaited_once()
+
+
+class TestSyncConcurrency:
+    """Test concurrent sync phases"""
+    
+    @pytest.fixture
+    def sync(self):
+        """Create a sync instance with a mock vector client"""
+        with patch('jobs.sync.get_settings') as mock_get_settings, \
+             patch('jobs.sync.get_cscc_team_ids') as mock_get_team_ids, \
+             patch('jobs.sync.get_cscc_org_id'), \
+             patch('jobs.sync.get_cscc_season_id'), \
+             patch('jobs.sync.get_cscc_grade_id'), \
+             patch('jobs.sync.get_vector_client'):
+            
+            mock_settings = Mock()
+            mock_settings.gcs_bucket = None
+            mock_get_settings.return_value = mock_settings
+            mock_get_team_ids.return_value = ["team-1", "team-2"]
+            
+            return CricketDataSync()
+    
+    @pytest.mark.asyncio
+    async def test_phases_overlap(self, sync):
+        """Test that phases run concurrently rather than back to back"""
+        running = []
+        overlap = []
+        
+        async def phase():
+            running.append(1)
+            await asyncio.sleep(0.01)
+            overlap.append(len(running))
+            running.pop()
+        
+        with patch('jobs.sync.initialize_playhq_client', AsyncMock(return_value=AsyncMock())):
+            await sync.run_phases(phase, phase, phase)
+        
+        assert max(overlap) == 3
+    
+    @pytest.mark.asyncio
+    async def test_phase_error_raised_after_all_phases(self, sync):
+        """Test that a failing phase does not cancel the others"""
+        completed = []
+        
+        async def failing():
+            raise RuntimeError("phase failed")
+        
+        async def slow():
+            await asyncio.sleep(0.01)
+            completed.append(True)
+        
+        playhq_client = AsyncMock()
+        with patch('jobs.sync.initialize_playhq_client', AsyncMock(return_value=playhq_client)):
+            with pytest.raises(RuntimeError, match="phase failed"):
+                await sync.run_phases(failing, slow)
+        
+        assert completed == [True]
+        playhq_client.close.assert_awaited_once()
+        assert sync._playhq_client is None
+
+
+class TestSyncSnapshot:
+    """Test the cricket data snapshot a sync publishes"""
+    
+    @pytest.fixture
+    def sync(self, tmp_path):
+        """Create a sync instance publishing to a local store that already holds one fixture"""
+        with patch('jobs.sync.get_settings') as mock_get_settings, \
+             patch('jobs.sync.get_cscc_team_ids') as mock_get_team_ids, \
+             patch('jobs.sync.get_cscc_org_id'), \
+             patch('jobs.sync.get_cscc_season_id'), \
+             patch('jobs.sync.get_cscc_grade_id'), \
+             patch('jobs.sync.get_vector_client'):
+            
+            mock_settings = Mock()
+            mock_settings.gcs_bucket = None
+            mock_get_settings.return_value = mock_settings
+            mock_get_team_ids.return_value = ["team-1"]
+            
+            sync = CricketDataSync()
+        
+        sync.cricket_data = CricketDataStore(path=str(tmp_path / "snapshot.json"))
+        builder = CricketDataBuilder()
+        builder.add_fixture(self._fixture("cancelled"), "team-1")
+        sync.cricket_data.publish(builder.build(), persist=False)
+        return sync
+    
+    def _fixture(self, fixture_id):
+        return Fixture(
+            id=fixture_id, home_team="Blue U10", away_team="Melton", home_team_id="team-1",
+            away_team_id="team-2", date=datetime(2030, 1, 1, tzinfo=timezone.utc)
+        )
+    
+    def _phases(self, sync, errors=0):
+        async def run_phases(*phases):
+            sync.data_builder.add_fixture(self._fixture("rescheduled"), "team-1")
+            sync.sync_stats["errors"] += errors
+        return run_phases
+    
+    @pytest.mark.asyncio
+    async def test_full_sync_drops_removed_fixtures(self, sync):
+        """Test that a full sync publishes only what PlayHQ still returns"""
+        sync.run_phases = self._phases(sync)
+        
+        await sync.sync_all()
+        
+        assert [fixture.id for fixture in sync.cricket_data.snapshot.fixtures_for_team("team-1")] == ["rescheduled"]
+    
+    @pytest.mark.asyncio
+    async def test_failed_phase_keeps_current_data(self, sync):
+        """Test that a sync with failed phases doesn't publish gaps"""
+        sync.run_phases = self._phases(sync, errors=1)
+        
+        await sync.sync_all()
+        
+        fixtures = sync.cricket_data.snapshot.fixtures_for_team("team-1")
+        assert sorted(fixture.id for fixture in fixtures) == ["cancelled", "rescheduled"]
+
+
 class TestSyncFilters:
     """Test sync filters and metadata"""
     
@@ -5,6 +5,9 @@ Tests vector operations, filtering, batching, and delta upserts
 
 import pytest
 import json
+import os
+import threading
+import time
 from unittest.mock import Mock, patch, MagicMock
 from datetime import datetime
 
@@ -429,5 +432,367 @@ class TestVectorClientEdgeCases:
         assert len(results) == 0
 
 
+@pytest.fixture
+def storage_backend():
+    """Create a fake primary storage backend"""
+    backend = Mock()
+    backend.get_version.return_value = "1"
+    backend.load_documents.return_value = {
+        "doc-1": {"text": "Blue U10 fixture", "metadata": {"type": "fixture"}, "embedding": [1.0, 0.0]}
+    }
+    backend.store_documents.return_value = True
+    backend.load_embedding_cache.return_value = None
+    backend.load_content_hashes.return_value = {}
+    return backend
+
+
+@pytest.fixture
+def real_client(storage_backend, tmp_path):
+    """Create a VectorClient with cloud dependencies patched out"""
+    with patch('agent.tools.vector_client.aiplatform'), \
+         patch('agent.tools.vector_client.CloudStoragePersistence', return_value=storage_backend), \
+         patch('agent.tools.vector_client.FirestoreStorage', return_value=None), \
+         patch('agent.tools.vector_client.RedisStorage', return_value=None), \
+         patch('agent.tools.vector_client.VertexMatchingEngine', return_value=None), \
+         patch.object(VectorClient, 'EMBEDDING_CACHE_DIR', str(tmp_path / "embedding_cache")):
+        client = VectorClient("test-project", "us-central1")
+        client.VERSION_CHECK_INTERVAL_SECONDS = 0
+        return client
+
+
+class TestVectorClientStorageVersion:
+    """Test version-aware reloads from shared storage"""
+    
+    def test_startup_load_records_version(self, real_client, storage_backend):
+        """Test the startup load records the storage version"""
+        assert storage_backend.load_documents.call_count == 1
+        assert real_client._loaded_version == "Mock:1"
+        assert "doc-1" in real_client._stored_documents
+    
+    def test_unchanged_version_skips_reload(self, real_client, storage_backend):
+        """Test that queries do not reload when the version is unchanged"""
+        assert real_client._refresh_from_shared_storage() is False
+        assert real_client._refresh_from_shared_storage() is False
+        
+        assert storage_backend.load_documents.call_count == 1
+    
+    def test_changed_version_triggers_reload(self, real_client, storage_backend):
+        """Test that a new version marker triggers exactly one reload"""
+        storage_backend.get_version.return_value = "2"
+        
+        assert real_client._refresh_from_shared_storage() is True
+        assert real_client._refresh_from_shared_storage() is False
+        
+        assert storage_backend.load_documents.call_count == 2
+        assert real_client._loaded_version == "Mock:2"
+    
+    def test_version_check_interval(self, real_client, storage_backend):
+        """Test that version checks are throttled on the query path"""
+        real_client.VERSION_CHECK_INTERVAL_SECONDS = 60
+        real_client._version_checked_at = time.monotonic()
+        storage_backend.get_version.reset_mock()
+        
+        assert real_client._refresh_from_shared_storage() is False
+        storage_backend.get_version.assert_not_called()
+    
+    def test_unversioned_storage_is_throttled(self, real_client, storage_backend):
+        """Test that a backend without a version marker reloads at most once per interval"""
+        storage_backend.get_version.return_value = None
+        assert real_client._refresh_from_shared_storage() is True
+        
+        real_client.VERSION_CHECK_INTERVAL_SECONDS = 60
+        assert real_client._refresh_from_shared_storage() is False
+        assert real_client._refresh_from_shared_storage() is False
+        assert storage_backend.load_documents.call_count == 2
+    
+    def test_search_keeps_the_store_it_read(self, real_client):
+        """Test that a query holding the previous store neither sees nor undoes a reload"""
+        documents, index = real_client._store
+        reloaded = {"doc-2": {"text": "White U10 ladder", "metadata": {"type": "ladder"}, "embedding": [0.0, 1.0]}}
+        real_client._set_documents(reloaded)
+        
+        assert real_client._semantic_search("fixture", [1.0, 0.0], documents, index, None, 6) == [("doc-1", pytest.approx(1.0))]
+        assert real_client._store[0] is reloaded
+        assert "doc-2" in real_client._index and "doc-1" not in real_client._index
+    
+    def test_concurrent_refresh_single_flight(self, real_client, storage_backend):
+        """Test that a burst of refreshes for a new version loads once"""
+        storage_backend.get_version.return_value = "2"
+        release = threading.Event()
+        
+        def slow_load():
+            release.wait(1)
+            return {}
+        
+        storage_backend.load_documents.side_effect = slow_load
+        threads = [threading.Thread(target=real_client._refresh_from_shared_storage) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join()
+        
+        assert storage_backend.load_documents.call_count == 2
+
+
+class TestVectorClientBatchEmbedding:
+    """Test batched embedding generation during upserts"""
+    
+    @pytest.fixture
+    def upsert_client(self, real_client):
+        """Real client with persistence side effects stubbed out"""
+        real_client._persist_to_local_storage = Mock()
+        real_client._persist_to_gcs = Mock()
+        return real_client
+    
+    def _response(self, instances, dims=2):
+        """Build a predict response with one embedding per instance"""
+        return Mock(predictions=[
+            {"embeddings": {"values": [float(len(instance["content"]))] + [1.0] * (dims - 1)}}
+            for instance in instances
+        ])
+    
+    def test_upsert_batches_predict_calls(self, upsert_client):
+        """Test that many docs are embedded in few predict calls"""
+        upsert_client.embedder.max_instances = 50
+        upsert_client.embedding_client.predict.side_effect = lambda endpoint, instances, **kwargs: self._response(instances)
+        docs = [{"id": f"doc-{i}", "text": f"text {i}", "metadata": {"type": "fixture"}} for i in range(120)]
+        
+        upsert_client.upsert(docs)
+        
+        assert upsert_client.embedding_client.predict.call_count == 3
+        assert all(f"doc-{i}" in upsert_client._stored_documents for i in range(120))
+    
+    def test_failed_request_keeps_alignment(self, upsert_client):
+        """Test that a failed request only drops its own docs and they are retried later"""
+        upsert_client.embedder.max_instances = 2
+        upsert_client.embedder.max_concurrency = 1
+        
+        def predict(endpoint, instances, **kwargs):
+            if any(instance["content"] == "bad" for instance in instances):
+                raise RuntimeError("quota exceeded")
+            return self._response(instances)
+        
+        upsert_client.embedding_client.predict.side_effect = predict
+        docs = [
+            {"id": "a", "text": "bad", "metadata": {}},
+            {"id": "b", "text": "short", "metadata": {}},
+            {"id": "c", "text": "longer text", "metadata": {}},
+        ]
+        
+        upsert_client.upsert(docs)
+        
+        assert "a" not in upsert_client._stored_documents
+        assert "b" not in upsert_client._stored_documents
+        assert upsert_client._stored_documents["c"]["embedding"][0] == float(len("longer text"))
+        assert "a" not in upsert_client.content_hashes
+        assert "c" in upsert_client.content_hashes
+
+
+    def test_unchanged_text_served_from_embedding_cache(self, upsert_client, storage_backend):
+        """Test that a metadata-only change reuses the cached embedding"""
+        upsert_client.embedding_client.predict.side_effect = lambda endpoint, instances, **kwargs: self._response(instances)
+        doc = {"id": "team-1", "text": "Caroline Springs Blue U10", "metadata": {"date": "2025-10-01"}}
+        
+        upsert_client.upsert([doc])
+        upsert_client.upsert([dict(doc, metadata={"date": "2025-10-02"})])
+        
+        assert upsert_client.embedding_client.predict.call_count == 1
+        assert upsert_client._stored_documents["team-1"]["metadata"]["date"] == "2025-10-02"
+        storage_backend.store_embedding_cache.assert_called_once()
+
+
+class TestVectorClientContentHashes:
+    """Test persistence of the delta-upsert hash manifest"""
+    
+    @pytest.fixture
+    def upsert_client(self, real_client):
+        """Real client with persistence side effects stubbed out"""
+        real_client._persist_to_local_storage = Mock()
+        real_client._persist_to_gcs = Mock()
+        real_client.embedding_client.predict.side_effect = lambda endpoint, instances, **kwargs: Mock(
+            predictions=[{"embeddings": {"values": [1.0, 0.0]}} for _ in instances]
+        )
+        return real_client
+    
+    def test_unchanged_doc_skipped_after_restart(self, upsert_client, storage_backend):
+        """Test that a persisted hash prevents re-upserting an unchanged doc"""
+        doc = {"id": "doc-1", "text": "Blue U10 fixture", "metadata": {"type": "fixture"}}
+        storage_backend.load_content_hashes.return_value = {"doc-1": upsert_client._generate_content_hash(doc)}
+        
+        upsert_client.upsert([doc])
+        
+        upsert_client.embedding_client.predict.assert_not_called()
+        stats = upsert_client.get_stats()
+        assert stats["skipped_upserts"] == 1
+        assert stats["upserts"] == 0
+    
+    def test_hash_without_stored_doc_ignored(self, upsert_client, storage_backend):
+        """Test that hashes for documents missing from the store are not trusted"""
+        doc = {"id": "doc-2", "text": "White U10 ladder", "metadata": {"type": "ladder"}}
+        storage_backend.load_content_hashes.return_value = {"doc-2": upsert_client._generate_content_hash(doc)}
+        
+        upsert_client.upsert([doc])
+        
+        assert upsert_client.get_stats()["upserts"] == 1
+        assert "doc-2" in upsert_client._stored_documents
+    
+    def test_manifest_saved_after_upsert(self, upsert_client, storage_backend):
+        """Test that the manifest is persisted without failed docs"""
+        def predict(endpoint, instances, **kwargs):
+            if instances[0]["content"] == "bad":
+                raise RuntimeError("quota exceeded")
+            return Mock(predictions=[{"embeddings": {"values": [1.0, 0.0]}} for _ in instances])
+        
+        upsert_client.embedder.max_instances = 1
+        upsert_client.embedding_client.predict.side_effect = predict
+        upsert_client.upsert([
+            {"id": "good", "text": "good", "metadata": {}},
+            {"id": "bad", "text": "bad", "metadata": {}},
+        ])
+        
+        saved = storage_backend.store_content_hashes.call_args[0][0]
+        assert "good" in saved
+        assert "bad" not in saved
+    
+    def test_manifest_loaded_once(self, upsert_client, storage_backend):
+        """Test that the manifest is loaded lazily, only on the first upsert"""
+        storage_backend.load_content_hashes.assert_not_called()
+        
+        upsert_client.upsert([{"id": "a", "text": "a", "metadata": {}}])
+        upsert_client.upsert([{"id": "b", "text": "b", "metadata": {}}])
+        
+        storage_backend.load_content_hashes.assert_called_once()
+
+
+class TestVectorClientSnapshotStorage:
+    """Test binary snapshot persistence and legacy JSON migration"""
+    
+    def test_local_storage_round_trip(self, real_client, tmp_path):
+        """Test that local storage is written and reloaded as a snapshot"""
+        real_client.local_storage_path = str(tmp_path / "stored_documents.snapshot")
+        real_client._persist_to_local_storage()
+        real_client._set_documents({})
+        
+        real_client._load_from_local_storage()
+        
+        assert list(real_client._stored_documents.keys()) == ["doc-1"]
+        assert "doc-1" in real_client._index
+    
+    def test_legacy_local_json_migrated(self, real_client, tmp_path):
+        """Test that a legacy JSON store is loaded and rewritten as a snapshot"""
+        real_client.local_storage_path = str(tmp_path / "stored_documents.snapshot")
+        real_client.legacy_local_storage_path = str(tmp_path / "stored_documents.json")
+        with open(real_client.legacy_local_storage_path, 'w') as f:
+            json.dump({"doc-9": {"text": "legacy", "metadata": {}, "embedding": [0.0, 1.0]}}, f)
+        
+        real_client._load_from_local_storage()
+        
+        assert "doc-9" in real_client._stored_documents
+        assert os.path.exists(real_client.local_storage_path)
+        assert os.path.exists(real_client.legacy_local_storage_path)
+    
+    def test_snapshot_documents_saved_as_lists(self, real_client, storage_backend):
+        """Test that snapshot-backed embeddings reach JSON backends as plain lists"""
+        from agent.tools.redis_storage import RedisStorage
+        from agent.tools.vector_snapshot import decode_snapshot, encode_snapshot
+        
+        documents = decode_snapshot(encode_snapshot(real_client._stored_documents))
+        redis = RedisStorage.__new__(RedisStorage)
+        redis.redis_client = Mock()
+        redis.documents_key = "documents"
+        redis.metadata_key = "metadata"
+        redis.version_key = "version"
+        redis._acquire_lock = Mock(return_value=True)
+        redis._release_lock = Mock()
+        
+        assert redis.store_documents(documents) is True
+        stored = redis.redis_client.hset.call_args_list[0][1]["mapping"]["doc-1"]
+        assert json.loads(stored)["embedding"] == [1.0, 0.0]
+
+
+class TestVectorClientBulkFetch:
+    """Test bulk document retrieval"""
+    
+    def test_resident_documents_need_no_round_trip(self, real_client, storage_backend):
+        """Test that documents already in memory are served without touching storage"""
+        assert real_client.get_documents(["doc-1"]) == {"doc-1": "Blue U10 fixture"}
+        storage_backend.get_documents.assert_not_called()
+    
+    def test_missing_documents_fetched_in_one_call(self, real_client, storage_backend):
+        """Test that non-resident ids are fetched with a single bulk read"""
+        storage_backend.get_documents.return_value = {"doc-2": {"text": "Ladder"}}
+        
+        texts = real_client.get_documents(["doc-1", "doc-2", "doc-3"])
+        
+        assert texts == {"doc-1": "Blue U10 fixture", "doc-2": "Ladder"}
+        storage_backend.get_documents.assert_called_once_with(["doc-2", "doc-3"])
+    
+    def test_query_with_documents_inline(self, real_client):
+        """Test that query hits come back with their content and similarity in rank order"""
+        hits = real_client.query_with_documents("blue fixture", k=1, query_embedding=[1.0, 0.0])
+        
+        assert hits == [{"id": "doc-1", "text": "Blue U10 fixture", "metadata": {"type": "fixture"}, "score": pytest.approx(1.0)}]
+
+
+class TestVectorClientWriteBehind:
+    """Test dirty tracking and batched flushes to shared storage"""
+    
+    @pytest.fixture
+    def upsert_client(self, real_client, storage_backend):
+        """Real client with backup persistence stubbed out"""
+        real_client._persist_to_local_storage = Mock()
+        real_client._persist_to_gcs = Mock()
+        real_client.embedding_client.predict.side_effect = lambda endpoint, instances, **kwargs: Mock(
+            predictions=[{"embeddings": {"values": [0.0, 1.0]}} for _ in instances]
+        )
+        storage_backend.append_documents.return_value = "2"
+        return real_client
+    
+    def test_deferred_upserts_flushed_once(self, upsert_client, storage_backend):
+        """Test that deferred upserts are written in a single append of only the changed docs"""
+        upsert_client.upsert([{"id": "a", "text": "a", "metadata": {}}], flush=False)
+        upsert_client.upsert([{"id": "b", "text": "b", "metadata": {}}], flush=False)
+        
+        storage_backend.append_documents.assert_not_called()
+        assert upsert_client._dirty_ids == {"a", "b"}
+        
+        assert upsert_client.flush() is True
+        
+        storage_backend.append_documents.assert_called_once()
+        written = storage_backend.append_documents.call_args[0][0]
+        assert set(written.keys()) == {"a", "b"}
+        assert storage_backend.append_documents.call_args[1]["total_documents"] == 3
+        assert upsert_client.flush() is False
+    
+    def test_flush_records_the_version_it_wrote(self, upsert_client, storage_backend):
+        """Test that a segment appended by another writer right after our flush is still loaded"""
+        upsert_client.upsert([{"id": "a", "text": "a", "metadata": {}}], flush=False)
+        storage_backend.get_version.return_value = "3"
+        
+        assert upsert_client.flush() is True
+        
+        assert upsert_client._loaded_version == "Mock:2"
+        assert upsert_client._refresh_from_shared_storage() is True
+    
+    def test_failed_flush_keeps_docs_dirty(self, upsert_client):
+        """Test that docs stay dirty when the shared storage write fails"""
+        upsert_client._save_to_shared_storage = Mock(side_effect=RuntimeError("unavailable"))
+        upsert_client.upsert([{"id": "a", "text": "a", "metadata": {}}], flush=False)
+        
+        assert upsert_client.flush() is False
+        assert upsert_client._dirty_ids == {"a"}
+    
+    def test_reload_keeps_unflushed_docs(self, upsert_client, storage_backend):
+        """Test that a reload triggered by another writer does not drop pending docs"""
+        upsert_client.upsert([{"id": "a", "text": "a", "metadata": {}}], flush=False)
+        storage_backend.get_version.return_value = "2"
+        
+        assert upsert_client._refresh_from_shared_storage() is True
+        
+        assert "doc-1" in upsert_client._stored_documents
+        assert "a" in upsert_client._stored_documents
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
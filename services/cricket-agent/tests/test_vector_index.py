@@ -0,0 +1,129 @@
+"""
+Unit tests for the in-memory vector index
+Tests filtering, top-k ordering, incremental upserts and removal
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from agent.tools.vector_index import VectorIndex
+
+
+def _unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+class TestVectorIndex:
+    """Test vector index functionality"""
+    
+    @pytest.fixture
+    def index(self):
+        """Create a small index with mixed metadata"""
+        index = VectorIndex()
+        index.upsert("fixture-1", [1.0, 0.0, 0.0], {"type": "fixture", "team_id": "team-1"})
+        index.upsert("fixture-2", [0.9, 0.1, 0.0], {"type": "fixture", "team_id": "team-2"})
+        index.upsert("ladder-1", [0.0, 1.0, 0.0], {"type": "ladder", "team_id": None})
+        index.upsert("roster-1", [0.0, 0.0, 1.0], {"type": "roster", "team_id": "team-1"})
+        return index
+    
+    def test_top_k_ordering(self, index):
+        """Test results are ordered by cosine similarity"""
+        results = index.search([1.0, 0.05, 0.0], k=2)
+        
+        assert [doc_id for doc_id, _ in results] == ["fixture-1", "fixture-2"]
+        assert results[0][1] >= results[1][1]
+    
+    def test_metadata_filters(self, index):
+        """Test boolean-mask filtering on metadata columns"""
+        results = index.search([1.0, 0.0, 0.0], filters={"team_id": "team-1"}, k=5)
+        assert [doc_id for doc_id, _ in results] == ["fixture-1", "roster-1"]
+        
+        results = index.search([1.0, 0.0, 0.0], filters={"type": "ladder"}, k=5)
+        assert [doc_id for doc_id, _ in results] == ["ladder-1"]
+    
+    def test_falsy_filters_ignored(self, index):
+        """Test that empty filter values do not restrict results"""
+        results = index.search([1.0, 0.0, 0.0], filters={"team_id": None, "type": ""}, k=10)
+        assert len(results) == 4
+    
+    def test_unindexed_field_filter(self, index):
+        """Test filtering on a field without a pre-built column"""
+        index.upsert("test-doc", [1.0, 0.0, 0.0], {"type": "test", "player": "Harshvarshan"})
+        
+        results = index.search([1.0, 0.0, 0.0], filters={"player": "Harshvarshan"}, k=5)
+        assert [doc_id for doc_id, _ in results] == ["test-doc"]
+    
+    def test_upsert_replaces_in_place(self, index):
+        """Test that re-upserting an id updates its vector and metadata"""
+        index.upsert("ladder-1", [1.0, 0.0, 0.0], {"type": "ladder", "team_id": "team-9"})
+        
+        assert len(index) == 4
+        results = index.search([1.0, 0.0, 0.0], filters={"team_id": "team-9"}, k=5)
+        assert results[0][0] == "ladder-1"
+        assert results[0][1] == pytest.approx(1.0)
+    
+    def test_remove(self, index):
+        """Test removed documents are excluded from search"""
+        assert index.remove("fixture-1") is True
+        assert index.remove("fixture-1") is False
+        
+        results = index.search([1.0, 0.0, 0.0], k=5)
+        assert "fixture-1" not in [doc_id for doc_id, _ in results]
+        assert len(index) == 3
+    
+    def test_dimension_mismatch_skipped(self, index):
+        """Test that embeddings of the wrong size are rejected"""
+        assert index.upsert("bad", [1.0, 0.0], {"type": "fixture"}) is False
+        assert index.search([1.0, 0.0], k=5) == []
+    
+    def test_from_documents(self):
+        """Test building the index from a stored-documents mapping"""
+        documents = {
+            "doc-1": {"text": "a", "metadata": {"type": "team"}, "embedding": [0.0, 1.0]},
+            "doc-2": {"text": "b", "metadata": {"type": "team"}, "embedding": []},
+        }
+        
+        index = VectorIndex.from_documents(documents)
+        
+        assert len(index) == 1
+        assert index.search([0.0, 1.0], k=5)[0][0] == "doc-1"
+    
+    def test_growth_keeps_existing_rows(self):
+        """Test geometric growth preserves vectors and metadata"""
+        index = VectorIndex(initial_capacity=2)
+        for i in range(50):
+            index.upsert(f"doc-{i}", _unit([i + 1.0, 1.0]), {"type": "fixture" if i % 2 else "team"})
+        
+        assert len(index) == 50
+        results = index.search([50.0, 1.0], filters={"type": "team"}, k=1)
+        assert results[0][0] == "doc-48"
+
+
+class TestVectorIndexPerformance:
+    """Sanity check that top-k stays fast on a realistic corpus"""
+    
+    @pytest.mark.slow
+    def test_top_k_over_large_corpus(self):
+        """Test filtered top-k over 100k 768-dim snippets"""
+        rng = np.random.default_rng(7)
+        count, dims = 100_000, 768
+        types = np.array(["fixture", "ladder", "roster", "scorecard", "team"], dtype=object)
+        
+        index = VectorIndex(initial_capacity=count)
+        vectors = rng.standard_normal((count, dims), dtype=np.float32)
+        index.upsert_many(
+            (f"doc-{i}", vectors[i], {"type": types[i % 5]}) for i in range(count)
+        )
+        query = rng.standard_normal(dims, dtype=np.float32)
+        
+        index.search(query, k=6)
+        start = time.perf_counter()
+        results = index.search(query, filters={"type": "fixture"}, k=6)
+        elapsed = time.perf_counter() - start
+        
+        assert len(results) == 6
+        assert all(doc_id.startswith("doc-") for doc_id, _ in results)
+        assert elapsed < 1.0
@@ -0,0 +1,139 @@
+"""
+Unit tests for the binary vector store snapshot format
+Tests round trips, zero-copy loading, and index adoption
+"""
+
+import pytest
+import json
+import numpy as np
+
+from agent.tools.vector_snapshot import (
+    SnapshotDocuments, decode_snapshot, embedding_to_list, encode_snapshot, read_snapshot, write_snapshot
+)
+from agent.tools.vector_index import VectorIndex
+
+
+@pytest.fixture
+def documents():
+    """Create sample documents with unit-length embeddings"""
+    return {
+        "fixture-1": {"text": "Blue U10 vs Hawks", "metadata": {"type": "fixture", "team_id": "team-1"}, "embedding": [1.0, 0.0, 0.0]},
+        "ladder-1": {"text": "Blue U10 are 1st", "metadata": {"type": "ladder", "team_id": "team-1"}, "embedding": [0.0, 1.0, 0.0]},
+        "roster-1": {"text": "White U10 squad", "metadata": {"type": "roster", "team_id": "team-2"}, "embedding": [0.0, 0.0, 1.0]},
+    }
+
+
+class TestVectorSnapshot:
+    """Test snapshot encoding and decoding"""
+    
+    def test_round_trip(self, documents):
+        """Test that text, metadata and embeddings survive a round trip"""
+        decoded = decode_snapshot(encode_snapshot(documents))
+        
+        assert list(decoded.keys()) == list(documents.keys())
+        for doc_id, doc_data in documents.items():
+            assert decoded[doc_id]["text"] == doc_data["text"]
+            assert decoded[doc_id]["metadata"] == doc_data["metadata"]
+            assert embedding_to_list(decoded[doc_id]["embedding"]) == doc_data["embedding"]
+    
+    def test_missing_and_odd_sized_embeddings(self, documents):
+        """Test docs without a matrix-sized embedding are preserved"""
+        documents["empty"] = {"text": "no vector", "metadata": {}, "embedding": []}
+        documents["odd"] = {"text": "short vector", "metadata": {}, "embedding": [0.5, 0.5]}
+        
+        decoded = decode_snapshot(encode_snapshot(documents))
+        
+        assert decoded["empty"]["embedding"] == []
+        assert decoded["odd"]["embedding"] == [0.5, 0.5]
+        assert decoded.present.tolist() == [True, True, True, False, False]
+    
+    def test_memmap_is_zero_copy(self, documents, tmp_path):
+        """Test that embeddings read from a file are views into one mapped block"""
+        path = str(tmp_path / "store.snapshot")
+        write_snapshot(path, documents)
+        
+        snapshot = read_snapshot(path)
+        
+        assert np.shares_memory(snapshot["ladder-1"]["embedding"], snapshot.matrix)
+        assert not snapshot.matrix.flags.writeable
+    
+    def test_much_smaller_than_json(self):
+        """Test the binary payload is far smaller than the legacy indented JSON"""
+        rng = np.random.default_rng(0)
+        documents = {
+            f"doc-{i}": {"text": f"snippet {i}", "metadata": {"type": "fixture"}, "embedding": rng.standard_normal(768).tolist()}
+            for i in range(50)
+        }
+        
+        assert len(encode_snapshot(documents)) * 4 < len(json.dumps({"documents": documents}, indent=2))
+    
+    def test_read_missing_file(self, tmp_path):
+        """Test reading a snapshot that does not exist"""
+        assert read_snapshot(str(tmp_path / "absent.snapshot")) is None
+    
+    def test_rejects_truncated_payload(self, documents):
+        """Test that a truncated payload is rejected rather than misread"""
+        payload = encode_snapshot(documents)
+        
+        with pytest.raises(ValueError):
+            decode_snapshot(payload[:-4])
+    
+    def test_mutation_detaches_matrix(self, documents):
+        """Test that editing the mapping drops the shared matrix"""
+        decoded = decode_snapshot(encode_snapshot(documents))
+        decoded["new"] = {"text": "x", "metadata": {}, "embedding": [1.0, 1.0, 0.0]}
+        
+        assert decoded.matrix is None
+
+
+class TestVectorIndexFromSnapshot:
+    """Test building the search index over a snapshot"""
+    
+    def test_index_adopts_matrix(self, documents, tmp_path):
+        """Test that unit-length rows are searched in place without copying"""
+        path = str(tmp_path / "store.snapshot")
+        write_snapshot(path, documents)
+        snapshot = read_snapshot(path)
+        
+        index = VectorIndex.from_documents(snapshot)
+        
+        assert np.shares_memory(index._matrix, snapshot.matrix)
+        assert index.search([0.0, 1.0, 0.0], {"team_id": "team-1"}, k=1)[0][0] == "ladder-1"
+    
+    def test_upsert_copies_read_only_matrix(self, documents, tmp_path):
+        """Test that writing to an adopted read-only index copies it first"""
+        path = str(tmp_path / "store.snapshot")
+        write_snapshot(path, documents)
+        snapshot = read_snapshot(path)
+        index = VectorIndex.from_documents(snapshot)
+        
+        index.upsert("fixture-1", [0.0, 1.0, 1.0], {"type": "fixture"})
+        index.upsert("fixture-2", [1.0, 1.0, 0.0], {"type": "fixture"})
+        
+        assert index._matrix.flags.writeable
+        assert len(index) == 4
+        assert snapshot.matrix[0].tolist() == [1.0, 0.0, 0.0]
+    
+    def test_unnormalised_rows_are_copied(self):
+        """Test that rows which are not unit length are normalised into a copy"""
+        documents = {"a": {"text": "a", "metadata": {}, "embedding": [3.0, 4.0]}}
+        snapshot = decode_snapshot(encode_snapshot(documents))
+        
+        index = VectorIndex.from_documents(snapshot)
+        
+        assert not np.shares_memory(index._matrix, snapshot.matrix)
+        assert index.search([3.0, 4.0], k=1)[0][1] == pytest.approx(1.0)
+    
+    def test_missing_rows_not_searchable(self, documents):
+        """Test that documents without embeddings never appear in results"""
+        documents["empty"] = {"text": "no vector", "metadata": {}, "embedding": []}
+        index = VectorIndex.from_documents(decode_snapshot(encode_snapshot(documents)))
+        
+        results = index.search([1.0, 1.0, 1.0], k=10)
+        
+        assert "empty" not in [doc_id for doc_id, _ in results]
+        assert len(results) == 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])